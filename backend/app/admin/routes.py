@@ -1,21 +1,39 @@
 from fastapi import APIRouter, Request, Depends, HTTPException, Form
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy import select, func, desc
+from app.database import get_db, get_read_db
 from app.core.config import settings
 from app.models.user import User, Admin
 from app.models.content import EncyclopediaContent, Tutorial
 from app.models.community import Post, Comment
 from app.models.shop import Product, Order
 from app.models.game import Challenge, Achievement
+from app.services.stats import get_admin_stats
+from app.services.counters import get_counters
+from app.services.search import matching_ids
+from app.services.likes import like_counter
+from app.services.views import view_counter
+from app.services.uploads import receive_upload
+from app.services.blobs import normalize_images
+from app.services.images import image_pipeline, schedule_variants
+from app.services.videos import video_streams
+from app.services.leaderboard import leaderboards
+from app.services.challenges import challenge_engine
+from app.services.achievements import achievement_engine
+from app.core.cache import invalidate_tags, response_cache
+from app.core.pagination import clamp_per_page, paginate
+from app.core.responses import FastJSONResponse
+from app.core.static import static_url
 import json
 from datetime import datetime, timedelta
 from typing import Optional
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
+templates.env.globals["static_url"] = static_url
 
 # 模拟管理员会话（生产环境应使用Redis或数据库）
 admin_sessions = {}
@@ -45,7 +63,7 @@ async def admin_login(
     request: Request,
     username: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """处理管理员登录"""
     # 简单的用户名密码验证
@@ -87,25 +105,30 @@ async def admin_logout(request: Request):
 async def admin_dashboard(
     request: Request,
     admin_user=Depends(check_admin_auth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """管理仪表板"""
     try:
         # 获取实际统计数据
+        totals = await get_counters(db, ["users", "encyclopedia", "tutorials", "posts", "products", "orders"])
         stats = {
-            "users": db.query(User).count(),
-            "content": db.query(EncyclopediaContent).count(),
-            "tutorials": db.query(Tutorial).count(),
-            "community": db.query(Post).count(),
-            "products": db.query(Product).count(),
-            "orders": db.query(Order).count()
+            "users": totals["users"],
+            "content": totals["encyclopedia"],
+            "tutorials": totals["tutorials"],
+            "community": totals["posts"],
+            "products": totals["products"],
+            "orders": totals["orders"]
         }
         
         # 获取最近用户
-        recent_users = db.query(User).order_by(desc(User.created_at)).limit(5).all()
+        recent_users = (await db.scalars(
+            select(User).order_by(desc(User.created_at)).limit(5)
+        )).all()
         
-        # 获取最近帖子
-        recent_posts = db.query(Post).order_by(desc(Post.created_at)).limit(5).all()
+        # 获取最近帖子（预加载作者，模板中不能触发异步懒加载）
+        recent_posts = (await db.scalars(
+            select(Post).options(joinedload(Post.author)).order_by(desc(Post.created_at)).limit(5)
+        )).all()
         
         # 图表数据（简化示例）
         chart_data = {
@@ -150,25 +173,29 @@ async def admin_users(
     page: int = 1,
     per_page: int = 20,
     search: Optional[str] = None,
+    cursor: Optional[str] = None,
     admin_user=Depends(check_admin_auth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """用户管理页面"""
+    """用户管理页面（传入cursor时使用游标分页，总数取缓存值）"""
     try:
+        per_page, page = clamp_per_page(per_page), max(page, 1)
         # 构建查询
-        query = db.query(User)
+        query = select(User)
         
         # 搜索过滤
         if search:
-            query = query.filter(
+            query = query.where(
                 (User.username.contains(search)) |
                 (User.email.contains(search)) |
                 (User.nickname.contains(search))
             )
         
         # 分页
-        total = query.count()
-        users = query.order_by(desc(User.created_at)).offset((page-1)*per_page).limit(per_page).all()
+        users, total, next_cursor = await paginate(
+            db, query, User, query.with_only_columns(User.id),
+            page=page, per_page=per_page, cursor=cursor, with_total=cursor is not None
+        )
         
         # 计算分页信息
         total_pages = (total + per_page - 1) // per_page
@@ -183,7 +210,9 @@ async def admin_users(
                 "current_page": page,
                 "total_pages": total_pages,
                 "total_users": total,
-                "search": search or ""
+                "search": search or "",
+                "cursor_mode": cursor is not None,
+                "next_cursor": next_cursor
             }
         )
     except Exception as e:
@@ -198,7 +227,9 @@ async def admin_users(
                 "current_page": 1,
                 "total_pages": 1,
                 "total_users": 0,
-                "search": ""
+                "search": "",
+                "cursor_mode": False,
+                "next_cursor": None
             }
         )
 
@@ -208,61 +239,63 @@ async def toggle_user_status(
     user_id: int,
     request: Request,
     admin_user=Depends(check_admin_auth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """切换用户状态"""
     try:
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.get(User, user_id)
         if not user:
-            return JSONResponse({"success": False, "message": "用户不存在"})
+            return FastJSONResponse({"success": False, "message": "用户不存在"})
         
         user.is_active = not user.is_active
-        db.commit()
+        await db.commit()
+        leaderboards.update_user(user.id, user.points, user.is_active)
         
-        return JSONResponse({
+        return FastJSONResponse({
             "success": True, 
             "message": f"用户已{'激活' if user.is_active else '禁用'}"
         })
     except Exception as e:
-        db.rollback()
-        return JSONResponse({"success": False, "message": f"操作失败: {str(e)}"})
+        await db.rollback()
+        return FastJSONResponse({"success": False, "message": f"操作失败: {str(e)}"})
 
 @router.delete("/users/{user_id}")
 async def delete_user(
     user_id: int,
     admin_user=Depends(check_admin_auth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """删除用户"""
     try:
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.get(User, user_id)
         if not user:
-            return JSONResponse({"success": False, "message": "用户不存在"})
+            return FastJSONResponse({"success": False, "message": "用户不存在"})
         
-        db.delete(user)
-        db.commit()
+        await db.delete(user)
+        await db.commit()
+        leaderboards.remove_user(user_id)
         
-        return JSONResponse({"success": True, "message": "用户删除成功"})
+        return FastJSONResponse({"success": True, "message": "用户删除成功"})
     except Exception as e:
-        db.rollback()
-        return JSONResponse({"success": False, "message": f"删除失败: {str(e)}"})
+        await db.rollback()
+        return FastJSONResponse({"success": False, "message": f"删除失败: {str(e)}"})
 
 @router.post("/users")
 async def create_user(
     request: Request,
     admin_user=Depends(check_admin_auth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """创建新用户"""
     try:
         form_data = await request.json()
         
         # 检查用户名和邮箱是否已存在
-        if db.query(User).filter(User.username == form_data["username"]).first():
-            return JSONResponse({"success": False, "message": "用户名已存在"})
+        if await db.scalar(select(User.id).where(User.username == form_data["username"])):
+            return FastJSONResponse({"success": False, "message": "用户名已存在"})
         
-        if form_data.get("email") and db.query(User).filter(User.email == form_data["email"]).first():
-            return JSONResponse({"success": False, "message": "邮箱已存在"})
+        if form_data.get("email") and await db.scalar(select(User.id).where(User.email == form_data["email"])):
+            return FastJSONResponse({"success": False, "message": "邮箱已存在"})
         
         # 创建新用户
         from passlib.context import CryptContext
@@ -279,19 +312,20 @@ async def create_user(
         )
         
         db.add(new_user)
-        db.commit()
+        await db.commit()
+        leaderboards.update_user(new_user.id, new_user.points, new_user.is_active)
         
-        return JSONResponse({"success": True, "message": "用户创建成功"})
+        return FastJSONResponse({"success": True, "message": "用户创建成功"})
     except Exception as e:
-        db.rollback()
-        return JSONResponse({"success": False, "message": f"创建失败: {str(e)}"})
+        await db.rollback()
+        return FastJSONResponse({"success": False, "message": f"创建失败: {str(e)}"})
 
 # 内容管理API接口
 @router.post("/api/encyclopedia")
 async def create_encyclopedia(
     request: Request,
     admin_user=Depends(check_admin_auth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """创建百科内容"""
     try:
@@ -307,27 +341,28 @@ async def create_encyclopedia(
         )
         
         db.add(new_content)
-        db.commit()
+        await db.commit()
+        await invalidate_tags("encyclopedia")
         
-        return JSONResponse({"success": True, "message": "百科内容创建成功"})
+        return FastJSONResponse({"success": True, "message": "百科内容创建成功"})
     except Exception as e:
-        db.rollback()
-        return JSONResponse({"success": False, "message": f"创建失败: {str(e)}"})
+        await db.rollback()
+        return FastJSONResponse({"success": False, "message": f"创建失败: {str(e)}"})
 
 @router.put("/api/encyclopedia/{content_id}")
 async def update_encyclopedia(
     content_id: int,
     request: Request,
     admin_user=Depends(check_admin_auth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """更新百科内容"""
     try:
         form_data = await request.json()
-        content = db.query(EncyclopediaContent).filter(EncyclopediaContent.id == content_id).first()
+        content = await db.get(EncyclopediaContent, content_id)
         
         if not content:
-            return JSONResponse({"success": False, "message": "内容不存在"})
+            return FastJSONResponse({"success": False, "message": "内容不存在"})
         
         content.title = form_data["title"]
         content.content = form_data["content"]
@@ -335,38 +370,40 @@ async def update_encyclopedia(
         content.tags = form_data.get("tags", "")
         content.updated_at = datetime.now()
         
-        db.commit()
+        await db.commit()
+        await invalidate_tags("encyclopedia")
         
-        return JSONResponse({"success": True, "message": "百科内容更新成功"})
+        return FastJSONResponse({"success": True, "message": "百科内容更新成功"})
     except Exception as e:
-        db.rollback()
-        return JSONResponse({"success": False, "message": f"更新失败: {str(e)}"})
+        await db.rollback()
+        return FastJSONResponse({"success": False, "message": f"更新失败: {str(e)}"})
 
 @router.delete("/api/encyclopedia/{content_id}")
 async def delete_encyclopedia(
     content_id: int,
     admin_user=Depends(check_admin_auth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """删除百科内容"""
     try:
-        content = db.query(EncyclopediaContent).filter(EncyclopediaContent.id == content_id).first()
+        content = await db.get(EncyclopediaContent, content_id)
         if not content:
-            return JSONResponse({"success": False, "message": "内容不存在"})
+            return FastJSONResponse({"success": False, "message": "内容不存在"})
         
-        db.delete(content)
-        db.commit()
+        await db.delete(content)
+        await db.commit()
+        await invalidate_tags("encyclopedia")
         
-        return JSONResponse({"success": True, "message": "百科内容删除成功"})
+        return FastJSONResponse({"success": True, "message": "百科内容删除成功"})
     except Exception as e:
-        db.rollback()
-        return JSONResponse({"success": False, "message": f"删除失败: {str(e)}"})
+        await db.rollback()
+        return FastJSONResponse({"success": False, "message": f"删除失败: {str(e)}"})
 
 @router.post("/api/tutorials")
 async def create_tutorial(
     request: Request,
     admin_user=Depends(check_admin_auth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """创建教程"""
     try:
@@ -383,12 +420,13 @@ async def create_tutorial(
         )
         
         db.add(new_tutorial)
-        db.commit()
+        await db.commit()
+        await invalidate_tags("tutorials")
         
-        return JSONResponse({"success": True, "message": "教程创建成功"})
+        return FastJSONResponse({"success": True, "message": "教程创建成功"})
     except Exception as e:
-        db.rollback()
-        return JSONResponse({"success": False, "message": f"创建失败: {str(e)}"})
+        await db.rollback()
+        return FastJSONResponse({"success": False, "message": f"创建失败: {str(e)}"})
 
 # 社区管理API接口
 @router.get("/api/posts")
@@ -398,72 +436,88 @@ async def get_posts(
     status: Optional[str] = None,
     category: Optional[str] = None,
     search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    with_total: bool = False,
     admin_user=Depends(check_admin_auth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """获取帖子列表"""
+    """获取帖子列表（传入cursor时使用游标分页，空字符串表示第一页）"""
     try:
-        query = db.query(Post)
-        
+        per_page, page = clamp_per_page(per_page), max(page, 1)
+        filters = []
         if status:
-            query = query.filter(Post.status == status)
+            filters.append(Post.status == status)
         if category:
-            query = query.filter(Post.category == category)
+            filters.append(Post.category == category)
         if search:
-            query = query.filter(Post.title.contains(search))
-        
-        total = query.count()
-        posts = query.order_by(desc(Post.created_at)).offset((page-1)*per_page).limit(per_page).all()
+            # 全文索引检索标题、正文和标签
+            filters.append(Post.id.in_(matching_ids("post", search)))
+        
+        # 只查询需要的列并关联作者用户名，避免ORM对象加载和逐行查询作者
+        rows, total, next_cursor = await paginate(
+            db,
+            select(
+                Post.id, Post.title, Post.category, User.username.label("author"),
+                Post.view_count, Post.like_count, Post.comment_count,
+                Post.status, Post.created_at
+            )
+            .outerjoin(User, Post.author_id == User.id)
+            .where(*filters),
+            Post,
+            select(Post.id).where(*filters),
+            page=page, per_page=per_page, cursor=cursor, with_total=with_total
+        )
         
         posts_data = []
-        for post in posts:
+        for row in rows:
             posts_data.append({
-                "id": post.id,
-                "title": post.title,
-                "category": post.category,
-                "author": post.author.username if post.author else "匿名",
-                "view_count": post.view_count,
-                "like_count": post.like_count,
-                "comment_count": post.comment_count,
-                "status": post.status,
-                "created_at": post.created_at.strftime("%Y-%m-%d %H:%M")
+                "id": row.id,
+                "title": row.title,
+                "category": row.category,
+                "author": row.author or "匿名",
+                "view_count": row.view_count,
+                "like_count": row.like_count,
+                "comment_count": row.comment_count,
+                "status": row.status,
+                "created_at": row.created_at.strftime("%Y-%m-%d %H:%M")
             })
         
-        return JSONResponse({
+        return FastJSONResponse({
             "success": True,
             "data": {
                 "posts": posts_data,
                 "total": total,
                 "page": page,
-                "per_page": per_page
+                "per_page": per_page,
+                "next_cursor": next_cursor
             }
         })
     except Exception as e:
-        return JSONResponse({"success": False, "message": f"获取失败: {str(e)}"})
+        return FastJSONResponse({"success": False, "message": f"获取失败: {str(e)}"})
 
 @router.put("/api/posts/{post_id}/status")
 async def update_post_status(
     post_id: int,
     request: Request,
     admin_user=Depends(check_admin_auth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """更新帖子状态"""
     try:
         form_data = await request.json()
-        post = db.query(Post).filter(Post.id == post_id).first()
+        post = await db.get(Post, post_id)
         
         if not post:
-            return JSONResponse({"success": False, "message": "帖子不存在"})
+            return FastJSONResponse({"success": False, "message": "帖子不存在"})
         
         post.status = form_data["status"]
         post.updated_at = datetime.now()
-        db.commit()
+        await db.commit()
         
-        return JSONResponse({"success": True, "message": "帖子状态更新成功"})
+        return FastJSONResponse({"success": True, "message": "帖子状态更新成功"})
     except Exception as e:
-        db.rollback()
-        return JSONResponse({"success": False, "message": f"更新失败: {str(e)}"})
+        await db.rollback()
+        return FastJSONResponse({"success": False, "message": f"更新失败: {str(e)}"})
 
 # 商品管理API接口
 @router.get("/api/products")
@@ -473,53 +527,65 @@ async def get_products(
     status: Optional[str] = None,
     category: Optional[str] = None,
     search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    with_total: bool = False,
     admin_user=Depends(check_admin_auth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """获取商品列表"""
+    """获取商品列表（传入cursor时使用游标分页，空字符串表示第一页）"""
     try:
-        query = db.query(Product)
-        
+        per_page, page = clamp_per_page(per_page), max(page, 1)
+        filters = []
         if status:
-            query = query.filter(Product.status == status)
+            filters.append(Product.status == status)
         if category:
-            query = query.filter(Product.category == category)
+            filters.append(Product.category == category)
         if search:
-            query = query.filter(Product.name.contains(search))
+            filters.append(Product.id.in_(matching_ids("product", search)))
         
-        total = query.count()
-        products = query.order_by(desc(Product.created_at)).offset((page-1)*per_page).limit(per_page).all()
+        rows, total, next_cursor = await paginate(
+            db,
+            select(
+                Product.id, Product.name, Product.category, Product.price,
+                Product.stock, Product.sales_count, Product.status, Product.created_at
+            )
+            .where(*filters),
+            Product,
+            select(Product.id).where(*filters),
+            page=page, per_page=per_page, cursor=cursor, with_total=with_total
+        )
         
         products_data = []
-        for product in products:
+        for row in rows:
             products_data.append({
-                "id": product.id,
-                "name": product.name,
-                "category": product.category,
-                "price": product.price,
-                "stock": product.stock,
-                "sales_count": product.sales_count,
-                "status": product.status,
-                "created_at": product.created_at.strftime("%Y-%m-%d %H:%M")
+                "id": row.id,
+                "name": row.name,
+                "category": row.category,
+                "price": row.price,
+                "stock": row.stock,
+                "sales_count": row.sales_count,
+                "status": row.status,
+                "created_at": row.created_at.strftime("%Y-%m-%d %H:%M")
             })
         
-        return JSONResponse({
+        return FastJSONResponse({
             "success": True,
             "data": {
                 "products": products_data,
                 "total": total,
                 "page": page,
-                "per_page": per_page
+                "per_page": per_page,
+                "next_cursor": next_cursor
             }
         })
     except Exception as e:
-        return JSONResponse({"success": False, "message": f"获取失败: {str(e)}"})
+        return FastJSONResponse({"success": False, "message": f"获取失败: {str(e)}"})
 
 @router.post("/api/products")
 async def create_product(
     request: Request,
     admin_user=Depends(check_admin_auth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """创建商品"""
     try:
@@ -532,17 +598,31 @@ async def create_product(
             price=float(form_data["price"]),
             original_price=float(form_data.get("original_price", form_data["price"])),
             stock=int(form_data["stock"]),
+            images=json.dumps(normalize_images(form_data.get("images", []))),
             status="available",
             created_at=datetime.now()
         )
         
         db.add(new_product)
-        db.commit()
+        await db.commit()
+        await invalidate_tags("products")
         
-        return JSONResponse({"success": True, "message": "商品创建成功"})
+        return FastJSONResponse({"success": True, "message": "商品创建成功"})
     except Exception as e:
-        db.rollback()
-        return JSONResponse({"success": False, "message": f"创建失败: {str(e)}"})
+        await db.rollback()
+        return FastJSONResponse({"success": False, "message": f"创建失败: {str(e)}"})
+
+@router.post("/api/uploads/{kind}")
+async def upload_file(
+    kind: str,
+    request: Request,
+    admin_user=Depends(check_admin_auth)
+):
+    """上传商品图片、内容图片/视频或头像（超限、类型不符时返回对应的HTTP错误码）"""
+    result = await receive_upload(request, kind)
+    if result["content_type"].startswith("image/") and not result["deduplicated"]:
+        schedule_variants(result["url"])
+    return FastJSONResponse({"success": True, "message": "上传成功", "data": result})
 
 # 订单管理API接口
 @router.get("/api/orders")
@@ -550,132 +630,112 @@ async def get_orders(
     page: int = 1,
     per_page: int = 20,
     status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    with_total: bool = False,
     admin_user=Depends(check_admin_auth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """获取订单列表"""
+    """获取订单列表（传入cursor时使用游标分页，空字符串表示第一页）"""
     try:
-        query = db.query(Order)
-        
+        per_page, page = clamp_per_page(per_page), max(page, 1)
+        filters = []
         if status:
-            query = query.filter(Order.status == status)
-        
-        total = query.count()
-        orders = query.order_by(desc(Order.created_at)).offset((page-1)*per_page).limit(per_page).all()
+            filters.append(Order.status == status)
+        
+        # 只查询需要的列并关联下单用户名，避免逐行查询用户
+        rows, total, next_cursor = await paginate(
+            db,
+            select(
+                Order.id, Order.order_no, User.username.label("user"), Order.total_amount,
+                Order.status, Order.payment_status, Order.created_at
+            )
+            .outerjoin(User, Order.user_id == User.id)
+            .where(*filters),
+            Order,
+            select(Order.id).where(*filters),
+            page=page, per_page=per_page, cursor=cursor, with_total=with_total
+        )
         
         orders_data = []
-        for order in orders:
+        for row in rows:
             orders_data.append({
-                "id": order.id,
-                "order_no": order.order_no,
-                "user": order.user.username if order.user else "未知用户",
-                "total_amount": order.total_amount,
-                "status": order.status,
-                "payment_status": order.payment_status,
-                "created_at": order.created_at.strftime("%Y-%m-%d %H:%M")
+                "id": row.id,
+                "order_no": row.order_no,
+                "user": row.user or "未知用户",
+                "total_amount": row.total_amount,
+                "status": row.status,
+                "payment_status": row.payment_status,
+                "created_at": row.created_at.strftime("%Y-%m-%d %H:%M")
             })
         
-        return JSONResponse({
+        return FastJSONResponse({
             "success": True,
             "data": {
                 "orders": orders_data,
                 "total": total,
                 "page": page,
-                "per_page": per_page
+                "per_page": per_page,
+                "next_cursor": next_cursor
             }
         })
     except Exception as e:
-        return JSONResponse({"success": False, "message": f"获取失败: {str(e)}"})
+        return FastJSONResponse({"success": False, "message": f"获取失败: {str(e)}"})
 
 @router.put("/api/orders/{order_id}/status")
 async def update_order_status(
     order_id: int,
     request: Request,
     admin_user=Depends(check_admin_auth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """更新订单状态"""
     try:
         form_data = await request.json()
-        order = db.query(Order).filter(Order.id == order_id).first()
+        order = await db.get(Order, order_id)
         
         if not order:
-            return JSONResponse({"success": False, "message": "订单不存在"})
+            return FastJSONResponse({"success": False, "message": "订单不存在"})
         
         order.status = form_data["status"]
         order.updated_at = datetime.now()
-        db.commit()
+        await db.commit()
         
-        return JSONResponse({"success": True, "message": "订单状态更新成功"})
+        return FastJSONResponse({"success": True, "message": "订单状态更新成功"})
     except Exception as e:
-        db.rollback()
-        return JSONResponse({"success": False, "message": f"更新失败: {str(e)}"})
+        await db.rollback()
+        return FastJSONResponse({"success": False, "message": f"更新失败: {str(e)}"})
 
 # 统计数据API
 @router.get("/api/stats")
 async def get_stats(
     admin_user=Depends(check_admin_auth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """获取统计数据"""
     try:
-        # 用户统计
-        total_users = db.query(User).count()
-        active_users = db.query(User).filter(User.is_active == True).count()
-        today_users = db.query(User).filter(
-            func.date(User.created_at) == datetime.now().date()
-        ).count()
-        
-        # 内容统计
-        total_encyclopedia = db.query(EncyclopediaContent).count()
-        total_tutorials = db.query(Tutorial).count()
-        
-        # 社区统计
-        total_posts = db.query(Post).count()
-        total_comments = db.query(Comment).count()
-        pending_posts = db.query(Post).filter(Post.status == "pending").count()
-        
-        # 商城统计
-        total_products = db.query(Product).count()
-        total_orders = db.query(Order).count()
-        pending_orders = db.query(Order).filter(Order.status == "pending").count()
-        
-        # 本周用户注册趋势
-        week_data = []
-        for i in range(7):
-            day = datetime.now().date() - timedelta(days=6-i)
-            count = db.query(User).filter(func.date(User.created_at) == day).count()
-            week_data.append(count)
-        
-        return JSONResponse({
+        return FastJSONResponse({
             "success": True,
-            "data": {
-                "users": {
-                    "total": total_users,
-                    "active": active_users,
-                    "today": today_users
-                },
-                "content": {
-                    "encyclopedia": total_encyclopedia,
-                    "tutorials": total_tutorials
-                },
-                "community": {
-                    "posts": total_posts,
-                    "comments": total_comments,
-                    "pending_posts": pending_posts
-                },
-                "shop": {
-                    "products": total_products,
-                    "orders": total_orders,
-                    "pending_orders": pending_orders
-                },
-                "trends": {
-                    "week_users": week_data
-                }
-            }
+            "data": await get_admin_stats(db)
         })
     except Exception as e:
-        return JSONResponse({"success": False, "message": f"获取统计失败: {str(e)}"})
+        return FastJSONResponse({"success": False, "message": f"获取统计失败: {str(e)}"})
+
+@router.get("/api/metrics")
+async def get_metrics(admin_user=Depends(check_admin_auth)):
+    """获取运行指标（浏览数和点赞数写回缓冲、响应缓存命中率、图片变体生成、视频流、排行榜、挑战和成就引擎）"""
+    return FastJSONResponse({
+        "success": True,
+        "data": {
+            "view_counter": view_counter.metrics(),
+            "like_counter": like_counter.metrics(),
+            "response_cache": response_cache.metrics(),
+            "image_pipeline": image_pipeline.metrics(),
+            "video_streams": video_streams.metrics(),
+            "leaderboard": leaderboards.metrics(),
+            "challenges": challenge_engine.metrics(),
+            "achievements": achievement_engine.metrics()
+        }
+    })
 
 @router.get("/content", response_class=HTMLResponse)
 async def admin_content(
@@ -684,19 +744,22 @@ async def admin_content(
     per_page: int = 20,
     content_type: str = "all",
     admin_user=Depends(check_admin_auth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """内容管理页面"""
     try:
         # 获取百科内容
-        encyclopedia_query = db.query(EncyclopediaContent)
-        encyclopedia_total = encyclopedia_query.count()
-        encyclopedia_contents = encyclopedia_query.order_by(desc(EncyclopediaContent.created_at)).limit(10).all()
+        totals = await get_counters(db, ["encyclopedia", "tutorials"])
+        encyclopedia_total = totals["encyclopedia"]
+        encyclopedia_contents = (await db.scalars(
+            select(EncyclopediaContent).order_by(desc(EncyclopediaContent.created_at)).limit(10)
+        )).all()
         
         # 获取教程内容
-        tutorial_query = db.query(Tutorial)
-        tutorial_total = tutorial_query.count()
-        tutorials = tutorial_query.order_by(desc(Tutorial.created_at)).limit(10).all()
+        tutorial_total = totals["tutorials"]
+        tutorials = (await db.scalars(
+            select(Tutorial).order_by(desc(Tutorial.created_at)).limit(10)
+        )).all()
         
         return templates.TemplateResponse(
             "admin/content.html",
@@ -729,22 +792,29 @@ async def admin_content(
 async def admin_shop(
     request: Request,
     admin_user=Depends(check_admin_auth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """商城管理页面"""
     try:
         # 获取商品数据
-        products = db.query(Product).order_by(desc(Product.created_at)).limit(20).all()
+        products = (await db.scalars(
+            select(Product).order_by(desc(Product.created_at)).limit(20)
+        )).all()
         
-        # 获取订单数据
-        orders = db.query(Order).order_by(desc(Order.created_at)).limit(20).all()
+        # 获取订单数据（预加载模板中用到的关联）
+        orders = (await db.scalars(
+            select(Order)
+            .options(joinedload(Order.user), selectinload(Order.order_items))
+            .order_by(desc(Order.created_at)).limit(20)
+        )).all()
         
         # 统计数据
+        totals = await get_counters(db, ["products", "active_products", "orders", "pending_orders"])
         product_stats = {
-            "total_products": db.query(Product).count(),
-            "active_products": db.query(Product).filter(Product.status == "available").count(),
-            "total_orders": db.query(Order).count(),
-            "pending_orders": db.query(Order).filter(Order.status == "pending").count()
+            "total_products": totals["products"],
+            "active_products": totals["active_products"],
+            "total_orders": totals["orders"],
+            "pending_orders": totals["pending_orders"]
         }
         
         return templates.TemplateResponse(
@@ -776,7 +846,7 @@ async def admin_shop(
 async def admin_settings(
     request: Request,
     admin_user=Depends(check_admin_auth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """系统设置页面"""
     # 模拟系统配置
@@ -803,7 +873,7 @@ async def admin_settings(
 async def admin_community(
     request: Request,
     admin_user=Depends(check_admin_auth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """社区管理页面"""
     community_stats = {
@@ -828,7 +898,7 @@ async def admin_community(
 async def admin_games(
     request: Request,
     admin_user=Depends(check_admin_auth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """游戏管理页面"""
     game_stats = {
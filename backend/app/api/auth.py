@@ -1,22 +1,68 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, get_read_db
 from app.models.user import User
 from app.core.config import settings
+from app.core.exceptions import CustomHTTPException
+from app.core.responses import FastJSONResponse
+from datetime import datetime, timedelta
+from typing import Optional
 import json
 
 router = APIRouter()
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 # 标准响应格式
 def success_response(data=None, message="操作成功"):
-    """成功响应格式"""
-    return {
+    """成功响应格式（直接返回响应对象，数据只由orjson序列化一次，不经过jsonable_encoder）"""
+    return FastJSONResponse({
         "success": True,
         "message": message,
         "data": data
-    }
+    })
+
+def paged_response(items, total=None, next_cursor=None, page=None, per_page=None):
+    """分页列表响应数据"""
+    return success_response(data={
+        "items": items,
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "next_cursor": next_cursor
+    })
+
+def load_json_field(value, default=None):
+    """解析以JSON文本存储的字段（images、tags等）"""
+    if not value:
+        return default if default is not None else []
+    try:
+        return json.loads(value)
+    except (TypeError, ValueError):
+        return default if default is not None else []
+
+def create_access_token(user_id: int) -> str:
+    """签发访问令牌"""
+    expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return jwt.encode({"sub": str(user_id), "exp": expire}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+async def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)) -> int:
+    """从Bearer令牌中取出当前用户ID（需要登录的接口使用）"""
+    try:
+        payload = jwt.decode(credentials.credentials, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        return int(payload["sub"])
+    except (JWTError, KeyError, ValueError):
+        raise CustomHTTPException(status_code=401, detail="登录已失效，请重新登录", error_code="INVALID_TOKEN")
+
+async def get_optional_user_id(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> Optional[int]:
+    """登录时返回当前用户ID，未登录时返回None（登录与否都可访问的接口使用）"""
+    if credentials is None:
+        return None
+    return await get_current_user_id(credentials)
 
 def error_response(message="操作失败", error_code="ERROR"):
     """错误响应格式"""
@@ -28,7 +74,7 @@ def error_response(message="操作失败", error_code="ERROR"):
     }
 
 @router.post("/login")
-async def login(db: Session = Depends(get_db)):
+async def login(db: AsyncSession = Depends(get_db)):
     """用户登录"""
     # 模拟登录逻辑
     return success_response(
@@ -45,7 +91,7 @@ async def login(db: Session = Depends(get_db)):
     )
 
 @router.post("/register")
-async def register(db: Session = Depends(get_db)):
+async def register(db: AsyncSession = Depends(get_db)):
     """用户注册"""
     # 模拟注册逻辑
     return success_response(
@@ -62,7 +108,7 @@ async def send_verification_code():
     return success_response(message="验证码已发送")
 
 @router.get("/profile")
-async def get_profile(db: Session = Depends(get_db)):
+async def get_profile(db: AsyncSession = Depends(get_read_db)):
     """获取用户信息"""
     # 模拟获取用户信息
     return success_response(
@@ -78,7 +124,7 @@ async def get_profile(db: Session = Depends(get_db)):
     )
 
 @router.put("/profile")
-async def update_profile(db: Session = Depends(get_db)):
+async def update_profile(db: AsyncSession = Depends(get_db)):
     """更新用户信息"""
     # 模拟更新用户信息
     return success_response(message="用户信息更新成功")
@@ -1,72 +1,195 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.api.auth import success_response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.core.config import settings
+from app.database import get_db, get_read_db
+from app.api.auth import success_response, paged_response, get_current_user_id, get_optional_user_id
+from app.core.exceptions import CustomHTTPException
+from app.core.pagination import clamp_per_page
+from app.services.blobs import resolve_images
+from app.services.comments import DEFAULT_REPLY_DEPTH, get_comment_page
+from app.services.feed import get_feed
+from app.services.images import attach_thumbnails
+from app.services.likes import MAX_LOOKUP_IDS, liked_ids, pending_likes, set_like
+from app.services.views import record_view, pending_views
+from app.models.community import Post
+from app.models.user import User
 
 router = APIRouter()
 
 @router.get("/posts")
-async def get_posts(db: Session = Depends(get_db)):
-    """获取帖子列表"""
-    mock_data = [
+async def get_posts(
+    page: int = 1,
+    per_page: int = 20,
+    category: Optional[str] = None,
+    sort: str = "new",
+    cursor: Optional[str] = None,
+    with_total: bool = False,
+    image_width: int = settings.IMAGE_LIST_WIDTH,
+    user_id: Optional[int] = Depends(get_optional_user_id),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """获取帖子列表（传入cursor时使用游标分页，空字符串表示第一页）
+
+    sort：new最新，hot热门（置顶在前），top本周最热（最近7天按点赞数）。
+    thumbnails与images一一对应，为不小于image_width的最小缩略图（含WebP版本）。
+    登录时liked表示自己是否已点赞（整页一次查询）。
+    """
+    filters = [Post.status == "published"]
+    if category:
+        filters.append(Post.category == category)
+
+    rows, total, next_cursor = await get_feed(
+        db,
+        select(
+            Post.id, Post.title, Post.content, Post.category, Post.images,
+            Post.view_count, Post.like_count, Post.comment_count, Post.is_pinned,
+            Post.hot_score, Post.created_at, Post.author_id, User.username, User.avatar
+        )
+        .outerjoin(User, Post.author_id == User.id),
+        filters,
+        sort,
+        page=page, per_page=per_page, cursor=cursor, with_total=with_total
+    )
+
+    items = [
         {
-            "id": 1,
-            "title": "我的第一个绒花作品",
-            "content": "经过一个月的学习，终于完成了我的第一个绒花作品...",
-            "category": "showcase",
+            "id": row.id,
+            "title": row.title,
+            "content": row.content,
+            "category": row.category,
+            "images": resolve_images(row.images),
             "author": {
-                "id": 1,
-                "username": "手工爱好者",
-                "avatar": "/static/images/avatar1.jpg"
+                "id": row.author_id,
+                "username": row.username,
+                "avatar": row.avatar
             },
-            "view_count": 245,
-            "like_count": 32,
-            "comment_count": 8,
-            "created_at": "2024-01-20T16:30:00"
+            "view_count": row.view_count + pending_views(Post, row.id),
+            "like_count": row.like_count + pending_likes(Post, row.id),
+            "comment_count": row.comment_count,
+            "is_pinned": row.is_pinned,
+            "created_at": row.created_at
         }
+        for row in rows
     ]
-    return success_response(data=mock_data)
+    if user_id is not None:
+        liked = await liked_ids(db, user_id, "post", [item["id"] for item in items])
+        for item in items:
+            item["liked"] = item["id"] in liked
+    await attach_thumbnails(db, items, image_width)
+    return paged_response(items, total, next_cursor, max(page, 1) if cursor is None else None, clamp_per_page(per_page))
 
 @router.post("/posts")
-async def create_post(db: Session = Depends(get_db)):
+async def create_post(db: AsyncSession = Depends(get_db)):
     """发布帖子"""
     return success_response(message="帖子发布成功")
 
 @router.get("/posts/{post_id}")
-async def get_post_detail(post_id: int, db: Session = Depends(get_db)):
-    """获取帖子详情"""
-    mock_data = {
-        "id": post_id,
-        "title": "我的第一个绒花作品",
-        "content": "详细的制作过程和心得体会...",
-        "images": ["/static/images/work1.jpg", "/static/images/work2.jpg"],
+async def get_post_detail(
+    post_id: int,
+    user_id: Optional[int] = Depends(get_optional_user_id),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """获取帖子详情（帖子存在时才记录浏览）"""
+    row = (await db.execute(
+        select(
+            Post.id, Post.title, Post.content, Post.category, Post.images, Post.view_count, Post.like_count,
+            Post.comment_count, Post.is_pinned, Post.created_at, Post.author_id, User.username, User.avatar
+        )
+        .outerjoin(User, Post.author_id == User.id)
+        .where(Post.id == post_id, Post.status == "published")
+    )).one_or_none()
+    if row is None:
+        raise CustomHTTPException(status_code=404, detail="帖子不存在", error_code="POST_NOT_FOUND")
+    record_view(Post, post_id)
+    data = {
+        "id": row.id,
+        "title": row.title,
+        "content": row.content,
+        "category": row.category,
+        "images": resolve_images(row.images),
         "author": {
-            "id": 1,
-            "username": "手工爱好者",
-            "level": 3
-        }
+            "id": row.author_id,
+            "username": row.username,
+            "avatar": row.avatar
+        },
+        "view_count": row.view_count + pending_views(Post, row.id),
+        "like_count": row.like_count + pending_likes(Post, row.id),
+        "comment_count": row.comment_count,
+        "is_pinned": row.is_pinned,
+        "created_at": row.created_at
     }
-    return success_response(data=mock_data)
+    if user_id is not None:
+        data["liked"] = bool(await liked_ids(db, user_id, "post", [post_id]))
+    return success_response(data=data)
 
 @router.get("/posts/{post_id}/comments")
-async def get_comments(post_id: int, db: Session = Depends(get_db)):
-    """获取评论列表"""
-    mock_data = [
-        {
-            "id": 1,
-            "content": "做得真漂亮！能分享一下制作技巧吗？",
-            "author": {
-                "id": 2,
-                "username": "学习者",
-                "avatar": "/static/images/avatar2.jpg"
-            },
-            "like_count": 5,
-            "created_at": "2024-01-20T18:00:00"
-        }
-    ]
-    return success_response(data=mock_data)
+async def get_comments(
+    post_id: int,
+    parent_id: Optional[int] = None,
+    page: int = 1,
+    per_page: int = 20,
+    cursor: Optional[str] = None,
+    with_total: bool = False,
+    max_depth: int = DEFAULT_REPLY_DEPTH,
+    user_id: Optional[int] = Depends(get_optional_user_id),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """获取评论列表：按顶层评论分页，每条附带max_depth层以内的回复（树形）
+
+    传入parent_id时分页返回该评论的直接回复，用于展开has_more_replies的评论。
+    """
+    items, total, next_cursor = await get_comment_page(
+        db, post_id, parent_id, page=page, per_page=per_page, cursor=cursor,
+        with_total=with_total, max_depth=max_depth, user_id=user_id
+    )
+    return paged_response(items, total, next_cursor, max(page, 1) if cursor is None else None, clamp_per_page(per_page))
 
 @router.post("/posts/{post_id}/comments")
-async def create_comment(post_id: int, db: Session = Depends(get_db)):
+async def create_comment(post_id: int, db: AsyncSession = Depends(get_db)):
     """发表评论"""
     return success_response(message="评论发表成功")
+
+@router.put("/likes/{target_type}/{target_id}")
+async def like(
+    target_type: str,
+    target_id: int,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """点赞（target_type: post、comment、tutorial；重复点赞不重复计数）"""
+    data = await set_like(db, user_id, target_type, target_id, True)
+    await db.commit()
+    return success_response(data=data)
+
+@router.delete("/likes/{target_type}/{target_id}")
+async def unlike(
+    target_type: str,
+    target_id: int,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """取消点赞（未点赞时不改变点赞数）"""
+    data = await set_like(db, user_id, target_type, target_id, False)
+    await db.commit()
+    return success_response(data=data)
+
+@router.get("/likes/{target_type}")
+async def get_liked(
+    target_type: str,
+    ids: str,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """ids（逗号分隔）中自己已点赞的对象id"""
+    try:
+        target_ids = [int(item) for item in ids.split(",") if item.strip()]
+    except ValueError:
+        raise CustomHTTPException(status_code=400, detail="ids格式无效", error_code="INVALID_IDS")
+    if len(target_ids) > MAX_LOOKUP_IDS:
+        raise CustomHTTPException(
+            status_code=400, detail=f"一次最多查询{MAX_LOOKUP_IDS}个对象", error_code="TOO_MANY_IDS"
+        )
+    liked = await liked_ids(db, user_id, target_type, target_ids)
+    return success_response(data={"liked_ids": [target_id for target_id in target_ids if target_id in liked]})
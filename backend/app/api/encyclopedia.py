@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_read_db
 from app.api.auth import success_response
+from app.core.cache import cached
 
 router = APIRouter()
 
 @router.get("/history")
-async def get_history_content(db: Session = Depends(get_db)):
+@cached("encyclopedia")
+async def get_history_content(db: AsyncSession = Depends(get_read_db)):
     """获取历史内容"""
     mock_data = [
         {
@@ -29,7 +31,8 @@ async def get_history_content(db: Session = Depends(get_db)):
     return success_response(data=mock_data)
 
 @router.get("/crafts")
-async def get_craft_info(db: Session = Depends(get_db)):
+@cached("encyclopedia")
+async def get_craft_info(db: AsyncSession = Depends(get_read_db)):
     """获取工艺信息"""
     mock_data = [
         {
@@ -48,7 +51,8 @@ async def get_craft_info(db: Session = Depends(get_db)):
     return success_response(data=mock_data)
 
 @router.get("/masters")
-async def get_masters_info(db: Session = Depends(get_db)):
+@cached("encyclopedia")
+async def get_masters_info(db: AsyncSession = Depends(get_read_db)):
     """获取传承大师信息"""
     mock_data = [
         {
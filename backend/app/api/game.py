@@ -1,109 +1,163 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.api.auth import success_response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from datetime import date
+from app.database import get_db, get_read_db
+from app.api.auth import success_response, get_current_user_id, get_optional_user_id
+from app.core.exceptions import CustomHTTPException
+from app.core.pagination import clamp_per_page
+from app.services.achievements import list_achievements
+from app.services.challenges import complete_challenge as claim_challenge, list_challenges
+from app.services.checkin import check_in, get_calendar
+from app.services.leaderboard import WINDOWS, leaderboards
+from app.models.game import UserGameProfile
+from app.models.user import User
 
 router = APIRouter()
 
+# 查询前后名次时每侧最多返回的人数
+MAX_RADIUS = 50
+
 @router.get("/user/profile")
-async def get_user_game_profile(db: Session = Depends(get_db)):
-    """获取用户游戏信息"""
-    mock_data = {
-        "user_id": 1,
-        "total_points": 1250,
-        "level": 5,
-        "experience": 750,
-        "next_level_exp": 1000,
-        "consecutive_days": 7,
-        "achievements": [
-            {
-                "id": 1,
-                "name": "初学者",
-                "description": "完成第一个教程",
-                "icon": "/static/images/achievement1.png"
-            }
-        ]
-    }
-    return success_response(data=mock_data)
+async def get_user_game_profile(user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_read_db)):
+    """获取用户游戏信息（积分、等级、连续签到天数、已获得的成就）"""
+    user = (await db.execute(select(User.points, User.level).where(User.id == user_id))).one_or_none()
+    if user is None:
+        raise CustomHTTPException(status_code=404, detail="用户不存在", error_code="USER_NOT_FOUND")
+    profile = (await db.execute(
+        select(UserGameProfile.experience, UserGameProfile.consecutive_days, UserGameProfile.last_checkin)
+        .where(UserGameProfile.user_id == user_id)
+    )).one_or_none()
+    return success_response(data={
+        "user_id": user_id,
+        "total_points": user.points,
+        "level": user.level,
+        "experience": profile.experience if profile else 0,
+        "consecutive_days": profile.consecutive_days if profile else 0,
+        "last_checkin": profile.last_checkin if profile else None,
+        "achievements": [item for item in await list_achievements(db, user_id) if item["earned"]]
+    })
 
 @router.post("/checkin")
-async def daily_checkin(db: Session = Depends(get_db)):
+async def daily_checkin(user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_db)):
     """每日签到"""
-    mock_data = {
-        "points_earned": 10,
-        "consecutive_days": 8,
-        "bonus_points": 5  # 连续签到奖励
-    }
-    return success_response(data=mock_data, message="签到成功")
+    data = await check_in(db, user_id)
+    await db.commit()
+    return success_response(data=data, message="签到成功")
+
+@router.get("/checkin/calendar")
+async def get_checkin_calendar(
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """某月的签到日历（默认本月）：已签到的日期、当月及全年签到天数、连续天数"""
+    today = date.today()
+    year, month = year or today.year, month or today.month
+    if not (1 <= month <= 12 and 2000 <= year <= today.year):
+        raise CustomHTTPException(status_code=400, detail="日期无效", error_code="INVALID_DATE")
+    return success_response(data=await get_calendar(db, user_id, year, month, today))
 
 @router.get("/challenges")
-async def get_challenges(db: Session = Depends(get_db)):
-    """获取挑战任务列表"""
-    mock_data = [
-        {
-            "id": 1,
-            "title": "学习达人",
-            "description": "完成3个视频教程",
-            "type": "weekly",
-            "category": "learning",
-            "points_reward": 50,
-            "progress": 2,
-            "target": 3,
-            "is_completed": False
-        },
-        {
-            "id": 2,
-            "title": "社交新星",
-            "description": "发布5个帖子",
-            "type": "weekly",
-            "category": "social",
-            "points_reward": 30,
-            "progress": 1,
-            "target": 5,
-            "is_completed": False
-        }
-    ]
-    return success_response(data=mock_data)
+async def get_challenges(
+    user_id: Optional[int] = Depends(get_optional_user_id),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """获取进行中的挑战任务列表，登录时附带自己当前周期的进度"""
+    return success_response(data=await list_challenges(db, user_id))
 
 @router.post("/challenges/{challenge_id}/complete")
-async def complete_challenge(challenge_id: int, db: Session = Depends(get_db)):
-    """完成挑战"""
-    mock_data = {
-        "challenge_id": challenge_id,
-        "points_earned": 50,
-        "new_achievement": None
-    }
-    return success_response(data=mock_data, message="挑战完成")
+async def complete_challenge(
+    challenge_id: int,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """完成挑战并领取奖励（进度达到目标后可领取，每个周期一次）"""
+    data = await claim_challenge(db, user_id, challenge_id)
+    await db.commit()
+    return success_response(data=data, message="挑战完成")
 
-@router.get("/leaderboard")
-async def get_leaderboard(db: Session = Depends(get_db)):
-    """获取排行榜"""
-    mock_data = [
-        {
-            "rank": 1,
-            "user": {
-                "id": 2,
-                "username": "绒花大师",
-                "avatar": "/static/images/avatar2.jpg"
-            },
-            "points": 5680,
-            "level": 12
-        },
-        {
-            "rank": 2,
+@router.get("/achievements")
+async def get_achievements(
+    user_id: Optional[int] = Depends(get_optional_user_id),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """获取成就列表，登录时附带是否已获得"""
+    return success_response(data=await list_achievements(db, user_id))
+
+async def leaderboard_users(db: AsyncSession, entries: list) -> list:
+    """为榜单条目补充用户名、头像和等级（一次IN查询）"""
+    if not entries:
+        return []
+    result = await db.execute(
+        select(User.id, User.username, User.nickname, User.avatar, User.level)
+        .where(User.id.in_([entry["user_id"] for entry in entries]))
+    )
+    users = {row.id: row for row in result}
+    items = []
+    for entry in entries:
+        user = users.get(entry["user_id"])
+        if user is None:
+            continue
+        items.append({
+            "rank": entry["rank"],
             "user": {
-                "id": 1,
-                "username": "手工爱好者",
-                "avatar": "/static/images/avatar1.jpg"
+                "id": user.id,
+                "username": user.nickname or user.username,
+                "avatar": user.avatar
             },
-            "points": 1250,
-            "level": 5
-        }
-    ]
-    return success_response(data=mock_data)
+            "points": entry["points"],
+            "level": user.level
+        })
+    return items
+
+def check_window(window: str):
+    if window not in WINDOWS:
+        raise CustomHTTPException(status_code=400, detail="不支持的排行榜类型", error_code="INVALID_WINDOW")
+
+@router.get("/leaderboard")
+async def get_leaderboard(
+    window: str = "all",
+    limit: int = 20,
+    offset: int = 0,
+    user_id: Optional[int] = Depends(get_optional_user_id),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """获取排行榜（window：all总榜、weekly周榜、daily日榜），登录时附带自己的名次"""
+    check_window(window)
+    board = leaderboards.board(window)
+    entries = board.top(clamp_per_page(limit), max(offset, 0))
+    me = None
+    if user_id is not None:
+        me = {"rank": board.rank(user_id), "points": board.score(user_id) or 0}
+    return success_response(data={
+        "window": window,
+        "total": len(board),
+        "items": await leaderboard_users(db, entries),
+        "me": me
+    })
+
+@router.get("/leaderboard/around")
+async def get_leaderboard_around(
+    window: str = "all",
+    radius: int = 5,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """自己在排行榜上的名次及前后各radius名"""
+    check_window(window)
+    board = leaderboards.board(window)
+    return success_response(data={
+        "window": window,
+        "total": len(board),
+        "rank": board.rank(user_id),
+        "items": await leaderboard_users(db, board.around(user_id, max(0, min(radius, MAX_RADIUS))))
+    })
 
 @router.post("/ai/chat")
-async def ai_chat(db: Session = Depends(get_db)):
+async def ai_chat(db: AsyncSession = Depends(get_db)):
     """AI智能问答"""
     # 这里应该集成到encyclopedia模块，临时放在game模块
     mock_responses = [
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.database import get_read_db
+from app.api.auth import paged_response
+from app.core.exceptions import CustomHTTPException
+from app.core.pagination import clamp_per_page
+from app.services import search as search_service
+
+router = APIRouter()
+
+@router.get("")
+async def search(
+    q: str,
+    type: Optional[str] = None,
+    page: int = 1,
+    per_page: int = 20,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """全站搜索帖子、百科、教程和商品（按相关度排序）"""
+    if type and type not in search_service.SOURCES_BY_TYPE:
+        raise CustomHTTPException(status_code=400, detail="不支持的搜索类型", error_code="INVALID_SEARCH_TYPE")
+
+    per_page = clamp_per_page(per_page)
+    page = max(page, 1)
+    items = await search_service.search(
+        db, q, doc_type=type, limit=per_page, offset=(page - 1) * per_page
+    )
+    return paged_response(items, page=page, per_page=per_page)
@@ -1,51 +1,96 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.api.auth import success_response
+from fastapi import APIRouter, Body, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.core.config import settings
+from app.database import get_db, get_read_db
+from app.api.auth import success_response, paged_response, get_current_user_id, load_json_field
+from app.core.cache import cached
+from app.core.exceptions import CustomHTTPException
+from app.core.pagination import clamp_per_page, paginate
+from app.services.blobs import resolve_images
+from app.services.images import attach_thumbnails
+from app.services.orders import place_order
+from app.services.views import record_view, pending_views
+from app.models.base import rows_to_dicts
+from app.models.shop import Product
 
 router = APIRouter()
 
+# 列表项字段（查询额外包含created_at，用于排序和游标）
+LIST_FIELDS = (
+    "id", "name", "description", "category", "price", "original_price",
+    "stock", "images", "rating", "sales_count"
+)
+
 @router.get("/products")
-async def get_products(db: Session = Depends(get_db)):
-    """获取商品列表"""
-    mock_data = [
-        {
-            "id": 1,
-            "name": "手工绒花发簪",
-            "description": "精美的传统绒花发簪，采用优质丝绸制作",
-            "category": "handicraft",
-            "price": 128.00,
-            "original_price": 168.00,
-            "stock": 20,
-            "images": ["/static/images/product1.jpg"],
-            "rating": 4.8,
-            "sales_count": 156
-        }
-    ]
-    return success_response(data=mock_data)
+async def get_products(
+    page: int = 1,
+    per_page: int = 20,
+    category: Optional[str] = None,
+    cursor: Optional[str] = None,
+    with_total: bool = False,
+    image_width: int = settings.IMAGE_LIST_WIDTH,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """获取商品列表（传入cursor时使用游标分页，空字符串表示第一页）
+
+    thumbnails与images一一对应，为不小于image_width的最小缩略图（含WebP版本）。
+    """
+    filters = [Product.status != "inactive"]
+    if category:
+        filters.append(Product.category == category)
+
+    rows, total, next_cursor = await paginate(
+        db,
+        select(
+            Product.id, Product.name, Product.description, Product.category,
+            Product.price, Product.original_price, Product.stock, Product.images,
+            Product.rating, Product.sales_count, Product.created_at
+        ).where(*filters),
+        Product,
+        select(Product.id).where(*filters),
+        page=page, per_page=per_page, cursor=cursor, with_total=with_total
+    )
+
+    items = rows_to_dicts(rows, LIST_FIELDS)
+    for item in items:
+        item["images"] = resolve_images(item["images"])
+    await attach_thumbnails(db, items, image_width)
+    return paged_response(items, total, next_cursor, max(page, 1) if cursor is None else None, clamp_per_page(per_page))
 
 @router.get("/products/{product_id}")
-async def get_product_detail(product_id: int, db: Session = Depends(get_db)):
-    """获取商品详情"""
-    mock_data = {
-        "id": product_id,
-        "name": "手工绒花发簪",
-        "description": "这款发簪采用传统绒花工艺制作...",
-        "specifications": {
-            "材质": "优质丝绸",
-            "尺寸": "长度12cm",
-            "重量": "15g",
-            "产地": "南京"
-        },
-        "images": [
-            "/static/images/product1_1.jpg",
-            "/static/images/product1_2.jpg"
-        ]
+async def get_product_detail(
+    product_id: int,
+    image_width: int = settings.IMAGE_LIST_WIDTH,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """获取商品详情（商品存在时才记录浏览）"""
+    product = await db.scalar(select(Product).where(Product.id == product_id, Product.status != "inactive"))
+    if product is None:
+        raise CustomHTTPException(status_code=404, detail="商品不存在或已下架", error_code="PRODUCT_NOT_FOUND")
+    record_view(Product, product_id)
+    data = {
+        "id": product.id,
+        "name": product.name,
+        "description": product.description,
+        "category": product.category,
+        "price": product.price,
+        "original_price": product.original_price,
+        "stock": product.stock,
+        "images": resolve_images(product.images),
+        "tags": load_json_field(product.tags),
+        "specifications": load_json_field(product.specifications, {}),
+        "rating": product.rating,
+        "sales_count": product.sales_count,
+        "view_count": product.view_count + pending_views(Product, product.id)
     }
-    return success_response(data=mock_data)
+    await attach_thumbnails(db, [data], image_width)
+    return success_response(data=data)
 
 @router.get("/categories")
-async def get_categories(db: Session = Depends(get_db)):
+@cached("products")
+async def get_categories(db: AsyncSession = Depends(get_read_db)):
     """获取商品分类"""
     mock_data = [
         {"id": 1, "name": "手工制品", "code": "handicraft"},
@@ -55,12 +100,12 @@ async def get_categories(db: Session = Depends(get_db)):
     return success_response(data=mock_data)
 
 @router.post("/cart")
-async def add_to_cart(db: Session = Depends(get_db)):
+async def add_to_cart(db: AsyncSession = Depends(get_db)):
     """添加到购物车"""
     return success_response(message="已添加到购物车")
 
 @router.get("/cart")
-async def get_cart(db: Session = Depends(get_db)):
+async def get_cart(db: AsyncSession = Depends(get_read_db)):
     """获取购物车"""
     mock_data = [
         {
@@ -77,15 +122,25 @@ async def get_cart(db: Session = Depends(get_db)):
     return success_response(data=mock_data)
 
 @router.post("/orders")
-async def create_order(db: Session = Depends(get_db)):
-    """创建订单"""
-    return success_response(
-        data={"order_no": "RH202401200001"},
-        message="订单创建成功"
-    )
+async def create_order(
+    payload: dict = Body(...),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """创建订单
+
+    请求体：{"items": [{"product_id": 1, "quantity": 2}], "shipping_address": {...}, "notes": "..."}；
+    库存在同一事务中原子扣减，库存不足时返回409且不创建订单。
+    """
+    items, shipping_address, notes = payload.get("items"), payload.get("shipping_address"), payload.get("notes")
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items) \
+            or not isinstance(shipping_address, (dict, type(None))) or not isinstance(notes, (str, type(None))):
+        raise CustomHTTPException(status_code=400, detail="订单格式无效", error_code="INVALID_ORDER")
+    data = await place_order(db, user_id, items, shipping_address, notes)
+    return success_response(data=data, message="订单创建成功")
 
 @router.get("/orders")
-async def get_orders(db: Session = Depends(get_db)):
+async def get_orders(db: AsyncSession = Depends(get_read_db)):
     """获取订单列表"""
     mock_data = [
         {
@@ -1,45 +1,201 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.api.auth import success_response
+import os
+import anyio
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import RedirectResponse, Response
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.database import AsyncReadSessionLocal, get_db, get_read_db
+from app.api.auth import success_response, paged_response, get_current_user_id
+from app.core.config import settings
+from app.core.exceptions import CustomHTTPException
+from app.core.ranges import RangeFileResponse
+from app.core.cache import cached
+from app.core.pagination import clamp_per_page, paginate
+from app.services.likes import pending_likes
+from app.services.views import record_view, pending_views
+from app.models.base import rows_to_dicts
+from app.services.videos import resume_offset, video_path, video_streams
+from app.models.content import LearningProgress, Tutorial
 
 router = APIRouter()
 
+# 列表项字段（查询额外包含created_at，用于排序和游标）；浏览数、点赞数不进入缓存，返回前实时补充
+LIST_FIELDS = (
+    "id", "title", "description", "video_url", "thumbnail_url",
+    "duration", "difficulty_level"
+)
+
+async def attach_live_counts(payload: dict, db: AsyncSession, **_):
+    """为缓存的教程列表补充当前的浏览数和点赞数（数据库值加上尚未写回的缓冲计数）"""
+    items = payload["data"]["items"]
+    if not items:
+        return
+    rows = await db.execute(
+        select(Tutorial.id, Tutorial.view_count, Tutorial.like_count)
+        .where(Tutorial.id.in_([item["id"] for item in items]))
+    )
+    counts = {row.id: (row.view_count, row.like_count) for row in rows}
+    for item in items:
+        view_count, like_count = counts.get(item["id"], (0, 0))
+        item["view_count"] = view_count + pending_views(Tutorial, item["id"])
+        item["like_count"] = like_count + pending_likes(Tutorial, item["id"])
+
 @router.get("/list")
-async def get_tutorial_list(db: Session = Depends(get_db)):
-    """获取教程列表"""
-    mock_data = [
-        {
-            "id": 1,
-            "title": "绒花制作入门教程",
-            "description": "从零开始学习绒花制作的基础技法",
-            "video_url": "/static/videos/tutorial1.mp4",
-            "thumbnail_url": "/static/images/tutorial1.jpg",
-            "duration": 1800,
-            "difficulty_level": 1,
-            "view_count": 2340,
-            "like_count": 189
-        }
-    ]
-    return success_response(data=mock_data)
+@cached("tutorials", live=attach_live_counts)
+async def get_tutorial_list(
+    page: int = 1,
+    per_page: int = 20,
+    category: Optional[str] = None,
+    cursor: Optional[str] = None,
+    with_total: bool = False,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """获取教程列表（传入cursor时使用游标分页，空字符串表示第一页）"""
+    filters = [Tutorial.status == "published"]
+    if category:
+        filters.append(Tutorial.category == category)
+
+    rows, total, next_cursor = await paginate(
+        db,
+        select(
+            Tutorial.id, Tutorial.title, Tutorial.description, Tutorial.video_url,
+            Tutorial.thumbnail_url, Tutorial.duration, Tutorial.difficulty_level, Tutorial.created_at
+        ).where(*filters),
+        Tutorial,
+        select(Tutorial.id).where(*filters),
+        page=page, per_page=per_page, cursor=cursor, with_total=with_total
+    )
+
+    items = rows_to_dicts(rows, LIST_FIELDS)
+    return paged_response(items, total, next_cursor, max(page, 1) if cursor is None else None, clamp_per_page(per_page))
 
 @router.get("/{tutorial_id}")
-async def get_tutorial_detail(tutorial_id: int, db: Session = Depends(get_db)):
-    """获取教程详情"""
-    mock_data = {
-        "id": tutorial_id,
-        "title": "绒花制作入门教程",
-        "description": "详细介绍绒花制作的每一个步骤...",
-        "video_url": "/static/videos/tutorial1.mp4",
-        "chapters": [
-            {"title": "材料准备", "start_time": 0},
-            {"title": "基础技法", "start_time": 300},
-            {"title": "成型技巧", "start_time": 900}
-        ]
-    }
-    return success_response(data=mock_data)
+async def get_tutorial_detail(tutorial_id: int, db: AsyncSession = Depends(get_read_db)):
+    """获取教程详情（教程存在时才记录浏览）"""
+    tutorial = await get_published_tutorial(db, tutorial_id)
+    record_view(Tutorial, tutorial_id)
+    return success_response(data={
+        "id": tutorial.id,
+        "title": tutorial.title,
+        "description": tutorial.description,
+        "video_url": tutorial.video_url,
+        "thumbnail_url": tutorial.thumbnail_url,
+        "category": tutorial.category,
+        "duration": tutorial.duration,
+        "difficulty_level": tutorial.difficulty_level,
+        "view_count": tutorial.view_count + pending_views(Tutorial, tutorial.id),
+        "like_count": tutorial.like_count + pending_likes(Tutorial, tutorial.id),
+        "created_at": tutorial.created_at
+    })
+
+async def get_published_tutorial(db: AsyncSession, tutorial_id: int):
+    tutorial = await db.scalar(
+        select(Tutorial).where(Tutorial.id == tutorial_id, Tutorial.status == "published")
+    )
+    if tutorial is None:
+        raise CustomHTTPException(status_code=404, detail="教程不存在", error_code="TUTORIAL_NOT_FOUND")
+    return tutorial
+
+@router.api_route("/{tutorial_id}/video", methods=["GET", "HEAD"])
+async def stream_tutorial_video(tutorial_id: int, request: Request):
+    """教程视频（支持Range/If-Range和多范围请求，拖动进度条时只传输需要的部分）"""
+    # 不使用get_read_db依赖：依赖的会话要到响应发送完才关闭，会在整个播放期间占用连接
+    async with AsyncReadSessionLocal() as db:
+        video_url = await db.scalar(
+            select(Tutorial.video_url).where(Tutorial.id == tutorial_id, Tutorial.status == "published")
+        )
+    if video_url is None:
+        raise CustomHTTPException(status_code=404, detail="教程不存在", error_code="TUTORIAL_NOT_FOUND")
+    if not video_url.startswith("/"):
+        # 外部视频地址（CDN等）
+        return RedirectResponse(video_url)
+    path = video_path(video_url)
+    if path is None:
+        raise CustomHTTPException(status_code=404, detail="视频文件不存在", error_code="VIDEO_NOT_FOUND")
+
+    if settings.VIDEO_ACCEL_REDIRECT_PREFIX:
+        # 由nginx处理Range并用sendfile发送文件（前缀对应的internal location指向static目录）
+        return Response(headers={
+            "X-Accel-Redirect": settings.VIDEO_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + video_url[len("/static/"):]
+        })
+
+    if not video_streams.try_acquire():
+        raise CustomHTTPException(
+            status_code=503, detail="观看人数较多，请稍后重试", error_code="TOO_MANY_STREAMS",
+            headers={"Retry-After": "1"}
+        )
+    try:
+        stat_result = os.stat(path)
+        return RangeFileResponse(
+            str(path), stat_result, request.headers, method=request.method,
+            on_complete=video_streams.release
+        )
+    except Exception:
+        video_streams.release()
+        raise
+
+@router.get("/{tutorial_id}/resume")
+async def get_resume_position(
+    tutorial_id: int,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """续播位置：上次观看的秒数，以及对应的视频字节偏移（播放器可直接从该位置请求Range）"""
+    tutorial = await get_published_tutorial(db, tutorial_id)
+    progress = await db.scalar(
+        select(LearningProgress).where(
+            LearningProgress.user_id == user_id, LearningProgress.tutorial_id == tutorial_id
+        )
+    )
+    position = progress.last_position if progress else 0
+    path = video_path(tutorial.video_url)
+    byte_offset = None
+    if path is not None:
+        byte_offset = await anyio.to_thread.run_sync(
+            lambda: resume_offset(path, os.stat(path), position, tutorial.duration)
+        )
+    return success_response(data={
+        "tutorial_id": tutorial_id,
+        "video_url": f"/api/tutorial/{tutorial_id}/video",
+        "last_position": position,
+        "progress_percent": progress.progress_percent if progress else 0,
+        "is_completed": progress.is_completed if progress else False,
+        "byte_offset": byte_offset
+    })
 
 @router.post("/{tutorial_id}/progress")
-async def update_progress(tutorial_id: int, db: Session = Depends(get_db)):
-    """更新学习进度"""
-    return success_response(message="学习进度已更新")
+async def update_progress(
+    tutorial_id: int,
+    position: int,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """更新学习进度（position为当前观看位置，单位秒）"""
+    tutorial = await get_published_tutorial(db, tutorial_id)
+    position = max(position, 0)
+    if tutorial.duration:
+        position = min(position, tutorial.duration)
+    # 先插入空进度（已存在时不做任何事）再读取：播放器定时上报时同一用户的首次上报可能同时到达，
+    # 不会因唯一索引冲突失败；插入取得写锁，并发的上报依次读取最新进度，完成事件只产生一次
+    await db.execute(
+        sqlite_insert(LearningProgress)
+        .values(user_id=user_id, tutorial_id=tutorial_id, progress_percent=0, last_position=0, is_completed=False)
+        .on_conflict_do_nothing(index_elements=["user_id", "tutorial_id"])
+    )
+    progress = await db.scalar(
+        select(LearningProgress).where(
+            LearningProgress.user_id == user_id, LearningProgress.tutorial_id == tutorial_id
+        )
+    )
+    progress.last_position = position
+    if tutorial.duration:
+        percent = position * 100 // tutorial.duration
+        progress.progress_percent = max(progress.progress_percent or 0, percent)
+        progress.is_completed = progress.is_completed or percent >= 95
+    await db.commit()
+    return success_response(
+        data={"last_position": progress.last_position, "progress_percent": progress.progress_percent},
+        message="学习进度已更新"
+    )
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.auth import success_response, get_current_user_id
+from app.core.exceptions import CustomHTTPException
+from app.database import get_db
+from app.services.images import schedule_variants
+from app.services.uploads import receive_upload, record_upload, upload_allowance, upload_slot
+
+router = APIRouter()
+
+# 用户端可上传的类别（商品图片通过中台上传）
+PUBLIC_KINDS = {"avatars", "content"}
+
+@router.post("/{kind}")
+async def upload_file(
+    kind: str,
+    request: Request,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """上传头像或帖子图片/视频（需登录；multipart字段file，或直接以请求体上传）
+
+    请求体边接收边写入磁盘，不经过表单解析的内存/临时文件缓冲。超过每人上传限额时返回429。
+    """
+    if kind not in PUBLIC_KINDS:
+        raise CustomHTTPException(status_code=404, detail="不支持的上传类别", error_code="INVALID_UPLOAD_KIND")
+    async with upload_slot(user_id):
+        max_size = await upload_allowance(db, user_id)
+        # 接收请求体期间不占用数据库连接
+        await db.commit()
+        result = await receive_upload(request, kind, max_size)
+    await record_upload(db, user_id, kind, result)
+    await db.commit()
+    # 相同内容已上传过时变体也已生成
+    if result["content_type"].startswith("image/") and not result["deduplicated"]:
+        schedule_variants(result["url"])
+    return success_response(result, "上传成功")
@@ -0,0 +1,294 @@
+# 响应缓存：进程内LRU或Redis后端，按路径+查询参数缓存GET响应，按标签失效
+import functools
+import inspect
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+
+import orjson
+from fastapi import Request, Response
+
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
+
+logger = logging.getLogger(__name__)
+
+class CacheBackend(ABC):
+    """缓存后端接口，值为已序列化的响应体"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: int, tags: Iterable[str]):
+        ...
+
+    @abstractmethod
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """删除带有任一标签的缓存项，返回删除数量"""
+
+    @abstractmethod
+    async def clear(self):
+        ...
+
+    # 可选：后端无法廉价统计条目数时返回None
+    def size(self) -> Optional[int]:
+        return None
+
+class MemoryCache(CacheBackend):
+    """进程内LRU缓存（多进程部署时各进程独立缓存、独立失效）"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.evictions = 0
+        # key -> (过期时间, 响应体, 标签)
+        self._entries: "OrderedDict[str, Tuple[float, bytes, Tuple[str, ...]]]" = OrderedDict()
+        self._tag_keys: Dict[str, Set[str]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    async def set(self, key: str, value: bytes, ttl: int, tags: Iterable[str]):
+        tags = tuple(tags)
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, value, tags)
+        for tag in tags:
+            self._tag_keys.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        keys = set()
+        for tag in tags:
+            keys |= self._tag_keys.pop(tag, set())
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    async def clear(self):
+        self._entries.clear()
+        self._tag_keys.clear()
+
+    def size(self) -> Optional[int]:
+        return len(self._entries)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_keys[tag]
+
+class RedisCache(CacheBackend):
+    """Redis缓存：值用SET EX存储，标签用集合记录对应的缓存键"""
+
+    def __init__(self, client, prefix: str = "rh:cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: int, tags: Iterable[str]):
+        await self.client.set(self.prefix + key, value, ex=ttl)
+        for tag in tags:
+            tag_key = f"{self.prefix}tag:{tag}"
+            await self.client.sadd(tag_key, key)
+            # 标签集合比缓存项多保留一个TTL，过期键在失效时一并删除
+            await self.client.expire(tag_key, ttl * 2)
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        for tag in tags:
+            tag_key = f"{self.prefix}tag:{tag}"
+            keys = await self.client.smembers(tag_key)
+            if keys:
+                removed += await self.client.delete(*(
+                    self.prefix + (key.decode() if isinstance(key, bytes) else key)
+                    for key in keys
+                ))
+            await self.client.delete(tag_key)
+        return removed
+
+    async def clear(self):
+        keys = [key async for key in self.client.scan_iter(match=self.prefix + "*")]
+        if keys:
+            await self.client.delete(*keys)
+
+class FakeRedis:
+    """进程内模拟的Redis客户端，实现RedisCache用到的命令（用于检查脚本和本地调试）"""
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[Optional[float], object]] = {}
+
+    def _get(self, key: str):
+        entry = self._values.get(key)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] <= time.monotonic():
+            del self._values[key]
+            return None
+        return entry[1]
+
+    async def get(self, key: str):
+        return self._get(key)
+
+    async def set(self, key: str, value, ex: Optional[int] = None):
+        self._values[key] = (time.monotonic() + ex if ex else None, value)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self._values.pop(key, None) is not None for key in keys)
+
+    async def sadd(self, key: str, *members: str) -> int:
+        current = self._get(key) or set()
+        added = len(set(members) - current)
+        expires = self._values[key][0] if key in self._values else None
+        self._values[key] = (expires, current | {member.encode() for member in members})
+        return added
+
+    async def smembers(self, key: str) -> set:
+        return set(self._get(key) or set())
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        if self._get(key) is None:
+            return False
+        self._values[key] = (time.monotonic() + seconds, self._values[key][1])
+        return True
+
+    async def scan_iter(self, match: str = "*"):
+        prefix = match.rstrip("*")
+        for key in list(self._values):
+            if key.startswith(prefix) and self._get(key) is not None:
+                yield key
+
+class ResponseCache:
+    """响应缓存：封装后端并统计命中率，后端异常时降级为不缓存"""
+
+    def __init__(self, backend: CacheBackend, default_ttl: int):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self._stats = {"hits": 0, "misses": 0, "sets": 0, "invalidations": 0, "errors": 0}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning(f"读取缓存失败: {type(e).__name__} - {str(e)}")
+            return None
+        self._stats["hits" if value is not None else "misses"] += 1
+        return value
+
+    async def set(self, key: str, value: bytes, tags: Iterable[str], ttl: Optional[int] = None):
+        try:
+            await self.backend.set(key, value, ttl or self.default_ttl, tags)
+            self._stats["sets"] += 1
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning(f"写入缓存失败: {type(e).__name__} - {str(e)}")
+
+    async def invalidate_tags(self, *tags: str) -> int:
+        try:
+            removed = await self.backend.invalidate_tags(tags)
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.error(f"缓存失效失败: {tags} - {type(e).__name__} - {str(e)}")
+            return 0
+        self._stats["invalidations"] += removed
+        return removed
+
+    def metrics(self) -> dict:
+        """命中率等指标"""
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": self.backend.size(),
+            "evictions": getattr(self.backend, "evictions", None),
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else None,
+            **self._stats
+        }
+
+def create_backend() -> CacheBackend:
+    """按配置创建缓存后端，Redis不可用时退回进程内缓存"""
+    if settings.CACHE_BACKEND == "redis" and settings.REDIS_URL:
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            logger.warning("未安装redis，响应缓存使用进程内缓存")
+        else:
+            return RedisCache(redis.from_url(settings.REDIS_URL))
+    return MemoryCache(settings.CACHE_MAX_ENTRIES)
+
+response_cache = ResponseCache(create_backend(), settings.CACHE_EXPIRE_TIME)
+
+def cache_key(request: Request) -> str:
+    """缓存键：路径加排序后的查询参数"""
+    query = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+    return f"{request.url.path}?{query}"
+
+def cached(*tags: str, ttl: Optional[int] = None, live: Optional[Callable[..., Awaitable[None]]] = None):
+    """缓存GET接口的JSON响应，tags用于写操作后失效
+
+    被装饰的接口没有request参数时自动注入；只缓存状态码200的JSON响应。
+    live(payload, **kwargs)在每次返回前（命中和未命中）就地补充不进入缓存的实时数据（如浏览数、点赞数），
+    kwargs为接口参数（含db）；接口返回的缓存内容不应包含这些数据。
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        inject_request = "request" not in signature.parameters
+        if inject_request:
+            signature = signature.replace(parameters=[
+                *signature.parameters.values(),
+                inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request)
+            ])
+
+        async def respond(body: bytes, status: str, kwargs) -> Response:
+            if live is None:
+                return Response(body, media_type="application/json", headers={"X-Cache": status})
+            payload = orjson.loads(body)
+            await live(payload, **kwargs)
+            return FastJSONResponse(payload, headers={"X-Cache": status})
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request = kwargs.pop("request") if inject_request else kwargs["request"]
+            key = cache_key(request)
+            body = await response_cache.get(key)
+            if body is not None:
+                return await respond(body, "HIT", kwargs)
+
+            response = await func(*args, **kwargs)
+            if not isinstance(response, Response):
+                response = FastJSONResponse(response)
+            elif not isinstance(response, FastJSONResponse) or response.status_code != 200:
+                return response
+            await response_cache.set(key, response.body, tags, ttl)
+            if live is None:
+                response.headers["X-Cache"] = "MISS"
+                return response
+            return await respond(response.body, "MISS", kwargs)
+
+        wrapper.__signature__ = signature
+        return wrapper
+    return decorator
+
+async def invalidate_tags(*tags: str) -> int:
+    """使带有指定标签的缓存失效（在写操作提交后调用）"""
+    return await response_cache.invalidate_tags(*tags)
@@ -13,6 +13,23 @@ class Settings(BaseSettings):
     # 数据库配置
     DATABASE_URL: str = "sqlite:///./data/database.db"
     
+    # SQLite性能配置（连接建立时通过PRAGMA应用）
+    SQLITE_PERFORMANCE_PROFILE: bool = True
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT: int = 5000  # 毫秒
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024  # 256MB
+    SQLITE_CACHE_SIZE: int = -64000  # 负数表示KB，约64MB
+    SQLITE_TEMP_STORE: str = "MEMORY"
+    
+    # 连接池配置
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30  # 秒
+    DB_POOL_RECYCLE: int = 3600  # 秒
+    DB_READ_POOL_SIZE: int = 10  # 只读连接池（GET请求使用）
+    DB_READ_MAX_OVERFLOW: int = 20
+    
     # 安全配置
     SECRET_KEY: str = "ronghua-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
@@ -32,6 +49,23 @@ class Settings(BaseSettings):
     UPLOAD_DIR: str = "./static/uploads"
     MAX_FILE_SIZE: int = 5 * 1024 * 1024  # 5MB
     ALLOWED_EXTENSIONS: List[str] = [".jpg", ".jpeg", ".png", ".gif", ".mp4", ".mov"]
+    # 用户端上传的每人限额：最近24小时的字节数、最近1小时的次数、同时进行的上传数
+    UPLOAD_USER_DAILY_BYTES: int = 100 * 1024 * 1024  # 100MB
+    UPLOAD_USER_HOURLY_COUNT: int = 60
+    UPLOAD_USER_CONCURRENCY: int = 2
+    
+    # 图片变体：上传图片后在进程池中生成的缩略图宽度（同时生成WebP版本），0个工作进程表示不生成
+    IMAGE_WORKERS: int = 2
+    IMAGE_VARIANT_WIDTHS: List[int] = [160, 320, 640, 1280]
+    IMAGE_QUALITY: int = 80
+    IMAGE_LIST_WIDTH: int = 320  # 列表接口默认的图片显示宽度
+    
+    # 教程视频：同时传输的视频流上限（超过时返回503）；设置了X-Accel-Redirect前缀时交给nginx发送文件
+    VIDEO_MAX_STREAMS: int = 32
+    VIDEO_ACCEL_REDIRECT_PREFIX: str = ""  # 例如 "/protected-static/"，对应nginx中internal的location
+    
+    # 前端构建产物目录（scripts/build_assets.py生成，存在时挂载到/site）
+    FRONTEND_DIST_DIR: str = "../frontend/dist"
     
     # 中台管理配置
     ADMIN_USERNAME: str = "admin"
@@ -39,6 +73,22 @@ class Settings(BaseSettings):
     
     # 缓存配置
     CACHE_EXPIRE_TIME: int = 300  # 5分钟
+    CACHE_BACKEND: str = "memory"  # memory, redis
+    CACHE_MAX_ENTRIES: int = 1024
+    REDIS_URL: str = ""
+    
+    # 公开API的Cache-Control max-age（秒，0表示每次都用ETag向服务器验证）
+    HTTP_CACHE_MAX_AGE: int = 0
+    
+    # 统计计数器校准间隔（秒，0表示不定期校准）
+    STATS_RECONCILE_INTERVAL: int = 3600
+    
+    # 浏览数写回：缓冲的浏览数每隔多少秒或累计多少次写入数据库
+    VIEW_COUNT_FLUSH_INTERVAL: int = 5
+    VIEW_COUNT_FLUSH_THRESHOLD: int = 1000
+    VIEW_COUNT_MAX_PENDING_ROWS: int = 10000  # 缓冲中不同记录数的上限
+    # 点赞数增量累计多少次写入数据库（间隔与浏览数相同）
+    LIKE_COUNT_FLUSH_THRESHOLD: int = 200
     
     # AI配置（可选）
     OPENAI_API_KEY: str = ""
@@ -67,6 +117,7 @@ def ensure_directories():
         "./static/uploads/avatars",
         "./static/uploads/content",
         "./static/uploads/products",
+        "./static/uploads/blobs",
         "./templates"
     ]
     
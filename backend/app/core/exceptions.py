@@ -9,8 +9,8 @@ logger = logging.getLogger(__name__)
 
 class CustomHTTPException(HTTPException):
     """自定义HTTP异常"""
-    def __init__(self, status_code: int, detail: str, error_code: str = None):
-        super().__init__(status_code=status_code, detail=detail)
+    def __init__(self, status_code: int, detail: str, error_code: str = None, headers: dict = None):
+        super().__init__(status_code=status_code, detail=detail, headers=headers)
         self.error_code = error_code
 
 async def custom_http_exception_handler(request: Request, exc: HTTPException):
@@ -24,7 +24,8 @@ async def custom_http_exception_handler(request: Request, exc: HTTPException):
             "error_code": getattr(exc, 'error_code', f"HTTP_{exc.status_code}"),
             "message": exc.detail,
             "data": None
-        }
+        },
+        headers=getattr(exc, "headers", None)
     )
 
 async def validation_exception_handler(request: Request, exc):
@@ -0,0 +1,186 @@
+# HTTP条件请求：为公开API的JSON响应生成强ETag，处理If-None-Match/If-Modified-Since返回304
+import hashlib
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import FrozenSet, List, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from fastapi.dependencies.utils import get_flat_dependant
+
+from app.core.config import settings
+
+# 按URL记录最近一次响应的ETag及其变化时间，作为Last-Modified（超过上限时淘汰最久未访问的URL）
+MAX_TRACKED_URLS = 4096
+
+def compute_etag(body: bytes) -> str:
+    """根据响应体计算强ETag"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match使用弱比较：忽略W/前缀"""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (candidate.strip() for candidate in if_none_match.split(","))
+    return any(
+        (candidate[2:] if candidate.startswith("W/") else candidate) == etag
+        for candidate in candidates
+    )
+
+def vary_with_authorization(headers) -> bytes:
+    """合并已有的Vary头并加入Authorization：同一URL登录与未登录的响应不同，缓存须按令牌区分"""
+    fields = [
+        field.strip() for name, value in headers if name == b"vary"
+        for field in value.decode("latin-1").split(",") if field.strip()
+    ]
+    if not any(field.lower() == "authorization" for field in fields):
+        fields.append("Authorization")
+    return ", ".join(fields).encode("latin-1")
+
+class ConditionalRequestMiddleware:
+    """ASGI中间件：缓冲已序列化的JSON响应体计算ETag，不重复序列化
+
+    只处理GET请求中路径前缀匹配、状态码200、application/json且未设置Cookie的响应，
+    其他响应直接透传（不缓冲）。
+    """
+
+    def __init__(self, app, path_prefixes: Tuple[str, ...] = ("/api/",),
+                 private_prefixes: Tuple[str, ...] = ("/api/auth/",)):
+        self.app = app
+        self.path_prefixes = path_prefixes
+        self.private_prefixes = private_prefixes
+        self._versions: "OrderedDict[bytes, Tuple[str, int]]" = OrderedDict()
+        # 路由函数 -> 该路由读取的查询参数名
+        self._route_params = {}
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or not scope["path"].startswith(self.path_prefixes)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = dict(scope["headers"])
+        start_message = None
+        body_parts: List[bytes] = []
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                if self._is_eligible(message):
+                    start_message = message
+                else:
+                    passthrough = True
+                    await send(message)
+                return
+
+            if message["type"] == "http.response.body":
+                body_parts.append(message.get("body", b""))
+                if message.get("more_body", False):
+                    return
+                await self._send_conditional(
+                    scope, request_headers, start_message, b"".join(body_parts), send
+                )
+                return
+
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _is_eligible(message) -> bool:
+        if message["status"] != 200:
+            return False
+        headers = dict(message.get("headers", []))
+        return (
+            headers.get(b"content-type", b"").startswith(b"application/json")
+            and b"set-cookie" not in headers
+        )
+
+    def _query_params(self, scope) -> FrozenSet[str]:
+        """匹配到的路由读取的查询参数名（路由匹配后scope中有app和endpoint）"""
+        endpoint = scope.get("endpoint")
+        names = self._route_params.get(endpoint)
+        if names is None:
+            names = frozenset()
+            for route in getattr(scope.get("app"), "routes", ()):
+                if getattr(route, "endpoint", None) is endpoint and hasattr(route, "dependant"):
+                    names = frozenset(param.alias for param in get_flat_dependant(route.dependant).query_params)
+                    break
+            self._route_params[endpoint] = names
+        return names
+
+    def _url_key(self, scope) -> bytes:
+        """路径 + 按名称排序、只保留路由读取的查询参数，参数顺序不同或附加无关参数的URL共用一条记录"""
+        names = self._query_params(scope)
+        query = scope.get("query_string", b"").decode("latin-1")
+        params = sorted((name, value) for name, value in parse_qsl(query, keep_blank_values=True) if name in names)
+        return scope["path"].encode() + b"?" + urlencode(params).encode()
+
+    def _last_modified(self, scope, etag: str) -> int:
+        """返回该URL响应内容最近一次变化的时间（秒，ETag变化时更新）"""
+        url = self._url_key(scope)
+        version = self._versions.get(url)
+        if version is None:
+            version = self._versions[url] = (etag, int(time.time()))
+        elif version[0] != etag:
+            # HTTP日期精度为秒，同一秒内再次变化时顺延一秒，保证If-Modified-Since不会误判
+            version = self._versions[url] = (etag, max(int(time.time()), version[1] + 1))
+        self._versions.move_to_end(url)
+        if len(self._versions) > MAX_TRACKED_URLS:
+            self._versions.popitem(last=False)
+        return version[1]
+
+    def _cache_control(self, path: str, request_headers) -> str:
+        # 带登录令牌的请求可能返回与用户相关的内容，不允许共享缓存保存
+        if path.startswith(self.private_prefixes) or b"authorization" in request_headers:
+            return "private, no-cache"
+        return f"public, max-age={settings.HTTP_CACHE_MAX_AGE}, must-revalidate"
+
+    async def _send_conditional(self, scope, request_headers, start_message, body: bytes, send):
+        etag = compute_etag(body)
+        last_modified = self._last_modified(scope, etag)
+        validators = [
+            (b"etag", etag.encode()),
+            (b"last-modified", formatdate(last_modified, usegmt=True).encode()),
+            (b"cache-control", self._cache_control(scope["path"], request_headers).encode()),
+            (b"vary", vary_with_authorization(start_message.get("headers", []))),
+        ]
+
+        if self._not_modified(request_headers, etag, last_modified):
+            headers = [
+                (name, value) for name, value in start_message.get("headers", [])
+                if name not in (b"content-length", b"content-type", b"etag", b"last-modified", b"cache-control", b"vary")
+            ]
+            await send({"type": "http.response.start", "status": 304, "headers": headers + validators})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        headers = [
+            (name, value) for name, value in start_message.get("headers", [])
+            if name not in (b"etag", b"last-modified", b"cache-control", b"vary")
+        ]
+        await send({**start_message, "headers": headers + validators})
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    def _not_modified(request_headers, etag: str, last_modified: int) -> bool:
+        if_none_match = request_headers.get(b"if-none-match")
+        if if_none_match is not None:
+            # 同时存在时以If-None-Match为准
+            return etag_matches(if_none_match.decode("latin-1"), etag)
+        if_modified_since = request_headers.get(b"if-modified-since")
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since.decode("latin-1")).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return last_modified <= since
+        return False
@@ -0,0 +1,169 @@
+# 分页工具：基于(created_at, id)或任意排序列的游标分页，以及可选的缓存总数
+import base64
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, func, or_, desc, literal, tuple_, String
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.exceptions import CustomHTTPException
+
+MAX_PER_PAGE = 100
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """将排序键编码为不透明游标"""
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """解析游标，格式错误时返回400"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise CustomHTTPException(status_code=400, detail="无效的分页游标", error_code="INVALID_CURSOR")
+
+def encode_key(values: List[Any]) -> str:
+    """将任意排序键（JSON可表示的值）编码为不透明游标"""
+    payload = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_key(cursor: str, size: int) -> List[Any]:
+    """解析encode_key生成的游标，格式错误时返回400"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or len(values) != size or not all(
+        isinstance(value, (int, float)) for value in values
+    ):
+        raise CustomHTTPException(status_code=400, detail="无效的分页游标", error_code="INVALID_CURSOR")
+    return values
+
+def keyset_query(query, model, cursor: Optional[str], per_page: int):
+    """为查询追加游标条件和排序（按created_at、id倒序，多取一条用于判断是否有下一页）
+
+    查询必须包含model.created_at和model.id列（或选择整个模型）。
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        # SQLite按文本比较时间：数据库默认值不带微秒（lower），ORM写入带微秒（upper），
+        # 同一时刻两种写法都属于并列组，只按id继续；created_at <= upper可走索引范围扫描
+        lower = literal(created_at.isoformat(sep=" "), String)
+        upper = literal(created_at.strftime("%Y-%m-%d %H:%M:%S.%f"), String)
+        query = query.where(
+            model.created_at <= upper,
+            or_(model.created_at < lower, model.id < row_id)
+        )
+    return query.order_by(desc(model.created_at), desc(model.id)).limit(per_page + 1)
+
+def keyset_page(rows: List[Any], per_page: int) -> Tuple[List[Any], Optional[str]]:
+    """截取当前页并生成下一页游标"""
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None
+    return rows, next_cursor
+
+def clamp_per_page(per_page: int) -> int:
+    """限制每页条数范围"""
+    return max(1, min(per_page, MAX_PER_PAGE))
+
+# 总数缓存：key -> (过期时间, 总数)
+_total_cache: Dict[str, Tuple[float, int]] = {}
+
+async def cached_total(db: AsyncSession, key: str, query, ttl: int = None) -> int:
+    """获取查询结果总数（缓存ttl秒，适用于深分页时只需近似总数的场景）"""
+    ttl = settings.CACHE_EXPIRE_TIME if ttl is None else ttl
+    now = time.monotonic()
+    cached = _total_cache.get(key)
+    if cached and cached[0] > now:
+        return cached[1]
+    total = await count_total(db, query)
+    _total_cache[key] = (now + ttl, total)
+    return total
+
+async def count_total(db: AsyncSession, query) -> int:
+    """统计查询结果总数"""
+    return await db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+
+async def paginate(
+    db: AsyncSession,
+    query,
+    model,
+    count_query,
+    page: int = 1,
+    per_page: int = 20,
+    cursor: Optional[str] = None,
+    with_total: bool = False,
+    cache_key: Optional[str] = None
+) -> Tuple[List[Any], Optional[int], Optional[str]]:
+    """执行分页查询，返回(当前页行, 总数, 下一页游标)
+
+    cursor为None时使用offset分页并精确统计总数；
+    cursor不为None（空字符串表示第一页）时使用游标分页，
+    仅在with_total为真时返回总数，且按cache_key缓存。
+    两种方式的per_page都限制在1到MAX_PER_PAGE之间（SQLite的LIMIT -1表示不限条数）。
+    """
+    per_page, page = clamp_per_page(per_page), max(page, 1)
+    # 查询整个模型时返回ORM对象，查询列时返回Row
+    descriptions = query.column_descriptions
+    entity_query = len(descriptions) == 1 and descriptions[0]["expr"] is model
+    fetch = db.scalars if entity_query else db.execute
+
+    if cursor is None:
+        total = await count_total(db, count_query)
+        rows = (await fetch(
+            query.order_by(desc(model.created_at), desc(model.id))
+            .offset((page - 1) * per_page).limit(per_page)
+        )).all()
+        return rows, total, None
+
+    rows = (await fetch(keyset_query(query, model, cursor, per_page))).all()
+    rows, next_cursor = keyset_page(rows, per_page)
+    total = None
+    if with_total:
+        if cache_key is None:
+            cache_key = str(count_query.compile(compile_kwargs={"literal_binds": True}))
+        total = await cached_total(db, cache_key, count_query)
+    return rows, total, next_cursor
+
+async def paginate_by(
+    db: AsyncSession,
+    query,
+    columns: list,
+    count_query,
+    page: int = 1,
+    per_page: int = 20,
+    cursor: Optional[str] = None,
+    with_total: bool = False
+) -> Tuple[List[Any], Optional[int], Optional[str]]:
+    """按columns（数值列，最后一列唯一，如id）倒序分页，返回(当前页行, 总数, 下一页游标)
+
+    与paginate相同：cursor为None时offset分页并统计总数，否则用行值比较 (a, b, id) < (?, ?, ?)
+    继续，columns与过滤条件组成索引时为索引范围扫描。查询必须包含columns。
+    """
+    per_page, page = clamp_per_page(per_page), max(page, 1)
+    order = [desc(column) for column in columns]
+    if cursor is None:
+        total = await count_total(db, count_query)
+        rows = (await db.execute(
+            query.order_by(*order).offset((page - 1) * per_page).limit(per_page)
+        )).all()
+        return rows, total, None
+
+    if cursor:
+        query = query.where(tuple_(*columns) < tuple_(*decode_key(cursor, len(columns))))
+    rows = (await db.execute(query.order_by(*order).limit(per_page + 1))).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    next_cursor = encode_key([getattr(rows[-1], column.key) for column in columns]) if has_more else None
+    total = None
+    if with_total:
+        cache_key = str(count_query.compile(compile_kwargs={"literal_binds": True}))
+        total = await cached_total(db, cache_key, count_query)
+    return rows, total, next_cursor
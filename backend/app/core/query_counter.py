@@ -0,0 +1,34 @@
+# SQL语句计数工具：用于检测N+1查询
+from sqlalchemy import event
+
+class QueryCounter:
+    """统计上下文中在指定引擎上执行的SQL语句数
+
+    用法:
+        with QueryCounter(async_read_engine) as counter:
+            ...
+        print(counter.count, counter.statements)
+    """
+
+    def __init__(self, *engines):
+        # 异步引擎需要挂在其同步引擎上
+        self.engines = [getattr(engine, "sync_engine", engine) for engine in engines]
+        self.statements = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        self.statements = []
+        for engine in self.engines:
+            event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for engine in self.engines:
+            event.remove(engine, "before_cursor_execute", self._before_cursor_execute)
+        return False
@@ -0,0 +1,189 @@
+# 文件范围请求：解析Range/If-Range，返回单个或多个字节范围（multipart/byteranges），
+# 服务器支持ASGI zerocopysend扩展时由其用sendfile直接发送；uvicorn没有实现该扩展，直接运行时在线程中
+# 分块读取（每个响应单独打开文件，seek + read不经过Python文件缓冲，Windows上也可用），零拷贝需由nginx的
+# X-Accel-Redirect发送（见DEPLOYMENT.md）
+import mimetypes
+import os
+import secrets
+from email.utils import formatdate
+from typing import Callable, List, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+CHUNK_SIZE = 256 * 1024
+# 合并后仍超过该数量的范围请求按普通请求处理（防止大量小范围放大开销）
+MAX_RANGES = 16
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+def read_at(file, offset: int, size: int) -> bytes:
+    """从offset读取最多size字节（阻塞调用，在线程中执行；file只由当前响应使用）"""
+    file.seek(offset)
+    return file.read(size)
+
+def parse_range(header: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """解析Range请求头，返回按起点排序、合并重叠部分后的[(start, end)]（end包含在内）
+
+    格式不正确或单位不是bytes时返回None（按普通请求处理）；没有可满足的范围时抛出RangeNotSatisfiable。
+    """
+    unit, _, specs = header.partition("=")
+    if unit.strip().lower() != "bytes" or not specs.strip():
+        return None
+    ranges = []
+    for spec in specs.split(","):
+        first, dash, last = spec.strip().partition("-")
+        first, last = first.strip(), last.strip()
+        if not dash or (first and not first.isdigit()) or (last and not last.isdigit()) or not (first or last):
+            return None
+        if not first:
+            # 后缀范围：最后N个字节
+            length = int(last)
+            if length > 0 and size > 0:
+                ranges.append((max(0, size - length), size - 1))
+            continue
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start < size:
+            ranges.append((start, min(int(last), size - 1) if last else size - 1))
+    if not ranges:
+        raise RangeNotSatisfiable()
+
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        if start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged if len(merged) <= MAX_RANGES else None
+
+def file_etag(stat_result: os.stat_result) -> str:
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+def if_range_matches(if_range: str, etag: str, last_modified: str) -> bool:
+    """If-Range为强ETag或HTTP日期，须与当前文件完全一致，否则忽略Range返回完整文件"""
+    if_range = if_range.strip()
+    if if_range.startswith(("\"", "W/")):
+        return if_range == etag
+    return if_range == last_modified
+
+class RangeFileResponse(Response):
+    """支持Range请求的文件响应
+
+    on_complete在响应发送结束（包括客户端断开）时调用，用于释放并发流名额。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        stat_result: os.stat_result,
+        request_headers: Headers,
+        method: str = "GET",
+        media_type: Optional[str] = None,
+        headers: Optional[dict] = None,
+        on_complete: Optional[Callable[[], None]] = None,
+    ):
+        self.path = path
+        self.size = stat_result.st_size
+        self.send_body = method != "HEAD"
+        self.on_complete = on_complete
+        self.background = None
+        self.media_type = media_type or mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.parts: List[Tuple[bytes, int, int]] = []
+        self.epilogue = b""
+
+        etag = file_etag(stat_result)
+        last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        base_headers = {
+            "accept-ranges": "bytes",
+            "etag": etag,
+            "last-modified": last_modified,
+            **(headers or {})
+        }
+
+        ranges = None
+        range_header = request_headers.get("range")
+        if range_header and method in ("GET", "HEAD"):
+            if_range = request_headers.get("if-range")
+            if if_range is None or if_range_matches(if_range, etag, last_modified):
+                try:
+                    ranges = parse_range(range_header, self.size)
+                except RangeNotSatisfiable:
+                    self.status_code = 416
+                    self._init_headers({**base_headers, "content-range": f"bytes */{self.size}", "content-length": "0"})
+                    return
+
+        if ranges is None:
+            self.status_code = 200
+            self.parts = [(b"", 0, self.size - 1)] if self.size else []
+            self._init_headers({**base_headers, "content-type": self.media_type, "content-length": str(self.size)})
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            self.status_code = 206
+            self.parts = [(b"", start, end)]
+            self._init_headers({
+                **base_headers,
+                "content-type": self.media_type,
+                "content-range": f"bytes {start}-{end}/{self.size}",
+                "content-length": str(end - start + 1),
+            })
+        else:
+            boundary = secrets.token_hex(12)
+            self.status_code = 206
+            self.parts = [
+                (
+                    (f"\r\n--{boundary}\r\nContent-Type: {self.media_type}\r\n"
+                     f"Content-Range: bytes {start}-{end}/{self.size}\r\n\r\n").encode("latin-1"),
+                    start, end
+                )
+                for start, end in ranges
+            ]
+            self.epilogue = f"\r\n--{boundary}--\r\n".encode("latin-1")
+            length = sum(len(prefix) + end - start + 1 for prefix, start, end in self.parts) + len(self.epilogue)
+            self._init_headers({
+                **base_headers,
+                "content-type": f"multipart/byteranges; boundary={boundary}",
+                "content-length": str(length),
+            })
+
+    def _init_headers(self, headers: dict):
+        self.raw_headers = [(key.lower().encode("latin-1"), value.encode("latin-1")) for key, value in headers.items()]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            if not self.send_body or not self.parts:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+            zerocopy = ZEROCOPY_EXTENSION in scope.get("extensions", {})
+            with open(self.path, "rb", buffering=0) as file:
+                for prefix, start, end in self.parts:
+                    if prefix:
+                        await send({"type": "http.response.body", "body": prefix, "more_body": True})
+                    if zerocopy:
+                        await send({
+                            "type": ZEROCOPY_EXTENSION, "file": file,
+                            "offset": start, "count": end - start + 1, "more_body": True
+                        })
+                    else:
+                        await self._send_chunks(file, start, end, send)
+            await send({"type": "http.response.body", "body": self.epilogue, "more_body": False})
+        finally:
+            if self.on_complete is not None:
+                self.on_complete()
+
+    @staticmethod
+    async def _send_chunks(file, start: int, end: int, send: Send):
+        offset = start
+        while offset <= end:
+            chunk = await anyio.to_thread.run_sync(read_at, file, offset, min(CHUNK_SIZE, end - offset + 1))
+            if not chunk:
+                break
+            offset += len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
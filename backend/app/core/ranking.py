@@ -0,0 +1,133 @@
+# 有序整数集合（顺序统计）：排行榜等需要按名次取元素、求元素名次的场景
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from typing import Iterable, Iterator, List
+
+class RankedKeys:
+    """有序整数键集合
+
+    键分块存放在有序的array中（每块约LOAD个），块的大小用树状数组（Fenwick树）索引：
+    插入、删除、求键的名次、按名次取键均为O(log n)（块内插入为一次内存移动）。
+    块分裂或删空时重建树状数组，代价为块数（n/LOAD）。
+    """
+
+    LOAD = 512
+
+    def __init__(self, keys: Iterable[int] = ()):
+        ordered = sorted(keys)
+        self._blocks: List[array] = [
+            array("q", ordered[i:i + self.LOAD]) for i in range(0, len(ordered), self.LOAD)
+        ]
+        self._maxes: List[int] = [block[-1] for block in self._blocks]
+        self._len = len(ordered)
+        self._rebuild_index()
+
+    def __len__(self) -> int:
+        return self._len
+
+    def _rebuild_index(self):
+        tree = [0] * (len(self._blocks) + 1)
+        for i, block in enumerate(self._blocks, 1):
+            tree[i] += len(block)
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _update(self, block_index: int, delta: int):
+        i = block_index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, block_index: int) -> int:
+        """前block_index块的键数"""
+        total, i = 0, block_index
+        while i:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _locate(self, position: int):
+        """名次position（从0开始）所在的块及块内位置"""
+        block_index, step = 0, 1 << (len(self._tree).bit_length())
+        while step:
+            nxt = block_index + step
+            if nxt < len(self._tree) and self._tree[nxt] <= position:
+                block_index = nxt
+                position -= self._tree[nxt]
+            step >>= 1
+        return block_index, position
+
+    def add(self, key: int):
+        if not self._blocks:
+            self._blocks.append(array("q", [key]))
+            self._maxes.append(key)
+            self._len = 1
+            self._rebuild_index()
+            return
+        i = bisect_left(self._maxes, key)
+        if i == len(self._blocks):
+            i -= 1
+        block = self._blocks[i]
+        insort(block, key)
+        self._maxes[i] = block[-1]
+        self._len += 1
+        if len(block) > 2 * self.LOAD:
+            self._blocks[i:i + 1] = [block[:self.LOAD], block[self.LOAD:]]
+            self._maxes[i:i + 1] = [self._blocks[i][-1], self._blocks[i + 1][-1]]
+            self._rebuild_index()
+        else:
+            self._update(i, 1)
+
+    def remove(self, key: int):
+        i = bisect_left(self._maxes, key)
+        block = self._blocks[i] if i < len(self._blocks) else None
+        j = bisect_left(block, key) if block is not None else 0
+        if block is None or j == len(block) or block[j] != key:
+            raise KeyError(key)
+        del block[j]
+        self._len -= 1
+        if block:
+            self._maxes[i] = block[-1]
+            self._update(i, -1)
+        else:
+            del self._blocks[i]
+            del self._maxes[i]
+            self._rebuild_index()
+
+    def index(self, key: int) -> int:
+        """小于key的键的个数（key存在时即为其名次，从0开始）"""
+        i = bisect_left(self._maxes, key)
+        if i == len(self._blocks):
+            return self._len
+        return self._prefix(i) + bisect_left(self._blocks[i], key)
+
+    def count_le(self, key: int) -> int:
+        """不大于key的键的个数"""
+        i = bisect_right(self._maxes, key)
+        if i == len(self._blocks):
+            return self._len
+        return self._prefix(i) + bisect_right(self._blocks[i], key)
+
+    def __getitem__(self, position: int) -> int:
+        if position < 0:
+            position += self._len
+        if not 0 <= position < self._len:
+            raise IndexError(position)
+        block_index, offset = self._locate(position)
+        return self._blocks[block_index][offset]
+
+    def slice(self, start: int, stop: int) -> Iterator[int]:
+        """名次在[start, stop)内的键"""
+        start, stop = max(start, 0), min(stop, self._len)
+        if start >= stop:
+            return
+        block_index, offset = self._locate(start)
+        remaining = stop - start
+        while remaining:
+            block = self._blocks[block_index]
+            chunk = block[offset:offset + remaining]
+            yield from chunk
+            remaining -= len(chunk)
+            block_index, offset = block_index + 1, 0
@@ -0,0 +1,28 @@
+# 高性能JSON响应：orjson直接序列化（原生支持datetime、date、UUID、Enum），不经过jsonable_encoder
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+def _default(value: Any):
+    """orjson不支持的类型，转换规则与FastAPI的jsonable_encoder一致"""
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode()
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    raise TypeError(f"无法序列化类型 {type(value).__name__}")
+
+def dumps(content: Any) -> bytes:
+    """序列化为JSON字节串（非字符串的字典键转换为字符串）"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+class FastJSONResponse(JSONResponse):
+    """使用orjson渲染的JSON响应（应用默认响应类）"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
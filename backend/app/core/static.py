@@ -0,0 +1,118 @@
+# 静态资源服务：按Accept-Encoding返回预压缩的.br/.gz文件，带内容哈希的文件名长期缓存
+import json
+import mimetypes
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Scope
+
+# 构建产物目录（scripts/build_assets.py生成，相对于static目录）
+STATIC_BUILD_DIR = "build"
+MANIFEST_FILE = "manifest.json"
+
+# 预压缩文件的后缀及对应的Content-Encoding，按优先级排列
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+# 文件名中的内容哈希，如 common.3f2a9c1b0d.css
+HASHED_NAME = re.compile(r"\.[0-9a-f]{10}\.[A-Za-z0-9]+$")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+def accepted_encodings(header: str) -> List[str]:
+    """解析Accept-Encoding，返回客户端接受的编码（忽略q=0）"""
+    encodings = []
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        encodings.append(name)
+    return encodings
+
+class PrecompressedStaticFiles(StaticFiles):
+    """在StaticFiles基础上增加预压缩协商和缓存策略
+
+    请求 a.css 且客户端接受br/gzip时，若存在 a.css.br / a.css.gz 则直接返回压缩文件
+    （Content-Type仍为原文件类型），并带Vary: Accept-Encoding。
+    文件名带内容哈希的资源内容永不变化，返回immutable；其余资源每次用ETag验证。
+    """
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        path = os.fspath(full_path)
+        headers = {
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL if HASHED_NAME.search(path) else REVALIDATE_CACHE_CONTROL
+        }
+
+        encoding, variant = self._negotiate(path, request_headers.get("accept-encoding", ""))
+        if variant is not None:
+            headers["Vary"] = "Accept-Encoding"
+        if encoding is not None:
+            media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            response = FileResponse(
+                variant[0], status_code=status_code, stat_result=variant[1],
+                media_type=media_type, headers=headers, method=scope["method"]
+            )
+            response.headers["Content-Encoding"] = encoding
+        else:
+            response = FileResponse(
+                path, status_code=status_code, stat_result=stat_result,
+                headers=headers, method=scope["method"]
+            )
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    @staticmethod
+    def _negotiate(path: str, accept_encoding: str) -> Tuple[Optional[str], Optional[Tuple[str, os.stat_result]]]:
+        """返回(选中的编码, (压缩文件路径, stat))；有压缩文件但客户端不接受时编码为None"""
+        accepted = accepted_encodings(accept_encoding)
+        available = None
+        for encoding, suffix in PRECOMPRESSED:
+            try:
+                variant_stat = os.stat(path + suffix)
+            except OSError:
+                continue
+            available = available or (path + suffix, variant_stat)
+            if encoding in accepted:
+                return encoding, (path + suffix, variant_stat)
+        return None, available
+
+@lru_cache(maxsize=1)
+def _load_manifest(static_dir: str) -> Dict[str, str]:
+    try:
+        with open(os.path.join(static_dir, STATIC_BUILD_DIR, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def static_url(path: str, static_dir: str = "static") -> str:
+    """模板中引用静态资源：构建过则返回带内容哈希的文件地址，否则返回原文件地址
+
+    清单在首次调用时读取，重新构建后需重启服务生效。
+    """
+    hashed = _load_manifest(static_dir).get(path)
+    if hashed is None:
+        return f"/static/{path}"
+    return f"/static/{STATIC_BUILD_DIR}/{hashed}"
@@ -1,30 +1,135 @@
-from sqlalchemy import create_engine, MetaData
+from sqlalchemy import create_engine, delete, event, func, inspect, select, text, MetaData
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 # 确保数据目录存在
 os.makedirs("./data", exist_ok=True)
 
-# 创建SQLite引擎
+def get_async_database_url(url: str) -> str:
+    """将同步数据库URL转换为异步驱动URL（sqlite -> sqlite+aiosqlite）"""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    return url
+
+def is_sqlite_file_url(url: str) -> bool:
+    """判断是否为SQLite文件数据库（内存库不使用连接池配置）"""
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+def apply_sqlite_pragmas(dbapi_connection, read_only: bool = False):
+    """在新连接上应用SQLite性能配置"""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT)}")
+        if settings.SQLITE_PERFORMANCE_PROFILE:
+            if not read_only:
+                # journal_mode写入数据库文件头，只需由读写连接设置
+                cursor.execute(f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}")
+            cursor.execute(f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}")
+            cursor.execute(f"PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE)}")
+            cursor.execute(f"PRAGMA cache_size = {int(settings.SQLITE_CACHE_SIZE)}")
+            cursor.execute(f"PRAGMA temp_store = {settings.SQLITE_TEMP_STORE}")
+        if read_only:
+            cursor.execute("PRAGMA query_only = ON")
+    finally:
+        cursor.close()
+
+def create_async_db_engine(url: str, read_only: bool = False, **kwargs):
+    """创建带SQLite性能配置和连接池的异步引擎"""
+    engine_kwargs = {"echo": settings.DEBUG}
+    if is_sqlite_file_url(url) and "poolclass" not in kwargs:
+        # aiosqlite默认使用NullPool（每次请求新建连接），这里改为固定大小的连接池
+        engine_kwargs.update(
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=settings.DB_READ_POOL_SIZE if read_only else settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_READ_MAX_OVERFLOW if read_only else settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=False
+        )
+    engine_kwargs.update(kwargs)
+    new_engine = create_async_engine(get_async_database_url(url), **engine_kwargs)
+
+    if make_url(url).get_backend_name() == "sqlite":
+        @event.listens_for(new_engine.sync_engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            apply_sqlite_pragmas(dbapi_connection, read_only=read_only)
+
+    return new_engine
+
+# 创建SQLite引擎（同步，供脚本和建表使用）
 engine = create_engine(
     settings.DATABASE_URL,
     connect_args={"check_same_thread": False},  # SQLite特有配置
     echo=settings.DEBUG  # 开发环境显示SQL语句
 )
 
+if make_url(settings.DATABASE_URL).get_backend_name() == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _on_sync_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection)
+
+# 创建异步引擎（供API路由使用，避免阻塞事件循环）
+async_engine = create_async_db_engine(settings.DATABASE_URL)
+
+# 只读异步引擎（GET请求使用，WAL模式下读不阻塞写）
+async_read_engine = create_async_db_engine(settings.DATABASE_URL, read_only=True)
+
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 创建异步会话工厂（提交后不过期，模板渲染时无需再次查询）
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+# 只读异步会话工厂
+AsyncReadSessionLocal = async_sessionmaker(
+    async_read_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # 创建基础模型类
 Base = declarative_base()
 
 # 数据库元数据
 metadata = MetaData()
 
-def get_db():
-    """获取数据库会话"""
+async def get_db():
+    """获取异步数据库会话"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_read_db():
+    """获取只读异步数据库会话（GET请求使用）"""
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+async def begin_immediate(db: AsyncSession):
+    """在事务开始时立即取得SQLite写锁（BEGIN IMMEDIATE），须在本事务的第一条写语句之前调用
+
+    默认的延迟事务在第一条写语句时才申请写锁，先读后写的事务并发时会出现读到的数据已过期或锁升级失败；
+    立即取得写锁后，其他写事务在busy_timeout内排队等待。其他数据库使用自身的行锁，不做处理。
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        await db.execute(text("BEGIN IMMEDIATE"))
+
+def get_sync_db():
+    """获取同步数据库会话（脚本等非异步场景使用）"""
     db = SessionLocal()
     try:
         yield db
@@ -34,11 +139,72 @@ def get_db():
 def create_tables():
     """创建所有数据库表"""
     # 导入所有模型以确保表被创建
-    from app.models import user, content, community, shop, game
-    
+    from app.models import user, content, community, shop, game, stats, media
+    # 注册全文搜索虚拟表
+    from app.services import search
+
     # 创建所有表
     Base.metadata.create_all(bind=engine)
-    
+    with engine.begin() as conn:
+        create_missing_columns(conn)
+        create_missing_indexes(conn)
+
+async def create_tables_async():
+    """异步创建所有数据库表（应用启动时使用）"""
+    from app.models import user, content, community, shop, game, stats, media
+    from app.services import search
+
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(create_missing_columns)
+        await conn.run_sync(create_missing_indexes)
+
+def create_missing_columns(conn):
+    """为已存在的表补加模型中新增的列（新增的非空列需有server_default）"""
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                ddl = CreateColumn(column).compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+
+def create_missing_indexes(conn):
+    """为已存在的表补建模型中新增的索引（create_all只在建表时创建索引）
+
+    新增的唯一索引先删除已有的重复行（保留id最小的一行），否则建索引失败导致无法启动。
+    """
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            if index.unique:
+                delete_duplicate_rows(conn, index)
+            index.create(bind=conn, checkfirst=True)
+
+def delete_duplicate_rows(conn, index) -> int:
+    """删除违反唯一索引的重复行（保留id最小的一行），返回删除的行数
+
+    index.info["after_deduplicate"]为删除后需要执行的操作说明（如重新校准计数），记录在日志中。
+    """
+    table = index.table
+    columns = list(index.columns)
+    # 含NULL的行不违反唯一约束
+    not_null = [column.isnot(None) for column in columns]
+    keep = select(func.min(table.c.id)).where(*not_null).group_by(*columns)
+    result = conn.execute(delete(table).where(*not_null, table.c.id.not_in(keep)))
+    if result.rowcount:
+        hint = index.info.get("after_deduplicate")
+        logger.warning(
+            f"建立唯一索引 {index.name} 前删除了 {table.name} 中 {result.rowcount} 条重复记录"
+            + (f"，请{hint}" if hint else "")
+        )
+    return result.rowcount
+
 def drop_tables():
     """删除所有数据库表（谨慎使用）"""
     Base.metadata.drop_all(bind=engine)
@@ -47,3 +213,9 @@ def reset_database():
     """重置数据库（删除并重新创建所有表）"""
     drop_tables()
     create_tables()
+
+async def dispose_engines():
+    """释放数据库连接（应用关闭时使用）"""
+    await async_engine.dispose()
+    await async_read_engine.dispose()
+    engine.dispose()
@@ -1,5 +1,4 @@
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
@@ -11,9 +10,13 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.core.config import settings
 from app.core.exceptions import setup_exception_handlers
-from app.database import engine, create_tables
-from app.api import auth, encyclopedia, tutorial, community, shop, game
+from app.core.http_cache import ConditionalRequestMiddleware
+from app.core.responses import FastJSONResponse
+from app.core.static import PrecompressedStaticFiles, static_url
+from app.database import create_tables_async, dispose_engines, AsyncSessionLocal
+from app.api import auth, encyclopedia, tutorial, community, shop, game, search, upload
 from app.admin import routes as admin_routes
+from app.services import counters, views, likes, feed, images, leaderboard, challenges, achievements, search as search_service
 
 # 创建FastAPI应用
 app = FastAPI(
@@ -21,7 +24,8 @@ app = FastAPI(
     description="基于FastAPI的轻量级后端服务，支持用户端和中台管理",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=FastJSONResponse
 )
 
 # CORS中间件配置
@@ -31,13 +35,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified"],
 )
 
-# 静态文件服务
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# 公开API的ETag和条件请求（304）
+app.add_middleware(ConditionalRequestMiddleware)
+
+# 静态文件服务（scripts/build_assets.py构建后返回预压缩文件）
+app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
+
+# 构建后的前端页面
+if os.path.isdir(settings.FRONTEND_DIST_DIR):
+    app.mount("/site", PrecompressedStaticFiles(directory=settings.FRONTEND_DIST_DIR, html=True), name="site")
 
 # 模板配置
 templates = Jinja2Templates(directory="templates")
+templates.env.globals["static_url"] = static_url
 
 # 异常处理
 setup_exception_handlers(app)
@@ -49,6 +62,8 @@ app.include_router(tutorial.router, prefix="/api/tutorial", tags=["视频教程"
 app.include_router(community.router, prefix="/api/community", tags=["社区论坛"])
 app.include_router(shop.router, prefix="/api/shop", tags=["文创商城"])
 app.include_router(game.router, prefix="/api/game", tags=["游戏化"])
+app.include_router(search.router, prefix="/api/search", tags=["全站搜索"])
+app.include_router(upload.router, prefix="/api/upload", tags=["文件上传"])
 
 # 中台管理路由
 app.include_router(admin_routes.router, prefix="/admin", tags=["中台管理"])
@@ -57,12 +72,38 @@ app.include_router(admin_routes.router, prefix="/admin", tags=["中台管理"])
 async def startup_event():
     """应用启动时的初始化"""
     # 创建数据库表
-    create_tables()
+    await create_tables_async()
     print("✅ 数据库表创建完成")
+    # 已有数据库首次启用搜索时重建全文索引
+    async with AsyncSessionLocal() as db:
+        await search_service.ensure_index_built(db)
+    # 计算尚未计算或与公式不一致的帖子热度分（已有数据库首次启用热门排序时）
+    async with AsyncSessionLocal() as db:
+        await feed.refresh_hot_scores(db)
+        await db.commit()
+    # 从数据库重建内存中的排行榜
+    async with AsyncSessionLocal() as db:
+        await leaderboard.leaderboards.rebuild(db)
+    # 启动统计计数器定期校准（首次立即执行）
+    counters.start_reconcile_task()
+    # 启动浏览数定期写回
+    views.start_flush_task()
     print(f"🚀 应用启动成功，访问地址：")
     print(f"   - API文档: http://localhost:8000/docs")
     print(f"   - 中台管理: http://localhost:8000/admin")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """应用关闭时释放资源"""
+    await counters.stop_reconcile_task()
+    # 写入缓冲中剩余的浏览数
+    await views.stop_flush_task()
+    # 等待进行中的成就评估
+    await achievements.achievement_engine.stop()
+    # 等待进行中的图片变体生成并关闭进程池
+    await images.stop_image_pipeline()
+    await dispose_engines()
+
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request):
     """根路径重定向到API文档"""
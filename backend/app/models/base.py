@@ -1,7 +1,39 @@
+from functools import lru_cache
+from operator import attrgetter, itemgetter
+from typing import Callable, List, Optional, Sequence, Tuple
+
 from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Float
 from sqlalchemy.sql import func
 from app.database import Base
 
+def _dict_builder(keys: Sequence[str], getter: Callable) -> Callable[[object], dict]:
+    """用operator的取值函数一次取出所有值再与键组合（单个取值时getter不返回元组）"""
+    keys = tuple(keys)
+    if not keys:
+        return lambda obj: {}
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda obj: {key: getter(obj)}
+    return lambda obj: dict(zip(keys, getter(obj)))
+
+def compile_serializer(attributes: Sequence[str]) -> Callable[[object], dict]:
+    """生成按属性名取值的序列化函数（attrgetter在C中一次取出所有属性，调用时没有Python层的循环）"""
+    return _dict_builder(attributes, attrgetter(*attributes) if attributes else None)
+
+@lru_cache(maxsize=256)
+def row_serializer(fields: Tuple[str, ...], keys: Optional[Tuple[str, ...]] = None) -> Callable[[tuple], dict]:
+    """生成按位置取值的Row序列化函数，keys可选取fields的子集（按列名组合缓存）"""
+    positions = {field: index for index, field in enumerate(fields)}
+    keys = keys or fields
+    return _dict_builder(keys, itemgetter(*(positions[key] for key in keys)) if keys else None)
+
+def rows_to_dicts(rows: Sequence, keys: Optional[Sequence[str]] = None) -> List[dict]:
+    """将select(...)返回的Row列表直接转换为字典列表（不经过ORM对象和标识映射）"""
+    if not rows:
+        return []
+    serialize = row_serializer(tuple(rows[0]._fields), tuple(keys) if keys else None)
+    return [serialize(row) for row in rows]
+
 class TimestampMixin:
     """时间戳混入类"""
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
@@ -13,9 +45,15 @@ class BaseModel(Base, TimestampMixin):
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     
+    @classmethod
+    def serializer(cls) -> Callable[[object], dict]:
+        """获取该模型的序列化函数（首次调用时按表结构生成并缓存在类上）"""
+        serialize = cls.__dict__.get("_serializer")
+        if serialize is None:
+            serialize = compile_serializer([column.name for column in cls.__table__.columns])
+            cls._serializer = serialize
+        return serialize
+
     def to_dict(self):
         """转换为字典"""
-        return {
-            column.name: getattr(self, column.name)
-            for column in self.__table__.columns
-        }
+        return type(self).serializer()(self)
@@ -1,10 +1,18 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Boolean, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
 class Post(BaseModel):
     """社区帖子模型"""
     __tablename__ = "posts"
+    __table_args__ = (
+        Index("ix_posts_created_at_id", "created_at", "id"),  # 游标分页
+        Index("ix_posts_status_pinned_hot", "status", "is_pinned", "hot_score", "id"),  # 热门
+        Index("ix_posts_status_category_pinned_hot", "status", "category", "is_pinned", "hot_score", "id"),
+        # 最新（按分类）；本周最热按发布时间范围读取最近7天的帖子
+        Index("ix_posts_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_posts_status_category_created_at_id", "status", "category", "created_at", "id"),
+    )
     
     title = Column(String(200), nullable=False, index=True)
     content = Column(Text, nullable=False)
@@ -16,7 +24,8 @@ class Post(BaseModel):
     like_count = Column(Integer, default=0, nullable=False)
     comment_count = Column(Integer, default=0, nullable=False)
     is_pinned = Column(Boolean, default=False, nullable=False)  # 是否置顶
-    status = Column(String(20), default="published", nullable=False)  # draft, published, hidden
+    hot_score = Column(Float, default=0, server_default="0", nullable=False)  # 热度分（见app.services.feed）
+    status = Column(String(20), default="published", nullable=False, index=True)  # draft, published, hidden
     
     # 关系定义
     author = relationship("User", back_populates="posts")
@@ -25,6 +34,10 @@ class Post(BaseModel):
 class Comment(BaseModel):
     """评论模型"""
     __tablename__ = "comments"
+    __table_args__ = (
+        Index("ix_comments_post_parent_created", "post_id", "parent_id", "created_at", "id"),  # 分页顶层评论
+        Index("ix_comments_parent_created", "parent_id", "created_at", "id"),  # 递归加载回复
+    )
     
     post_id = Column(Integer, ForeignKey("posts.id"), nullable=False)
     author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -41,6 +54,12 @@ class Comment(BaseModel):
 class Like(BaseModel):
     """点赞记录模型"""
     __tablename__ = "likes"
+    __table_args__ = (
+        # 每人对同一对象只能点赞一次；也用于"是否已点赞"的批量查询
+        Index("ix_likes_user_target", "user_id", "target_type", "target_id", unique=True,
+              info={"after_deduplicate": "运行 python scripts/reconcile_like_counts.py 校准点赞数"}),
+        Index("ix_likes_target", "target_type", "target_id"),  # 按对象校准点赞数
+    )
     
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     target_type = Column(String(20), nullable=False)  # post, comment, tutorial
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
@@ -22,6 +22,9 @@ class EncyclopediaContent(BaseModel):
 class Tutorial(BaseModel):
     """视频教程模型"""
     __tablename__ = "tutorials"
+    __table_args__ = (
+        Index("ix_tutorials_created_at_id", "created_at", "id"),  # 游标分页
+    )
     
     title = Column(String(200), nullable=False, index=True)
     description = Column(Text, nullable=True)
@@ -42,6 +45,9 @@ class Tutorial(BaseModel):
 class LearningProgress(BaseModel):
     """学习进度模型"""
     __tablename__ = "learning_progress"
+    __table_args__ = (
+        Index("ix_learning_progress_user_tutorial", "user_id", "tutorial_id", unique=True),  # 每人每个教程一条
+    )
     
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     tutorial_id = Column(Integer, ForeignKey("tutorials.id"), nullable=False)
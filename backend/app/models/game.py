@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, Date, DateTime, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
@@ -26,28 +26,34 @@ class Challenge(BaseModel):
     type = Column(String(50), nullable=False)  # daily, weekly, achievement
     category = Column(String(50), nullable=False)  # learning, social, shop
     points_reward = Column(Integer, nullable=False)
-    requirements = Column(Text, nullable=True)  # JSON格式存储完成条件
+    # JSON格式存储完成条件，如 {"event": "post_created", "count": 5, "where": {"category": "showcase"}}
+    requirements = Column(Text, nullable=True)
     is_active = Column(Boolean, default=True, nullable=False)
     start_date = Column(DateTime, nullable=True)
     end_date = Column(DateTime, nullable=True)
 
 class UserChallenge(BaseModel):
-    """用户挑战记录模型"""
+    """用户挑战记录模型（每日、每周挑战每个周期一行）"""
     __tablename__ = "user_challenges"
+    __table_args__ = (
+        Index("ix_user_challenges_user_challenge_period", "user_id", "challenge_id", "period_start", unique=True),
+    )
     
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     challenge_id = Column(Integer, ForeignKey("challenges.id"), nullable=False)
+    period_start = Column(Date, nullable=False, server_default="1970-01-01")  # 周期第一天，不分周期的挑战为1970-01-01
     progress = Column(Integer, default=0, nullable=False)  # 进度
     is_completed = Column(Boolean, default=False, nullable=False)
     completed_at = Column(DateTime, nullable=True)
     points_earned = Column(Integer, default=0, nullable=False)
+    reward_claimed_at = Column(DateTime, nullable=True)  # 领取奖励的时间（奖励可以为0分，不能用points_earned判断是否已领取）
     
     # 关系定义
     user = relationship("User", backref="user_challenges")
     challenge = relationship("Challenge", backref="user_challenges")
 
 class CheckinRecord(BaseModel):
-    """签到记录模型"""
+    """签到记录模型（旧版，每次签到一行；已由CheckinCalendar代替，保留用于迁移）"""
     __tablename__ = "checkin_records"
     
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -58,6 +64,34 @@ class CheckinRecord(BaseModel):
     # 关系定义
     user = relationship("User", backref="checkin_records")
 
+class CheckinCalendar(BaseModel):
+    """签到日历模型（每人每年一行，每天一位：第i位表示当年第i+1天已签到）"""
+    __tablename__ = "checkin_calendars"
+    __table_args__ = (
+        Index("ix_checkin_calendars_user_year", "user_id", "year", unique=True),  # 每人每年一行
+    )
+    
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    year = Column(Integer, nullable=False)
+    days = Column(LargeBinary(46), nullable=False)  # 366位，小端序
+    
+    # 关系定义
+    user = relationship("User", backref="checkin_calendars")
+
+class PointsRecord(BaseModel):
+    """积分流水模型（每次积分变化一条，用于统计日榜、周榜）"""
+    __tablename__ = "points_records"
+    __table_args__ = (
+        Index("ix_points_records_created_at_user", "created_at", "user_id"),  # 按时间窗口汇总
+    )
+    
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    points = Column(Integer, nullable=False)
+    source = Column(String(50), nullable=False)  # checkin, challenge, achievement, admin
+    
+    # 关系定义
+    user = relationship("User", backref="points_records")
+
 class Achievement(BaseModel):
     """成就模型"""
     __tablename__ = "achievements"
@@ -66,13 +100,17 @@ class Achievement(BaseModel):
     description = Column(Text, nullable=False)
     icon = Column(String(200), nullable=True)
     category = Column(String(50), nullable=False)  # learning, social, points
-    requirements = Column(Text, nullable=True)  # JSON格式存储获得条件
+    # JSON格式存储获得条件，如 {"metric": "posts", "gte": 10}，多个条件同时满足为 {"all": [...]}
+    requirements = Column(Text, nullable=True)
     points_reward = Column(Integer, default=0, nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
 
 class UserAchievement(BaseModel):
     """用户成就记录模型"""
     __tablename__ = "user_achievements"
+    __table_args__ = (
+        Index("ix_user_achievements_user_achievement", "user_id", "achievement_id", unique=True),  # 每个成就只获得一次
+    )
     
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     achievement_id = Column(Integer, ForeignKey("achievements.id"), nullable=False)
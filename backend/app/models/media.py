@@ -0,0 +1,25 @@
+from sqlalchemy import Column, ForeignKey, Index, Integer, String
+from app.models.base import BaseModel
+
+class ImageVariant(BaseModel):
+    """图片变体模型（上传图片的缩略图和WebP版本，按原图URL查询；原图本身也记录一行，format为原格式）"""
+    __tablename__ = "image_variants"
+    
+    original_url = Column(String(500), nullable=False, index=True)
+    url = Column(String(500), nullable=False)
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    format = Column(String(10), nullable=False)  # webp, jpeg, png
+    size = Column(Integer, nullable=False)  # 字节数
+
+class Upload(BaseModel):
+    """用户上传记录（上传者、类别和大小，用于每人上传限额；不作为blob的引用，不影响blob回收）"""
+    __tablename__ = "uploads"
+    __table_args__ = (
+        Index("ix_uploads_user_created", "user_id", "created_at"),
+    )
+
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    blob_id = Column(String(100), nullable=False)
+    kind = Column(String(20), nullable=False)
+    size = Column(Integer, nullable=False)  # 字节数
@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, Boolean, Float, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
 class Product(BaseModel):
     """商品模型"""
     __tablename__ = "products"
+    __table_args__ = (
+        Index("ix_products_created_at_id", "created_at", "id"),  # 游标分页
+    )
     
     name = Column(String(200), nullable=False, index=True)
     description = Column(Text, nullable=True)
@@ -39,11 +42,14 @@ class Cart(BaseModel):
 class Order(BaseModel):
     """订单模型"""
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_created_at_id", "created_at", "id"),  # 游标分页
+    )
     
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     order_no = Column(String(50), unique=True, nullable=False, index=True)
     total_amount = Column(Float, nullable=False)
-    status = Column(String(20), default="pending", nullable=False)  # pending, paid, shipped, completed, cancelled
+    status = Column(String(20), default="pending", nullable=False, index=True)  # pending, paid, shipped, completed, cancelled
     payment_method = Column(String(20), nullable=True)  # wechat, alipay, card
     payment_status = Column(String(20), default="unpaid", nullable=False)  # unpaid, paid, refunded
     shipping_address = Column(Text, nullable=True)  # JSON格式存储收货地址
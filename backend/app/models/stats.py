@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, String
+from app.models.base import BaseModel
+
+class StatsCounter(BaseModel):
+    """统计计数器模型（由模型事件增量维护，定期与实际数据校准）"""
+    __tablename__ = "stats_counters"
+    
+    name = Column(String(50), unique=True, nullable=False, index=True)
+    value = Column(Integer, default=0, nullable=False)
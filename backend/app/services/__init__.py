@@ -0,0 +1 @@
+# 业务逻辑服务包
@@ -0,0 +1,297 @@
+# 成就引擎：成就的获得条件（requirements JSON）只编译一次为条件对象，按依赖的事件类型索引；
+# 事务提交后只对相关用户评估相关成就，每个成就一条集合SQL（满足条件且未获得的用户）批量发放；
+# 定期（scripts/evaluate_achievements.py）用同样的SQL对全部用户评估，补上遗漏
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import event, exists, func, intersect, literal, or_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.community import Post
+from app.models.content import LearningProgress
+from app.models.game import Achievement, UserAchievement, UserChallenge, UserGameProfile
+from app.models.shop import Order
+from app.models.user import User
+from app.services.events import PAID_STATUSES, on_commit
+from app.services.points import BATCH_SIZE, award_points_bulk
+
+logger = logging.getLogger(__name__)
+
+# 规则缓存的最长时间（其他进程修改成就后最迟在此时间后生效）
+RELOAD_SECONDS = 60
+
+# Session.info中本事务是否修改了成就
+CHANGED_KEY = "achievements_changed"
+
+class Metric:
+    """用户指标：value为None时按行数计数（GROUP BY用户 HAVING COUNT），否则比较该列的值"""
+
+    def __init__(self, events: Iterable[str], user_column, value=None, where=()):
+        self.events = frozenset(events)
+        self.user_column = user_column
+        self.value = value
+        self.where = tuple(where)
+
+    def qualifying(self, threshold: int, user_ids: Optional[List[int]] = None):
+        """达到阈值的用户id查询（user_ids不为None时只评估这些用户）"""
+        query = select(self.user_column.label("user_id")).where(*self.where)
+        if user_ids is not None:
+            query = query.where(self.user_column.in_(user_ids))
+        if self.value is None:
+            return query.group_by(self.user_column).having(func.count() >= threshold)
+        return query.where(self.value >= threshold)
+
+METRICS = {
+    "points": Metric(["points_awarded"], User.id, User.points),
+    "checkin_streak": Metric(["checkin"], UserGameProfile.user_id, UserGameProfile.consecutive_days),
+    "posts": Metric(["post_created"], Post.author_id, where=[Post.status == "published"]),
+    "tutorials_completed": Metric(
+        ["tutorial_completed"], LearningProgress.user_id, where=[LearningProgress.is_completed == True]
+    ),
+    "orders_paid": Metric(
+        ["order_paid"], Order.user_id, where=[or_(Order.status.in_(PAID_STATUSES), Order.payment_status == "paid")]
+    ),
+    "challenges_completed": Metric(
+        ["challenge_completed"], UserChallenge.user_id, where=[UserChallenge.is_completed == True]
+    ),
+}
+
+class MetricCondition:
+    """指标达到阈值"""
+
+    def __init__(self, metric: str, threshold: int):
+        if metric not in METRICS:
+            raise ValueError(f"不支持的指标: {metric}")
+        if threshold < 1:
+            raise ValueError(f"阈值无效: {threshold}")
+        self.metric = METRICS[metric]
+        self.threshold = threshold
+        self.events = self.metric.events
+
+    def qualifying(self, user_ids: Optional[List[int]] = None):
+        return self.metric.qualifying(self.threshold, user_ids)
+
+class AllCondition:
+    """多个条件同时满足（各条件的用户集合取交集）"""
+
+    def __init__(self, conditions: list):
+        if not conditions:
+            raise ValueError("all条件不能为空")
+        self.conditions = conditions
+        self.events = frozenset().union(*(condition.events for condition in conditions))
+
+    def qualifying(self, user_ids: Optional[List[int]] = None):
+        return intersect(*(condition.qualifying(user_ids) for condition in self.conditions))
+
+def compile_condition(spec: dict):
+    if "all" in spec:
+        return AllCondition([compile_condition(item) for item in spec["all"]])
+    return MetricCondition(spec.get("metric"), int(spec.get("gte", 1)))
+
+def compile_requirements(text: Optional[str]):
+    """编译获得条件，没有条件时返回None（不自动发放）"""
+    if not text:
+        return None
+    return compile_condition(json.loads(text))
+
+class AchievementRule:
+    """编译后的成就"""
+
+    def __init__(self, achievement):
+        self.id = achievement.id
+        self.name = achievement.name
+        self.description = achievement.description
+        self.icon = achievement.icon
+        self.category = achievement.category
+        self.points_reward = achievement.points_reward
+        self.condition = compile_requirements(achievement.requirements)
+
+    async def award(self, db: AsyncSession, user_ids: Optional[List[int]] = None, now: Optional[datetime] = None) -> List[int]:
+        """给满足条件且尚未获得的用户发放（一条INSERT ... SELECT），返回新获得的用户id"""
+        if self.condition is None:
+            return []
+        now = now or datetime.now()
+        qualifying = self.condition.qualifying(user_ids).subquery()
+        candidates = select(
+            qualifying.c.user_id, literal(self.id), literal(now), literal(now), literal(now)
+        ).where(
+            ~exists().where(
+                UserAchievement.user_id == qualifying.c.user_id,
+                UserAchievement.achievement_id == self.id
+            )
+        )
+        awarded = list((await db.scalars(
+            sqlite_insert(UserAchievement)
+            .from_select(["user_id", "achievement_id", "earned_at", "created_at", "updated_at"], candidates)
+            .on_conflict_do_nothing(index_elements=[UserAchievement.user_id, UserAchievement.achievement_id])
+            .returning(UserAchievement.user_id)
+        )).all())
+        if awarded and self.points_reward:
+            await award_points_bulk(db, awarded, self.points_reward, "achievement", at=now)
+        return awarded
+
+class AchievementEngine:
+    """成就规则缓存（按事件类型索引），以及提交后待评估的用户"""
+
+    def __init__(self):
+        self.rules: Dict[int, AchievementRule] = {}
+        self._by_event: Dict[str, List[AchievementRule]] = {}
+        self._loaded_at: Optional[float] = None
+        # 事件类型 -> 待评估的用户
+        self._pending: Dict[str, Set[int]] = defaultdict(set)
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {
+            "loads": 0, "invalid_rules": 0, "evaluations": 0, "rule_checks": 0,
+            "awarded": 0, "failed_evaluations": 0, "last_batch_ms": None
+        }
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def ensure_loaded(self, connection):
+        """规则未加载或已过期时从数据库编译"""
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < RELOAD_SECONDS:
+            return
+        rows = connection.execute(
+            select(
+                Achievement.id, Achievement.name, Achievement.description, Achievement.icon,
+                Achievement.category, Achievement.points_reward, Achievement.requirements
+            ).where(Achievement.is_active == True).order_by(Achievement.id)
+        ).all()
+        rules, invalid = {}, 0
+        for row in rows:
+            try:
+                rules[row.id] = AchievementRule(row)
+            except (ValueError, TypeError, AttributeError) as e:
+                invalid += 1
+                logger.warning(f"成就 {row.id} 的获得条件无效: {e}")
+        by_event = defaultdict(list)
+        for rule in rules.values():
+            for event_name in (rule.condition.events if rule.condition else ()):
+                by_event[event_name].append(rule)
+        self.rules, self._by_event = rules, dict(by_event)
+        self._loaded_at = time.monotonic()
+        self._stats["loads"] += 1
+        self._stats["invalid_rules"] = invalid
+
+    async def load(self, db: AsyncSession):
+        await db.run_sync(lambda session: self.ensure_loaded(session.connection()))
+
+    def enqueue(self, events: list):
+        """记录提交后的事件涉及的用户，在后台评估（没有运行中的事件循环时留给定期评估）"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        for user_id, event_name, attrs, at in events:
+            self._pending[event_name].add(user_id)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.evaluate_pending())
+
+    async def evaluate_pending(self) -> int:
+        """评估待评估用户的相关成就，返回发放数"""
+        from app.database import AsyncSessionLocal
+
+        total = 0
+        async with self._lock:
+            while self._pending:
+                pending, self._pending = self._pending, defaultdict(set)
+                start = time.monotonic()
+                try:
+                    async with AsyncSessionLocal() as db:
+                        await self.load(db)
+                        # 同一成就依赖的多个事件的用户合并，每个成就评估一次
+                        users_by_rule = defaultdict(set)
+                        for event_name, user_ids in pending.items():
+                            for rule in self._by_event.get(event_name, ()):
+                                users_by_rule[rule.id] |= user_ids
+                        for rule_id, user_ids in users_by_rule.items():
+                            user_ids = sorted(user_ids)
+                            for i in range(0, len(user_ids), BATCH_SIZE):
+                                total += len(await self.rules[rule_id].award(db, user_ids[i:i + BATCH_SIZE]))
+                        self._stats["rule_checks"] += len(users_by_rule)
+                        await db.commit()
+                except Exception as e:
+                    # 不重试，由定期评估补上
+                    self._stats["failed_evaluations"] += 1
+                    logger.error(f"成就评估失败: {type(e).__name__} - {str(e)}")
+                    continue
+                self._stats["evaluations"] += 1
+                self._stats["last_batch_ms"] = round((time.monotonic() - start) * 1000, 2)
+        self._stats["awarded"] += total
+        return total
+
+    async def evaluate_all(self, db: AsyncSession) -> Dict[int, int]:
+        """对全部用户评估全部成就（每个成就一条集合SQL），返回 成就id -> 新发放数；由调用方提交事务"""
+        self.invalidate()
+        await self.load(db)
+        results = {}
+        for rule in self.rules.values():
+            if rule.condition is not None:
+                results[rule.id] = len(await rule.award(db))
+        self._stats["awarded"] += sum(results.values())
+        return results
+
+    async def stop(self):
+        """等待进行中的评估（应用关闭时调用）"""
+        if self._task is not None and not self._task.done():
+            await self._task
+
+    def metrics(self) -> dict:
+        return {
+            "rules": len(self.rules),
+            "pending_users": len(set().union(*self._pending.values())) if self._pending else 0,
+            **self._stats
+        }
+
+achievement_engine = AchievementEngine()
+
+@on_commit
+def _evaluate_after_commit(events: list):
+    achievement_engine.enqueue(events)
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session):
+    if session.info.pop(CHANGED_KEY, False):
+        achievement_engine.invalidate()
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session):
+    session.info.pop(CHANGED_KEY, None)
+
+def _achievement_changed(mapper, connection, target):
+    Session.object_session(target).info[CHANGED_KEY] = True
+
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(Achievement, _event, _achievement_changed)
+
+async def list_achievements(db: AsyncSession, user_id: Optional[int]) -> List[dict]:
+    """全部成就；登录时附带是否已获得及获得时间"""
+    await achievement_engine.load(db)
+    earned = {}
+    if user_id is not None:
+        result = await db.execute(
+            select(UserAchievement.achievement_id, UserAchievement.earned_at).where(UserAchievement.user_id == user_id)
+        )
+        earned = dict(result.all())
+    return [
+        {
+            "id": rule.id,
+            "name": rule.name,
+            "description": rule.description,
+            "icon": rule.icon,
+            "category": rule.category,
+            "points_reward": rule.points_reward,
+            "earned": rule.id in earned,
+            "earned_at": earned.get(rule.id)
+        }
+        for rule in achievement_engine.rules.values()
+    ]
@@ -0,0 +1,160 @@
+# 上传文件的内容寻址存储：按SHA-256存放在两级分片目录中，相同内容只存一份；
+# images字段保存blob id（读取时转换为URL），定期标记-清除没有被任何记录引用的blob
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.exceptions import CustomHTTPException
+from app.models.community import Comment, Post
+from app.models.content import EncyclopediaContent, Tutorial
+from app.models.media import ImageVariant
+from app.models.shop import Product
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# UPLOAD_DIR位于static目录下，通过/static挂载对外提供
+UPLOAD_URL = "/static/uploads"
+BLOB_DIR = "blobs"
+
+# blob id：内容的SHA-256十六进制 + 按文件头识别的扩展名（扩展名由内容决定，仍然是内容寻址）
+BLOB_ID = re.compile(r"^[0-9a-f]{64}\.[a-z0-9]+$")
+BLOB_REF = re.compile(r"[0-9a-f]{64}\.[a-z0-9]+")
+
+def blob_relative(blob_id: str) -> str:
+    return f"{BLOB_DIR}/{blob_id[:2]}/{blob_id[2:4]}/{blob_id}"
+
+def blob_path(blob_id: str) -> Path:
+    return Path(settings.UPLOAD_DIR) / blob_relative(blob_id)
+
+def blob_url(blob_id: str) -> str:
+    return f"{UPLOAD_URL}/{blob_relative(blob_id)}"
+
+def parse_blob_ref(value) -> Optional[str]:
+    """blob id或blob的URL，返回blob id；其他值返回None"""
+    if not isinstance(value, str):
+        return None
+    if BLOB_ID.match(value):
+        return value
+    prefix = f"{UPLOAD_URL}/{BLOB_DIR}/"
+    if value.startswith(prefix):
+        name = value.rsplit("/", 1)[-1]
+        if BLOB_ID.match(name) and value == blob_url(name):
+            return name
+    return None
+
+def resolve_images(value) -> List[str]:
+    """解析images字段（JSON文本）：blob id转换为URL，其他URL（站内静态图片、外部地址）保持不变"""
+    if not value:
+        return []
+    try:
+        images = json.loads(value)
+    except (TypeError, ValueError):
+        return []
+    return [blob_url(image) if BLOB_ID.match(image) else image for image in images if isinstance(image, str)]
+
+def normalize_images(values: Iterable[str]) -> List[str]:
+    """把提交的图片（上传返回的id或url）转换为保存到images字段的blob id，引用不存在的blob时报错"""
+    images = []
+    for value in values:
+        blob_id = parse_blob_ref(value)
+        if blob_id is None:
+            if isinstance(value, str) and value.startswith(UPLOAD_URL + "/"):
+                raise CustomHTTPException(status_code=400, detail="图片地址无效", error_code="INVALID_IMAGE")
+            images.append(value)
+            continue
+        if not blob_path(blob_id).is_file():
+            raise CustomHTTPException(status_code=400, detail="图片不存在，请重新上传", error_code="INVALID_IMAGE")
+        images.append(blob_id)
+    return images
+
+def store_blob(temp_path: Path, blob_id: str) -> bool:
+    """把写好的临时文件放入存储，返回是否已有相同内容（已有时删除临时文件，只刷新修改时间）"""
+    path = blob_path(blob_id)
+    if path.is_file():
+        os.unlink(temp_path)
+        # 修改时间作为最近上传时间，重新上传的未引用blob不会在宽限期内被清理
+        os.utime(path)
+        return True
+    path.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(temp_path, path)
+    return False
+
+# 可能引用blob的列：images字段保存blob id；头像、视频等保存URL，帖子、评论、百科、商品和教程的
+# 正文或描述中可能嵌入上传图片的URL（清理时扫描，迁移旧文件时改写）
+IMAGE_COLUMNS = (Product.images, Post.images, EncyclopediaContent.images)
+URL_COLUMNS = (
+    User.avatar, Tutorial.video_url, Tutorial.thumbnail_url,
+    Post.content, Comment.content, EncyclopediaContent.content, Product.description, Tutorial.description,
+)
+
+async def referenced_blobs(db: AsyncSession) -> Dict[str, int]:
+    """标记：统计每个blob被引用的次数"""
+    counts: Dict[str, int] = {}
+    # 文本列只读取含blob URL的行
+    patterns = [(column, "%.%") for column in IMAGE_COLUMNS]
+    patterns += [(column, f"%{UPLOAD_URL}/{BLOB_DIR}/%") for column in URL_COLUMNS]
+    for column, pattern in patterns:
+        result = await db.execute(select(column).where(column.like(pattern)))
+        for value in result.scalars():
+            for blob_id in BLOB_REF.findall(value or ""):
+                counts[blob_id] = counts.get(blob_id, 0) + 1
+    return counts
+
+def stored_blobs() -> Dict[str, Path]:
+    """存储目录中所有blob文件（不包括缩略图等变体和未完成的临时文件）"""
+    root = Path(settings.UPLOAD_DIR) / BLOB_DIR
+    if not root.is_dir():
+        return {}
+    return {path.name: path for path in root.glob("*/*/*") if BLOB_ID.match(path.name)}
+
+async def collect_garbage(db: AsyncSession, grace_seconds: int = 24 * 3600, dry_run: bool = False) -> dict:
+    """清除：删除没有被引用、且在宽限期内没有上传过的blob及其图片变体
+
+    宽限期用于保护刚上传、还没有保存到商品或帖子中的文件；同样超过宽限期的临时文件一并删除。
+    """
+    references = await referenced_blobs(db)
+    cutoff = time.time() - grace_seconds
+    removed: List[str] = []
+    freed = 0
+    for blob_id, path in stored_blobs().items():
+        if blob_id in references or path.stat().st_mtime > cutoff:
+            continue
+        removed.append(blob_id)
+        url = blob_url(blob_id)
+        variant_urls = (await db.scalars(
+            select(ImageVariant.url).where(ImageVariant.original_url == url, ImageVariant.url != url)
+        )).all()
+        files = [path] + [Path(settings.UPLOAD_DIR) / variant[len(UPLOAD_URL) + 1:] for variant in variant_urls]
+        for file in files:
+            if file.is_file():
+                freed += file.stat().st_size
+                if not dry_run:
+                    file.unlink()
+        if not dry_run:
+            await db.execute(delete(ImageVariant).where(ImageVariant.original_url == url))
+
+    temp_files = [
+        path for path in (Path(settings.UPLOAD_DIR) / BLOB_DIR).glob(".*.part")
+        if path.stat().st_mtime <= cutoff
+    ]
+    if not dry_run:
+        for path in temp_files:
+            path.unlink(missing_ok=True)
+        await db.commit()
+        if removed:
+            logger.info(f"清理未引用的blob {len(removed)} 个，释放 {freed} 字节")
+    return {
+        "referenced": len(references),
+        "removed": removed,
+        "freed_bytes": freed,
+        "temp_files": len(temp_files),
+    }
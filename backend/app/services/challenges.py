@@ -0,0 +1,297 @@
+# 挑战引擎：挑战的完成条件（requirements JSON）只编译一次为匹配规则；领域事件（见events.py）
+# 在同一事务flush结束时按(用户, 挑战, 周期)汇总，一条批量upsert累加用户挑战进度，回滚时一并撤销
+import json
+import logging
+import operator
+import time
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, case, event, func, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import CustomHTTPException
+from app.models.game import Challenge, UserChallenge
+from app.services.events import EVENTS, on_flush, record_event
+from app.services.leaderboard import period_start
+from app.services.points import award_points
+
+logger = logging.getLogger(__name__)
+
+# 每日、每周挑战按周期分别计算进度，其他挑战只有一个周期
+PERIODIC_TYPES = ("daily", "weekly")
+ONE_OFF_PERIOD = date(1970, 1, 1)
+
+# 规则缓存的最长时间（其他进程修改挑战后最迟在此时间后生效）
+RELOAD_SECONDS = 60
+
+# Session.info中本事务是否修改了挑战
+CHANGED_KEY = "challenges_changed"
+
+OPERATORS = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "in": lambda value, options: value in options,
+}
+
+def compile_condition(field: str, condition) -> Callable[[dict], bool]:
+    """编译单个字段的条件：直接给值表示相等，或 {"gte": 100} 等比较"""
+    if not isinstance(condition, dict):
+        return lambda attrs: attrs.get(field) == condition
+    checks = []
+    for name, expected in condition.items():
+        if name not in OPERATORS:
+            raise ValueError(f"不支持的比较: {name}")
+        checks.append((OPERATORS[name], expected))
+
+    def match(attrs: dict) -> bool:
+        value = attrs.get(field)
+        return value is not None and all(compare(value, expected) for compare, expected in checks)
+    return match
+
+def compile_requirements(text: Optional[str]) -> Optional[Tuple[str, int, Callable[[dict], bool]]]:
+    """编译完成条件，返回(事件, 目标次数, 匹配函数)；没有条件（由客户端上报完成的小游戏挑战）时返回None"""
+    if not text:
+        return None
+    spec = json.loads(text)
+    event_name = spec.get("event")
+    if event_name not in EVENTS:
+        raise ValueError(f"不支持的事件: {event_name}")
+    target = int(spec.get("count", 1))
+    if target < 1:
+        raise ValueError(f"目标次数无效: {target}")
+    conditions = [compile_condition(field, condition) for field, condition in (spec.get("where") or {}).items()]
+    return event_name, target, lambda attrs: all(condition(attrs) for condition in conditions)
+
+class ChallengeRule:
+    """编译后的挑战"""
+
+    def __init__(self, challenge):
+        self.id = challenge.id
+        self.title = challenge.title
+        self.description = challenge.description
+        self.type = challenge.type
+        self.category = challenge.category
+        self.points_reward = challenge.points_reward
+        self.start_date = challenge.start_date
+        self.end_date = challenge.end_date
+        self.event, self.target, self.predicate = compile_requirements(challenge.requirements) or (None, 1, None)
+
+    def period(self, at: datetime) -> Optional[date]:
+        """时间at所属的周期，不在挑战起止时间内时返回None"""
+        if (self.start_date and at < self.start_date) or (self.end_date and at >= self.end_date):
+            return None
+        return period_start(self.type, at) if self.type in PERIODIC_TYPES else ONE_OFF_PERIOD
+
+class ChallengeEngine:
+    """进行中挑战的规则缓存，按事件类型索引"""
+
+    def __init__(self):
+        self.rules: Dict[int, ChallengeRule] = {}
+        self._by_event: Dict[str, List[ChallengeRule]] = {}
+        self._loaded_at: Optional[float] = None
+        self._stats = {"loads": 0, "invalid_rules": 0, "events": 0, "increments": 0}
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def ensure_loaded(self, connection):
+        """规则未加载或已过期时从数据库编译（同步连接，可在flush事件中调用）"""
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < RELOAD_SECONDS:
+            return
+        rows = connection.execute(
+            select(
+                Challenge.id, Challenge.title, Challenge.description, Challenge.type, Challenge.category,
+                Challenge.points_reward, Challenge.requirements, Challenge.start_date, Challenge.end_date
+            ).where(Challenge.is_active == True).order_by(Challenge.id)
+        ).all()
+        rules, invalid = {}, 0
+        for row in rows:
+            try:
+                rules[row.id] = ChallengeRule(row)
+            except (ValueError, TypeError) as e:
+                invalid += 1
+                logger.warning(f"挑战 {row.id} 的完成条件无效: {e}")
+        by_event = defaultdict(list)
+        for rule in rules.values():
+            if rule.event is not None:
+                by_event[rule.event].append(rule)
+        self.rules, self._by_event = rules, dict(by_event)
+        self._loaded_at = time.monotonic()
+        self._stats["loads"] += 1
+        self._stats["invalid_rules"] = invalid
+
+    async def load(self, db: AsyncSession):
+        await db.run_sync(lambda session: self.ensure_loaded(session.connection()))
+
+    def increments(self, events: list) -> Dict[tuple, int]:
+        """事件汇总为 (用户, 挑战, 周期) -> 增量"""
+        totals = defaultdict(int)
+        for user_id, event_name, attrs, at in events:
+            for rule in self._by_event.get(event_name, ()):
+                period = rule.period(at)
+                if period is not None and rule.predicate(attrs):
+                    totals[(user_id, rule.id, period)] += 1
+        self._stats["events"] += len(events)
+        self._stats["increments"] += len(totals)
+        return totals
+
+    def active(self, now: datetime) -> List[Tuple[ChallengeRule, date]]:
+        """当前进行中的挑战及其当前周期"""
+        return [(rule, period) for rule in self.rules.values() if (period := rule.period(now)) is not None]
+
+    def metrics(self) -> dict:
+        return {"rules": len(self.rules), **self._stats}
+
+challenge_engine = ChallengeEngine()
+
+def _upsert_statement():
+    """累加进度（不超过目标次数），达到目标时标记完成"""
+    table = UserChallenge.__table__
+    stmt = sqlite_insert(table)
+    total = table.c.progress + stmt.excluded.progress
+    target = bindparam("target")
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.challenge_id, table.c.period_start],
+        set_={
+            "progress": func.min(total, target),
+            "is_completed": total >= target,
+            "completed_at": func.coalesce(table.c.completed_at, case((total >= target, stmt.excluded.updated_at))),
+            "updated_at": stmt.excluded.updated_at,
+        }
+    )
+
+_UPSERT = _upsert_statement()
+
+def apply_increments(connection, totals: Dict[tuple, int], now: datetime):
+    """批量写入进度增量（一条executemany）"""
+    if not totals:
+        return
+    rules = challenge_engine.rules
+    connection.execute(_UPSERT, [
+        {
+            "user_id": user_id,
+            "challenge_id": challenge_id,
+            "period_start": period,
+            "progress": min(count, rules[challenge_id].target),
+            "is_completed": count >= rules[challenge_id].target,
+            "completed_at": now if count >= rules[challenge_id].target else None,
+            "points_earned": 0,
+            "created_at": now,
+            "updated_at": now,
+            "target": rules[challenge_id].target,
+        }
+        for (user_id, challenge_id, period), count in totals.items()
+    ])
+
+@on_flush
+def _apply_events(connection, events: list):
+    challenge_engine.ensure_loaded(connection)
+    apply_increments(connection, challenge_engine.increments(events), datetime.now())
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session):
+    if session.info.pop(CHANGED_KEY, False):
+        challenge_engine.invalidate()
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session):
+    session.info.pop(CHANGED_KEY, None)
+
+def _challenge_changed(mapper, connection, target):
+    Session.object_session(target).info[CHANGED_KEY] = True
+
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(Challenge, _event, _challenge_changed)
+
+# 接口
+
+def challenge_not_found() -> CustomHTTPException:
+    return CustomHTTPException(status_code=404, detail="挑战不存在或不在进行中", error_code="CHALLENGE_NOT_FOUND")
+
+async def list_challenges(db: AsyncSession, user_id: Optional[int], now: Optional[datetime] = None) -> List[dict]:
+    """进行中的挑战；登录时附带当前周期的进度（一次按唯一索引的查询）"""
+    now = now or datetime.now()
+    await challenge_engine.load(db)
+    active = challenge_engine.active(now)
+    progress = {}
+    if user_id is not None and active:
+        result = await db.execute(
+            select(
+                UserChallenge.challenge_id, UserChallenge.period_start, UserChallenge.progress,
+                UserChallenge.is_completed, UserChallenge.points_earned, UserChallenge.reward_claimed_at
+            ).where(
+                UserChallenge.user_id == user_id,
+                UserChallenge.challenge_id.in_([rule.id for rule, _ in active]),
+                UserChallenge.period_start.in_({period for _, period in active})
+            )
+        )
+        progress = {(row.challenge_id, row.period_start): row for row in result}
+    items = []
+    for rule, period in active:
+        row = progress.get((rule.id, period))
+        items.append({
+            "id": rule.id,
+            "title": rule.title,
+            "description": rule.description,
+            "type": rule.type,
+            "category": rule.category,
+            "points_reward": rule.points_reward,
+            "progress": row.progress if row else 0,
+            "target": rule.target,
+            "is_completed": row.is_completed if row else False,
+            "reward_claimed": bool(row and (row.reward_claimed_at or row.points_earned)),
+            "end_date": rule.end_date
+        })
+    return items
+
+async def complete_challenge(
+    db: AsyncSession, user_id: int, challenge_id: int, now: Optional[datetime] = None
+) -> dict:
+    """领取挑战奖励，由调用方提交事务；没有完成条件的挑战（小游戏）由客户端上报完成"""
+    now = now or datetime.now()
+    await challenge_engine.load(db)
+    rule = challenge_engine.rules.get(challenge_id)
+    period = rule.period(now) if rule else None
+    if period is None:
+        raise challenge_not_found()
+    if rule.event is None:
+        totals = {(user_id, rule.id, period): rule.target}
+        await db.run_sync(lambda session: apply_increments(session.connection(), totals, now))
+
+    # 只有一个请求能写入领取时间，重复领取时不会重复加分和计入完成的挑战数；
+    # 增加reward_claimed_at之前领取的记录没有领取时间，由points_earned > 0排除
+    result = await db.execute(
+        update(UserChallenge)
+        .where(
+            UserChallenge.user_id == user_id,
+            UserChallenge.challenge_id == challenge_id,
+            UserChallenge.period_start == period,
+            UserChallenge.is_completed == True,
+            UserChallenge.reward_claimed_at.is_(None),
+            UserChallenge.points_earned == 0
+        )
+        .values(points_earned=rule.points_reward, reward_claimed_at=now, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        completed = await db.scalar(
+            select(UserChallenge.is_completed).where(
+                UserChallenge.user_id == user_id,
+                UserChallenge.challenge_id == challenge_id,
+                UserChallenge.period_start == period
+            )
+        )
+        if completed:
+            raise CustomHTTPException(status_code=400, detail="奖励已领取", error_code="REWARD_ALREADY_CLAIMED")
+        raise CustomHTTPException(status_code=400, detail="挑战尚未完成", error_code="CHALLENGE_NOT_COMPLETED")
+    total = await award_points(db, user_id, rule.points_reward, "challenge", at=now)
+    record_event(db, user_id, "challenge_completed", at=now, challenge_id=challenge_id)
+    return {"challenge_id": challenge_id, "points_earned": rule.points_reward, "total_points": total}
@@ -0,0 +1,152 @@
+# 签到服务：每人每年一行签到日历（每天一位，46字节），今天是否已签到为一次位运算，
+# 月签到天数为掩码后的popcount，连续天数为日历末尾连续1的位数
+from calendar import monthrange
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import CustomHTTPException
+from app.models.game import CheckinCalendar, UserGameProfile
+from app.services.events import record_event
+from app.services.points import award_points, get_game_profile
+
+# 一年最多366天
+CALENDAR_BYTES = 46
+EMPTY_CALENDAR = bytes(CALENDAR_BYTES)
+
+# 每次签到的积分，连续签到第n天额外奖励min(n - 1, MAX_STREAK_BONUS)
+CHECKIN_POINTS = 10
+MAX_STREAK_BONUS = 5
+
+def day_index(day: date) -> int:
+    """当年的第几天（从0开始）"""
+    return day.timetuple().tm_yday - 1
+
+def to_bits(days: Optional[bytes]) -> int:
+    return int.from_bytes(days or EMPTY_CALENDAR, "little")
+
+def to_bytes(bits: int) -> bytes:
+    return bits.to_bytes(CALENDAR_BYTES, "little")
+
+def is_checked(bits: int, day: date) -> bool:
+    return bool(bits >> day_index(day) & 1)
+
+@lru_cache(maxsize=64)
+def month_mask(year: int, month: int) -> int:
+    """该月各天对应位的掩码"""
+    first = day_index(date(year, month, 1))
+    return ((1 << monthrange(year, month)[1]) - 1) << first
+
+def month_days(bits: int, year: int, month: int) -> List[int]:
+    """该月已签到的日期（几号）"""
+    month_bits = (bits & month_mask(year, month)) >> day_index(date(year, month, 1))
+    days = []
+    while month_bits:
+        low = month_bits & -month_bits
+        days.append(low.bit_length())
+        month_bits ^= low
+    return days
+
+def month_total(bits: int, year: int, month: int) -> int:
+    return (bits & month_mask(year, month)).bit_count()
+
+def run_ending(bits: int, index: int) -> int:
+    """以第index位结尾的连续1的位数"""
+    if index < 0:
+        return 0
+    window = (1 << (index + 1)) - 1
+    gaps = ~bits & window
+    return index + 1 if gaps == 0 else index + 1 - gaps.bit_length()
+
+async def load_bits(db: AsyncSession, user_id: int, year: int) -> int:
+    days = await db.scalar(
+        select(CheckinCalendar.days).where(CheckinCalendar.user_id == user_id, CheckinCalendar.year == year)
+    )
+    return to_bits(days)
+
+async def streak_ending(db: AsyncSession, user_id: int, day: date, bits: Optional[int] = None) -> int:
+    """截至day（含）的连续签到天数；连续到年初时继续查上一年的日历"""
+    bits = await load_bits(db, user_id, day.year) if bits is None else bits
+    streak = 0
+    while True:
+        run = run_ending(bits, day_index(day))
+        streak += run
+        if run <= day_index(day):
+            return streak
+        day = date(day.year - 1, 12, 31)
+        bits = await load_bits(db, user_id, day.year)
+
+async def current_streak(db: AsyncSession, user_id: int, today: date, bits: int) -> int:
+    """当前连续天数：今天已签到时截至今天，否则截至昨天（今天仍可续上）"""
+    if is_checked(bits, today):
+        return await streak_ending(db, user_id, today, bits)
+    yesterday = today - timedelta(days=1)
+    return await streak_ending(db, user_id, yesterday, bits if yesterday.year == today.year else None)
+
+def already_checked_in() -> CustomHTTPException:
+    return CustomHTTPException(status_code=400, detail="今天已经签到过了", error_code="ALREADY_CHECKED_IN")
+
+async def check_in(db: AsyncSession, user_id: int, now: Optional[datetime] = None) -> dict:
+    """签到并发放积分，由调用方提交事务；今天已签到时返回400"""
+    now = now or datetime.now()
+    today = now.date()
+    await get_game_profile(db, user_id)
+    calendar = await db.scalar(
+        select(CheckinCalendar).where(CheckinCalendar.user_id == user_id, CheckinCalendar.year == today.year)
+    )
+    old = to_bits(calendar.days if calendar else None)
+    if is_checked(old, today):
+        raise already_checked_in()
+    new = old | 1 << day_index(today)
+    if calendar is None:
+        db.add(CheckinCalendar(user_id=user_id, year=today.year, days=to_bytes(new)))
+        try:
+            await db.flush()
+        except IntegrityError:
+            # 并发的另一个请求先创建了今年的日历
+            raise already_checked_in()
+    else:
+        # 比较并交换：并发的重复签到只有一个能更新成功
+        result = await db.execute(
+            update(CheckinCalendar)
+            .where(CheckinCalendar.id == calendar.id, CheckinCalendar.days == calendar.days)
+            .values(days=to_bytes(new), updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            raise already_checked_in()
+
+    streak = await streak_ending(db, user_id, today, new)
+    bonus = min(streak - 1, MAX_STREAK_BONUS)
+    total = await award_points(db, user_id, CHECKIN_POINTS + bonus, "checkin", at=now)
+    await db.execute(
+        update(UserGameProfile)
+        .where(UserGameProfile.user_id == user_id)
+        .values(consecutive_days=streak, last_checkin=now)
+    )
+    record_event(db, user_id, "checkin", at=now, consecutive_days=streak)
+    return {
+        "points_earned": CHECKIN_POINTS,
+        "bonus_points": bonus,
+        "consecutive_days": streak,
+        "total_points": total,
+        "month_total": month_total(new, today.year, today.month)
+    }
+
+async def get_calendar(db: AsyncSession, user_id: int, year: int, month: int, today: date) -> dict:
+    """某月的签到日历"""
+    bits = await load_bits(db, user_id, year)
+    today_bits = bits if year == today.year else await load_bits(db, user_id, today.year)
+    return {
+        "year": year,
+        "month": month,
+        "days": month_days(bits, year, month),
+        "month_total": month_total(bits, year, month),
+        "year_total": bits.bit_count(),
+        "checked_in_today": is_checked(today_bits, today),
+        "consecutive_days": await current_streak(db, user_id, today, today_bits)
+    }
@@ -0,0 +1,104 @@
+# 评论服务：一页顶层评论（或某条评论的直接回复）连同限定深度内的全部回复用一条递归CTE加载，
+# 按深度排序后一次遍历组装成树；SQL语句数与评论数量、层数无关
+from typing import List, Optional, Tuple
+
+from sqlalchemy import case, exists, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core.exceptions import CustomHTTPException
+from app.core.pagination import clamp_per_page, paginate
+from app.models.community import Comment, Post
+from app.models.user import User
+from app.services.likes import liked_ids, pending_likes
+
+# 每条顶层评论附带的回复层数（默认、最大）
+DEFAULT_REPLY_DEPTH = 3
+MAX_REPLY_DEPTH = 10
+
+async def load_comment_tree(
+    db: AsyncSession, root_ids: List[int], max_depth: int, user_id: Optional[int] = None
+) -> List[dict]:
+    """root_ids及其max_depth层以内的已发布回复，组装为树（保持root_ids的顺序，回复按时间正序）
+
+    到达层数上限的评论不再展开，has_more_replies表示是否还有回复（可用parent_id继续加载）。
+    """
+    if not root_ids:
+        return []
+    tree = select(Comment.id, Comment.parent_id, literal(0).label("depth")).where(
+        Comment.id.in_(root_ids)
+    ).cte("comment_tree", recursive=True)
+    tree = tree.union_all(
+        select(Comment.id, Comment.parent_id, tree.c.depth + 1)
+        .join(tree, Comment.parent_id == tree.c.id)
+        .where(tree.c.depth < max_depth, Comment.status == "published")
+    )
+    child = aliased(Comment)
+    rows = (await db.execute(
+        select(
+            Comment.id, Comment.parent_id, Comment.content, Comment.like_count, Comment.created_at,
+            Comment.author_id, User.username, User.avatar, tree.c.depth,
+            case(
+                (tree.c.depth == max_depth, exists().where(child.parent_id == Comment.id, child.status == "published")),
+                else_=False
+            ).label("has_more_replies")
+        )
+        .join(tree, tree.c.id == Comment.id)
+        .outerjoin(User, Comment.author_id == User.id)
+        .order_by(tree.c.depth, Comment.created_at, Comment.id)
+    )).all()
+
+    liked = await liked_ids(db, user_id, "comment", [row.id for row in rows]) if user_id is not None else None
+    nodes = {}
+    for row in rows:
+        node = {
+            "id": row.id,
+            "parent_id": row.parent_id,
+            "content": row.content,
+            "author": {
+                "id": row.author_id,
+                "username": row.username,
+                "avatar": row.avatar
+            },
+            "like_count": row.like_count + pending_likes(Comment, row.id),
+            "created_at": row.created_at,
+            "replies": [],
+            "has_more_replies": bool(row.has_more_replies)
+        }
+        if liked is not None:
+            node["liked"] = row.id in liked
+        nodes[row.id] = node
+        # 按深度排序，父评论一定已经处理
+        if row.depth:
+            nodes[row.parent_id]["replies"].append(node)
+    return [nodes[root_id] for root_id in root_ids if root_id in nodes]
+
+async def get_comment_page(
+    db: AsyncSession,
+    post_id: int,
+    parent_id: Optional[int] = None,
+    page: int = 1,
+    per_page: int = 20,
+    cursor: Optional[str] = None,
+    with_total: bool = False,
+    max_depth: int = DEFAULT_REPLY_DEPTH,
+    user_id: Optional[int] = None
+) -> Tuple[List[dict], Optional[int], Optional[str]]:
+    """按顶层评论（传入parent_id时为该评论的直接回复）分页，每条附带回复树，返回(评论树, 总数, 下一页游标)"""
+    if await db.scalar(select(Post.id).where(Post.id == post_id, Post.status == "published")) is None:
+        raise CustomHTTPException(status_code=404, detail="帖子不存在", error_code="POST_NOT_FOUND")
+    filters = [
+        Comment.post_id == post_id,
+        Comment.parent_id.is_(None) if parent_id is None else Comment.parent_id == parent_id,
+        Comment.status == "published"
+    ]
+    rows, total, next_cursor = await paginate(
+        db,
+        select(Comment.id, Comment.created_at).where(*filters),
+        Comment,
+        select(Comment.id).where(*filters),
+        page=page, per_page=clamp_per_page(per_page), cursor=cursor, with_total=with_total
+    )
+    max_depth = max(0, min(max_depth, MAX_REPLY_DEPTH))
+    items = await load_comment_tree(db, [row.id for row in rows], max_depth, user_id)
+    return items, total, next_cursor
@@ -0,0 +1,182 @@
+# 统计计数器服务：通过模型事件增量维护stats_counters表，读取为O(1)
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import select, update, func, event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.stats import StatsCounter
+from app.models.user import User
+from app.models.content import EncyclopediaContent, Tutorial
+from app.models.community import Post, Comment
+from app.models.shop import Product, Order
+
+logger = logging.getLogger(__name__)
+
+class CounterDefinition:
+    """计数器定义：统计某模型的全部行，或某字段等于指定值的行"""
+
+    def __init__(self, name: str, model, field: Optional[str] = None, value=None):
+        self.name = name
+        self.model = model
+        self.field = field
+        self.value = value
+
+    def matches(self, target) -> bool:
+        """判断对象当前是否计入该计数器"""
+        return self.field is None or getattr(target, self.field) == self.value
+
+    def count_query(self):
+        """构造校准用的计数标量子查询"""
+        query = select(func.count()).select_from(self.model)
+        if self.field is not None:
+            query = query.where(getattr(self.model, self.field) == self.value)
+        return query.scalar_subquery()
+
+COUNTERS = [
+    CounterDefinition("users", User),
+    CounterDefinition("users_inactive", User, "is_active", False),
+    CounterDefinition("encyclopedia", EncyclopediaContent),
+    CounterDefinition("tutorials", Tutorial),
+    CounterDefinition("posts", Post),
+    CounterDefinition("pending_posts", Post, "status", "pending"),
+    CounterDefinition("comments", Comment),
+    CounterDefinition("products", Product),
+    CounterDefinition("active_products", Product, "status", "available"),
+    CounterDefinition("orders", Order),
+    CounterDefinition("pending_orders", Order, "status", "pending"),
+]
+
+COUNTER_NAMES = [counter.name for counter in COUNTERS]
+
+_counters_by_model = defaultdict(list)
+for _counter in COUNTERS:
+    _counters_by_model[_counter.model].append(_counter)
+
+_DELTAS_KEY = "stats_counter_deltas"
+
+def _record_delta(target, name: str, delta: int):
+    """将增量暂存到会话中，在flush结束时统一写入"""
+    session = Session.object_session(target)
+    if session is None or not delta:
+        return
+    deltas = session.info.setdefault(_DELTAS_KEY, defaultdict(int))
+    deltas[name] += delta
+
+def _on_insert(mapper, connection, target):
+    for counter in _counters_by_model[mapper.class_]:
+        if counter.matches(target):
+            _record_delta(target, counter.name, 1)
+
+def _on_delete(mapper, connection, target):
+    for counter in _counters_by_model[mapper.class_]:
+        if counter.matches(target):
+            _record_delta(target, counter.name, -1)
+
+def _on_update(mapper, connection, target):
+    state = inspect(target)
+    for counter in _counters_by_model[mapper.class_]:
+        if counter.field is None:
+            continue
+        history = state.attrs[counter.field].history
+        if not history.deleted:
+            continue
+        was_counted = history.deleted[0] == counter.value
+        _record_delta(target, counter.name, int(counter.matches(target)) - int(was_counted))
+
+for _model in _counters_by_model:
+    event.listen(_model, "after_insert", _on_insert)
+    event.listen(_model, "after_delete", _on_delete)
+    event.listen(_model, "after_update", _on_update)
+
+@event.listens_for(Session, "before_flush")
+def _reset_deltas(session, flush_context, instances):
+    session.info.pop(_DELTAS_KEY, None)
+
+@event.listens_for(Session, "after_flush")
+def _apply_deltas(session, flush_context):
+    """在同一事务中批量更新计数器，回滚时一并撤销"""
+    deltas = session.info.pop(_DELTAS_KEY, None)
+    if not deltas:
+        return
+    connection = session.connection()
+    table = StatsCounter.__table__
+    for name, delta in deltas.items():
+        if delta:
+            connection.execute(
+                update(table)
+                .where(table.c.name == name)
+                .values(value=table.c.value + delta, updated_at=func.now())
+            )
+
+async def get_counters(db: AsyncSession, names: Iterable[str] = None) -> Dict[str, int]:
+    """读取计数器（O(1)，不扫描业务表）"""
+    names = list(names or COUNTER_NAMES)
+    rows = await db.execute(
+        select(StatsCounter.name, StatsCounter.value).where(StatsCounter.name.in_(names))
+    )
+    counters = {row.name: row.value for row in rows}
+    if len(counters) < len(names):
+        # 计数器尚未初始化（校准任务未运行），直接统计，不在只读会话中写入
+        counters = await count_actual(db)
+    return {name: counters[name] for name in names}
+
+async def count_actual(db: AsyncSession) -> Dict[str, int]:
+    """实际统计全部计数器的值（一条聚合查询）"""
+    row = (await db.execute(
+        select(*(counter.count_query().label(counter.name) for counter in COUNTERS))
+    )).one()
+    return dict(row._mapping)
+
+async def reconcile_counters(db: AsyncSession) -> Dict[str, int]:
+    """用实际COUNT结果校准全部计数器"""
+    actual = await count_actual(db)
+
+    existing = {
+        counter.name: counter
+        for counter in (await db.scalars(select(StatsCounter))).all()
+    }
+    for name, value in actual.items():
+        if name in existing:
+            if existing[name].value != value:
+                logger.info(f"计数器校准: {name} {existing[name].value} -> {value}")
+                existing[name].value = value
+        else:
+            db.add(StatsCounter(name=name, value=value))
+    return actual
+
+_reconcile_task: Optional[asyncio.Task] = None
+
+async def _reconcile_loop(interval: int):
+    """定期校准计数器"""
+    from app.database import AsyncSessionLocal
+
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                await reconcile_counters(db)
+                await db.commit()
+        except Exception as e:
+            logger.error(f"计数器校准失败: {type(e).__name__} - {str(e)}")
+        await asyncio.sleep(interval)
+
+def start_reconcile_task():
+    """启动定期校准任务（应用启动时调用，首次立即执行）"""
+    global _reconcile_task
+    if settings.STATS_RECONCILE_INTERVAL > 0 and _reconcile_task is None:
+        _reconcile_task = asyncio.create_task(_reconcile_loop(settings.STATS_RECONCILE_INTERVAL))
+
+async def stop_reconcile_task():
+    """停止定期校准任务（应用关闭时调用）"""
+    global _reconcile_task
+    if _reconcile_task is not None:
+        _reconcile_task.cancel()
+        try:
+            await _reconcile_task
+        except asyncio.CancelledError:
+            pass
+        _reconcile_task = None
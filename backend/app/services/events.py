@@ -0,0 +1,107 @@
+# 领域事件：完成教程、发布帖子、订单支付等由模型变化产生，签到、积分变化等由业务代码记录到会话；
+# 在同一事务flush结束时交给挑战引擎等处理（回滚时一并撤销），提交后再交给成就引擎等异步处理
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models.community import Post
+from app.models.content import LearningProgress
+from app.models.shop import Order
+
+EVENTS = ("tutorial_completed", "post_created", "order_paid", "checkin", "points_awarded", "challenge_completed")
+
+# Session.info中待处理、已处理待提交的事件
+PENDING_KEY = "domain_events"
+COMMITTED_KEY = "domain_events_committed"
+
+# 事件处理函数：flush结束时 handler(connection, events)，提交后 handler(events)
+_flush_handlers: List[Callable] = []
+_commit_handlers: List[Callable] = []
+
+def on_flush(handler: Callable) -> Callable:
+    _flush_handlers.append(handler)
+    return handler
+
+def on_commit(handler: Callable) -> Callable:
+    _commit_handlers.append(handler)
+    return handler
+
+def record_event(session, user_id: int, name: str, at: Optional[datetime] = None, **attrs):
+    """记录领域事件，在本事务flush结束（或提交）时处理；session可为Session或AsyncSession"""
+    session.info.setdefault(PENDING_KEY, []).append((user_id, name, attrs, at or datetime.now()))
+
+def _dispatch(session: Session):
+    events = session.info.pop(PENDING_KEY, None)
+    if not events:
+        return
+    if _flush_handlers:
+        connection = session.connection()
+        for handler in _flush_handlers:
+            handler(connection, events)
+    session.info.setdefault(COMMITTED_KEY, []).extend(events)
+
+@event.listens_for(Session, "after_flush")
+def _dispatch_after_flush(session: Session, flush_context):
+    _dispatch(session)
+
+@event.listens_for(Session, "before_commit")
+def _dispatch_before_commit(session: Session):
+    # 记录事件后没有再flush的情况（提交时没有需要flush的对象就不会触发after_flush）
+    _dispatch(session)
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_after_commit(session: Session):
+    events = session.info.pop(COMMITTED_KEY, None)
+    if events:
+        for handler in _commit_handlers:
+            handler(events)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_events(session: Session):
+    session.info.pop(PENDING_KEY, None)
+    session.info.pop(COMMITTED_KEY, None)
+
+# 模型变化产生的事件
+
+def _post_inserted(mapper, connection, target):
+    if target.status == "published":
+        record_event(Session.object_session(target), target.author_id, "post_created", category=target.category)
+
+def _post_updated(mapper, connection, target):
+    # 审核通过（草稿、待审核 -> 已发布）
+    history = inspect(target).attrs.status.history
+    if target.status == "published" and history.deleted and history.deleted[0] in ("draft", "pending"):
+        record_event(Session.object_session(target), target.author_id, "post_created", category=target.category)
+
+def _progress_changed(mapper, connection, target):
+    history = inspect(target).attrs.is_completed.history
+    if target.is_completed and history.added and not any(history.deleted):
+        record_event(Session.object_session(target), target.user_id, "tutorial_completed", tutorial_id=target.tutorial_id)
+
+PAID_STATUSES = ("paid", "shipped", "completed")
+
+def is_paid(status: str, payment_status: str) -> bool:
+    return status in PAID_STATUSES or payment_status == "paid"
+
+def _order_inserted(mapper, connection, target):
+    if is_paid(target.status, target.payment_status):
+        record_event(Session.object_session(target), target.user_id, "order_paid", total_amount=target.total_amount)
+
+def _order_updated(mapper, connection, target):
+    state = inspect(target)
+    status, payment = state.attrs.status.history, state.attrs.payment_status.history
+    was_paid = is_paid(
+        status.deleted[0] if status.deleted else target.status,
+        payment.deleted[0] if payment.deleted else target.payment_status
+    )
+    if not was_paid and is_paid(target.status, target.payment_status):
+        record_event(Session.object_session(target), target.user_id, "order_paid", total_amount=target.total_amount)
+
+event.listen(Post, "after_insert", _post_inserted)
+event.listen(Post, "after_update", _post_updated)
+event.listen(LearningProgress, "after_insert", _progress_changed)
+event.listen(LearningProgress, "after_update", _progress_changed)
+event.listen(Order, "after_insert", _order_inserted)
+event.listen(Order, "after_update", _order_updated)
@@ -0,0 +1,126 @@
+# 帖子信息流：热度分hot_score预先计算并与status、is_pinned（、category）建联合索引，
+# "热门"、"最新"都按索引顺序读取一页，不在每次请求时对全部帖子计算并排序。
+# "本周最热"是滑动的7天窗口，点赞数排序无法与时间范围共用一个索引：按(status, (category,) created_at)
+# 索引只读取最近7天的帖子，再对这部分排序（排序量随一周的发帖数增长，与帖子总数无关）。
+# 热度分 = log10(互动数) + 发布时间 / HOT_SCORE_DECAY_SECONDS（互动数每增加10倍相当于晚发布这么久），
+# 随时间的衰减体现在新帖的时间项更大，已有帖子的分数不必定期重算；点赞、评论数变化时增量更新
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import Float, event, func, inspect, select, type_coerce, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import CustomHTTPException
+from app.core.pagination import paginate, paginate_by
+from app.models.community import Post
+
+FEEDS = ("new", "hot", "top")
+
+# 互动数中评论的权重（点赞为1）
+COMMENT_WEIGHT = 2
+# 互动数相差10倍相当于发布时间相差的秒数
+HOT_SCORE_DECAY_SECONDS = 45000
+# 时间项的起点（julianday），使分数保持在较小的范围
+HOT_SCORE_EPOCH = "2024-01-01"
+# "本周最热"的时间范围
+TOP_WINDOW = timedelta(days=7)
+
+# 单条UPDATE的最大id数
+REFRESH_BATCH_SIZE = 500
+
+# Session.info中本事务需要重算热度分的帖子id
+DIRTY_KEY = "hot_score_dirty"
+
+def hot_score_expression(table=Post.__table__):
+    """热度分的SQL表达式（由数据库计算，写入和校准使用同一公式）"""
+    engagement = table.c.like_count + COMMENT_WEIGHT * table.c.comment_count
+    age = (func.julianday(table.c.created_at) - func.julianday(HOT_SCORE_EPOCH)) * 86400
+    return type_coerce(func.log10(func.max(engagement, 1)) + age / HOT_SCORE_DECAY_SECONDS, Float)
+
+async def refresh_hot_scores(db, post_ids: Optional[Iterable[int]] = None) -> int:
+    """重算指定帖子（None为与公式不一致的全部帖子）的热度分，返回更新的行数；由调用方提交事务"""
+    table = Post.__table__
+    score = hot_score_expression(table)
+    # 热度分不算内容修改，保持updated_at不变
+    values = {"hot_score": score, "updated_at": table.c.updated_at}
+    if post_ids is None:
+        result = await db.execute(update(table).where(table.c.hot_score != score).values(values))
+        return result.rowcount
+    ids = list(post_ids)
+    updated = 0
+    for i in range(0, len(ids), REFRESH_BATCH_SIZE):
+        result = await db.execute(update(table).where(table.c.id.in_(ids[i:i + REFRESH_BATCH_SIZE])).values(values))
+        updated += result.rowcount
+    return updated
+
+async def refresh_after_counts(db, model, ids: List[int]):
+    """计数缓冲批量写入点赞数后重算这些帖子的热度分"""
+    if model is Post:
+        await refresh_hot_scores(db, ids)
+
+# ORM写入帖子（发布、修改点赞或评论数）时在同一事务中重算
+
+def _mark_dirty(target):
+    Session.object_session(target).info.setdefault(DIRTY_KEY, set()).add(target.id)
+
+def _post_inserted(mapper, connection, target):
+    _mark_dirty(target)
+
+def _post_updated(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[name].history.deleted for name in ("like_count", "comment_count", "created_at")):
+        _mark_dirty(target)
+
+event.listen(Post, "after_insert", _post_inserted)
+event.listen(Post, "after_update", _post_updated)
+
+@event.listens_for(Session, "after_flush")
+def _refresh_after_flush(session: Session, flush_context):
+    post_ids = session.info.pop(DIRTY_KEY, None)
+    if post_ids:
+        table = Post.__table__
+        session.connection().execute(
+            update(table).where(table.c.id.in_(list(post_ids)))
+            .values(hot_score=hot_score_expression(table), updated_at=table.c.updated_at)
+        )
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session: Session):
+    session.info.pop(DIRTY_KEY, None)
+
+async def get_feed(
+    db: AsyncSession,
+    query,
+    filters: list,
+    feed: str = "new",
+    page: int = 1,
+    per_page: int = 20,
+    cursor: Optional[str] = None,
+    with_total: bool = False,
+    now: Optional[datetime] = None
+) -> Tuple[list, Optional[int], Optional[str]]:
+    """按信息流排序分页帖子，返回(当前页行, 总数, 下一页游标)
+
+    new：按发布时间倒序；hot：置顶在前，再按热度分倒序（均按索引顺序读取）；
+    top：最近7天内按点赞数倒序（按发布时间索引范围读取一周的帖子后排序）。
+    query须包含Post.id、created_at、is_pinned、hot_score、like_count列。
+    """
+    if feed not in FEEDS:
+        raise CustomHTTPException(status_code=400, detail="不支持的排序方式", error_code="INVALID_FEED")
+    if feed == "new":
+        return await paginate(
+            db, query.where(*filters), Post, select(Post.id).where(*filters),
+            page=page, per_page=per_page, cursor=cursor, with_total=with_total
+        )
+    if feed == "hot":
+        columns = [Post.is_pinned, Post.hot_score, Post.id]
+    else:
+        # 起点取整到小时，同一小时内的请求共用总数缓存
+        since = ((now or datetime.now()) - TOP_WINDOW).replace(minute=0, second=0, microsecond=0)
+        filters = [*filters, Post.created_at >= since]
+        columns = [Post.like_count, Post.id]
+    return await paginate_by(
+        db, query.where(*filters), columns, select(Post.id).where(*filters),
+        page=page, per_page=per_page, cursor=cursor, with_total=with_total
+    )
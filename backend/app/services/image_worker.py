@@ -0,0 +1,55 @@
+# 图片变体生成（在进程池的工作进程中执行，只依赖Pillow，不导入应用其他模块）
+from pathlib import Path
+from typing import List, Sequence
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+WEBP = "webp"
+
+def generate_variants(source: str, widths: Sequence[int], quality: int) -> List[dict]:
+    """生成缩略图和WebP版本，返回包括原图在内的各版本信息
+
+    每个小于原图宽度的目标宽度生成一份WebP和一份原格式（有透明通道为PNG，否则为JPEG）的缩略图，
+    另外生成一份原尺寸的WebP。体积不小于原图的版本直接丢弃。动图不处理，只记录原图。
+    """
+    source_path = Path(source)
+    original_size = source_path.stat().st_size
+    with Image.open(source_path) as opened:
+        original_format = (opened.format or "").lower()
+        if getattr(opened, "is_animated", False):
+            return [{
+                "path": str(source_path), "width": opened.width, "height": opened.height,
+                "format": original_format, "size": original_size
+            }]
+        # 浏览器按EXIF方向显示原图，尺寸以旋转后的为准
+        image = ImageOps.exif_transpose(opened)
+
+    variants = [{
+        "path": str(source_path), "width": image.width, "height": image.height,
+        "format": original_format, "size": original_size
+    }]
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    image = image.convert("RGBA" if has_alpha else "RGB")
+    fallback_format = "png" if has_alpha else "jpeg"
+
+    targets = sorted({width for width in widths if width < image.width} | {image.width})
+    for width in targets:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for fmt in ([WEBP] if width == image.width else [WEBP, fallback_format]):
+            path = source_path.with_name(f"{source_path.stem}_{width}.{'jpg' if fmt == 'jpeg' else fmt}")
+            if fmt == WEBP:
+                resized.save(path, "WEBP", quality=quality, method=4)
+            elif fmt == "jpeg":
+                resized.save(path, "JPEG", quality=quality, optimize=True, progressive=True)
+            else:
+                resized.save(path, "PNG", optimize=True)
+            size = path.stat().st_size
+            if size >= original_size:
+                path.unlink()
+                continue
+            variants.append({"path": str(path), "width": width, "height": height, "format": fmt, "size": size})
+    return variants
@@ -0,0 +1,163 @@
+# 图片变体服务：上传的图片在进程池中生成缩略图和WebP版本，列表接口按显示宽度选用最小的合适版本
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database import AsyncSessionLocal
+from app.models.media import ImageVariant
+from app.services.image_worker import WEBP, Image, generate_variants
+from app.services.blobs import UPLOAD_URL
+
+logger = logging.getLogger(__name__)
+
+class ImagePipeline:
+    """管理生成图片变体的进程池和后台任务"""
+
+    def __init__(self, workers: int, widths: Sequence[int], quality: int):
+        self.workers = workers
+        self.widths = tuple(widths)
+        self.quality = quality
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._stats = {"generated": 0, "failed": 0, "variants": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return Image is not None and self.workers > 0
+
+    def start(self):
+        if self.enabled and self._executor is None:
+            # spawn启动的工作进程只导入image_worker，不继承应用的事件循环、线程和数据库连接
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+
+    async def stop(self):
+        """等待进行中的任务完成并关闭进程池"""
+        await self.wait()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def schedule(self, url: str) -> Optional[asyncio.Task]:
+        """为上传目录中的图片安排生成变体，立即返回（不等待生成完成）"""
+        if not self.enabled:
+            return None
+        self.start()
+        task = asyncio.create_task(self._process(url))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def wait(self):
+        """等待所有进行中的任务完成"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def _process(self, url: str):
+        path = upload_path(url)
+        if path is None:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            variants = await loop.run_in_executor(
+                self._executor, generate_variants, str(path), self.widths, self.quality
+            )
+            async with AsyncSessionLocal() as db:
+                await save_variants(db, url, variants)
+                await db.commit()
+        except Exception as e:
+            self._stats["failed"] += 1
+            logger.warning(f"生成图片变体失败: {url} - {type(e).__name__} - {str(e)}")
+            return
+        self._stats["generated"] += 1
+        self._stats["variants"] += len(variants) - 1
+
+    def metrics(self) -> dict:
+        return {"enabled": self.enabled, "workers": self.workers, "pending": len(self._tasks), **self._stats}
+
+def upload_path(url: str) -> Optional[Path]:
+    """上传文件的URL对应的磁盘路径（不在上传目录中的URL返回None）"""
+    if not url.startswith(UPLOAD_URL + "/"):
+        return None
+    relative = url[len(UPLOAD_URL) + 1:]
+    if ".." in relative.split("/"):
+        return None
+    path = Path(settings.UPLOAD_DIR) / relative
+    return path if path.is_file() else None
+
+async def save_variants(db: AsyncSession, original_url: str, variants: List[dict]):
+    """记录图片的各版本（替换已有记录）"""
+    base_url = original_url.rsplit("/", 1)[0]
+    await db.execute(delete(ImageVariant).where(ImageVariant.original_url == original_url))
+    db.add_all([
+        ImageVariant(
+            original_url=original_url,
+            url=f"{base_url}/{os.path.basename(variant['path'])}",
+            width=variant["width"],
+            height=variant["height"],
+            format=variant["format"],
+            size=variant["size"]
+        )
+        for variant in variants
+    ])
+
+async def load_variants(db: AsyncSession, urls: Iterable[str]) -> Dict[str, List[ImageVariant]]:
+    """一次查询取出多张图片的各版本，按原图URL分组"""
+    urls = {url for url in urls if isinstance(url, str) and url.startswith(UPLOAD_URL + "/")}
+    if not urls:
+        return {}
+    result = await db.execute(select(ImageVariant).where(ImageVariant.original_url.in_(urls)))
+    grouped: Dict[str, List[ImageVariant]] = {}
+    for variant in result.scalars():
+        grouped.setdefault(variant.original_url, []).append(variant)
+    return grouped
+
+def _smallest_adequate(candidates: List[ImageVariant], width: int) -> Optional[ImageVariant]:
+    """宽度不小于width的最小版本；都比width小时取最大的"""
+    if not candidates:
+        return None
+    adequate = [variant for variant in candidates if variant.width >= width]
+    if adequate:
+        return min(adequate, key=lambda variant: (variant.width, variant.size))
+    return max(candidates, key=lambda variant: variant.width)
+
+def pick_variant(url: str, variants: Dict[str, List[ImageVariant]], width: int) -> dict:
+    """为显示宽度width选择图片版本：url为原格式，webp为WebP版本（前端用<picture>选择）"""
+    candidates = variants.get(url)
+    if not candidates:
+        return {"url": url, "webp": None, "width": None, "height": None}
+    fallback = _smallest_adequate([variant for variant in candidates if variant.format != WEBP], width)
+    webp = _smallest_adequate([variant for variant in candidates if variant.format == WEBP], width)
+    return {
+        "url": fallback.url if fallback else url,
+        "webp": webp.url if webp else None,
+        "width": fallback.width if fallback else None,
+        "height": fallback.height if fallback else None
+    }
+
+async def attach_thumbnails(db: AsyncSession, items: List[dict], width: int, field: str = "images"):
+    """为列表项添加thumbnails字段（与images一一对应），原图URL保持不变"""
+    variants = await load_variants(db, (url for item in items for url in item[field]))
+    for item in items:
+        item["thumbnails"] = [pick_variant(url, variants, width) for url in item[field]]
+
+image_pipeline = ImagePipeline(
+    settings.IMAGE_WORKERS, settings.IMAGE_VARIANT_WIDTHS, settings.IMAGE_QUALITY
+)
+
+def schedule_variants(url: str) -> Optional[asyncio.Task]:
+    """上传图片后调用，在后台生成变体"""
+    return image_pipeline.schedule(url)
+
+async def stop_image_pipeline():
+    """等待进行中的变体生成并关闭进程池（应用关闭时调用）"""
+    await image_pipeline.stop()
@@ -0,0 +1,181 @@
+# 排行榜服务：总榜、周榜、日榜保存在内存中的顺序统计结构里，取前N名、查名次和前后名次均为O(log n)；
+# 启动时从数据库重建，积分变化在事务提交后更新（每个进程各自维护，启动时重建）
+import logging
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.ranking import RankedKeys
+from app.models.game import PointsRecord
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = ("all", "weekly", "daily")
+
+# 键 = 用户id - 积分 << 32：按键升序即按积分降序、同分按用户id升序，用户id可由低32位还原
+SCORE_SHIFT = 32
+USER_MASK = (1 << SCORE_SHIFT) - 1
+
+# Session.info中待提交后更新排行榜的积分变化
+PENDING_KEY = "leaderboard_updates"
+
+def encode(score: int, user_id: int) -> int:
+    return user_id - (score << SCORE_SHIFT)
+
+class Leaderboard:
+    """单个时间窗口的排行榜"""
+
+    def __init__(self, scores: Optional[Dict[int, int]] = None):
+        self.scores: Dict[int, int] = dict(scores or {})
+        self._keys = RankedKeys(encode(score, user_id) for user_id, score in self.scores.items())
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def score(self, user_id: int) -> Optional[int]:
+        return self.scores.get(user_id)
+
+    def set(self, user_id: int, score: int):
+        old = self.scores.get(user_id)
+        if old == score:
+            return
+        if old is not None:
+            self._keys.remove(encode(old, user_id))
+        self.scores[user_id] = score
+        self._keys.add(encode(score, user_id))
+
+    def add(self, user_id: int, points: int):
+        self.set(user_id, self.scores.get(user_id, 0) + points)
+
+    def discard(self, user_id: int):
+        score = self.scores.pop(user_id, None)
+        if score is not None:
+            self._keys.remove(encode(score, user_id))
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """名次（从1开始，同分同名次），不在榜上时返回None"""
+        score = self.scores.get(user_id)
+        if score is None:
+            return None
+        return self._keys.index(encode(score, 0)) + 1
+
+    def entries(self, start: int, stop: int) -> List[dict]:
+        """按排序位置[start, stop)取榜单条目"""
+        entries = []
+        for key in self._keys.slice(start, stop):
+            user_id = key & USER_MASK
+            score = self.scores[user_id]
+            if entries and entries[-1]["points"] == score:
+                rank = entries[-1]["rank"]
+            else:
+                rank = self._keys.index(encode(score, 0)) + 1
+            entries.append({"rank": rank, "user_id": user_id, "points": score})
+        return entries
+
+    def top(self, limit: int, offset: int = 0) -> List[dict]:
+        return self.entries(offset, offset + limit)
+
+    def around(self, user_id: int, radius: int) -> List[dict]:
+        """用户及其前后各radius名"""
+        score = self.scores.get(user_id)
+        if score is None:
+            return []
+        position = self._keys.index(encode(score, user_id))
+        return self.entries(position - radius, position + radius + 1)
+
+def period_start(window: str, now: datetime) -> date:
+    """日榜、周榜（周一开始）当前周期的第一天"""
+    today = now.date()
+    return today - timedelta(days=today.weekday()) if window == "weekly" else today
+
+class LeaderboardService:
+    """管理各时间窗口的排行榜，日榜、周榜进入新周期时从空榜开始"""
+
+    def __init__(self):
+        self.boards: Dict[str, Leaderboard] = {window: Leaderboard() for window in WINDOWS}
+        self._periods: Dict[str, date] = {}
+        # 已禁用的用户：之后的积分变化不再计入任何榜单
+        self.disabled: Set[int] = set()
+        self._stats = {"rebuilds": 0, "last_rebuild_ms": None, "updates": 0}
+
+    def board(self, window: str, now: Optional[datetime] = None) -> Leaderboard:
+        if window == "all":
+            return self.boards[window]
+        start = period_start(window, now or datetime.now())
+        if self._periods.get(window) != start:
+            self._periods[window] = start
+            self.boards[window] = Leaderboard()
+        return self.boards[window]
+
+    def record(self, user_id: int, points: int, at: datetime):
+        """积分变化（事务提交后调用），已禁用的用户忽略"""
+        if user_id in self.disabled:
+            return
+        self.boards["all"].add(user_id, points)
+        for window in ("weekly", "daily"):
+            board = self.board(window)
+            if period_start(window, at) == self._periods[window]:
+                board.add(user_id, points)
+        self._stats["updates"] += 1
+
+    def update_user(self, user_id: int, points: int, active: bool = True):
+        """用户新增、启用或禁用（提交后调用），禁用的用户不出现在任何榜单上"""
+        if active:
+            self.disabled.discard(user_id)
+            self.boards["all"].set(user_id, points)
+        else:
+            self.disabled.add(user_id)
+            self.remove_user(user_id)
+
+    def remove_user(self, user_id: int):
+        for board in self.boards.values():
+            board.discard(user_id)
+
+    async def rebuild(self, db: AsyncSession):
+        """从数据库重建：总榜取User.points，日榜、周榜汇总当前周期的积分流水"""
+        started = time.perf_counter()
+        now = datetime.now()
+        result = await db.execute(select(User.id, User.points).where(User.is_active == True))
+        boards = {"all": Leaderboard(dict(result.all()))}
+        disabled = set((await db.scalars(select(User.id).where(User.is_active == False))).all())
+        periods = {}
+        for window in ("weekly", "daily"):
+            start = period_start(window, now)
+            result = await db.execute(
+                select(PointsRecord.user_id, func.sum(PointsRecord.points))
+                .join(User, User.id == PointsRecord.user_id)
+                .where(
+                    PointsRecord.created_at >= datetime.combine(start, datetime.min.time()),
+                    User.is_active == True
+                )
+                .group_by(PointsRecord.user_id)
+            )
+            boards[window] = Leaderboard(dict(result.all()))
+            periods[window] = start
+        self.boards, self._periods, self.disabled = boards, periods, disabled
+        self._stats["rebuilds"] += 1
+        self._stats["last_rebuild_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"排行榜重建完成：{len(boards['all'])} 名用户，耗时 {self._stats['last_rebuild_ms']}ms")
+
+    def metrics(self) -> dict:
+        return {**{f"{window}_users": len(self.board(window)) for window in WINDOWS}, **self._stats}
+
+leaderboards = LeaderboardService()
+
+def queue_update(db: AsyncSession, user_id: int, points: int, at: datetime):
+    """记录待更新的积分变化，事务提交后才更新排行榜（回滚时丢弃）"""
+    db.info.setdefault(PENDING_KEY, []).append((user_id, points, at))
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session: Session):
+    for user_id, points, at in session.info.pop(PENDING_KEY, ()):
+        leaderboards.record(user_id, points, at)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session):
+    session.info.pop(PENDING_KEY, None)
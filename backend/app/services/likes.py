@@ -0,0 +1,121 @@
+# 点赞服务：likes表 (user_id, target_type, target_id) 唯一，点赞/取消点赞是幂等的单条INSERT/DELETE；
+# 列表页用一条IN查询判断当前用户点赞了哪些对象；like_count的增减在事务提交后进入缓冲，与浏览数一起批量写回
+from collections import defaultdict
+from typing import Dict, Iterable, Set
+
+from sqlalchemy import delete, event, func, literal, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.exceptions import CustomHTTPException
+from app.models.community import Comment, Like, Post
+from app.models.content import Tutorial
+from app.services.feed import refresh_after_counts
+from app.services.views import ViewCounter, buffered_counters
+
+TARGETS = {"post": Post, "comment": Comment, "tutorial": Tutorial}
+
+# 批量查询是否已点赞时一次最多的对象数
+MAX_LOOKUP_IDS = 100
+
+# Session.info中本事务的点赞数增量：模型 -> id -> 增量
+DELTAS_KEY = "like_count_deltas"
+
+like_counter = ViewCounter(
+    TARGETS.values(),
+    flush_threshold=settings.LIKE_COUNT_FLUSH_THRESHOLD,
+    column="like_count",
+    on_applied=refresh_after_counts
+)
+buffered_counters.append(like_counter)
+
+def get_target_model(target_type: str):
+    model = TARGETS.get(target_type)
+    if model is None:
+        raise CustomHTTPException(status_code=400, detail="不支持的点赞对象", error_code="INVALID_TARGET_TYPE")
+    return model
+
+async def set_like(db: AsyncSession, user_id: int, target_type: str, target_id: int, liked: bool) -> dict:
+    """点赞或取消点赞（重复操作不改变状态），返回当前状态和点赞数；由调用方提交事务
+
+    状态变化时只执行一条语句（点赞时从已发布的对象INSERT ... SELECT，RETURNING带回点赞数），
+    未变化时再查询对象是否存在。
+    """
+    model = get_target_model(target_type)
+    like_count = select(model.like_count).where(model.id == target_id).scalar_subquery()
+    if liked:
+        statement = sqlite_insert(Like).from_select(
+            ["user_id", "target_type", "target_id"],
+            select(literal(user_id), literal(target_type), model.id).where(
+                model.id == target_id, model.status == "published"
+            )
+        ).on_conflict_do_nothing(index_elements=[Like.user_id, Like.target_type, Like.target_id])
+    else:
+        statement = delete(Like).where(
+            Like.user_id == user_id, Like.target_type == target_type, Like.target_id == target_id
+        )
+    row = (await db.execute(statement.returning(like_count.label("like_count")))).one_or_none()
+
+    delta = 0
+    if row is not None:
+        delta = 1 if liked else -1
+        deltas = db.info.setdefault(DELTAS_KEY, defaultdict(lambda: defaultdict(int)))
+        deltas[model][target_id] += delta
+    else:
+        row = (await db.execute(
+            select(model.like_count).where(model.id == target_id, model.status == "published")
+        )).one_or_none()
+        if row is None:
+            raise CustomHTTPException(status_code=404, detail="点赞对象不存在", error_code="TARGET_NOT_FOUND")
+    return {
+        "liked": liked,
+        "changed": delta != 0,
+        "like_count": row.like_count + like_counter.pending(model, target_id) + delta
+    }
+
+async def liked_ids(db: AsyncSession, user_id: int, target_type: str, target_ids: Iterable[int]) -> Set[int]:
+    """target_ids中当前用户已点赞的id（一条使用唯一索引的IN查询）"""
+    get_target_model(target_type)
+    target_ids = list(set(target_ids))
+    if not target_ids:
+        return set()
+    result = await db.scalars(
+        select(Like.target_id).where(
+            Like.user_id == user_id, Like.target_type == target_type, Like.target_id.in_(target_ids)
+        )
+    )
+    return set(result.all())
+
+def pending_likes(model, obj_id: int) -> int:
+    """尚未写入数据库的点赞数增量"""
+    return like_counter.pending(model, obj_id)
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session):
+    deltas: Dict = session.info.pop(DELTAS_KEY, None)
+    if deltas:
+        for model, counts in deltas.items():
+            for obj_id, delta in counts.items():
+                if delta:
+                    like_counter.record(model, obj_id, delta)
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session):
+    session.info.pop(DELTAS_KEY, None)
+
+async def reconcile_like_counts(db: AsyncSession) -> Dict[str, int]:
+    """按likes表重新计算各对象的点赞数（每种对象一条UPDATE），返回更新的行数；由调用方提交事务"""
+    results = {}
+    for target_type, model in TARGETS.items():
+        count = (
+            select(func.count())
+            .where(Like.target_type == target_type, Like.target_id == model.id)
+            .scalar_subquery()
+        )
+        result = await db.execute(
+            update(model).where(model.like_count != count).values(like_count=count, updated_at=model.updated_at)
+        )
+        results[target_type] = result.rowcount
+    return results
@@ -0,0 +1,129 @@
+# 订单服务：下单在一个BEGIN IMMEDIATE事务中完成——先取得写锁，再对每个商品执行一条条件UPDATE
+# （库存不少于购买数量时才扣减库存并增加销量），任一商品不满足则整单回滚；判断和扣减是同一条语句，
+# 并发下单不会超卖，也不会出现先读后写事务的锁升级失败。订单明细一条批量INSERT写入。
+# 同一进程内的下单先在asyncio锁上按先后排队，只有一个连接等待写锁（SQLite的busy重试按最长100ms的间隔轮询，
+# 多个连接同时等待时吞吐下降且容易等待超时）
+import asyncio
+import json
+import secrets
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import CustomHTTPException
+from app.database import begin_immediate
+from app.models.shop import Order, OrderItem, Product
+
+# 每个订单的最多商品种数、每种商品的最多购买数量
+MAX_ORDER_ITEMS = 50
+MAX_ITEM_QUANTITY = 99
+
+# 进程内下单事务排队
+_order_lock = asyncio.Lock()
+
+def normalize_items(items: Iterable[dict]) -> List[Tuple[int, int]]:
+    """校验下单商品，合并重复的商品，返回按商品id排序的[(product_id, quantity)]
+
+    所有订单按相同顺序扣减库存，在使用行锁的数据库上也不会互相死锁。
+    """
+    quantities = {}
+    for item in items:
+        product_id, quantity = item.get("product_id"), item.get("quantity", 1)
+        if type(product_id) is not int or type(quantity) is not int or quantity < 1:
+            raise CustomHTTPException(status_code=400, detail="商品或购买数量无效", error_code="INVALID_QUANTITY")
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    if not quantities:
+        raise CustomHTTPException(status_code=400, detail="订单中没有商品", error_code="EMPTY_ORDER")
+    if len(quantities) > MAX_ORDER_ITEMS:
+        raise CustomHTTPException(
+            status_code=400, detail=f"每个订单最多{MAX_ORDER_ITEMS}种商品", error_code="TOO_MANY_ITEMS"
+        )
+    if max(quantities.values()) > MAX_ITEM_QUANTITY:
+        raise CustomHTTPException(
+            status_code=400, detail=f"每种商品最多购买{MAX_ITEM_QUANTITY}件", error_code="INVALID_QUANTITY"
+        )
+    return sorted(quantities.items())
+
+def generate_order_no(now: datetime) -> str:
+    """订单号：RH + 时间（精确到微秒）+ 2位随机数；在持有写锁时生成，同一数据库内不会重复"""
+    return f"RH{now:%Y%m%d%H%M%S%f}{secrets.randbelow(100):02d}"
+
+async def place_order(
+    db: AsyncSession,
+    user_id: int,
+    items: Iterable[dict],
+    shipping_address: Optional[dict] = None,
+    notes: Optional[str] = None
+) -> dict:
+    """下单：扣减库存、增加销量并写入订单和明细，提交事务后返回订单信息
+
+    会话中不能有未提交的写入。商品不存在或已下架时返回404，库存不足时返回409，
+    两种情况都回滚整个订单；等待写锁超过busy_timeout时返回503。
+    """
+    lines = normalize_items(items)
+    async with _order_lock:
+        data = await _place_order(db, user_id, lines, shipping_address, notes)
+        await db.commit()
+    return data
+
+async def _place_order(
+    db: AsyncSession, user_id: int, lines: List[Tuple[int, int]], shipping_address: Optional[dict], notes: Optional[str]
+) -> dict:
+    try:
+        await begin_immediate(db)
+    except OperationalError:
+        await db.rollback()
+        raise CustomHTTPException(
+            status_code=503, detail="下单人数过多，请稍后重试", error_code="ORDER_BUSY", headers={"Retry-After": "1"}
+        )
+
+    order_items = []
+    for product_id, quantity in lines:
+        row = (await db.execute(
+            update(Product)
+            .where(Product.id == product_id, Product.status != "inactive", Product.stock >= quantity)
+            .values(stock=Product.stock - quantity, sales_count=Product.sales_count + quantity)
+            .returning(Product.name, Product.price)
+        )).one_or_none()
+        if row is None:
+            stock = await db.scalar(
+                select(Product.stock).where(Product.id == product_id, Product.status != "inactive")
+            )
+            await db.rollback()
+            if stock is None:
+                raise CustomHTTPException(status_code=404, detail="商品不存在或已下架", error_code="PRODUCT_NOT_FOUND")
+            raise CustomHTTPException(
+                status_code=409, detail=f"商品库存不足（剩余{stock}件）", error_code="INSUFFICIENT_STOCK"
+            )
+        order_items.append({
+            "product_id": product_id,
+            "product_name": row.name,
+            "quantity": quantity,
+            "price": row.price
+        })
+
+    # 订单通过ORM写入，统计计数和事件钩子照常生效
+    order = Order(
+        user_id=user_id,
+        order_no=generate_order_no(datetime.now()),
+        total_amount=round(sum(item["price"] * item["quantity"] for item in order_items), 2),
+        shipping_address=json.dumps(shipping_address, ensure_ascii=False) if shipping_address else None,
+        notes=notes
+    )
+    db.add(order)
+    await db.flush()
+    await db.execute(insert(OrderItem), [
+        {"order_id": order.id, "product_id": item["product_id"], "quantity": item["quantity"], "price": item["price"]}
+        for item in order_items
+    ])
+    return {
+        "id": order.id,
+        "order_no": order.order_no,
+        "total_amount": order.total_amount,
+        "status": order.status,
+        "payment_status": order.payment_status,
+        "items": order_items
+    }
@@ -0,0 +1,81 @@
+# 积分服务：积分变化都通过award_points写入（用户积分、游戏档案、积分流水），事务提交后同步更新排行榜
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import CustomHTTPException
+from app.models.game import PointsRecord, UserGameProfile
+from app.models.user import User
+from app.services.events import record_event
+from app.services.leaderboard import queue_update
+
+# 批量更新时单条语句的最大id数（保持在SQLite参数上限以内）
+BATCH_SIZE = 500
+
+async def get_game_profile(db: AsyncSession, user_id: int) -> UserGameProfile:
+    """取用户的游戏档案，不存在时创建（总积分与User.points一致）"""
+    profile = await db.scalar(select(UserGameProfile).where(UserGameProfile.user_id == user_id))
+    if profile is None:
+        points = await db.scalar(select(User.points).where(User.id == user_id))
+        if points is None:
+            raise CustomHTTPException(status_code=404, detail="用户不存在", error_code="USER_NOT_FOUND")
+        # 同一用户的并发请求可能同时创建档案，已存在时忽略
+        await db.execute(
+            sqlite_insert(UserGameProfile)
+            .values(user_id=user_id, total_points=points)
+            .on_conflict_do_nothing(index_elements=[UserGameProfile.user_id])
+        )
+        profile = await db.scalar(select(UserGameProfile).where(UserGameProfile.user_id == user_id))
+    return profile
+
+async def award_points(
+    db: AsyncSession, user_id: int, points: int, source: str, at: Optional[datetime] = None
+) -> int:
+    """给用户加积分（points可为负数），返回新的总积分；由调用方提交事务
+
+    User.points和游戏档案用UPDATE ... SET x = x + n累加，并发请求不会互相覆盖。
+    """
+    at = at or datetime.now()
+    profile = await get_game_profile(db, user_id)
+    total = await db.scalar(
+        update(User).where(User.id == user_id).values(points=User.points + points).returning(User.points)
+    )
+    await db.execute(
+        update(UserGameProfile)
+        .where(UserGameProfile.id == profile.id)
+        .values(total_points=UserGameProfile.total_points + points)
+    )
+    db.add(PointsRecord(user_id=user_id, points=points, source=source, created_at=at, updated_at=at))
+    queue_update(db, user_id, points, at)
+    record_event(db, user_id, "points_awarded", at=at, points=points)
+    return total
+
+async def award_points_bulk(
+    db: AsyncSession, user_ids: List[int], points: int, source: str, at: Optional[datetime] = None
+):
+    """给多名用户加相同的积分（按批UPDATE，流水一次批量插入）；由调用方提交事务"""
+    at = at or datetime.now()
+    for i in range(0, len(user_ids), BATCH_SIZE):
+        batch = user_ids[i:i + BATCH_SIZE]
+        # 补建缺少的游戏档案（总积分与User.points一致）
+        await db.execute(
+            sqlite_insert(UserGameProfile)
+            .from_select(["user_id", "total_points"], select(User.id, User.points).where(User.id.in_(batch)))
+            .on_conflict_do_nothing(index_elements=[UserGameProfile.user_id])
+        )
+        await db.execute(update(User).where(User.id.in_(batch)).values(points=User.points + points))
+        await db.execute(
+            update(UserGameProfile)
+            .where(UserGameProfile.user_id.in_(batch))
+            .values(total_points=UserGameProfile.total_points + points)
+        )
+    await db.execute(insert(PointsRecord), [
+        {"user_id": user_id, "points": points, "source": source, "created_at": at, "updated_at": at}
+        for user_id in user_ids
+    ])
+    for user_id in user_ids:
+        queue_update(db, user_id, points, at)
+        record_event(db, user_id, "points_awarded", at=at, points=points)
@@ -0,0 +1,306 @@
+# 全文搜索服务：基于SQLite FTS5，中文按二元分词（bigram）预处理后写入索引
+import json
+import logging
+import re
+from typing import Dict, List, Optional
+
+from sqlalchemy import DDL, Integer, column, event, false, inspect, literal_column, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models.community import Post
+from app.models.content import EncyclopediaContent, Tutorial
+from app.models.shop import Product
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = "search_index"
+
+# rowid = 文档id << 4 | 可见位 << 3 | 类型编码：按类型、可见性过滤只需检查rowid，
+# 不必与高频词条做倒排表合并；删除和更新按rowid直接定位
+TYPE_MASK = 0b111
+VISIBLE_FLAG = 0b1000
+ID_SHIFT = 4
+
+# bm25列权重：标题 > 标签 > 正文
+BM25_WEIGHTS = "10.0, 1.0, 5.0"
+
+CJK_RUN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+WORD = re.compile(r"[^\W\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+
+class SearchSource:
+    """可搜索的模型定义"""
+
+    def __init__(self, doc_type: str, code: int, model, title: str, body: str,
+                 tags: Optional[str], visible):
+        self.doc_type = doc_type
+        self.code = code
+        self.model = model
+        self.title = title
+        self.body = body
+        self.tags = tags
+        self.visible = visible
+
+    @property
+    def fields(self) -> List[str]:
+        """影响索引内容的字段"""
+        return [field for field in (self.title, self.body, self.tags, "status") if field]
+
+SOURCES = [
+    SearchSource("post", 1, Post, "title", "content", "tags",
+                 lambda obj: obj.status == "published"),
+    SearchSource("encyclopedia", 2, EncyclopediaContent, "title", "content", "tags",
+                 lambda obj: obj.status == "published"),
+    SearchSource("tutorial", 3, Tutorial, "title", "description", None,
+                 lambda obj: obj.status == "published"),
+    SearchSource("product", 4, Product, "name", "description", "tags",
+                 lambda obj: obj.status != "inactive"),
+]
+
+SOURCES_BY_TYPE = {source.doc_type: source for source in SOURCES}
+SOURCES_BY_CODE = {source.code: source for source in SOURCES}
+_sources_by_model = {source.model: source for source in SOURCES}
+
+event.listen(
+    Base.metadata,
+    "after_create",
+    DDL(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+        "USING fts5(title, body, tags, tokenize = 'unicode61')"
+    ).execute_if(dialect="sqlite")
+)
+event.listen(
+    Base.metadata,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {SEARCH_TABLE}").execute_if(dialect="sqlite")
+)
+
+def segment(value: Optional[str]) -> str:
+    """中文连续字符切分为二元词组，并保留每段末字（使单字前缀查询可命中），其余文本原样保留"""
+    if not value:
+        return ""
+    parts = []
+    position = 0
+    for match in CJK_RUN.finditer(value):
+        parts.append(value[position:match.start()])
+        run = match.group()
+        parts.extend(run[i:i + 2] for i in range(len(run) - 1))
+        parts.append(run[-1])
+        position = match.end()
+    parts.append(value[position:])
+    return " ".join(part.strip() for part in parts if part.strip())
+
+def _quote(token: str) -> str:
+    return '"' + token.replace('"', '""') + '"'
+
+def build_match_query(query: str) -> Optional[str]:
+    """将用户输入转换为FTS5查询：中文片段作为二元词组短语，单字和英文词按前缀匹配"""
+    terms = []
+    position = 0
+    for match in CJK_RUN.finditer(query):
+        terms.extend(_quote(word) + "*" for word in WORD.findall(query[position:match.start()]))
+        run = match.group()
+        if len(run) == 1:
+            terms.append(_quote(run) + "*")
+        else:
+            terms.append(_quote(" ".join(run[i:i + 2] for i in range(len(run) - 1))))
+        position = match.end()
+    terms.extend(_quote(word) + "*" for word in WORD.findall(query[position:]))
+    if not terms:
+        return None
+    return " ".join(terms)
+
+def _tags_text(value) -> str:
+    """标签可能是JSON数组或普通字符串"""
+    if not value:
+        return ""
+    try:
+        tags = json.loads(value)
+        if isinstance(tags, list):
+            return " ".join(str(tag) for tag in tags)
+    except (TypeError, ValueError):
+        pass
+    return str(value)
+
+def _rowid(code: int, doc_id: int, visible: bool = False) -> int:
+    return (doc_id << ID_SHIFT) | (VISIBLE_FLAG if visible else 0) | code
+
+def _index_params(source: SearchSource, doc_id: int, title, body, tags, visible: bool) -> dict:
+    return {
+        "rowid": _rowid(source.code, doc_id, visible),
+        "title": segment(title),
+        "body": segment(body),
+        "tags": segment(_tags_text(tags))
+    }
+
+_INSERT_SQL = text(
+    f"INSERT INTO {SEARCH_TABLE} (rowid, title, body, tags) "
+    "VALUES (:rowid, :title, :body, :tags)"
+)
+# 可见性可能已变化，两种rowid都删除
+_DELETE_SQL = text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN (:rowid, :rowid | {VISIBLE_FLAG})")
+
+_PENDING_KEY = "search_index_pending"
+
+def _pending(target) -> Optional[dict]:
+    session = Session.object_session(target)
+    if session is None:
+        return None
+    return session.info.setdefault(_PENDING_KEY, {})
+
+def _queue_upsert(source: SearchSource, target):
+    pending = _pending(target)
+    if pending is None:
+        return
+    pending[(source.code, target.id)] = _index_params(
+        source, target.id,
+        getattr(target, source.title),
+        getattr(target, source.body),
+        getattr(target, source.tags) if source.tags else None,
+        source.visible(target)
+    )
+
+def _on_insert(mapper, connection, target):
+    _queue_upsert(_sources_by_model[mapper.class_], target)
+
+def _on_update(mapper, connection, target):
+    source = _sources_by_model[mapper.class_]
+    state = inspect(target)
+    # 只有影响索引的字段变化才重建索引行（浏览数、点赞数等更新跳过）
+    if any(state.attrs[field].history.has_changes() for field in source.fields):
+        _queue_upsert(source, target)
+
+def _on_delete(mapper, connection, target):
+    source = _sources_by_model[mapper.class_]
+    pending = _pending(target)
+    if pending is not None:
+        pending[(source.code, target.id)] = None
+
+for _source in SOURCES:
+    event.listen(_source.model, "after_insert", _on_insert)
+    event.listen(_source.model, "after_update", _on_update)
+    event.listen(_source.model, "after_delete", _on_delete)
+
+@event.listens_for(Session, "before_flush")
+def _reset_pending(session, flush_context, instances):
+    session.info.pop(_PENDING_KEY, None)
+
+@event.listens_for(Session, "after_flush")
+def _apply_pending(session, flush_context):
+    """在同一事务中更新搜索索引"""
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    connection = session.connection()
+    connection.execute(
+        _DELETE_SQL,
+        [{"rowid": _rowid(code, doc_id)} for code, doc_id in pending]
+    )
+    rows = [params for params in pending.values() if params is not None]
+    if rows:
+        connection.execute(_INSERT_SQL, rows)
+
+def _match_sql(columns: str, doc_type: Optional[str], visible_only: bool) -> str:
+    sql = f"SELECT {columns} FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :query"
+    if doc_type:
+        sql += f" AND (rowid & {TYPE_MASK}) = :code"
+    if visible_only:
+        sql += f" AND (rowid & {VISIBLE_FLAG}) != 0"
+    return sql
+
+def _match_params(match: str, doc_type: Optional[str]) -> dict:
+    params = {"query": match}
+    if doc_type:
+        params["code"] = SOURCES_BY_TYPE[doc_type].code
+    return params
+
+def matching_ids(doc_type: str, query: str):
+    """返回匹配指定类型文档id的子查询，用于Model.id.in_()（管理端搜索，包含未发布内容）"""
+    match = build_match_query(query)
+    if match is None:
+        return select(literal_column("NULL")).where(false())
+    return text(
+        _match_sql(f"rowid >> {ID_SHIFT} AS id", doc_type, False)
+    ).bindparams(**_match_params(match, doc_type)).columns(column("id", Integer))
+
+async def search(
+    db: AsyncSession,
+    query: str,
+    doc_type: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0
+) -> List[dict]:
+    """全站搜索已发布内容，按BM25相关度排序"""
+    match = build_match_query(query)
+    if match is None:
+        return []
+
+    hits = (await db.execute(
+        text(
+            _match_sql(f"rowid, bm25({SEARCH_TABLE}, {BM25_WEIGHTS}) AS score", doc_type, True)
+            + " ORDER BY score LIMIT :limit OFFSET :offset"
+        ),
+        {**_match_params(match, doc_type), "limit": limit, "offset": offset}
+    )).all()
+
+    # 按类型分组，每种类型一次查询取标题和摘要
+    ids_by_code: Dict[int, List[int]] = {}
+    for hit in hits:
+        ids_by_code.setdefault(hit.rowid & TYPE_MASK, []).append(hit.rowid >> ID_SHIFT)
+
+    documents = {}
+    for code, ids in ids_by_code.items():
+        source = SOURCES_BY_CODE[code]
+        model = source.model
+        rows = await db.execute(
+            select(model.id, getattr(model, source.title), getattr(model, source.body))
+            .where(model.id.in_(ids))
+        )
+        for doc_id, title, body in rows:
+            documents[(code, doc_id)] = (title, body)
+
+    results = []
+    for hit in hits:
+        key = (hit.rowid & TYPE_MASK, hit.rowid >> ID_SHIFT)
+        if key not in documents:
+            continue
+        title, body = documents[key]
+        results.append({
+            "type": SOURCES_BY_CODE[key[0]].doc_type,
+            "id": key[1],
+            "title": title,
+            "summary": (body or "")[:100],
+            "score": round(-hit.score, 4)
+        })
+    return results
+
+async def rebuild_index(db: AsyncSession, batch_size: int = 1000):
+    """从业务表重建搜索索引"""
+    await db.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+    for source in SOURCES:
+        model = source.model
+        columns = [model.id, getattr(model, source.title), getattr(model, source.body), model.status]
+        if source.tags:
+            columns.append(getattr(model, source.tags))
+        result = await db.stream(select(*columns).execution_options(yield_per=batch_size))
+        async for rows in result.partitions(batch_size):
+            await db.execute(_INSERT_SQL, [
+                _index_params(
+                    source, row[0], row[1], row[2],
+                    row[4] if source.tags else None,
+                    source.visible(row)
+                )
+                for row in rows
+            ])
+    await db.commit()
+
+async def ensure_index_built(db: AsyncSession):
+    """索引为空而业务表有数据时（已有数据库首次启用搜索）重建索引"""
+    if await db.scalar(text(f"SELECT 1 FROM {SEARCH_TABLE} LIMIT 1")):
+        return
+    for source in SOURCES:
+        if await db.scalar(select(source.model.id).limit(1)):
+            logger.info("搜索索引为空，开始重建")
+            await rebuild_index(db)
+            return
@@ -0,0 +1,64 @@
+# 统计服务：计数读取stats_counters表，注册趋势用一次按日期分组的范围查询
+from datetime import datetime, timedelta, date
+from typing import Dict, List
+
+from sqlalchemy import select, func, literal, String
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import User
+from app.services import counters
+
+TREND_DAYS = 7
+
+async def get_counters(db: AsyncSession) -> Dict[str, int]:
+    """获取全部计数（读取增量维护的stats_counters表）"""
+    return await counters.get_counters(db)
+
+async def get_user_trend(db: AsyncSession, days: int = TREND_DAYS, today: date = None) -> List[int]:
+    """获取最近days天的每日注册数（按created_at索引做范围扫描，一次GROUP BY）"""
+    today = today or datetime.now().date()
+    start_day = today - timedelta(days=days - 1)
+    day_column = func.date(User.created_at)
+
+    rows = await db.execute(
+        select(day_column.label("day"), func.count().label("count"))
+        # 以日期字符串作为边界：SQLite按文本比较时间，零点整的记录不会被漏掉
+        .where(User.created_at >= literal(start_day.isoformat(), String))
+        .where(User.created_at < literal((today + timedelta(days=1)).isoformat(), String))
+        .group_by(day_column)
+    )
+    counts = {row.day: row.count for row in rows}
+    return [
+        counts.get((start_day + timedelta(days=i)).isoformat(), 0)
+        for i in range(days)
+    ]
+
+async def get_admin_stats(db: AsyncSession) -> dict:
+    """获取管理端统计数据"""
+    totals = await get_counters(db)
+    week_users = await get_user_trend(db)
+
+    return {
+        "users": {
+            "total": totals["users"],
+            "active": totals["users"] - totals["users_inactive"],
+            "today": week_users[-1]
+        },
+        "content": {
+            "encyclopedia": totals["encyclopedia"],
+            "tutorials": totals["tutorials"]
+        },
+        "community": {
+            "posts": totals["posts"],
+            "comments": totals["comments"],
+            "pending_posts": totals["pending_posts"]
+        },
+        "shop": {
+            "products": totals["products"],
+            "orders": totals["orders"],
+            "pending_orders": totals["pending_orders"]
+        },
+        "trends": {
+            "week_users": week_users
+        }
+    }
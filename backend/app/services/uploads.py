@@ -0,0 +1,302 @@
+# 文件上传服务：边接收边写入并计算SHA-256，超过大小限制立即中止，按文件头识别类型，
+# 完成后放入内容寻址存储（相同内容只存一份），磁盘IO在线程池中执行。
+# 用户端上传记录上传者，按每人最近24小时的字节数、最近1小时的次数和同时进行的上传数限额
+import asyncio
+import hashlib
+import logging
+import uuid
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+import aiofiles
+import aiofiles.os
+from fastapi import Request
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import ClientDisconnect
+
+from app.core.config import settings
+from app.core.exceptions import CustomHTTPException
+from app.models.media import Upload
+from app.services.blobs import BLOB_DIR, UPLOAD_URL, blob_url, store_blob
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {".jpg", ".png", ".gif"}
+VIDEO_EXTENSIONS = {".mp4", ".mov"}
+
+# 上传类别 -> 允许的文件类型（再与settings.ALLOWED_EXTENSIONS取交集）
+UPLOAD_KINDS: Dict[str, set] = {
+    "avatars": IMAGE_EXTENSIONS,
+    "content": IMAGE_EXTENSIONS | VIDEO_EXTENSIONS,
+    "products": IMAGE_EXTENSIONS,
+}
+
+CONTENT_TYPES = {
+    ".jpg": "image/jpeg",
+    ".png": "image/png",
+    ".gif": "image/gif",
+    ".mp4": "video/mp4",
+    ".mov": "video/quicktime",
+}
+
+# 识别文件类型需要的文件头字节数
+SNIFF_BYTES = 12
+# multipart请求中边界、字段头等额外内容的上限
+MULTIPART_OVERHEAD = 64 * 1024
+
+def sniff_extension(head: bytes) -> Optional[str]:
+    """按文件头（魔数）识别文件类型，返回规范化的扩展名，无法识别时返回None"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return ".jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ".png"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return ".gif"
+    # ISO基础媒体文件：4字节box长度后为ftyp，随后是主品牌
+    if head[4:8] == b"ftyp":
+        return ".mov" if head[8:12] == b"qt  " else ".mp4"
+    return None
+
+def too_large(max_size: int) -> CustomHTTPException:
+    limit = f"{max_size // 1024 // 1024}MB" if max_size >= 1024 * 1024 else f"{max_size // 1024}KB"
+    return CustomHTTPException(status_code=413, detail=f"文件大小超过限制（{limit}）", error_code="FILE_TOO_LARGE")
+
+def allowed_extensions(kind: str) -> set:
+    allowed = {".jpg" if ext == ".jpeg" else ext for ext in settings.ALLOWED_EXTENSIONS}
+    return UPLOAD_KINDS[kind] & allowed
+
+class UploadSink:
+    """把接收到的数据块写入临时文件并计算SHA-256，完成后放入内容寻址存储
+
+    前SNIFF_BYTES字节到齐后识别类型，不允许的类型立即拒绝；累计大小超过限制时立即拒绝，
+    不等请求体接收完。文件写入通过aiofiles在线程池中执行，不阻塞事件循环。
+    kind只决定允许的文件类型，不同类别的相同内容共用一份文件。
+    """
+
+    def __init__(self, kind: str, max_size: int):
+        self.kind = kind
+        self.max_size = max_size
+        self.directory = Path(settings.UPLOAD_DIR) / BLOB_DIR
+        self.temp_path = self.directory / f".{uuid.uuid4().hex}.part"
+        self.size = 0
+        self.extension: Optional[str] = None
+        self._head = bytearray()
+        self._file = None
+        self._hash = hashlib.sha256()
+
+    async def write(self, data: bytes):
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise too_large(self.max_size)
+        if self.extension is None:
+            self._head += data
+            if len(self._head) < SNIFF_BYTES:
+                return
+            data = self._detect()
+        if self._file is None:
+            await self._open()
+        self._hash.update(data)
+        await self._file.write(data)
+
+    def _detect(self) -> bytes:
+        extension = sniff_extension(bytes(self._head[:SNIFF_BYTES]))
+        if extension is None or extension not in allowed_extensions(self.kind):
+            raise CustomHTTPException(status_code=415, detail="不支持的文件类型", error_code="UNSUPPORTED_FILE_TYPE")
+        self.extension = extension
+        data, self._head = bytes(self._head), bytearray()
+        return data
+
+    async def finish(self) -> dict:
+        """写入剩余数据并放入存储，返回文件信息（id为blob id，deduplicated表示已有相同内容）"""
+        if self.size == 0:
+            raise CustomHTTPException(status_code=400, detail="上传文件为空", error_code="EMPTY_UPLOAD")
+        if self.extension is None:
+            # 文件总长度不足SNIFF_BYTES，在结束时识别类型
+            await self._open()
+            data = self._detect()
+            self._hash.update(data)
+            await self._file.write(data)
+        await self._file.close()
+        self._file = None
+        blob_id = self._hash.hexdigest() + self.extension
+        deduplicated = await asyncio.to_thread(store_blob, self.temp_path, blob_id)
+        return {
+            "id": blob_id,
+            "url": blob_url(blob_id),
+            "size": self.size,
+            "content_type": CONTENT_TYPES[self.extension],
+            "deduplicated": deduplicated,
+        }
+
+    async def _open(self):
+        await aiofiles.os.makedirs(self.directory, exist_ok=True)
+        self._file = await aiofiles.open(self.temp_path, "wb")
+
+    async def abort(self):
+        """关闭并删除未完成的临时文件"""
+        if self._file is not None:
+            await self._file.close()
+            self._file = None
+        try:
+            await aiofiles.os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+class _FilePartCollector:
+    """multipart解析回调：只收集第一个带文件名的字段的数据，其余字段丢弃"""
+
+    def __init__(self):
+        self.filename: Optional[str] = None
+        self.chunks = []
+        self.finished = False
+        self._header_field = b""
+        self._header_value = b""
+        self._headers: Dict[bytes, bytes] = {}
+        self._in_file = False
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+    def on_part_begin(self):
+        self._headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._in_file = b"filename" in options and self.filename is None and not self.finished
+        if self._in_file:
+            self.filename = options[b"filename"].decode("utf-8", "replace")
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_file:
+            self.chunks.append(data[start:end])
+
+    def on_part_end(self):
+        if self._in_file:
+            self.finished = True
+            self._in_file = False
+
+# 用户id -> 进行中的上传数
+_active_uploads: Dict[int, int] = defaultdict(int)
+
+def rate_limited(detail: str, retry_after: int) -> CustomHTTPException:
+    return CustomHTTPException(
+        status_code=429, detail=detail, error_code="UPLOAD_RATE_LIMITED", headers={"Retry-After": str(retry_after)}
+    )
+
+async def upload_allowance(db: AsyncSession, user_id: int) -> int:
+    """检查用户的上传限额，返回本次上传允许的最大字节数（不超过MAX_FILE_SIZE和当天剩余额度），超限时返回429"""
+    now = datetime.now()
+    hourly = await db.scalar(
+        select(func.count()).where(Upload.user_id == user_id, Upload.created_at >= now - timedelta(hours=1))
+    )
+    if hourly >= settings.UPLOAD_USER_HOURLY_COUNT:
+        raise rate_limited("上传过于频繁，请稍后再试", 3600)
+    daily = await db.scalar(
+        select(func.coalesce(func.sum(Upload.size), 0))
+        .where(Upload.user_id == user_id, Upload.created_at >= now - timedelta(days=1))
+    )
+    remaining = settings.UPLOAD_USER_DAILY_BYTES - daily
+    if remaining <= 0:
+        raise rate_limited("今日上传额度已用完", 24 * 3600)
+    return min(settings.MAX_FILE_SIZE, remaining)
+
+@asynccontextmanager
+async def upload_slot(user_id: int):
+    """占用用户的一个上传名额，同时进行的上传超过UPLOAD_USER_CONCURRENCY时返回429"""
+    if _active_uploads[user_id] >= settings.UPLOAD_USER_CONCURRENCY:
+        raise rate_limited("同时进行的上传过多，请等待当前上传完成", 1)
+    _active_uploads[user_id] += 1
+    try:
+        yield
+    finally:
+        _active_uploads[user_id] -= 1
+        if not _active_uploads[user_id]:
+            del _active_uploads[user_id]
+
+async def record_upload(db: AsyncSession, user_id: int, kind: str, result: dict):
+    """记录上传者和大小（相同内容的重复上传也计入限额）；由调用方提交事务"""
+    db.add(Upload(user_id=user_id, blob_id=result["id"], kind=kind, size=result["size"]))
+
+async def receive_upload(request: Request, kind: str, max_size: Optional[int] = None) -> dict:
+    """流式接收上传文件并保存到内容寻址存储中
+
+    支持multipart/form-data（取第一个文件字段）和直接以请求体上传文件两种方式。
+    max_size默认为MAX_FILE_SIZE，用户端上传传入剩余额度。
+    """
+    if kind not in UPLOAD_KINDS:
+        raise CustomHTTPException(status_code=404, detail="不支持的上传类别", error_code="INVALID_UPLOAD_KIND")
+
+    max_size = settings.MAX_FILE_SIZE if max_size is None else max_size
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    is_multipart = content_type == b"multipart/form-data"
+    body_limit = max_size + (MULTIPART_OVERHEAD if is_multipart else 0)
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > body_limit:
+        # 声明的长度已超限，不读取请求体
+        raise too_large(max_size)
+
+    sink = UploadSink(kind, max_size)
+    filename = None
+    try:
+        if is_multipart:
+            if b"boundary" not in options:
+                raise CustomHTTPException(status_code=400, detail="缺少multipart边界", error_code="INVALID_UPLOAD")
+            collector = _FilePartCollector()
+            parser = MultipartParser(options[b"boundary"], collector.callbacks())
+            received = 0
+            async for chunk in request.stream():
+                received += len(chunk)
+                if received > body_limit:
+                    raise too_large(max_size)
+                parser.write(chunk)
+                # 解析回调是同步的，文件数据在回调外写入
+                for data in collector.chunks:
+                    await sink.write(data)
+                collector.chunks.clear()
+            parser.finalize()
+            if collector.filename is None:
+                raise CustomHTTPException(status_code=400, detail="请求中没有文件", error_code="INVALID_UPLOAD")
+            filename = collector.filename
+        else:
+            async for chunk in request.stream():
+                if chunk:
+                    await sink.write(chunk)
+        result = await sink.finish()
+    except ClientDisconnect:
+        await sink.abort()
+        raise CustomHTTPException(status_code=400, detail="上传已中断", error_code="UPLOAD_INTERRUPTED")
+    except MultipartParseError:
+        await sink.abort()
+        raise CustomHTTPException(status_code=400, detail="multipart请求格式错误", error_code="INVALID_UPLOAD")
+    except BaseException:
+        await sink.abort()
+        raise
+
+    result["filename"] = filename
+    logger.info(f"上传文件: {result['url']} ({result['size']} 字节{'，与已有文件相同' if result['deduplicated'] else ''})")
+    return result
@@ -0,0 +1,79 @@
+# 教程视频服务：视频URL到文件路径的映射、同时传输的视频流数量限制，以及按上次观看位置估算续播的字节偏移
+import os
+import struct
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Tuple
+
+from app.core.config import settings
+from app.core.ranges import read_at
+from app.services.uploads import UPLOAD_URL
+
+STATIC_URL = "/static/"
+STATIC_DIR = "static"
+
+class StreamLimiter:
+    """限制同时传输的视频流数量，名额用完时直接拒绝（不排队等待）"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._stats = {"served": 0, "rejected": 0}
+
+    def try_acquire(self) -> bool:
+        if self.active >= self.limit:
+            self._stats["rejected"] += 1
+            return False
+        self.active += 1
+        self._stats["served"] += 1
+        return True
+
+    def release(self):
+        self.active -= 1
+
+    def metrics(self) -> dict:
+        return {"limit": self.limit, "active": self.active, **self._stats}
+
+video_streams = StreamLimiter(settings.VIDEO_MAX_STREAMS)
+
+def video_path(url: str) -> Optional[Path]:
+    """/static/下的视频URL对应的文件路径（上传的视频在UPLOAD_DIR中），越出目录或文件不存在时返回None"""
+    if url.startswith(UPLOAD_URL + "/"):
+        root, relative = Path(settings.UPLOAD_DIR).resolve(), url[len(UPLOAD_URL) + 1:]
+    elif url.startswith(STATIC_URL):
+        root, relative = Path(STATIC_DIR).resolve(), url[len(STATIC_URL):]
+    else:
+        return None
+    path = (root / relative).resolve()
+    if not path.is_relative_to(root) or not path.is_file():
+        return None
+    return path
+
+@lru_cache(maxsize=256)
+def _media_data(path: str, mtime_ns: int, size: int) -> Tuple[int, int]:
+    """MP4/MOV中媒体数据（mdat box）的起点和长度，只读取顶层box的头部；无法识别时返回整个文件"""
+    offset = 0
+    with open(path, "rb", buffering=0) as file:
+        while offset + 8 <= size:
+            header = read_at(file, offset, 16)
+            box_size, box_type = struct.unpack(">I4s", header[:8])
+            header_size = 8
+            if box_size == 1 and len(header) == 16:
+                box_size = struct.unpack(">Q", header[8:16])[0]
+                header_size = 16
+            elif box_size == 0:
+                box_size = size - offset
+            if box_size < header_size:
+                break
+            if box_type == b"mdat":
+                return offset + header_size, min(box_size, size - offset) - header_size
+            offset += box_size
+    return 0, size
+
+def resume_offset(path: Path, stat_result: os.stat_result, position: int, duration: Optional[int]) -> int:
+    """按上次观看位置（秒）估算续播的字节偏移：在媒体数据中按时长比例定位（读取文件，在线程中调用）"""
+    if not duration or position <= 0:
+        return 0
+    start, length = _media_data(str(path), stat_result.st_mtime_ns, stat_result.st_size)
+    offset = start + int(length * min(position / duration, 1.0))
+    return min(offset, max(stat_result.st_size - 1, 0))
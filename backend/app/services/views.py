@@ -0,0 +1,209 @@
+# 浏览数写回服务：浏览在内存中按模型和id累加，定期或达到阈值时批量UPDATE写入，避免每次浏览都争用写锁；
+# 点赞数等其他计数列的增量也使用同样的缓冲写回
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import update, case
+
+from app.core.config import settings
+from app.models.community import Post
+from app.models.content import EncyclopediaContent, Tutorial
+from app.models.shop import Product
+
+logger = logging.getLogger(__name__)
+
+# 单条UPDATE的最大id数（CASE和IN各占一个参数，保持在SQLite参数上限以内）
+FLUSH_BATCH_SIZE = 500
+
+class ViewCounter:
+    """计数缓冲（默认为浏览数）：按模型分片、按id累加，flush时整体换出后批量写入column列
+
+    on_applied(db, model, ids)在同一事务中写入每个模型后调用（如重算依赖该列的热度分）。
+    max_rows限制缓冲中不同id的数量：达到上限时立即触发写入，写入完成前新id的计数丢弃（已有id照常累加）。
+    """
+
+    def __init__(
+        self,
+        models,
+        flush_threshold: int,
+        column: str = "view_count",
+        on_applied: Optional[Callable] = None,
+        max_rows: Optional[int] = None
+    ):
+        self.models = set(models)
+        self.flush_threshold = flush_threshold
+        self.column = column
+        self.on_applied = on_applied
+        self.max_rows = max_rows
+        self._buffers: Dict[type, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self._pending_views = 0
+        self._pending_rows = 0
+        # 最早一次未写入浏览的时间，用于计算写回延迟
+        self._oldest_pending: Optional[float] = None
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._stats = {
+            "flushes": 0,
+            "flushed_views": 0,
+            "failed_flushes": 0,
+            "dropped_views": 0,
+            "last_flush_at": None,
+            "last_flush_ms": None,
+            "last_flush_lag_seconds": None
+        }
+
+    def record(self, model, obj_id: int, count: int = 1):
+        """记录浏览（仅内存操作），累计达到阈值时在后台触发写入"""
+        if model not in self.models:
+            raise ValueError(f"{model.__name__} 不支持{self.column}计数")
+        buffer = self._buffers[model]
+        if obj_id not in buffer:
+            if self.max_rows is not None and self._pending_rows >= self.max_rows:
+                self._stats["dropped_views"] += count
+                self._schedule_flush()
+                return
+            self._pending_rows += 1
+        buffer[obj_id] += count
+        self._pending_views += count
+        if self._oldest_pending is None:
+            self._oldest_pending = time.monotonic()
+        if self._pending_views >= self.flush_threshold:
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self.flush())
+
+    def pending(self, model, obj_id: int) -> int:
+        """尚未写入数据库的浏览数（列表展示时与数据库值相加）"""
+        buffer = self._buffers.get(model)
+        return buffer.get(obj_id, 0) if buffer else 0
+
+    async def flush(self) -> int:
+        """将缓冲的浏览数写入数据库，返回写入的浏览数"""
+        from app.database import AsyncSessionLocal
+
+        async with self._flush_lock:
+            if not self._pending_views:
+                return 0
+            # 换出缓冲区，写入期间的新浏览进入新缓冲区
+            buffers, self._buffers = self._buffers, defaultdict(lambda: defaultdict(int))
+            views, self._pending_views = self._pending_views, 0
+            self._pending_rows = 0
+            oldest, self._oldest_pending = self._oldest_pending, None
+
+            start = time.monotonic()
+            try:
+                async with AsyncSessionLocal() as db:
+                    for model, counts in buffers.items():
+                        await _apply_counts(db, model, counts, self.column)
+                        if self.on_applied is not None:
+                            await self.on_applied(db, model, list(counts))
+                    await db.commit()
+            except Exception as e:
+                self._restore(buffers, views, oldest)
+                self._stats["failed_flushes"] += 1
+                logger.error(f"{self.column}写入失败: {type(e).__name__} - {str(e)}")
+                return 0
+
+            finished = time.monotonic()
+            self._stats["flushes"] += 1
+            self._stats["flushed_views"] += views
+            self._stats["last_flush_at"] = time.time()
+            self._stats["last_flush_ms"] = round((finished - start) * 1000, 2)
+            self._stats["last_flush_lag_seconds"] = round(finished - oldest, 3)
+            return views
+
+    def _restore(self, buffers, views: int, oldest: Optional[float]):
+        """写入失败时把换出的计数合并回当前缓冲区，等待下次重试"""
+        for model, counts in buffers.items():
+            for obj_id, count in counts.items():
+                if obj_id not in self._buffers[model]:
+                    self._pending_rows += 1
+                self._buffers[model][obj_id] += count
+        self._pending_views += views
+        if oldest is not None and (self._oldest_pending is None or oldest < self._oldest_pending):
+            self._oldest_pending = oldest
+
+    def metrics(self) -> dict:
+        """缓冲和写回指标"""
+        return {
+            "pending_views": self._pending_views,
+            "pending_rows": self._pending_rows,
+            "max_rows": self.max_rows,
+            "pending_lag_seconds": (
+                round(time.monotonic() - self._oldest_pending, 3)
+                if self._oldest_pending is not None else 0
+            ),
+            "flush_interval": settings.VIEW_COUNT_FLUSH_INTERVAL,
+            "flush_threshold": self.flush_threshold,
+            **self._stats
+        }
+
+async def _apply_counts(db, model, counts: Dict[int, int], column: str = "view_count"):
+    """按批执行 UPDATE ... SET view_count = view_count + CASE id WHEN ... END"""
+    table = model.__table__
+    ids = list(counts)
+    for i in range(0, len(ids), FLUSH_BATCH_SIZE):
+        batch = ids[i:i + FLUSH_BATCH_SIZE]
+        await db.execute(
+            update(table)
+            .where(table.c.id.in_(batch))
+            .values({
+                column: table.c[column] + case(
+                    {obj_id: counts[obj_id] for obj_id in batch},
+                    value=table.c.id,
+                    else_=0
+                ),
+                # 浏览、点赞不算内容修改，保持updated_at不变
+                "updated_at": table.c.updated_at
+            })
+        )
+
+view_counter = ViewCounter(
+    [Post, EncyclopediaContent, Tutorial, Product],
+    flush_threshold=settings.VIEW_COUNT_FLUSH_THRESHOLD,
+    max_rows=settings.VIEW_COUNT_MAX_PENDING_ROWS
+)
+
+# 由定期写入任务统一写入的缓冲（其他服务的计数缓冲创建后在此登记）
+buffered_counters: List[ViewCounter] = [view_counter]
+
+def record_view(model, obj_id: int):
+    """记录一次浏览（在确认记录存在后调用）"""
+    view_counter.record(model, obj_id)
+
+def pending_views(model, obj_id: int) -> int:
+    """尚未写入数据库的浏览数"""
+    return view_counter.pending(model, obj_id)
+
+_flush_loop_task: Optional[asyncio.Task] = None
+
+async def _flush_loop(interval: int):
+    """定期写入缓冲的浏览数等计数"""
+    while True:
+        await asyncio.sleep(interval)
+        for counter in buffered_counters:
+            await counter.flush()
+
+def start_flush_task():
+    """启动定期写入任务（应用启动时调用）"""
+    global _flush_loop_task
+    if settings.VIEW_COUNT_FLUSH_INTERVAL > 0 and _flush_loop_task is None:
+        _flush_loop_task = asyncio.create_task(_flush_loop(settings.VIEW_COUNT_FLUSH_INTERVAL))
+
+async def stop_flush_task():
+    """停止定期写入任务并写入剩余计数（应用关闭时调用）"""
+    global _flush_loop_task
+    if _flush_loop_task is not None:
+        _flush_loop_task.cancel()
+        try:
+            await _flush_loop_task
+        except asyncio.CancelledError:
+            pass
+        _flush_loop_task = None
+    for counter in buffered_counters:
+        await counter.flush()
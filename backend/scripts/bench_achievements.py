@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+成就引擎基准测试
+在临时数据库中生成N名用户的帖子、教程学习记录和订单以及M个成就，对比逐个用户、逐个成就解析JSON并查询
+（N×M条查询）与每个成就一条集合SQL批量评估全部用户的耗时；检查条件编译、事件驱动评估（只评估相关成就）、
+奖励积分连带获得积分成就、不重复发放、修改成就后重新编译，以及 scripts/evaluate_achievements.py 批量评估。
+
+用法:
+    python scripts/bench_achievements.py --users 2000
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+# 必须在导入应用之前指定临时数据库
+tmp_dir = tempfile.mkdtemp()
+db_path = os.path.join(tmp_dir, "achievements.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+os.environ["DEBUG"] = "False"
+os.environ["STATS_RECONCILE_INTERVAL"] = "0"
+os.chdir(backend_dir)
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.api.auth import create_access_token
+from app.database import AsyncSessionLocal, SessionLocal
+from app.models.community import Post
+from app.models.content import LearningProgress, Tutorial
+from app.models.game import Achievement, UserAchievement
+from app.models.shop import Order
+from app.models.user import User
+from app.services.achievements import achievement_engine, compile_requirements
+
+failures = []
+
+def check(name: str, ok: bool):
+    print(f"{'OK ' if ok else 'FAIL'} {name}")
+    if not ok:
+        failures.append(name)
+
+# 逐个用户评估时每个指标的查询
+NAIVE_SQL = {
+    "points": "SELECT points FROM users WHERE id = ?",
+    "posts": "SELECT COUNT(*) FROM posts WHERE author_id = ? AND status = 'published'",
+    "tutorials_completed": "SELECT COUNT(*) FROM learning_progress WHERE user_id = ? AND is_completed = 1",
+    "orders_paid": "SELECT COUNT(*) FROM orders WHERE user_id = ? AND (status IN ('paid', 'shipped', 'completed') "
+                   "OR payment_status = 'paid')",
+}
+
+def bench_achievements() -> list:
+    specs = []
+    for metric, thresholds in (("posts", (1, 5, 10)), ("tutorials_completed", (1, 3, 5)),
+                               ("orders_paid", (1, 3)), ("points", (100, 500, 1000))):
+        specs += [(f"{metric}≥{t}", {"metric": metric, "gte": t}) for t in thresholds]
+    specs.append(("全能", {"all": [{"metric": "posts", "gte": 5}, {"metric": "tutorials_completed", "gte": 3}]}))
+    return specs
+
+def seed(users: int, rng: random.Random):
+    db = SessionLocal()
+    try:
+        db.add_all([User(id=i, username=f"player{i}", password_hash="x", points=int(rng.paretovariate(1.3) * 60))
+                    for i in range(1, users + 1)])
+        db.add_all([Tutorial(id=i, title=f"教程{i}", video_url=f"/static/v{i}.mp4", category="basic", duration=100)
+                    for i in range(1, 7)])
+        db.add_all([Achievement(name=name, description=name, category="bench", points_reward=0,
+                                requirements=json.dumps(spec), is_active=True) for name, spec in bench_achievements()])
+        for user_id in range(1, users + 1):
+            db.add_all([Post(title="作品", content="...", category="showcase", author_id=user_id)
+                        for _ in range(rng.randint(0, 12))])
+            db.add_all([LearningProgress(user_id=user_id, tutorial_id=t, is_completed=rng.random() < 0.5)
+                        for t in rng.sample(range(1, 7), rng.randint(0, 6))])
+            db.add_all([Order(user_id=user_id, order_no=f"S{user_id}-{i}", total_amount=100, status="paid")
+                        for i in range(rng.randint(0, 4))])
+        db.commit()
+    finally:
+        db.close()
+
+def naive_evaluate(users: int) -> int:
+    """旧做法：逐个用户、逐个成就解析条件并查询"""
+    conn = sqlite3.connect(db_path)
+    achievements = conn.execute("SELECT id, requirements FROM achievements WHERE is_active = 1").fetchall()
+    awarded = 0
+    for user_id in range(1, users + 1):
+        for achievement_id, requirements in achievements:
+            spec = json.loads(requirements)
+            conditions = spec.get("all", [spec])
+            if conn.execute("SELECT 1 FROM user_achievements WHERE user_id = ? AND achievement_id = ?",
+                            (user_id, achievement_id)).fetchone():
+                continue
+            if all(conn.execute(NAIVE_SQL[c["metric"]], (user_id,)).fetchone()[0] >= c["gte"] for c in conditions):
+                awarded += 1
+    conn.close()
+    return awarded
+
+async def evaluate_all() -> dict:
+    async with AsyncSessionLocal() as db:
+        results = await achievement_engine.evaluate_all(db)
+        await db.commit()
+    return results
+
+def bench(client: TestClient, users: int):
+    start = time.perf_counter()
+    expected = naive_evaluate(users)
+    naive = time.perf_counter() - start
+    start = time.perf_counter()
+    results = client.portal.call(evaluate_all)
+    batch = time.perf_counter() - start
+    print(f"[{users} 名用户，{len(results)} 个成就]")
+    print(f"  逐个用户评估：{naive * 1000:.0f}ms（约 {users * len(results)} 次评估）；集合SQL批量评估：{batch * 1000:.0f}ms")
+    check("批量评估与逐个评估的发放数一致", sum(results.values()) == expected)
+    check("再次评估不重复发放", sum(client.portal.call(evaluate_all).values()) == 0)
+
+def check_compile():
+    condition = compile_requirements(json.dumps(
+        {"all": [{"metric": "posts", "gte": 5}, {"metric": "orders_paid"}]}
+    ))
+    check("编译组合条件并按依赖的事件类型索引", condition.events == {"post_created", "order_paid"})
+    invalid = 0
+    for spec in ({"metric": "likes", "gte": 1}, {"metric": "posts", "gte": 0}, {"all": []}):
+        try:
+            compile_requirements(json.dumps(spec))
+        except ValueError:
+            invalid += 1
+    check("无效的获得条件报错", invalid == 3 and compile_requirements(None) is None)
+
+async def add_posts(user_id: int, count: int):
+    async with AsyncSessionLocal() as db:
+        db.add_all([Post(title="作品", content="...", category="showcase", author_id=user_id) for _ in range(count)])
+        await db.commit()
+
+def earned(user_id: int) -> set:
+    db = SessionLocal()
+    try:
+        return {name for (name,) in db.query(Achievement.name).join(
+            UserAchievement, UserAchievement.achievement_id == Achievement.id
+        ).filter(UserAchievement.user_id == user_id)}
+    finally:
+        db.close()
+
+def check_api(client: TestClient, users: int):
+    user_id = users + 1
+    db = SessionLocal()
+    try:
+        db.add(User(id=user_id, username="tester", password_hash="x"))
+        db.add_all([
+            Achievement(name="初露锋芒", description="发布3个帖子", category="social", points_reward=100,
+                        requirements=json.dumps({"metric": "posts", "gte": 3}), is_active=True),
+            Achievement(name="百分达人", description="累计获得100积分", category="points", points_reward=7,
+                        requirements=json.dumps({"metric": "points", "gte": 100}), is_active=True),
+            Achievement(name="坚持不懈", description="连续签到1天", category="learning", points_reward=0,
+                        requirements=json.dumps({"metric": "checkin_streak", "gte": 1}), is_active=True),
+            Achievement(name="条件无效", description="无法编译", category="bench", points_reward=1,
+                        requirements=json.dumps({"metric": "unknown"}), is_active=True),
+        ])
+        db.commit()
+    finally:
+        db.close()
+    auth = {"Authorization": f"Bearer {create_access_token(user_id)}"}
+
+    client.portal.call(add_posts, user_id, 2)
+    client.portal.call(achievement_engine.evaluate_pending)
+    checks_before = achievement_engine.metrics()["rule_checks"]
+    check("未达到条件时不发放", "初露锋芒" not in earned(user_id))
+    client.portal.call(add_posts, user_id, 1)
+    client.portal.call(achievement_engine.evaluate_pending)
+    metrics = achievement_engine.metrics()
+    check("发帖后只评估依赖发帖的成就并发放", "初露锋芒" in earned(user_id))
+    check("奖励积分达到100后连带获得积分成就", "百分达人" in earned(user_id))
+    db = SessionLocal()
+    try:
+        points = db.query(User.points).filter(User.id == user_id).scalar()
+    finally:
+        db.close()
+    check("奖励积分各发放一次", points == 100 + 7)
+    print(f"  引擎指标：{metrics}（发帖及连带的积分变化评估的成就数 {metrics['rule_checks'] - checks_before}）")
+
+    client.post("/api/game/checkin", headers=auth)
+    client.portal.call(achievement_engine.evaluate_pending)
+    check("签到后获得连续签到成就", "坚持不懈" in earned(user_id))
+    items = client.get("/api/game/achievements", headers=auth).json()["data"]
+    check("成就列表标记已获得", {item["name"] for item in items if item["earned"]} == earned(user_id)
+          and "条件无效" not in {item["name"] for item in items})
+    profile = client.get("/api/game/user/profile", headers=auth).json()["data"]
+    check("游戏信息包含积分、连续签到和已获得的成就",
+          profile["total_points"] == points + 10 and profile["consecutive_days"] == 1
+          and {item["name"] for item in profile["achievements"]} == earned(user_id))
+
+    # 脚本直接写入的数据不产生事件，由批量评估补上；修改成就后重新编译
+    other = user_id + 1
+    db = SessionLocal()
+    try:
+        db.add(User(id=other, username="imported", password_hash="x"))
+        db.add_all([Post(title="导入", content="...", category="showcase", author_id=other) for _ in range(3)])
+        achievement = db.query(Achievement).filter(Achievement.name == "坚持不懈").one()
+        achievement.name = "持之以恒"
+        db.commit()
+    finally:
+        db.close()
+    check("修改成就后重新编译", any(item["name"] == "持之以恒" for item in
+                                   client.get("/api/game/achievements").json()["data"]))
+    output = subprocess.run([sys.executable, "scripts/evaluate_achievements.py", "--dry-run"],
+                            capture_output=True, text=True, check=True, env=os.environ).stdout
+    check("dry-run不发放", "初露锋芒：将发放" in output and not earned(other))
+    output = subprocess.run([sys.executable, "scripts/evaluate_achievements.py"],
+                            capture_output=True, text=True, check=True, env=os.environ).stdout
+    print("  " + output.strip().splitlines()[-1])
+    check("批量评估补发脚本导入用户的成就", "初露锋芒" in earned(other))
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="成就引擎基准测试")
+    parser.add_argument("--users", type=int, default=2000, help="用户数")
+    args = parser.parse_args()
+    rng = random.Random(4)
+
+    check_compile()
+    with TestClient(app) as client:
+        seed(args.users, rng)
+        bench(client, args.users)
+        check_api(client, args.users)
+    if failures:
+        print(f"{len(failures)} 项检查失败")
+        sys.exit(1)
+    print("成就引擎检查通过")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+管理端统计基准测试
+在临时数据库中生成大量用户（默认100万），对比逐表COUNT + 七次按日计数的旧实现
+与聚合统计服务（app.services.stats）的响应时间。
+
+用法:
+    python scripts/bench_admin_stats.py --users 1000000 --rounds 20
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import create_engine, select, func
+
+from app.core.config import settings
+from app.database import Base, create_async_db_engine, create_missing_indexes
+from app.models.user import User
+from app.models.content import EncyclopediaContent, Tutorial
+from app.models.community import Post, Comment
+from app.models.shop import Product, Order
+from app.services.stats import get_admin_stats
+from sqlalchemy.ext.asyncio import AsyncSession
+
+def seed_database(db_path: str, user_count: int):
+    """建表并用sqlite3批量写入测试数据"""
+    sync_engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=sync_engine)
+    sync_engine.dispose()
+
+    now = datetime.now()
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    batch = []
+    for i in range(user_count):
+        created_at = now - timedelta(days=random.randint(0, 365), seconds=random.randint(0, 86399))
+        batch.append((f"bench_{i}", "x", random.random() < 0.9, created_at.strftime("%Y-%m-%d %H:%M:%S.%f")))
+        if len(batch) >= 50000:
+            conn.executemany(
+                "INSERT INTO users (username, password_hash, is_active, is_verified, is_admin, points, level, created_at, updated_at) "
+                "VALUES (?, ?, ?, 0, 0, 0, 1, ?, ?)",
+                [row + (row[3],) for row in batch]
+            )
+            batch.clear()
+    if batch:
+        conn.executemany(
+            "INSERT INTO users (username, password_hash, is_active, is_verified, is_admin, points, level, created_at, updated_at) "
+            "VALUES (?, ?, ?, 0, 0, 0, 1, ?, ?)",
+            [row + (row[3],) for row in batch]
+        )
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+async def legacy_stats(db: AsyncSession) -> dict:
+    """旧实现：每个计数一次查询，注册趋势按天查询七次"""
+    async def count(model, *criteria):
+        query = select(func.count()).select_from(model)
+        if criteria:
+            query = query.where(*criteria)
+        return await db.scalar(query)
+
+    result = [
+        await count(User),
+        await count(User, User.is_active == True),
+        await count(User, func.date(User.created_at) == datetime.now().date()),
+        await count(EncyclopediaContent),
+        await count(Tutorial),
+        await count(Post),
+        await count(Comment),
+        await count(Post, Post.status == "pending"),
+        await count(Product),
+        await count(Order),
+        await count(Order, Order.status == "pending"),
+    ]
+    for i in range(7):
+        day = datetime.now().date() - timedelta(days=6 - i)
+        result.append(await count(User, func.date(User.created_at) == day))
+    return result
+
+async def measure(name, engine, func_, rounds):
+    """多轮计时并输出中位数和最大值"""
+    timings = []
+    for _ in range(rounds):
+        async with AsyncSession(engine) as db:
+            start = time.perf_counter()
+            await func_(db)
+            timings.append((time.perf_counter() - start) * 1000)
+    print(f"  {name:<12} 中位数 {statistics.median(timings):>8.1f}ms  最大 {max(timings):>8.1f}ms")
+
+async def run(db_path: str, rounds: int):
+    """运行基准测试"""
+    url = f"sqlite:///{db_path}"
+    engine = create_async_db_engine(url, read_only=True)
+
+    print("[无新增索引]")
+    await measure("旧实现", engine, legacy_stats, rounds)
+    await measure("聚合统计", engine, get_admin_stats, rounds)
+
+    sync_engine = create_engine(url)
+    with sync_engine.begin() as conn:
+        create_missing_indexes(conn)
+        conn.exec_driver_sql("ANALYZE")
+    sync_engine.dispose()
+    await engine.dispose()
+
+    print("[创建索引后]")
+    await measure("旧实现", engine, legacy_stats, rounds)
+    await measure("聚合统计", engine, get_admin_stats, rounds)
+    await engine.dispose()
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="管理端统计基准测试")
+    parser.add_argument("--users", type=int, default=1000000, help="测试用户数")
+    parser.add_argument("--rounds", type=int, default=20, help="测量轮数")
+    args = parser.parse_args()
+
+    settings.DEBUG = False
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "bench_stats.db")
+        print(f"生成 {args.users} 个用户...")
+        seed_database(db_path, args.users)
+
+        # 先删除模型索引，得到旧版数据库的表结构
+        conn = sqlite3.connect(db_path)
+        for (index_name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'users' "
+            "AND name IN ('ix_users_created_at', 'ix_users_is_active')"
+        ).fetchall():
+            conn.execute(f"DROP INDEX {index_name}")
+        conn.commit()
+        conn.close()
+
+        asyncio.run(run(db_path, args.rounds))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+内容寻址上传存储基准测试
+在临时数据库和上传目录中把K张照片各上传N次（商品图片、帖子图片混合），对比每次上传都保存
+一份新文件与按内容去重后占用的磁盘空间和上传耗时；检查商品images字段保存blob id、列表返回URL和缩略图，
+用户端上传需要登录、记录上传者并按每人限额拒绝，以及 scripts/gc_blobs.py 清理未引用文件、scripts/migrate_uploads_to_blobs.py 迁移旧文件。
+
+用法:
+    python scripts/bench_blob_store.py --photos 4 --repeat 10
+"""
+
+import argparse
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+# 必须在导入应用之前指定临时数据库和上传目录
+tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'blob_store.db')}"
+os.environ["UPLOAD_DIR"] = os.path.join(tmp_dir, "uploads")
+os.environ["DEBUG"] = "False"
+os.environ["STATS_RECONCILE_INTERVAL"] = "0"
+os.chdir(backend_dir)
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.main import app
+from app.api.auth import create_access_token
+from app.core.exceptions import CustomHTTPException
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.content import EncyclopediaContent
+from app.models.media import ImageVariant, Upload
+from app.models.shop import Product
+from app.models.user import User
+from app.services.blobs import blob_path, stored_blobs
+from app.services.images import image_pipeline
+from app.services.uploads import upload_slot
+
+failures = []
+
+def check(name: str, ok: bool):
+    print(f"{'OK ' if ok else 'FAIL'} {name}")
+    if not ok:
+        failures.append(name)
+
+def make_photo(width: int, seed: int) -> bytes:
+    height = width * 2 // 3
+    gradient = Image.linear_gradient("L").rotate(seed * 37 % 360).resize((width, height))
+    noise = Image.effect_noise((width, height), 24 + seed % 8)
+    buffer = io.BytesIO()
+    Image.merge("RGB", (gradient, noise, Image.blend(gradient, noise, 0.5))).save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+def wait_pipeline(client: TestClient, timeout: float = 120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if client.get("/admin/api/metrics").json()["data"]["image_pipeline"]["pending"] == 0:
+            return
+        time.sleep(0.2)
+
+def disk_usage(directory: Path) -> int:
+    return sum(path.stat().st_size for path in directory.rglob("*") if path.is_file())
+
+def run_script(*args) -> str:
+    return subprocess.run(
+        [sys.executable, *args], capture_output=True, text=True, check=True, env=os.environ
+    ).stdout
+
+def check_user_limits(client: TestClient, auth: dict, photo: bytes, public_uploads: int):
+    """用户端上传：需要登录、记录上传者，超过次数、当天字节数或同时上传数时拒绝"""
+    db = SessionLocal()
+    try:
+        recorded = db.query(Upload).filter(Upload.user_id == 1).all()
+    finally:
+        db.close()
+    check("用户端上传记录上传者和大小", len(recorded) == public_uploads and all(row.size > 0 for row in recorded))
+    used = sum(row.size for row in recorded)
+
+    def upload(headers=auth):
+        return client.post("/api/upload/content", files={"file": ("p.jpg", photo)}, headers=headers).status_code
+
+    hourly, daily = settings.UPLOAD_USER_HOURLY_COUNT, settings.UPLOAD_USER_DAILY_BYTES
+    try:
+        settings.UPLOAD_USER_HOURLY_COUNT = len(recorded)
+        over_count = upload()
+        settings.UPLOAD_USER_HOURLY_COUNT = hourly
+        settings.UPLOAD_USER_DAILY_BYTES = used + len(photo) // 2
+        over_remaining = upload()
+        settings.UPLOAD_USER_DAILY_BYTES = used
+        exhausted = upload()
+    finally:
+        settings.UPLOAD_USER_HOURLY_COUNT, settings.UPLOAD_USER_DAILY_BYTES = hourly, daily
+    check("未登录上传返回403", upload(headers={}) == 403)
+    check("超过每小时次数返回429，超过当天剩余额度返回413，额度用完返回429",
+          (over_count, over_remaining, exhausted) == (429, 413, 429))
+
+    async def concurrent_slots():
+        async with upload_slot(1), upload_slot(1):
+            try:
+                async with upload_slot(1):
+                    return False
+            except CustomHTTPException as exc:
+                return exc.status_code == 429
+    check(f"同时进行的上传超过{settings.UPLOAD_USER_CONCURRENCY}个时返回429",
+          settings.UPLOAD_USER_CONCURRENCY == 2 and client.portal.call(concurrent_slots))
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="内容寻址上传存储基准测试")
+    parser.add_argument("--photos", type=int, default=6, help="不同照片数（至少5张）")
+    parser.add_argument("--repeat", type=int, default=10, help="每张照片上传次数")
+    args = parser.parse_args()
+    settings.MAX_FILE_SIZE = 20 * 1024 * 1024
+    upload_dir = Path(settings.UPLOAD_DIR)
+
+    photos = [make_photo(1600, seed) for seed in range(args.photos)]
+    with TestClient(app) as client:
+        response = client.post(
+            "/admin/login",
+            data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+            follow_redirects=False
+        )
+        client.cookies.set("admin_session", response.cookies["admin_session"])
+
+        auth = {"Authorization": f"Bearer {create_access_token(1)}"}
+        first, repeated = [], []
+        uploads = []
+        for round_index in range(args.repeat):
+            for i, photo in enumerate(photos):
+                path = "/admin/api/uploads/products" if round_index % 2 == 0 else "/api/upload/content"
+                start = time.perf_counter()
+                data = client.post(path, files={"file": (f"p{i}.jpg", photo)}, headers=auth).json()["data"]
+                (first if round_index == 0 else repeated).append(time.perf_counter() - start)
+                uploads.append(data)
+        wait_pipeline(client)
+
+        ids = [upload["id"] for upload in uploads[:args.photos]]
+        check_user_limits(client, auth, photos[0], args.photos * (args.repeat // 2))
+        uploaded = sum(len(photo) for photo in photos) * args.repeat
+        blobs_size = sum(path.stat().st_size for path in stored_blobs().values())
+        print(f"[{args.photos} 张照片，每张上传 {args.repeat} 次（商品图片与帖子图片交替）]")
+        print(f"  每次保存新文件：{uploaded / 1024 / 1024:.1f}MB，按内容去重：{blobs_size / 1024 / 1024:.1f}MB")
+        print(f"  上传耗时：首次平均 {sum(first) / len(first) * 1000:.1f}ms，"
+              f"重复内容平均 {sum(repeated) / len(repeated) * 1000:.1f}ms（不生成缩略图）")
+        print(f"  上传目录总占用（含缩略图和WebP）：{disk_usage(upload_dir) / 1024 / 1024:.1f}MB")
+
+        check("相同内容只保存一份", len(stored_blobs()) == args.photos)
+        check("重复上传标记为deduplicated且返回相同id",
+              all(upload["deduplicated"] for upload in uploads[args.photos:])
+              and all(upload["id"] == ids[i % args.photos] for i, upload in enumerate(uploads)))
+        check("每张照片只生成一次缩略图", image_pipeline.metrics()["generated"] == args.photos)
+        check("blob按两级分片目录存放",
+              all(blob_path(blob_id).parent.name == blob_id[2:4] for blob_id in ids))
+        check("没有遗留临时文件", not list(upload_dir.rglob("*.part")))
+
+        # 商品images字段保存blob id，列表接口返回URL和缩略图
+        response = client.post("/admin/api/products", json={
+            "name": "绒花胸针", "category": "handicraft", "price": 99, "stock": 5,
+            "images": [ids[0], uploads[1]["url"], "/static/images/product1.jpg"]
+        })
+        check("创建商品时引用上传的图片", response.json()["success"])
+        db = SessionLocal()
+        try:
+            stored = json.loads(db.query(Product.images).filter(Product.name == "绒花胸针").scalar())
+        finally:
+            db.close()
+        check("images字段保存blob id", stored == [ids[0], ids[1], "/static/images/product1.jpg"])
+        item = client.get("/api/shop/products").json()["data"]["items"][0]
+        check("列表返回图片URL和缩略图",
+              item["images"][:2] == [uploads[0]["url"], uploads[1]["url"]]
+              and item["thumbnails"][0]["webp"] is not None and item["thumbnails"][0]["width"] >= 320)
+        response = client.post("/admin/api/products", json={
+            "name": "无效图片", "category": "handicraft", "price": 1, "stock": 1, "images": ["0" * 64 + ".jpg"]
+        })
+        check("引用不存在的blob时拒绝", not response.json()["success"])
+
+        # 百科正文、商品描述中嵌入的图片URL也是引用
+        db = SessionLocal()
+        try:
+            db.add(EncyclopediaContent(title="绒花的历史", category="history",
+                                       content=f'<p>明清时期</p><img src="{uploads[2]["url"]}">'))
+            db.add(Product(name="描述带图", category="handicraft", price=10, stock=1, status="inactive",
+                           description=f'<img src="{uploads[3]["url"]}">'))
+            db.commit()
+        finally:
+            db.close()
+
+        # 清理：未引用的blob超过宽限期后删除（连同缩略图），被引用的保留
+        unreferenced = ids[4:]
+        output = run_script("scripts/gc_blobs.py", "--grace-hours", "1")
+        check("宽限期内的未引用文件不删除", all(blob_path(blob_id).is_file() for blob_id in unreferenced))
+        old = time.time() - 2 * 3600
+        for blob_id in ids:
+            os.utime(blob_path(blob_id), (old, old))
+        output = run_script("scripts/gc_blobs.py", "--grace-hours", "1", "--dry-run")
+        check("dry-run只列出不删除",
+              all(blob_path(blob_id).is_file() for blob_id in unreferenced) and unreferenced[0] in output)
+        before = disk_usage(upload_dir)
+        output = run_script("scripts/gc_blobs.py", "--grace-hours", "1")
+        print(f"  清理未引用文件：{before / 1024 / 1024:.1f}MB -> {disk_usage(upload_dir) / 1024 / 1024:.1f}MB")
+        db = SessionLocal()
+        try:
+            variants_left = db.query(ImageVariant).filter(
+                ImageVariant.original_url.in_([upload["url"] for upload in uploads[4:args.photos]])
+            ).count()
+        finally:
+            db.close()
+        check("删除未引用的blob及其缩略图",
+              not any(blob_path(blob_id).exists() for blob_id in unreferenced) and variants_left == 0
+              and not list(upload_dir.rglob(f"{unreferenced[0][:64]}_*")))
+        check("被引用的blob保留", blob_path(ids[0]).is_file() and blob_path(ids[1]).is_file())
+        check("百科正文、商品描述中嵌入的blob保留", blob_path(ids[2]).is_file() and blob_path(ids[3]).is_file())
+
+        # 迁移：旧目录中的文件移入存储，引用改为blob
+        legacy_dir = upload_dir / "products"
+        legacy_dir.mkdir(parents=True, exist_ok=True)
+        (legacy_dir / "legacy_a.jpg").write_bytes(photos[0])
+        (legacy_dir / "legacy_b.jpg").write_bytes(photos[0])
+        legacy_url = "/static/uploads/products/legacy_b.jpg"
+        db = SessionLocal()
+        try:
+            db.add(Product(name="旧商品", category="handicraft", price=10, stock=1,
+                           images=json.dumps(["/static/uploads/products/legacy_a.jpg"])))
+            user = db.query(User).first() or User(username="u1", password_hash="x")
+            user.avatar = legacy_url
+            db.add(user)
+            article = EncyclopediaContent(title="旧百科", category="craft", content=f'<img src="{legacy_url}">')
+            db.add(article)
+            db.commit()
+            print("  " + run_script("scripts/migrate_uploads_to_blobs.py").strip().replace("\n", "\n  "))
+            db.expire_all()
+            migrated = json.loads(db.query(Product.images).filter(Product.name == "旧商品").scalar())
+            avatar = db.query(User.avatar).filter(User.id == user.id).scalar()
+            content = db.query(EncyclopediaContent.content).filter(EncyclopediaContent.id == article.id).scalar()
+        finally:
+            db.close()
+        check("迁移后旧文件删除，相同内容不重复保存",
+              not any(legacy_dir.iterdir()) and len(stored_blobs()) == 4)
+        check("迁移后images字段为blob id，头像和百科正文中为blob URL",
+              migrated == [ids[0]] and avatar == uploads[0]["url"] and content == f'<img src="{uploads[0]["url"]}">')
+
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    if failures:
+        print(f"{len(failures)} 项检查失败")
+        sys.exit(1)
+    print("内容寻址存储检查通过")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+挑战引擎基准测试
+在临时数据库中生成N名用户的帖子、教程学习记录和订单，对比每次列出挑战时按完成条件重新统计
+（每个挑战一条COUNT查询）与读取增量维护的用户挑战进度（一次按索引的查询）的耗时，以及批量事件写入进度的开销；
+检查完成条件编译、发帖/审核/完成教程/订单支付/签到事件累加进度、回滚不计入、周期和起止时间、领取奖励（0分奖励也只能领取一次）。
+
+用法:
+    python scripts/bench_challenges.py --users 2000
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+# 必须在导入应用之前指定临时数据库
+tmp_dir = tempfile.mkdtemp()
+db_path = os.path.join(tmp_dir, "challenges.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+os.environ["DEBUG"] = "False"
+os.environ["STATS_RECONCILE_INTERVAL"] = "0"
+os.chdir(backend_dir)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.main import app
+from app.api.auth import create_access_token
+from app.core.config import settings
+from app.database import SessionLocal, async_read_engine
+from app.models.community import Post
+from app.models.content import Tutorial
+from app.models.game import Challenge
+from app.models.shop import Order
+from app.models.user import User
+from app.services.challenges import ChallengeRule, compile_requirements
+from app.services.leaderboard import period_start
+
+failures = []
+
+def check(name: str, ok: bool):
+    print(f"{'OK ' if ok else 'FAIL'} {name}")
+    if not ok:
+        failures.append(name)
+
+CHALLENGES = [
+    dict(title="社交新星", description="本周发布5个作品帖", type="weekly", category="social", points_reward=30,
+         requirements={"event": "post_created", "count": 5, "where": {"category": "showcase"}}),
+    dict(title="学习达人", description="本周完成3个视频教程", type="weekly", category="learning", points_reward=50,
+         requirements={"event": "tutorial_completed", "count": 3}),
+    dict(title="每日签到", description="今天签到", type="daily", category="learning", points_reward=5,
+         requirements={"event": "checkin"}),
+    dict(title="首单", description="完成一笔满100元的订单", type="achievement", category="shop", points_reward=20,
+         requirements={"event": "order_paid", "where": {"total_amount": {"gte": 100}}}),
+    dict(title="绒花记忆配对", description="通过配对游戏学习绒花知识", type="记忆游戏", category="学习挑战",
+         points_reward=10, requirements=None),
+    dict(title="已结束的活动", description="上周的活动", type="achievement", category="social", points_reward=99,
+         requirements={"event": "post_created"}, end_date=datetime.now() - timedelta(days=1)),
+    dict(title="条件无效", description="无法编译的条件", type="daily", category="social", points_reward=1,
+         requirements={"event": "unknown_event"}),
+    dict(title="集章打卡", description="参加线下集章活动（只记录完成，不奖励积分）", type="achievement", category="social",
+         points_reward=0, requirements=None),
+]
+
+def check_compile():
+    event_name, target, predicate = compile_requirements(json.dumps(
+        {"event": "order_paid", "count": 2, "where": {"total_amount": {"gte": 100, "lt": 500}, "channel": "app"}}
+    ))
+    check("编译完成条件：事件、目标次数、比较和相等条件",
+          (event_name, target) == ("order_paid", 2) and predicate({"total_amount": 100, "channel": "app"})
+          and not predicate({"total_amount": 500, "channel": "app"}) and not predicate({"channel": "app"}))
+    invalid = 0
+    for spec in ({"event": "nope"}, {"event": "checkin", "count": 0}, {"event": "checkin", "where": {"a": {"like": 1}}}):
+        try:
+            compile_requirements(json.dumps(spec))
+        except ValueError:
+            invalid += 1
+    check("无效的完成条件报错", invalid == 3 and compile_requirements(None) is None)
+
+    monday = datetime(2026, 3, 2, 9)
+    rule = ChallengeRule(Challenge(id=1, title="t", description="d", type="weekly", category="c", points_reward=1,
+                                   requirements=None, start_date=monday, end_date=monday + timedelta(days=14)))
+    check("每周挑战按周一开始的周期计算，起止时间外不计",
+          rule.period(monday + timedelta(days=6)) == monday.date()
+          and rule.period(monday + timedelta(days=7)) == (monday + timedelta(days=7)).date()
+          and rule.period(monday - timedelta(hours=1)) is None and rule.period(monday + timedelta(days=14)) is None)
+
+def seed(users: int, rng: random.Random):
+    db = SessionLocal()
+    try:
+        db.add_all([User(id=i, username=f"player{i}", password_hash="x") for i in range(1, users + 1)])
+        for spec in CHALLENGES:
+            spec = dict(spec)
+            spec["requirements"] = json.dumps(spec["requirements"]) if spec["requirements"] else None
+            db.add(Challenge(is_active=True, **spec))
+        db.add_all([Tutorial(id=i, title=f"教程{i}", video_url=f"/static/v{i}.mp4", category="basic", duration=100)
+                    for i in range(1, 6)])
+        db.commit()
+        # 批量发帖：一次提交中的事件汇总为一条批量upsert
+        posts = [
+            Post(title="作品", content="...", category=rng.choice(["showcase", "question"]), author_id=user_id)
+            for user_id in range(1, users + 1) for _ in range(rng.randint(0, 8))
+        ]
+        db.add_all(posts)
+        start = time.perf_counter()
+        db.commit()
+        elapsed = time.perf_counter() - start
+    finally:
+        db.close()
+    return len(posts), elapsed
+
+def recount_progress(conn: sqlite3.Connection, user_id: int, week_start: str) -> list:
+    """旧做法：每次列出挑战时按完成条件重新统计"""
+    return [
+        conn.execute("SELECT COUNT(*) FROM posts WHERE author_id = ? AND category = 'showcase' AND created_at >= ?",
+                     (user_id, week_start)).fetchone()[0],
+        conn.execute("SELECT COUNT(*) FROM learning_progress WHERE user_id = ? AND is_completed = 1 "
+                     "AND updated_at >= ?", (user_id, week_start)).fetchone()[0],
+        conn.execute("SELECT COUNT(*) FROM orders WHERE user_id = ? AND status IN ('paid', 'shipped', 'completed') "
+                     "AND total_amount >= 100", (user_id,)).fetchone()[0],
+    ]
+
+def bench(client: TestClient, users: int, posts: int, elapsed: float, rng: random.Random):
+    user_ids = [rng.randrange(1, users + 1) for _ in range(300)]
+    week_start = str(period_start("weekly", datetime.now()))
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_bench_posts_author ON posts (author_id, created_at)")
+    start = time.perf_counter()
+    for user_id in user_ids:
+        recount_progress(conn, user_id, week_start)
+    recount = (time.perf_counter() - start) / len(user_ids) * 1e6
+    start = time.perf_counter()
+    for user_id in user_ids:
+        conn.execute(
+            "SELECT challenge_id, period_start, progress, is_completed, points_earned FROM user_challenges "
+            "WHERE user_id = ? AND challenge_id IN (1, 2, 3, 4, 5) AND period_start IN (?, ?, '1970-01-01')",
+            (user_id, week_start, str(datetime.now().date()))
+        ).fetchall()
+    indexed = (time.perf_counter() - start) / len(user_ids) * 1e6
+    expected = conn.execute(
+        "SELECT COUNT(*) FROM posts WHERE author_id = ? AND category = 'showcase'", (user_ids[0],)
+    ).fetchone()[0]
+    conn.close()
+
+    headers = [{"Authorization": f"Bearer {create_access_token(user_id)}"} for user_id in user_ids]
+    start = time.perf_counter()
+    for auth in headers:
+        client.get("/api/game/challenges", headers=auth)
+    listing = (time.perf_counter() - start) / len(headers) * 1e6
+    items = client.get("/api/game/challenges", headers=headers[0]).json()["data"]
+    check("增量进度与重新统计一致", items[0]["progress"] == min(expected, 5))
+
+    print(f"[{users} 名用户，{posts} 个帖子]")
+    print(f"  一次提交 {posts} 个帖子（含进度批量写入）：{elapsed * 1000:.0f}ms")
+    print(f"  每次重新统计进度（3条COUNT）：{recount:.0f}us/用户；读取用户挑战进度（1条索引查询）：{indexed:.0f}us/用户")
+    print(f"  接口列出挑战（含HTTP和鉴权）：{listing:.0f}us/次")
+
+def check_api(client: TestClient, users: int):
+    user_id = users + 1
+    db = SessionLocal()
+    try:
+        db.add(User(id=user_id, username="tester", password_hash="x"))
+        db.add(Post(title="草稿", content="...", category="showcase", author_id=user_id, status="pending"))
+        db.commit()
+        pending_id = db.query(Post.id).filter(Post.author_id == user_id).scalar()
+    finally:
+        db.close()
+    auth = {"Authorization": f"Bearer {create_access_token(user_id)}"}
+
+    def progress():
+        return {item["title"]: item for item in client.get("/api/game/challenges", headers=auth).json()["data"]}
+
+    items = progress()
+    check("只列出进行中且条件有效的挑战",
+          set(items) == {"社交新星", "学习达人", "每日签到", "首单", "绒花记忆配对", "集章打卡"})
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(async_read_engine.sync_engine, "before_cursor_execute", listener)
+    client.get("/api/game/challenges", headers=auth)
+    event.remove(async_read_engine.sync_engine, "before_cursor_execute", listener)
+    check("列出挑战只查询一次用户进度", sum("user_challenges" in s for s in statements) == 1
+          and not any("FROM posts" in s or "FROM challenges" in s for s in statements))
+
+    db = SessionLocal()
+    try:
+        db.add_all([Post(title="作品", content="...", category="showcase", author_id=user_id) for _ in range(3)])
+        db.add(Post(title="提问", content="...", category="question", author_id=user_id))
+        db.commit()
+        db.add(Post(title="回滚", content="...", category="showcase", author_id=user_id))
+        db.flush()
+        db.rollback()
+    finally:
+        db.close()
+    check("发帖按条件累加进度，回滚的不计入", progress()["社交新星"]["progress"] == 3)
+
+    response = client.post(
+        "/admin/login",
+        data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+        follow_redirects=False
+    )
+    client.cookies.set("admin_session", response.cookies["admin_session"])
+    client.put(f"/admin/api/posts/{pending_id}/status", json={"status": "published"})
+    client.put(f"/admin/api/posts/{pending_id}/status", json={"status": "hidden"})
+    client.put(f"/admin/api/posts/{pending_id}/status", json={"status": "published"})
+    check("审核通过计为发帖（隐藏后重新发布不重复计）", progress()["社交新星"]["progress"] == 4)
+
+    response = client.post("/api/game/challenges/1/complete", headers=auth)
+    check("未完成时不能领取", response.status_code == 400 and response.json()["error_code"] == "CHALLENGE_NOT_COMPLETED")
+    db = SessionLocal()
+    try:
+        db.add(Post(title="作品", content="...", category="showcase", author_id=user_id))
+        db.add(Post(title="作品", content="...", category="showcase", author_id=user_id))
+        db.commit()
+    finally:
+        db.close()
+    item = progress()["社交新星"]
+    check("达到目标后标记完成，进度不超过目标", item["progress"] == 5 and item["is_completed"])
+    data = client.post("/api/game/challenges/1/complete", headers=auth).json()["data"]
+    check("领取奖励", data["points_earned"] == 30 and data["total_points"] == 30)
+    response = client.post("/api/game/challenges/1/complete", headers=auth)
+    check("重复领取返回400", response.json().get("error_code") == "REWARD_ALREADY_CLAIMED"
+          and progress()["社交新星"]["reward_claimed"])
+
+    for tutorial_id in (1, 2, 2, 3):
+        client.post(f"/api/tutorial/{tutorial_id}/progress", params={"position": 99}, headers=auth)
+    check("完成教程累加进度（同一教程只计一次）", progress()["学习达人"]["progress"] == 3)
+
+    client.post("/api/game/checkin", headers=auth)
+    check("签到累加每日挑战进度", progress()["每日签到"]["is_completed"])
+
+    db = SessionLocal()
+    try:
+        db.add_all([
+            Order(user_id=user_id, order_no="B1", total_amount=50),
+            Order(user_id=user_id, order_no="B2", total_amount=120),
+        ])
+        db.commit()
+        order_ids = [row.id for row in db.query(Order.id).filter(Order.user_id == user_id).order_by(Order.id)]
+    finally:
+        db.close()
+    client.put(f"/admin/api/orders/{order_ids[0]}/status", json={"status": "paid"})
+    check("金额不满足条件的订单不计", not progress()["首单"]["is_completed"])
+    client.put(f"/admin/api/orders/{order_ids[1]}/status", json={"status": "paid"})
+    client.put(f"/admin/api/orders/{order_ids[1]}/status", json={"status": "shipped"})
+    check("订单支付后完成", progress()["首单"]["progress"] == 1 and progress()["首单"]["is_completed"])
+
+    game = next(item for item in progress().values() if item["title"] == "绒花记忆配对")
+    data = client.post(f"/api/game/challenges/{game['id']}/complete", headers=auth).json()["data"]
+    check("没有完成条件的小游戏挑战上报即完成", data["points_earned"] == 10)
+    stamp = progress()["集章打卡"]
+    data = client.post(f"/api/game/challenges/{stamp['id']}/complete", headers=auth).json()["data"]
+    responses = [client.post(f"/api/game/challenges/{stamp['id']}/complete", headers=auth) for _ in range(3)]
+    check("0分奖励的挑战只能领取一次",
+          data["points_earned"] == 0 and progress()["集章打卡"]["reward_claimed"]
+          and all(response.json().get("error_code") == "REWARD_ALREADY_CLAIMED" for response in responses))
+    check("已结束的挑战不能领取", client.post("/api/game/challenges/6/complete", headers=auth).status_code == 404)
+
+    db = SessionLocal()
+    try:
+        challenge = db.get(Challenge, 2)
+        challenge.is_active = False
+        db.commit()
+    finally:
+        db.close()
+    check("修改挑战后立即生效", "学习达人" not in progress())
+    check("未登录时只返回挑战不含进度",
+          all(item["progress"] == 0 for item in client.get("/api/game/challenges").json()["data"]))
+    metrics = client.get("/admin/api/metrics").json()["data"]["challenges"]
+    print(f"  引擎指标：{metrics}")
+    check("无效条件计入指标", metrics["invalid_rules"] == 1)
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="挑战引擎基准测试")
+    parser.add_argument("--users", type=int, default=2000, help="用户数")
+    args = parser.parse_args()
+    rng = random.Random(9)
+
+    check_compile()
+    with TestClient(app) as client:
+        posts, elapsed = seed(args.users, rng)
+        bench(client, args.users, posts, elapsed, rng)
+        check_api(client, args.users)
+    if failures:
+        print(f"{len(failures)} 项检查失败")
+        sys.exit(1)
+    print("挑战引擎检查通过")
+
+if __name__ == "__main__":
+    main()
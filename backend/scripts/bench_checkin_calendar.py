@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+签到日历基准测试
+生成N名用户约D天的签到历史，对比旧的签到记录表（每次签到一行）与签到日历（每人每年一行、每天一位）
+的占用空间，以及"今天是否已签到"、月签到天数、连续签到天数的查询耗时；随机签到历史与按日期集合计算的结果对照，
+并在临时数据库中检查签到接口、跨年连续签到、并发重复签到和 scripts/migrate_checkins_to_calendar.py 迁移。
+
+用法:
+    python scripts/bench_checkin_calendar.py --users 2000 --days 730
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+# 必须在导入应用之前指定临时数据库
+tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'checkin.db')}"
+os.environ["DEBUG"] = "False"
+os.environ["STATS_RECONCILE_INTERVAL"] = "0"
+os.chdir(backend_dir)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from app.main import app
+from app.api.auth import create_access_token
+from app.database import AsyncSessionLocal, Base, SessionLocal
+from app.models.game import CheckinCalendar, CheckinRecord, UserGameProfile
+from app.models.user import User
+from app.services.checkin import (
+    day_index, month_days, month_total, run_ending, check_in, to_bits, to_bytes
+)
+
+failures = []
+
+def check(name: str, ok: bool):
+    print(f"{'OK ' if ok else 'FAIL'} {name}")
+    if not ok:
+        failures.append(name)
+
+def timed(func, repeat: int) -> float:
+    """平均每次耗时（微秒）"""
+    start = time.perf_counter()
+    for i in range(repeat):
+        func(i)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+def make_history(rng: random.Random, today: date, days: int) -> list:
+    """签到历史：连续签到一段时间、中断几天交替"""
+    history, day = [], today - timedelta(days=days)
+    while day <= today:
+        run = rng.randint(1, 40)
+        history.extend(day + timedelta(days=i) for i in range(run) if day + timedelta(days=i) <= today)
+        day += timedelta(days=run + rng.randint(1, 5))
+    return history
+
+def db_size(path: str) -> int:
+    with sqlite3.connect(path) as conn:
+        conn.execute("VACUUM")
+    return os.path.getsize(path)
+
+def bench(users: int, days: int):
+    rng = random.Random(11)
+    today = date.today()
+    histories = {user_id: make_history(rng, today, days) for user_id in range(1, users + 1)}
+    records_path = os.path.join(tmp_dir, "records_bench.db")
+    calendars_path = os.path.join(tmp_dir, "calendars_bench.db")
+    for path, table in ((records_path, CheckinRecord.__table__), (calendars_path, CheckinCalendar.__table__)):
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(engine, tables=[User.__table__, table])
+        engine.dispose()
+    now = datetime.now().isoformat(sep=" ")
+    # 旧表只有外键没有索引，这里补上(user_id, checkin_date)索引，对比的是有索引时的查询
+    records = sqlite3.connect(records_path)
+    records.execute("CREATE INDEX ix_bench_user_date ON checkin_records (user_id, checkin_date)")
+    records.executemany(
+        "INSERT INTO checkin_records (user_id, checkin_date, points_earned, consecutive_days, created_at, updated_at) "
+        "VALUES (?, ?, 10, 1, ?, ?)",
+        ((user_id, f"{day} 08:00:00", now, now) for user_id, history in histories.items() for day in history)
+    )
+    records.commit()
+    calendars = sqlite3.connect(calendars_path)
+    rows = []
+    for user_id, history in histories.items():
+        years = {}
+        for day in history:
+            years[day.year] = years.get(day.year, 0) | 1 << day_index(day)
+        rows.extend((user_id, year, to_bytes(bits), now, now) for year, bits in years.items())
+    calendars.executemany(
+        "INSERT INTO checkin_calendars (user_id, year, days, created_at, updated_at) VALUES (?, ?, ?, ?, ?)", rows
+    )
+    calendars.commit()
+    user_ids = [rng.randrange(1, users + 1) for _ in range(2000)]
+    month_start = today.replace(day=1)
+
+    def rows_streak(i):
+        streak, expected = 0, today
+        for (value,) in records.execute(
+            "SELECT checkin_date FROM checkin_records WHERE user_id = ? ORDER BY checkin_date DESC", (user_ids[i],)
+        ):
+            if value[:10] != expected.isoformat():
+                break
+            streak, expected = streak + 1, expected - timedelta(days=1)
+        return streak
+
+    def load(i, year=today.year):
+        row = calendars.execute(
+            "SELECT days FROM checkin_calendars WHERE user_id = ? AND year = ?", (user_ids[i], year)
+        ).fetchone()
+        return to_bits(row[0] if row else None)
+
+    def bits_streak(i):
+        day, streak = today, 0
+        while True:
+            run = run_ending(load(i, day.year), day_index(day))
+            streak += run
+            if run <= day_index(day):
+                return streak
+            day = date(day.year - 1, 12, 31)
+
+    results = {
+        "今天是否已签到": (
+            timed(lambda i: records.execute(
+                "SELECT 1 FROM checkin_records WHERE user_id = ? AND checkin_date >= ? LIMIT 1",
+                (user_ids[i], f"{today} 00:00:00")).fetchone(), 2000),
+            timed(lambda i: load(i) >> day_index(today) & 1, 2000)
+        ),
+        "本月签到天数": (
+            timed(lambda i: records.execute(
+                "SELECT COUNT(*) FROM checkin_records WHERE user_id = ? AND checkin_date >= ?",
+                (user_ids[i], f"{month_start} 00:00:00")).fetchone(), 2000),
+            timed(lambda i: month_total(load(i), today.year, today.month), 2000)
+        ),
+        "连续签到天数": (timed(rows_streak, 2000), timed(bits_streak, 2000)),
+    }
+    check("两种方式计算的连续天数一致", all(rows_streak(i) == bits_streak(i) for i in range(500)))
+    records.close()
+    calendars.close()
+
+    total = sum(len(history) for history in histories.values())
+    print(f"[{users} 名用户，约 {days} 天，共 {total} 次签到]")
+    print(f"  占用空间：签到记录 {db_size(records_path) / 1024 / 1024:.1f}MB（{total} 行），"
+          f"签到日历 {db_size(calendars_path) / 1024 / 1024:.1f}MB（{len(rows)} 行）")
+    print(f"  {'查询':<12}{'签到记录':>10}{'签到日历':>10}")
+    for name, (old, new) in results.items():
+        print(f"  {name:<10}{old:>10.1f}us{new:>10.1f}us")
+
+def check_functions():
+    """随机签到日期与按日期集合计算的结果对照"""
+    rng = random.Random(5)
+    ok = True
+    for year in (2023, 2024):
+        days = {date(year, 1, 1) + timedelta(days=i) for i in range(366) if rng.random() < 0.7}
+        days = {day for day in days if day.year == year}
+        bits = 0
+        for day in days:
+            bits |= 1 << day_index(day)
+        for month in range(1, 13):
+            expected = sorted(day.day for day in days if day.month == month)
+            ok = ok and month_days(bits, year, month) == expected and month_total(bits, year, month) == len(expected)
+        for _ in range(200):
+            day = date(year, 1, 1) + timedelta(days=rng.randrange(365))
+            streak, cursor = 0, day
+            while cursor in days:
+                streak, cursor = streak + 1, cursor - timedelta(days=1)
+            ok = ok and run_ending(bits, day_index(day)) == streak
+    check("月签到日期、月签到天数、连续天数与日期集合一致", ok)
+    check("闰年12月31日为第366天", day_index(date(2024, 12, 31)) == 365 and len(to_bytes(1 << 365)) == 46)
+
+async def checkin_at(user_id: int, now: datetime) -> dict:
+    async with AsyncSessionLocal() as db:
+        data = await check_in(db, user_id, now)
+        await db.commit()
+        return data
+
+async def checkin_race(user_id: int, now: datetime, count: int = 4) -> list:
+    """同时发起多个签到（模拟重复点击）"""
+    async def attempt():
+        async with AsyncSessionLocal() as db:
+            try:
+                await check_in(db, user_id, now)
+                await db.commit()
+                return "ok"
+            except Exception as exc:
+                return getattr(exc, "error_code", type(exc).__name__)
+    return await asyncio.gather(*(attempt() for _ in range(count)))
+
+def check_api():
+    with TestClient(app) as client:
+        db = SessionLocal()
+        try:
+            db.add_all([User(id=i, username=f"player{i}", password_hash="x") for i in range(1, 5)])
+            db.commit()
+        finally:
+            db.close()
+        auth = {"Authorization": f"Bearer {create_access_token(1)}"}
+
+        check("未登录不能签到", client.post("/api/game/checkin").status_code in (401, 403))
+        response = client.post("/api/game/checkin", headers=auth)
+        data = response.json()["data"]
+        check("首次签到得10分、连续1天", data["points_earned"] == 10 and data["bonus_points"] == 0
+              and data["consecutive_days"] == 1 and data["total_points"] == 10)
+        response = client.post("/api/game/checkin", headers=auth)
+        check("同一天重复签到返回400",
+              response.status_code == 400 and response.json()["error_code"] == "ALREADY_CHECKED_IN")
+        today = date.today()
+        calendar = client.get("/api/game/checkin/calendar", headers=auth).json()["data"]
+        check("日历显示今天已签到", calendar["checked_in_today"] and calendar["days"] == [today.day]
+              and calendar["month_total"] == 1 and calendar["consecutive_days"] == 1)
+        check("无效月份返回400", client.get(
+            "/api/game/checkin/calendar", params={"month": 13}, headers=auth).status_code == 400)
+
+        # 跨年连续签到：去年最后3天 + 今年1月1日
+        start = datetime(2025, 12, 29, 9)
+        streaks = [client.portal.call(checkin_at, 2, start + timedelta(days=i))["consecutive_days"] for i in range(4)]
+        last = client.portal.call(checkin_at, 2, datetime(2026, 1, 3, 9))
+        check("连续签到跨年累计，中断后从1开始", streaks == [1, 2, 3, 4] and last["consecutive_days"] == 1)
+        outcomes = client.portal.call(checkin_race, 3, datetime(2026, 3, 1, 9))
+        outcomes += client.portal.call(checkin_race, 3, datetime(2026, 3, 2, 9))
+        db = SessionLocal()
+        try:
+            points = db.query(User.points).filter(User.id == 3).scalar()
+        finally:
+            db.close()
+        print(f"  并发签到结果：{outcomes}")
+        check("并发重复签到只有一次成功", outcomes.count("ok") == 2 and points == 10 + 11)
+
+        # 迁移旧签到记录
+        db = SessionLocal()
+        try:
+            db.add_all([
+                CheckinRecord(user_id=4, checkin_date=datetime(2025, 12, 30, 8) + timedelta(days=i))
+                for i in range(5)
+            ])
+            db.add(CheckinCalendar(user_id=4, year=2026, days=to_bytes(1 << day_index(date(2026, 1, 4)))))
+            db.commit()
+            output = subprocess.run(
+                [sys.executable, "scripts/migrate_checkins_to_calendar.py"],
+                capture_output=True, text=True, check=True, env=os.environ
+            ).stdout
+            print("  " + output.strip().replace("\n", "\n  "))
+            subprocess.run([sys.executable, "scripts/migrate_checkins_to_calendar.py"],
+                           capture_output=True, check=True, env=os.environ)
+            db.expire_all()
+            calendars = {row.year: to_bits(row.days) for row in
+                         db.query(CheckinCalendar).filter(CheckinCalendar.user_id == 4)}
+            profile = db.query(UserGameProfile).filter(UserGameProfile.user_id == 4).one()
+        finally:
+            db.close()
+        check("迁移后合并为每年一行日历（可重复运行）",
+              sorted(calendars) == [2025, 2026] and bin(calendars[2025]).count("1") == 2
+              and month_days(calendars[2026], 2026, 1) == [1, 2, 3, 4])
+        check("迁移后重新计算连续天数", profile.consecutive_days == 5
+              and profile.last_checkin == datetime(2026, 1, 3, 8))
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="签到日历基准测试")
+    parser.add_argument("--users", type=int, default=2000, help="用户数")
+    parser.add_argument("--days", type=int, default=730, help="签到历史天数")
+    args = parser.parse_args()
+
+    bench(args.users, args.days)
+    check_functions()
+    check_api()
+    if failures:
+        print(f"{len(failures)} 项检查失败")
+        sys.exit(1)
+    print("签到日历检查通过")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+评论树加载基准测试
+在临时数据库中为一个帖子生成N条评论（多层回复），对比通过Comment.replies关系逐层懒加载
+（每个评论一条SELECT）与一条递归CTE加载一页评论树的语句数和耗时；检查两种方式结果一致、
+隐藏评论的回复不返回、层数上限和has_more_replies、parent_id展开、游标分页和点赞状态。
+
+用法:
+    python scripts/bench_comments.py --comments 10000 --roots 500
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+# 必须在导入应用之前指定临时数据库
+tmp_dir = tempfile.mkdtemp()
+db_path = os.path.join(tmp_dir, "comments.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+os.environ["DEBUG"] = "False"
+os.environ["STATS_RECONCILE_INTERVAL"] = "0"
+os.chdir(backend_dir)
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.api.auth import create_access_token
+from app.core.query_counter import QueryCounter
+from app.database import SessionLocal, async_engine, async_read_engine, engine
+from app.models.community import Comment, Post
+from app.models.user import User
+
+failures = []
+
+def check(name: str, ok: bool):
+    print(f"{'OK ' if ok else 'FAIL'} {name}")
+    if not ok:
+        failures.append(name)
+
+def seed(comments: int, roots: int, rng: random.Random) -> int:
+    """生成帖子和评论（回复随机挂在已有评论下，偏向较新的评论以形成较深的对话），返回一条被隐藏的评论id"""
+    db = SessionLocal()
+    try:
+        db.add_all([User(id=i, username=f"user{i}", password_hash="x", avatar=f"/a/{i}.png") for i in range(1, 51)])
+        db.add_all([Post(id=i, title=f"帖子{i}", content="内容", category="discussion", author_id=1) for i in (1, 2)])
+        db.commit()
+    finally:
+        db.close()
+    start = datetime(2026, 1, 1)
+    rows, depth = [], {}
+    for comment_id in range(1, comments + 1):
+        if comment_id <= roots:
+            parent_id = None
+        else:
+            parent_id = max(rng.randint(1, comment_id - 1), comment_id - rng.randint(1, 50))
+        depth[comment_id] = 0 if parent_id is None else depth[parent_id] + 1
+        rows.append((comment_id, 1, rng.randint(1, 50), parent_id, f"评论{comment_id}", "published",
+                     (start + timedelta(seconds=comment_id)).isoformat(sep=" ")))
+    hidden = next(comment_id for comment_id in range(roots + 1, comments + 1) if depth[comment_id] == 1)
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO comments (id, post_id, author_id, parent_id, content, status, like_count, created_at, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?)", [row + (row[-1],) for row in rows]
+    )
+    conn.execute("UPDATE comments SET status = 'hidden' WHERE id = ?", (hidden,))
+    conn.commit()
+    conn.close()
+    print(f"[{comments} 条评论，{roots} 条顶层评论，最大层数 {max(depth.values())}]")
+    return hidden
+
+def lazy_tree(root_ids: list, max_depth: int) -> list:
+    """旧方式：通过Comment.replies关系逐个懒加载"""
+    db = SessionLocal()
+
+    def walk(comment, depth):
+        replies = sorted((reply for reply in comment.replies if reply.status == "published"),
+                         key=lambda reply: (reply.created_at, reply.id)) if depth < max_depth else []
+        return (comment.id, comment.author.username, [walk(reply, depth + 1) for reply in replies])
+
+    try:
+        return [walk(db.get(Comment, root_id), 0) for root_id in root_ids]
+    finally:
+        db.close()
+
+def shape(items: list) -> list:
+    return [(item["id"], item["author"]["username"], shape(item["replies"])) for item in items]
+
+def count_nodes(items: list) -> int:
+    return sum(1 + count_nodes(item["replies"]) for item in items)
+
+def bench(client: TestClient, per_page: int, max_depth: int, rounds: int = 5):
+    params = {"per_page": per_page, "max_depth": max_depth, "cursor": ""}
+    start = time.perf_counter()
+    for _ in range(rounds):
+        with QueryCounter(async_engine, async_read_engine) as counter:
+            items = client.get("/api/community/posts/1/comments", params=params).json()["data"]["items"]
+    cte = (time.perf_counter() - start) / rounds
+    root_ids = [item["id"] for item in items]
+    start = time.perf_counter()
+    with QueryCounter(engine) as lazy_counter:
+        expected = lazy_tree(root_ids, max_depth)
+    lazy = time.perf_counter() - start
+    print(f"  每页{per_page}条、{max_depth}层（{count_nodes(items)} 条评论）：逐个懒加载 {lazy_counter.count} 条语句 "
+          f"{lazy * 1000:.0f}ms；递归CTE {counter.count} 条语句 {cte * 1000:.0f}ms（含HTTP）")
+    check(f"每页{per_page}条、{max_depth}层时两种方式结果一致", shape(items) == expected)
+    return counter.count
+
+def find(items: list, comment_id: int):
+    for item in items:
+        if item["id"] == comment_id:
+            return item
+        found = find(item["replies"], comment_id)
+        if found:
+            return found
+    return None
+
+def check_api(client: TestClient, comments: int, hidden: int):
+    counts = {bench(client, per_page, max_depth) for per_page, max_depth in ((20, 3), (100, 10))}
+    check("语句数与每页条数、层数无关", len(counts) == 1)
+
+    db = SessionLocal()
+    try:
+        hidden_comment = db.get(Comment, hidden)
+        parent_id, hidden_children = hidden_comment.parent_id, [reply.id for reply in hidden_comment.replies]
+    finally:
+        db.close()
+    thread = client.get("/api/community/posts/1/comments", params={"per_page": 100, "max_depth": 10, "page": 1})
+    body = thread.json()["data"]
+    page = body["items"]
+    if find(page, parent_id) is not None:
+        check("隐藏的评论及其回复不返回", find(page, hidden) is None
+              and all(find(page, child) is None for child in hidden_children))
+    check("offset分页返回总数", body["total"] is not None and body["page"] == 1)
+
+    capped = client.get("/api/community/posts/1/comments", params={"per_page": 100, "max_depth": 1}).json()["data"]["items"]
+    leaf = next(reply for item in capped for reply in item["replies"] if reply["has_more_replies"])
+    check("达到层数上限时不展开并标记has_more_replies", leaf["replies"] == []
+          and all(not reply["replies"] for item in capped for reply in item["replies"]))
+    expanded = client.get("/api/community/posts/1/comments",
+                          params={"parent_id": leaf["id"], "max_depth": 0, "per_page": 100}).json()["data"]["items"]
+    db = SessionLocal()
+    try:
+        children = {reply.id for reply in db.get(Comment, leaf["id"]).replies if reply.status == "published"}
+    finally:
+        db.close()
+    check("parent_id展开该评论的直接回复", {item["id"] for item in expanded} == children)
+
+    seen, cursor = [], ""
+    while cursor is not None:
+        data = client.get("/api/community/posts/1/comments",
+                          params={"per_page": 100, "max_depth": 0, "cursor": cursor}).json()["data"]
+        seen += [item["id"] for item in data["items"]]
+        cursor = data["next_cursor"]
+    check("游标分页遍历全部顶层评论且不重复", len(seen) == len(set(seen)) and sorted(seen) == sorted(
+        item[0] for item in lazy_tree(seen, 0)))
+
+    auth = {"Authorization": f"Bearer {create_access_token(1)}"}
+    target = page[0]["replies"][0]["id"] if page[0]["replies"] else page[0]["id"]
+    client.put(f"/api/community/likes/comment/{target}", headers=auth)
+    liked = client.get("/api/community/posts/1/comments", params={"per_page": 100}, headers=auth).json()["data"]["items"]
+    node = find(liked, target)
+    check("登录时返回点赞状态和点赞数", node["liked"] and node["like_count"] == 1
+          and "liked" not in client.get("/api/community/posts/1/comments").json()["data"]["items"][0])
+    empty = client.get("/api/community/posts/2/comments").json()["data"]
+    missing = client.get("/api/community/posts/999/comments")
+    check("没有评论时返回空列表，帖子不存在时返回404", empty["items"] == [] and missing.status_code == 404)
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="评论树加载基准测试")
+    parser.add_argument("--comments", type=int, default=10000, help="评论数")
+    parser.add_argument("--roots", type=int, default=500, help="顶层评论数")
+    args = parser.parse_args()
+    rng = random.Random(23)
+
+    with TestClient(app) as client:
+        hidden = seed(args.comments, args.roots, rng)
+        check_api(client, args.comments, hidden)
+    if failures:
+        print(f"{len(failures)} 项检查失败")
+        sys.exit(1)
+    print("评论树检查通过")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+帖子信息流基准测试
+在临时数据库中生成N个帖子，对比每次请求在ORDER BY中计算时间衰减热度（全表计算并排序）
+与按预先计算的hot_score索引读取一页的耗时；检查查询计划：热门、最新（含分类和游标）为索引范围扫描（无临时排序），
+本周最热按发布时间索引只读取最近7天的帖子（只对这部分排序），并对比按状态读取全部帖子再排序的耗时；
+检查两种方式顺序一致、置顶在前、游标翻页、点赞（缓冲写回）和ORM修改后热度分增量更新、回滚不更新，以及"本周最热"。
+
+用法:
+    python scripts/bench_feed.py --posts 200000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+# 必须在导入应用之前指定临时数据库
+tmp_dir = tempfile.mkdtemp()
+db_path = os.path.join(tmp_dir, "feed.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+os.environ["DEBUG"] = "False"
+os.environ["STATS_RECONCILE_INTERVAL"] = "0"
+os.chdir(backend_dir)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.main import app
+from app.api.auth import create_access_token
+from app.database import AsyncSessionLocal, SessionLocal, create_tables
+from app.models.community import Post
+from app.models.user import User
+from app.services.feed import (
+    COMMENT_WEIGHT, HOT_SCORE_DECAY_SECONDS, HOT_SCORE_EPOCH, TOP_WINDOW, hot_score_expression, refresh_hot_scores
+)
+from app.services.likes import like_counter
+
+CATEGORIES = ["discussion", "showcase", "question"]
+
+# 旧方式：每次请求在ORDER BY中计算热度
+COMPUTED_ORDER = (
+    f"is_pinned DESC, log10(max(like_count + {COMMENT_WEIGHT} * comment_count, 1)) + "
+    f"(julianday(created_at) - julianday('{HOT_SCORE_EPOCH}')) * 86400 / {HOT_SCORE_DECAY_SECONDS} DESC, id DESC"
+)
+
+failures = []
+
+def check(name: str, ok: bool):
+    print(f"{'OK ' if ok else 'FAIL'} {name}")
+    if not ok:
+        failures.append(name)
+
+def seed(posts: int, rng: random.Random, now: datetime):
+    create_tables()
+    db = SessionLocal()
+    try:
+        db.add(User(id=1, username="author", password_hash="x"))
+        db.commit()
+    finally:
+        db.close()
+    rows = []
+    for post_id in range(1, posts + 1):
+        created_at = (now - timedelta(seconds=rng.randint(0, 90 * 86400))).isoformat(sep=" ")
+        rows.append((post_id, f"帖子{post_id}", rng.choice(CATEGORIES), int(rng.paretovariate(1.2)) - 1,
+                     int(rng.paretovariate(1.5)) - 1, int(post_id % 5000 == 0),
+                     "published" if rng.random() < 0.95 else "hidden", created_at, created_at))
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO posts (id, title, content, category, author_id, like_count, comment_count, view_count, "
+        "is_pinned, status, created_at, updated_at) VALUES (?, ?, '内容', ?, 1, ?, ?, 0, ?, ?, ?, ?)", rows
+    )
+    conn.commit()
+    conn.close()
+
+def timed(conn, sql: str, params=(), rounds: int = 5):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        rows = conn.execute(sql, params).fetchall()
+    return rows, (time.perf_counter() - start) / rounds
+
+async def refresh_all() -> int:
+    async with AsyncSessionLocal() as db:
+        updated = await refresh_hot_scores(db)
+        await db.commit()
+    return updated
+
+def bench(client: TestClient, posts: int, now: datetime):
+    # 启动时已计算；清零后重新计算全部帖子，再次运行时没有需要更新的行
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE posts SET hot_score = 0")
+    conn.commit()
+    start = time.perf_counter()
+    updated = client.portal.call(refresh_all)
+    elapsed = time.perf_counter() - start
+    check("全量计算热度分，再次运行不更新", updated == posts and client.portal.call(refresh_all) == 0)
+    print(f"  全量计算 {posts} 个帖子的热度分：{elapsed:.2f}s")
+    computed, slow = timed(conn, f"SELECT id FROM posts WHERE status = 'published' ORDER BY {COMPUTED_ORDER} LIMIT 100")
+    indexed, fast = timed(conn, "SELECT id FROM posts WHERE status = 'published' "
+                                "ORDER BY is_pinned DESC, hot_score DESC, id DESC LIMIT 100")
+    print(f"[{posts} 个帖子] 热门前100：ORDER BY中计算热度 {slow * 1000:.1f}ms；hot_score索引 {fast * 1000:.2f}ms")
+    check("预先计算的热度分与实时计算的顺序一致", computed == indexed)
+
+    plans = {
+        "热门": "SELECT id FROM posts WHERE status = 'published' ORDER BY is_pinned DESC, hot_score DESC, id DESC LIMIT 21",
+        "热门+分类+游标": "SELECT id FROM posts WHERE status = 'published' AND category = 'showcase' "
+                     "AND (is_pinned, hot_score, id) < (0, 1e9, 1) ORDER BY is_pinned DESC, hot_score DESC, id DESC LIMIT 21",
+    }
+    cursor = (now - timedelta(days=1)).isoformat(sep=" ")
+    plans.update({
+        "最新": "SELECT id FROM posts WHERE status = 'published' ORDER BY created_at DESC, id DESC LIMIT 21",
+        "最新+分类+游标": "SELECT id FROM posts WHERE status = 'published' AND category = 'showcase' "
+                     f"AND created_at <= '{cursor}' AND (created_at < '{cursor}' OR id < 100) "
+                     "ORDER BY created_at DESC, id DESC LIMIT 21",
+    })
+    for name, sql in plans.items():
+        plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql))
+        check(f"{name}为索引范围扫描（{plan}）", "USING" in plan and "TEMP B-TREE" not in plan)
+
+    since = (now - TOP_WINDOW).isoformat(sep=" ")
+    top = {
+        "本周最热": "SELECT id FROM posts {index} WHERE status = 'published' AND created_at >= ? "
+                "ORDER BY like_count DESC, id DESC LIMIT 21",
+        "本周最热+分类": "SELECT id FROM posts {index} WHERE status = 'published' AND category = 'showcase' "
+                   "AND created_at >= ? ORDER BY like_count DESC, id DESC LIMIT 21",
+    }
+    for name, sql in top.items():
+        plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql.format(index=""), (since,)))
+        check(f"{name}按发布时间索引只读取最近7天（{plan}）", "created_at>?" in plan)
+    window = conn.execute("SELECT COUNT(*) FROM posts WHERE status = 'published' AND created_at >= ?", (since,)).fetchone()[0]
+    ranged, fast = timed(conn, top["本周最热"].format(index=""), (since,))
+    scanned, slow = timed(conn, top["本周最热"].format(index="INDEXED BY ix_posts_status_pinned_hot"), (since,))
+    print(f"  本周最热（最近7天 {window} 个帖子）：按状态读取全部帖子再排序 {slow * 1000:.1f}ms；"
+          f"按发布时间范围读取 {fast * 1000:.1f}ms")
+    check("两种读取方式结果一致", ranged == scanned)
+    conn.close()
+
+def feed(client: TestClient, **params) -> dict:
+    return client.get("/api/community/posts", params=params).json()["data"]
+
+def post_row(post_id: int):
+    db = SessionLocal()
+    try:
+        return db.execute(select(Post.hot_score, hot_score_expression().label("expected"), Post.like_count)
+                          .where(Post.id == post_id)).one()
+    finally:
+        db.close()
+
+def check_api(client: TestClient, now: datetime):
+    first = feed(client, sort="hot", per_page=20, cursor="")
+    check("置顶帖子在前", first["items"][0]["is_pinned"])
+    pages, cursor = [], ""
+    for _ in range(3):
+        data = feed(client, sort="hot", per_page=20, cursor=cursor)
+        pages += [item["id"] for item in data["items"]]
+        cursor = data["next_cursor"]
+    offset = [item["id"] for page in (1, 2, 3) for item in feed(client, sort="hot", per_page=20, page=page)["items"]]
+    check("游标翻页与offset分页一致", pages == offset and len(set(pages)) == 60)
+
+    # 点赞经缓冲写回后更新热度分
+    target = pages[-1]
+    before = pages.index(target)
+    for user_id in range(2, 202):
+        client.put(f"/api/community/likes/post/{target}",
+                   headers={"Authorization": f"Bearer {create_access_token(user_id)}"})
+    client.portal.call(like_counter.flush)
+    row = post_row(target)
+    check("点赞写回后热度分增量更新", abs(row.hot_score - row.expected) < 1e-9)
+    after = [item["id"] for item in feed(client, sort="hot", per_page=60, cursor="")["items"]]
+    check("点赞增加后排名上升", target in after and after.index(target) < before)
+
+    # ORM修改评论数、新发帖在同一事务中计算；回滚不更新
+    db = SessionLocal()
+    try:
+        post = db.get(Post, pages[10])
+        post.comment_count += 100
+        db.commit()
+        db.add(Post(id=10 ** 7, title="新帖子", content="内容", category="showcase", author_id=1))
+        db.commit()
+        post = db.get(Post, pages[11])
+        post.like_count += 1000
+        db.flush()
+        db.rollback()
+    finally:
+        db.close()
+    changed, inserted, rolled_back = post_row(pages[10]), post_row(10 ** 7), post_row(pages[11])
+    check("ORM修改评论数后重算热度分", abs(changed.hot_score - changed.expected) < 1e-9)
+    check("新帖子写入时计算热度分", inserted.hot_score > 0 and abs(inserted.hot_score - inserted.expected) < 1e-9)
+    check("回滚不改变热度分", abs(rolled_back.hot_score - rolled_back.expected) < 1e-9)
+
+    top = feed(client, sort="top", per_page=50, cursor="", category="showcase")["items"]
+    week = now - timedelta(days=7, hours=1)
+    check("本周最热只含最近7天的帖子并按点赞数排序",
+          top and all(item["created_at"] >= week.isoformat() and item["category"] == "showcase" for item in top)
+          and [item["like_count"] for item in top] == sorted((item["like_count"] for item in top), reverse=True))
+    new = feed(client, per_page=20, cursor="")["items"]
+    check("默认仍按发布时间排序", [item["created_at"] for item in new] == sorted((item["created_at"] for item in new), reverse=True))
+    statuses = [
+        client.get("/api/community/posts", params={"sort": "random"}).status_code,
+        client.get("/api/community/posts", params={"sort": "hot", "cursor": "abc"}).status_code,
+    ]
+    check("排序方式或游标无效时返回400", statuses == [400, 400])
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="帖子信息流基准测试")
+    parser.add_argument("--posts", type=int, default=200000, help="帖子数")
+    args = parser.parse_args()
+    rng = random.Random(24)
+    now = datetime.now()
+
+    seed(args.posts, rng, now)
+    with TestClient(app) as client:
+        bench(client, args.posts, now)
+        check_api(client, now)
+    if failures:
+        print(f"{len(failures)} 项检查失败")
+        sys.exit(1)
+    print("信息流检查通过")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+图片变体基准测试
+在临时数据库和上传目录中通过中台上传N张照片并创建引用它们的商品，等待后台进程池生成
+缩略图和WebP版本，然后对比商品列表页按原图和按缩略图加载时需要传输的图片字节数。
+另外对比在事件循环中直接缩放图片与放入进程池时，同时发出的/health请求的最大延迟。
+
+用法:
+    python scripts/bench_image_variants.py --images 12 --width 2400
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+# 必须在导入应用之前指定临时数据库和上传目录
+tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'image_variants.db')}"
+os.environ["UPLOAD_DIR"] = os.path.join(tmp_dir, "uploads")
+os.environ["DEBUG"] = "False"
+os.environ["STATS_RECONCILE_INTERVAL"] = "0"
+os.chdir(backend_dir)
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.main import app
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.shop import Product
+from app.services.image_worker import generate_variants
+from app.services.images import image_pipeline, upload_path
+
+failures = []
+
+def check(name: str, ok: bool):
+    print(f"{'OK ' if ok else 'FAIL'} {name}")
+    if not ok:
+        failures.append(name)
+
+def make_photo(width: int, seed: int, fmt: str = "JPEG") -> bytes:
+    """渐变叠加噪点，压缩率接近真实照片"""
+    height = width * 2 // 3
+    gradient = Image.linear_gradient("L").rotate(seed * 37 % 360).resize((width, height))
+    noise = Image.effect_noise((width, height), 24 + seed % 8)
+    image = Image.merge("RGB", (gradient, noise, Image.blend(gradient, noise, 0.5)))
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, quality=92)
+    return buffer.getvalue()
+
+def wait_pipeline(client: TestClient, timeout: float = 120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if client.get("/admin/api/metrics").json()["data"]["image_pipeline"]["pending"] == 0:
+            return
+        time.sleep(0.2)
+
+def health_latency(client: TestClient, stop: threading.Event, result: list):
+    """不断请求/health，记录最大延迟"""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        client.get("/health")
+        worst = max(worst, time.perf_counter() - start)
+        time.sleep(0.005)
+    result.append(worst)
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="图片变体基准测试")
+    parser.add_argument("--images", type=int, default=12, help="上传的照片数")
+    parser.add_argument("--width", type=int, default=2400, help="照片宽度（像素）")
+    args = parser.parse_args()
+    settings.MAX_FILE_SIZE = 50 * 1024 * 1024
+
+    photos = [make_photo(args.width, seed) for seed in range(args.images)]
+    with TestClient(app) as client:
+        response = client.post(
+            "/admin/login",
+            data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+            follow_redirects=False
+        )
+        client.cookies.set("admin_session", response.cookies["admin_session"])
+
+        # 上传时后台生成变体，同时测量其他请求的延迟
+        stop, pool_latency = threading.Event(), []
+        probe = threading.Thread(target=health_latency, args=(client, stop, pool_latency))
+        probe.start()
+        start = time.perf_counter()
+        uploads = [
+            client.post("/admin/api/uploads/products", files={"file": (f"p{i}.jpg", photo)}).json()["data"]
+            for i, photo in enumerate(photos)
+        ]
+        urls = [upload["url"] for upload in uploads]
+        upload_elapsed = time.perf_counter() - start
+        wait_pipeline(client)
+        generate_elapsed = time.perf_counter() - start
+        stop.set()
+        probe.join()
+
+        # 对照：在事件循环中直接生成（阻塞期间其他请求无法处理）
+        async def inline_resize():
+            for url in urls:
+                generate_variants(str(upload_path(url)), settings.IMAGE_VARIANT_WIDTHS, settings.IMAGE_QUALITY)
+            return "ok"
+        stop, inline_latency = threading.Event(), []
+        probe = threading.Thread(target=health_latency, args=(client, stop, inline_latency))
+        probe.start()
+        client.portal.call(inline_resize)
+        stop.set()
+        probe.join()
+
+        db = SessionLocal()
+        try:
+            db.add_all([
+                Product(name=f"绒花{i}", category="handicraft", price=99, stock=10, images=json.dumps([upload["id"]]))
+                for i, upload in enumerate(uploads)
+            ])
+            db.commit()
+        finally:
+            db.close()
+
+        print(f"[{args.images} 张 {args.width}px 照片，缩略图宽度 {settings.IMAGE_VARIANT_WIDTHS}]")
+        print(f"  上传耗时 {upload_elapsed:.2f}s，上传并生成全部变体 {generate_elapsed:.2f}s "
+              f"（{settings.IMAGE_WORKERS} 个工作进程）")
+        print(f"  生成变体期间/health最大延迟：进程池 {pool_latency[0] * 1000:.0f}ms，"
+              f"事件循环内直接缩放 {inline_latency[0] * 1000:.0f}ms")
+
+        print("\n  列表图片显示宽度    原图        缩略图       WebP")
+        for width in (160, 320, 640):
+            items = client.get("/api/shop/products", params={"per_page": 50, "image_width": width}).json()["data"]["items"]
+            original = sum((upload_path(url)).stat().st_size for item in items for url in item["images"])
+            fallback = sum(upload_path(thumb["url"]).stat().st_size for item in items for thumb in item["thumbnails"])
+            webp = sum(upload_path(thumb["webp"]).stat().st_size for item in items for thumb in item["thumbnails"])
+            print(f"  {width:>6}px          {original / 1024:>8.0f}KB {fallback / 1024:>8.0f}KB {webp / 1024:>8.0f}KB")
+            check(f"{width}px 缩略图宽度不小于显示宽度",
+                  all(thumb["width"] >= width for item in items for thumb in item["thumbnails"]))
+            check(f"{width}px WebP小于原格式缩略图", webp < fallback < original)
+
+        metrics = image_pipeline.metrics()
+        check("全部图片生成变体且无失败", metrics["generated"] == args.images and metrics["failed"] == 0)
+        items = client.get("/api/shop/products", params={"image_width": 5000}).json()["data"]["items"]
+        check("显示宽度超过原图时返回原图",
+              all(thumb["url"] == item["images"][0] for item in items for thumb in item["thumbnails"]))
+
+        png = io.BytesIO()
+        noise = Image.effect_noise((800, 600), 30)
+        Image.merge("RGBA", (noise, noise, noise, Image.linear_gradient("L").resize((800, 600)))).save(png, "PNG")
+        url = client.post("/admin/api/uploads/products", files={"file": ("a.png", png.getvalue())}).json()["data"]["url"]
+        wait_pipeline(client)
+        check("带透明通道的PNG缩略图保持PNG", upload_path(url.replace(".png", "_320.png")) is not None)
+
+    if failures:
+        print(f"{len(failures)} 项检查失败")
+        sys.exit(1)
+    print("图片变体检查通过")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+JSON响应序列化基准测试
+用与社区帖子列表、商品列表相同结构的数据，对比FastAPI默认路径
+（jsonable_encoder遍历 + 标准库json的JSONResponse）与FastJSONResponse（orjson直接序列化）
+生成响应体的耗时，并确认两者输出的JSON等价。
+
+用法:
+    python scripts/bench_json_response.py --sizes 100 1000 10000
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.responses import FastJSONResponse
+
+def build_posts(count: int) -> list:
+    """帖子列表项（与/api/community/posts相同结构）"""
+    now = datetime.now()
+    return [
+        {
+            "id": i,
+            "title": f"绒花作品分享第{i}期",
+            "content": "详细的制作过程和心得体会，" * 5,
+            "category": "showcase",
+            "images": [f"/static/uploads/{i}_1.jpg", f"/static/uploads/{i}_2.jpg"],
+            "author": {"id": i % 100, "username": f"用户{i % 100}", "avatar": None},
+            "view_count": i * 3,
+            "like_count": i,
+            "comment_count": i % 17,
+            "is_pinned": False,
+            "created_at": now - timedelta(minutes=i)
+        }
+        for i in range(count)
+    ]
+
+def build_products(count: int) -> list:
+    """商品列表项（价格为Decimal，覆盖非原生类型的转换）"""
+    now = datetime.now()
+    return [
+        {
+            "id": i,
+            "name": f"手工绒花发簪{i}",
+            "price": Decimal("128.50"),
+            "original_price": Decimal("168.00"),
+            "images": [f"/static/uploads/p{i}.jpg"],
+            "tags": ["非遗", "手工"],
+            "stock": 10,
+            "sales_count": i,
+            "created_at": now - timedelta(hours=i)
+        }
+        for i in range(count)
+    ]
+
+def envelope(items: list) -> dict:
+    return {"success": True, "message": "操作成功", "data": {"items": items, "total": len(items)}}
+
+def legacy(items: list) -> bytes:
+    """FastAPI默认路径：jsonable_encoder后由JSONResponse用标准库json渲染"""
+    return JSONResponse(jsonable_encoder(envelope(items))).body
+
+def fast(items: list) -> bytes:
+    return FastJSONResponse(envelope(items)).body
+
+def measure(func_, items: list, rounds: int) -> float:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func_(items)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="JSON响应序列化基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="列表条数")
+    parser.add_argument("--rounds", type=int, default=20, help="测量轮数")
+    args = parser.parse_args()
+
+    for name, builder in (("帖子列表", build_posts), ("商品列表", build_products)):
+        print(f"[{name}]")
+        for size in args.sizes:
+            items = builder(size)
+            if json.loads(legacy(items)) != json.loads(fast(items)):
+                print(f"  {size:>6} 条  两种序列化结果不一致")
+                sys.exit(1)
+            before = measure(legacy, items, args.rounds)
+            after = measure(fast, items, args.rounds)
+            print(f"  {size:>6} 条  jsonable_encoder+json {before:>9.2f}ms  "
+                  f"orjson {after:>8.2f}ms  加速 {before / after:>5.1f}x  "
+                  f"响应体 {len(fast(items)) / 1024:.0f}KB")
+
+if __name__ == "__main__":
+    main()
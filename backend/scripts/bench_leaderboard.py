@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+排行榜基准测试
+生成N名用户的积分（大部分用户积分很少、少数用户积分很高），对比内存顺序统计结构与
+直接查询users表（ORDER BY points DESC取前N名、COUNT(*)求名次）的耗时，以及从数据库重建的耗时；
+随机增删改与排序后的列表对照检查正确性；在临时数据库中检查排行榜接口、日榜周榜和事务回滚。
+
+用法:
+    python scripts/bench_leaderboard.py --users 1000000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+# 必须在导入应用之前指定临时数据库
+tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'leaderboard.db')}"
+os.environ["DEBUG"] = "False"
+os.environ["STATS_RECONCILE_INTERVAL"] = "0"
+os.chdir(backend_dir)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.main import app
+from app.api.auth import create_access_token
+from app.core.config import settings
+from app.core.ranking import RankedKeys
+from app.database import AsyncSessionLocal, Base, SessionLocal
+from app.models.game import PointsRecord
+from app.models.user import User
+from app.services.leaderboard import WINDOWS, Leaderboard, LeaderboardService, leaderboards
+from app.services.points import award_points
+
+failures = []
+
+def check(name: str, ok: bool):
+    print(f"{'OK ' if ok else 'FAIL'} {name}")
+    if not ok:
+        failures.append(name)
+
+def timed(func, repeat: int) -> float:
+    """平均每次耗时（微秒）"""
+    start = time.perf_counter()
+    for i in range(repeat):
+        func(i)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+def make_scores(count: int, rng: random.Random) -> dict:
+    """约一半用户0分，其余按长尾分布"""
+    return {
+        user_id: 0 if rng.random() < 0.5 else int(rng.paretovariate(1.2) * 10)
+        for user_id in range(1, count + 1)
+    }
+
+def create_users_db(path: str, scores: dict):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine, tables=[User.__table__, PointsRecord.__table__])
+    engine.dispose()
+    now = datetime.now().isoformat(sep=" ")
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            "INSERT INTO users (id, username, password_hash, points, level, is_active, is_verified, is_admin, "
+            "created_at, updated_at) VALUES (?, ?, 'x', ?, 1, 1, 0, 0, ?, ?)",
+            ((user_id, f"user{user_id}", score, now, now) for user_id, score in scores.items())
+        )
+
+async def rebuild_from(path: str) -> LeaderboardService:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    service = LeaderboardService()
+    async with AsyncSession(engine) as db:
+        await service.rebuild(db)
+    await engine.dispose()
+    return service
+
+def bench(count: int):
+    rng = random.Random(7)
+    scores = make_scores(count, rng)
+    start = time.perf_counter()
+    board = Leaderboard(scores)
+    build = time.perf_counter() - start
+    user_ids = [rng.randrange(1, count + 1) for _ in range(10000)]
+
+    top = timed(lambda i: board.top(20), 2000)
+    rank = timed(lambda i: board.rank(user_ids[i]), 10000)
+    around = timed(lambda i: board.around(user_ids[i], 5), 10000)
+    update = timed(lambda i: board.add(user_ids[i], 10), 10000)
+
+    db_path = os.path.join(tmp_dir, "users_bench.db")
+    create_users_db(db_path, scores)
+    conn = sqlite3.connect(db_path)
+    sql_top = timed(lambda i: conn.execute(
+        "SELECT id, points FROM users WHERE is_active = 1 ORDER BY points DESC, id LIMIT 20").fetchall(), 5)
+    sql_rank = timed(lambda i: conn.execute(
+        "SELECT COUNT(*) FROM users WHERE is_active = 1 AND points > ?", (scores[user_ids[i]],)).fetchone(), 20)
+    conn.close()
+    start = time.perf_counter()
+    service = asyncio.run(rebuild_from(db_path))
+    rebuild = time.perf_counter() - start
+
+    print(f"[{count} 名用户]")
+    print(f"  构建 {build:.2f}s，从数据库重建 {rebuild:.2f}s")
+    print(f"  {'操作':<14}{'内存结构':>12}{'查询users表':>14}")
+    print(f"  {'前20名':<14}{top:>10.1f}us{sql_top:>12.0f}us")
+    print(f"  {'查名次':<14}{rank:>10.1f}us{sql_rank:>12.0f}us")
+    print(f"  {'前后各5名':<13}{around:>10.1f}us")
+    print(f"  {'加积分':<14}{update:>10.1f}us")
+    check("重建后与数据库一致", len(service.board("all")) == count
+          and service.board("all").top(1)[0]["points"] == max(scores.values()))
+
+def check_structure():
+    """随机增删改，与排序后的列表对照"""
+    rng = random.Random(3)
+    keys = RankedKeys()
+    reference = []
+    ok = True
+    for step in range(20000):
+        if reference and rng.random() < 0.4:
+            key = reference.pop(rng.randrange(len(reference)))
+            keys.remove(key)
+        else:
+            key = rng.randrange(-10**12, 10**12)
+            if key in reference:
+                continue
+            keys.add(key)
+            reference.append(key)
+        if step % 997 == 0:
+            reference.sort()
+            probe = rng.randrange(-10**12, 10**12)
+            position = rng.randrange(len(reference)) if reference else 0
+            ok = ok and len(keys) == len(reference) and list(keys.slice(0, len(keys))) == reference
+            ok = ok and keys.index(probe) == sum(1 for key in reference if key < probe)
+            ok = ok and (not reference or keys[position] == reference[position])
+    check("顺序统计结构随机增删与排序列表一致", ok)
+
+    board = Leaderboard({1: 50, 2: 80, 3: 50, 4: 10})
+    check("同分同名次、按用户id排序",
+          [(e["rank"], e["user_id"]) for e in board.top(10)] == [(1, 2), (2, 1), (2, 3), (4, 4)])
+    check("前后名次", [e["user_id"] for e in board.around(3, 1)] == [1, 3, 4])
+
+async def award(user_id: int, points: int, commit: bool = True, at: datetime = None):
+    async with AsyncSessionLocal() as db:
+        await award_points(db, user_id, points, "bench", at=at)
+        if commit:
+            await db.commit()
+        else:
+            await db.rollback()
+
+def check_api():
+    with TestClient(app) as client:
+        db = SessionLocal()
+        try:
+            db.add_all([User(id=i, username=f"player{i}", password_hash="x", points=i * 10) for i in range(1, 6)])
+            db.commit()
+        finally:
+            db.close()
+        client.portal.call(leaderboards_rebuild)
+
+        data = client.get("/api/game/leaderboard").json()["data"]
+        check("总榜按积分排序", [item["user"]["id"] for item in data["items"]] == [5, 4, 3, 2, 1])
+        client.portal.call(award, 1, 100)
+        client.portal.call(award, 2, 500, False)
+        client.portal.call(award, 3, 5, True, datetime.now() - timedelta(days=8))
+        data = client.get("/api/game/leaderboard").json()["data"]
+        check("提交后更新排行榜，回滚的积分不计入",
+              data["items"][0]["user"]["id"] == 1 and data["items"][0]["points"] == 110
+              and leaderboards.board("all").score(2) == 20)
+        daily = client.get("/api/game/leaderboard", params={"window": "daily"}).json()["data"]
+        check("日榜只包含今天的积分", [(i["user"]["id"], i["points"]) for i in daily["items"]] == [(1, 100)])
+
+        token = create_access_token(1)
+        auth = {"Authorization": f"Bearer {token}"}
+        response = client.get("/api/game/leaderboard", headers=auth)
+        check("登录时返回自己的名次", response.json()["data"]["me"] == {"rank": 1, "points": 110})
+        check("带令牌的响应不允许共享缓存", response.headers["cache-control"].startswith("private"))
+        data = client.get("/api/game/leaderboard/around", params={"radius": 1}, headers=auth).json()["data"]
+        check("查询前后名次", data["rank"] == 1 and [item["user"]["id"] for item in data["items"]] == [1, 5])
+        check("不支持的榜单返回400",
+              client.get("/api/game/leaderboard", params={"window": "yearly"}).status_code == 400)
+
+        response = client.post(
+            "/admin/login",
+            data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+            follow_redirects=False
+        )
+        client.cookies.set("admin_session", response.cookies["admin_session"])
+        client.post("/admin/users/5/status")
+        check("禁用的用户移出排行榜", leaderboards.board("all").rank(5) is None)
+        client.portal.call(award, 5, 30)
+        check("禁用后获得积分不重新上榜", all(leaderboards.board(window).rank(5) is None for window in WINDOWS))
+
+        expected = {user_id: leaderboards.board("all").score(user_id) for user_id in range(1, 5)}
+        client.portal.call(leaderboards_rebuild)
+        client.portal.call(award, 5, 30)
+        check("重建后仍忽略禁用用户的积分变化", leaderboards.board("all").rank(5) is None)
+        check("重建结果与增量更新一致",
+              all(leaderboards.board("all").score(user_id) == score for user_id, score in expected.items())
+              and leaderboards.board("daily").score(1) == 100 and leaderboards.board("weekly").score(3) is None)
+
+async def leaderboards_rebuild():
+    async with AsyncSessionLocal() as db:
+        await leaderboards.rebuild(db)
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="排行榜基准测试")
+    parser.add_argument("--users", type=int, default=1000000, help="用户数")
+    args = parser.parse_args()
+
+    bench(args.users)
+    check_structure()
+    check_api()
+    if failures:
+        print(f"{len(failures)} 项检查失败")
+        sys.exit(1)
+    print("排行榜检查通过")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+点赞服务基准测试
+在临时数据库中生成大量点赞记录，对比没有索引时逐个查询"是否已点赞"与唯一索引上一条IN查询的耗时，
+以及每次点赞单独UPDATE like_count与提交后缓冲、批量写回的吞吐量；检查重复点赞与取消点赞幂等、
+并发点赞只计一次、回滚不计数、列表页的点赞状态和 scripts/reconcile_like_counts.py 校准。
+
+用法:
+    python scripts/bench_likes.py --likes 200000 --posts 2000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+# 必须在导入应用之前指定临时数据库
+tmp_dir = tempfile.mkdtemp()
+db_path = os.path.join(tmp_dir, "likes.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+os.environ["DEBUG"] = "False"
+os.environ["STATS_RECONCILE_INTERVAL"] = "0"
+os.chdir(backend_dir)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select, update
+
+from app.main import app
+from app.api.auth import create_access_token
+from app.database import AsyncSessionLocal, SessionLocal
+from app.models.community import Like, Post
+from app.models.user import User
+from app.services.likes import like_counter, set_like
+
+failures = []
+
+def check(name: str, ok: bool):
+    print(f"{'OK ' if ok else 'FAIL'} {name}")
+    if not ok:
+        failures.append(name)
+
+def seed(likes: int, posts: int, users: int, rng: random.Random):
+    db = SessionLocal()
+    try:
+        db.add_all([User(id=i, username=f"user{i}", password_hash="x") for i in range(1, users + 1)])
+        db.add_all([Post(id=i, title=f"帖子{i}", content="内容", category="discussion", author_id=1)
+                    for i in range(1, posts + 1)])
+        db.commit()
+    finally:
+        db.close()
+    pairs = set()
+    while len(pairs) < likes:
+        pairs.add((rng.randint(1, users), rng.randint(1, posts)))
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO likes (user_id, target_type, target_id, created_at, updated_at) "
+        "VALUES (?, 'post', ?, datetime('now'), datetime('now'))", sorted(pairs)
+    )
+    conn.execute("UPDATE posts SET like_count = (SELECT COUNT(*) FROM likes "
+                 "WHERE target_type = 'post' AND target_id = posts.id)")
+    # 对照：没有索引的旧表
+    conn.execute("CREATE TABLE likes_noindex AS SELECT * FROM likes")
+    conn.commit()
+    conn.close()
+
+def bench_lookup(posts: int, users: int, rng: random.Random, rounds: int = 50):
+    conn = sqlite3.connect(db_path)
+    pages = [(rng.randint(1, users), rng.sample(range(1, posts + 1), 20)) for _ in range(rounds)]
+    start = time.perf_counter()
+    old = [{post_id for post_id in ids if conn.execute(
+        "SELECT 1 FROM likes_noindex WHERE user_id = ? AND target_type = 'post' AND target_id = ?",
+        (user_id, post_id)).fetchone()} for user_id, ids in pages]
+    scan = (time.perf_counter() - start) / rounds
+    start = time.perf_counter()
+    new = [{row[0] for row in conn.execute(
+        f"SELECT target_id FROM likes WHERE user_id = ? AND target_type = 'post' AND target_id IN ({','.join('?' * len(ids))})",
+        (user_id, *ids))} for user_id, ids in pages]
+    indexed = (time.perf_counter() - start) / rounds
+    plan = " ".join(row[-1] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT target_id FROM likes WHERE user_id = 1 AND target_type = 'post' AND target_id IN (1, 2)"))
+    conn.close()
+    print(f"  每页20个帖子的点赞状态：逐个查询（无索引）{scan * 1000:.1f}ms；唯一索引IN查询 {indexed * 1000:.3f}ms")
+    check("两种方式结果一致", old == new)
+    check("IN查询使用唯一索引", "ix_likes_user_target" in plan)
+
+async def direct_like(user_id: int, post_id: int):
+    """旧方式：每次点赞插入记录并单独UPDATE like_count"""
+    async with AsyncSessionLocal() as db:
+        db.add(Like(user_id=user_id, target_type="post", target_id=post_id))
+        await db.execute(update(Post).where(Post.id == post_id).values(like_count=Post.like_count + 1))
+        await db.commit()
+
+async def service_like(user_id: int, post_id: int):
+    async with AsyncSessionLocal() as db:
+        await set_like(db, user_id, "post", post_id, True)
+        await db.commit()
+
+async def run_likes(handler, pairs: list, concurrency: int = 20) -> float:
+    queue = list(pairs)
+
+    async def worker():
+        while queue:
+            await handler(*queue.pop())
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return len(pairs) / (time.perf_counter() - start)
+
+async def counts_match() -> bool:
+    async with AsyncSessionLocal() as db:
+        actual = select(func.count()).where(Like.target_type == "post", Like.target_id == Post.id).scalar_subquery()
+        return not await db.scalar(select(func.count()).select_from(Post).where(Post.like_count != actual))
+
+def bench_writes(client: TestClient, posts: int, users: int, rng: random.Random, count: int = 2000):
+    # 使用新用户，保证都是新点赞
+    db = SessionLocal()
+    try:
+        db.add_all([User(id=users + i, username=f"fan{i}", password_hash="x") for i in range(1, 2 * count + 1)])
+        db.commit()
+    finally:
+        db.close()
+    direct = client.portal.call(run_likes, direct_like, [(users + i, rng.randint(1, posts)) for i in range(1, count + 1)])
+    flushes = like_counter.metrics()["flushes"]
+    buffered = client.portal.call(run_likes, service_like,
+                                  [(users + i, rng.randint(1, posts)) for i in range(count + 1, 2 * count + 1)])
+    client.portal.call(like_counter.flush)
+    print(f"  {count} 次点赞：逐次UPDATE like_count {direct:.0f} 次/秒；提交后批量写回 {buffered:.0f} 次/秒"
+          f"（写回 {like_counter.metrics()['flushes'] - flushes} 次）")
+    check("写回后like_count与点赞记录一致", client.portal.call(counts_match))
+
+async def concurrent_likes(user_id: int, post_id: int, n: int = 10) -> list:
+    async def one():
+        async with AsyncSessionLocal() as db:
+            data = await set_like(db, user_id, "post", post_id, True)
+            await db.commit()
+            return data["changed"]
+    return await asyncio.gather(*(one() for _ in range(n)))
+
+async def like_and_rollback(user_id: int, post_id: int):
+    async with AsyncSessionLocal() as db:
+        await set_like(db, user_id, "post", post_id, True)
+        await db.rollback()
+
+def post_like_count(post_id: int) -> int:
+    db = SessionLocal()
+    try:
+        return db.query(Post.like_count).filter(Post.id == post_id).scalar()
+    finally:
+        db.close()
+
+def check_api(client: TestClient, posts: int):
+    user_id = 1
+    auth = {"Authorization": f"Bearer {create_access_token(user_id)}"}
+    post_id = posts + 1
+    db = SessionLocal()
+    try:
+        db.add(Post(id=post_id, title="新帖子", content="内容", category="discussion", author_id=1))
+        db.commit()
+    finally:
+        db.close()
+
+    first = client.put(f"/api/community/likes/post/{post_id}", headers=auth).json()["data"]
+    second = client.put(f"/api/community/likes/post/{post_id}", headers=auth).json()["data"]
+    check("重复点赞只计一次", first["changed"] and not second["changed"] and second["like_count"] == 1)
+    check("写回前like_count未变、点赞数包含缓冲的增量",
+          post_like_count(post_id) == 0 and like_counter.pending(Post, post_id) == 1)
+    items = client.get("/api/community/posts?per_page=100", headers=auth).json()["data"]["items"]
+    item = next(item for item in items if item["id"] == post_id)
+    check("帖子列表返回点赞状态和未写回的点赞数", item["liked"] and item["like_count"] == 1)
+    anonymous = client.get("/api/community/posts?per_page=5").json()["data"]["items"]
+    check("未登录时不返回点赞状态", all("liked" not in item for item in anonymous))
+
+    removed = client.delete(f"/api/community/likes/post/{post_id}", headers=auth).json()["data"]
+    again = client.delete(f"/api/community/likes/post/{post_id}", headers=auth).json()["data"]
+    check("重复取消点赞不会减成负数", removed["changed"] and not again["changed"] and again["like_count"] == 0)
+
+    changed = client.portal.call(concurrent_likes, 2, post_id)
+    check("同一用户并发点赞只成功一次", changed.count(True) == 1)
+    client.portal.call(like_and_rollback, 3, post_id)
+    client.portal.call(like_counter.flush)
+    check("回滚的点赞不计数", post_like_count(post_id) == 1)
+
+    client.put(f"/api/community/likes/post/{post_id}", headers=auth)
+    liked = client.get(f"/api/community/likes/post?ids={post_id},{post_id + 1},999999", headers=auth).json()
+    check("批量查询已点赞的对象", liked["data"]["liked_ids"] == [post_id])
+    too_many = client.get("/api/community/likes/post?ids=" + ",".join(map(str, range(101))), headers=auth)
+    statuses = [
+        client.put(f"/api/community/likes/post/{post_id}").status_code,
+        client.put("/api/community/likes/product/1", headers=auth).status_code,
+        client.put("/api/community/likes/post/999999", headers=auth).status_code,
+        client.get("/api/community/likes/post?ids=a,b", headers=auth).status_code,
+        too_many.status_code,
+    ]
+    check("未登录、对象类型无效、对象不存在、ids无效或过多时报错", statuses == [403, 400, 404, 400, 400])
+
+    # 模拟计数丢失后用脚本校准
+    client.portal.call(like_counter.flush)
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE posts SET like_count = 0 WHERE id <= 10")
+    conn.commit()
+    conn.close()
+    output = subprocess.run([sys.executable, "scripts/reconcile_like_counts.py"],
+                            capture_output=True, text=True, check=True, env=os.environ).stdout
+    print("  " + " ".join(line.strip() for line in output.strip().splitlines()))
+    check("脚本校准点赞数", client.portal.call(counts_match))
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="点赞服务基准测试")
+    parser.add_argument("--likes", type=int, default=200000, help="已有点赞数")
+    parser.add_argument("--posts", type=int, default=2000, help="帖子数")
+    parser.add_argument("--users", type=int, default=5000, help="用户数")
+    args = parser.parse_args()
+    rng = random.Random(22)
+
+    with TestClient(app) as client:
+        seed(args.likes, args.posts, args.users, rng)
+        print(f"[{args.likes} 条点赞，{args.posts} 个帖子]")
+        bench_lookup(args.posts, args.users, rng)
+        bench_writes(client, args.posts, args.users, rng)
+        check_api(client, args.posts)
+    if failures:
+        print(f"{len(failures)} 项检查失败")
+        sys.exit(1)
+    print("点赞服务检查通过")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+并发下单基准测试
+在临时数据库中让N个买家同时抢购库存有限的商品，对比先读库存再写回（ORM读-判断-写）与
+BEGIN IMMEDIATE事务内条件UPDATE原子扣减：检查原子扣减不超卖（成交件数 = 库存减少量 = 销量增加量 = 订单明细件数）、
+库存不足的买家收到409、多商品订单任一商品不足时整单回滚、交叉购买多种商品时没有锁错误，并测量每秒订单数；
+最后检查下单接口的登录、参数校验和返回值。
+
+用法:
+    python scripts/bench_orders.py --buyers 500 --stock 100
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+# 必须在导入应用之前指定临时数据库
+tmp_dir = tempfile.mkdtemp()
+db_path = os.path.join(tmp_dir, "orders.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+os.environ["DEBUG"] = "False"
+os.environ["STATS_RECONCILE_INTERVAL"] = "0"
+os.chdir(backend_dir)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from app.main import app
+from app.api.auth import create_access_token
+from app.core.exceptions import CustomHTTPException
+from app.database import AsyncSessionLocal, SessionLocal
+from app.models.shop import Order, OrderItem, Product
+from app.models.user import User
+from app.services.orders import generate_order_no, place_order
+
+# 抢购商品、多商品订单使用的商品
+FLASH_ID = 1
+MIXED_IDS = list(range(10, 30))
+
+failures = []
+
+def check(name: str, ok: bool):
+    print(f"{'OK ' if ok else 'FAIL'} {name}")
+    if not ok:
+        failures.append(name)
+
+def seed(buyers: int, stock: int):
+    db = SessionLocal()
+    try:
+        db.add_all([User(id=i, username=f"buyer{i}", password_hash="x") for i in range(1, buyers + 1)])
+        db.add(Product(id=FLASH_ID, name="限量绒花", category="handicraft", price=128.0, stock=stock))
+        db.add(Product(id=2, name="朴素版绒花", category="handicraft", price=99.5, stock=stock))
+        db.add(Product(id=3, name="已下架", category="handicraft", price=10.0, stock=100, status="inactive"))
+        db.add_all([
+            Product(id=product_id, name=f"商品{product_id}", category="book", price=10.0 + product_id, stock=10 ** 6)
+            for product_id in MIXED_IDS
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+def product_state(product_id: int):
+    """(库存, 销量, 订单明细件数, 订单数)"""
+    db = SessionLocal()
+    try:
+        product = db.get(Product, product_id)
+        sold = db.scalar(select(func.coalesce(func.sum(OrderItem.quantity), 0)).where(OrderItem.product_id == product_id))
+        return product.stock, product.sales_count, sold, db.scalar(select(func.count()).select_from(Order))
+    finally:
+        db.close()
+
+def reset_product(product_id: int, stock: int):
+    db = SessionLocal()
+    try:
+        product = db.get(Product, product_id)
+        product.stock, product.sales_count = stock, 0
+        db.commit()
+    finally:
+        db.close()
+
+async def naive_order(user_id: int, product_id: int, quantity: int):
+    """旧方式：读出库存，在Python中判断后写回新值"""
+    async with AsyncSessionLocal() as db:
+        product = await db.get(Product, product_id)
+        if product.stock < quantity:
+            raise CustomHTTPException(status_code=409, detail="库存不足", error_code="INSUFFICIENT_STOCK")
+        await asyncio.sleep(0)
+        product.stock -= quantity
+        product.sales_count += quantity
+        order = Order(user_id=user_id, order_no=generate_order_no(datetime.now()),
+                      total_amount=product.price * quantity)
+        db.add(order)
+        await db.flush()
+        db.add(OrderItem(order_id=order.id, product_id=product_id, quantity=quantity, price=product.price))
+        await db.commit()
+
+async def atomic_order(user_id: int, items: list):
+    async with AsyncSessionLocal() as db:
+        await place_order(db, user_id, items)
+
+async def run_buyers(orders: list):
+    """orders为[(下单函数, 参数)]，全部同时发起，返回(各请求结果, 耗时)"""
+    start = time.perf_counter()
+    results = await asyncio.gather(*(fn(*args) for fn, args in orders), return_exceptions=True)
+    return results, time.perf_counter() - start
+
+def summarize(results: list):
+    succeeded = sum(result is None for result in results)
+    rejected = sum(isinstance(result, CustomHTTPException) and result.status_code == 409 for result in results)
+    errors = [result for result in results if result is not None and not (
+        isinstance(result, CustomHTTPException) and result.status_code == 409)]
+    return succeeded, rejected, errors
+
+def flash_sale(client: TestClient, buyers: int, stock: int):
+    reset_product(FLASH_ID, stock)
+    results, elapsed = client.portal.call(run_buyers, [(naive_order, (i, FLASH_ID, 1)) for i in range(1, buyers + 1)])
+    succeeded, rejected, errors = summarize(results)
+    final, sales, sold, _ = product_state(FLASH_ID)
+    print(f"[{buyers} 个买家抢 {stock} 件] 先读后写：成交 {sold} 件，库存剩余 {final}，"
+          f"超卖 {max(0, sold - stock)} 件，错误 {len(errors)} 个，{elapsed:.2f}s")
+
+    reset_product(FLASH_ID, stock)
+    _, _, sold_before, orders_before = product_state(FLASH_ID)
+    results, elapsed = client.portal.call(
+        run_buyers, [(atomic_order, (i, [{"product_id": FLASH_ID, "quantity": 1}])) for i in range(1, buyers + 1)]
+    )
+    succeeded, rejected, errors = summarize(results)
+    final, sales, sold, orders = product_state(FLASH_ID)
+    sold -= sold_before
+    print(f"  原子扣减：成交 {succeeded} 单，409 {rejected} 单，错误 {len(errors)} 个，{elapsed:.2f}s "
+          f"（{buyers / elapsed:.0f} 请求/秒）")
+    check("原子扣减不超卖：成交件数 = 库存减少量 = 销量 = 订单明细件数",
+          final == max(0, stock - buyers) and succeeded == stock - final == sales == sold
+          and orders - orders_before == succeeded)
+    check("库存不足的买家收到409且没有其他错误", rejected == buyers - succeeded and not errors)
+
+def multi_item(client: TestClient):
+    reset_product(FLASH_ID, 5)
+    reset_product(2, 1)
+    orders = product_state(FLASH_ID)[3]
+    result = client.portal.call(run_buyers, [(atomic_order, (1, [
+        {"product_id": FLASH_ID, "quantity": 2}, {"product_id": 2, "quantity": 2}
+    ]))])[0][0]
+    first, second = product_state(FLASH_ID), product_state(2)
+    check("多商品订单任一商品库存不足时整单回滚",
+          isinstance(result, CustomHTTPException) and result.status_code == 409
+          and first[:2] == (5, 0) and second[:2] == (1, 0) and first[3] == orders)
+
+def mixed(client: TestClient, buyers: int, rng: random.Random):
+    """每个买家随机购买1-5种商品（顺序随机），测量吞吐并检查各商品的库存和销量一致"""
+    orders = []
+    for user_id in range(1, buyers + 1):
+        items = [{"product_id": product_id, "quantity": rng.randint(1, 3)}
+                 for product_id in rng.sample(MIXED_IDS, rng.randint(1, 5))]
+        orders.append((atomic_order, (user_id, items)))
+    results, elapsed = client.portal.call(run_buyers, orders)
+    succeeded, rejected, errors = summarize(results)
+    print(f"[{buyers} 个买家同时购买多种商品] {succeeded} 单，{elapsed:.2f}s，{succeeded / elapsed:.0f} 订单/秒")
+    consistent = all(
+        10 ** 6 - stock == sales == sold for stock, sales, sold, _ in map(product_state, MIXED_IDS)
+    )
+    check("交叉购买多种商品没有锁错误，库存减少量 = 销量 = 订单明细件数",
+          succeeded == buyers and not errors and consistent)
+
+def check_api(client: TestClient):
+    auth = {"Authorization": f"Bearer {create_access_token(1)}"}
+    reset_product(FLASH_ID, 3)
+    body = {"items": [{"product_id": FLASH_ID, "quantity": 1}, {"product_id": FLASH_ID, "quantity": 1},
+                      {"product_id": MIXED_IDS[0]}], "shipping_address": {"city": "南京"}, "notes": "尽快发货"}
+    response = client.post("/api/shop/orders", json=body, headers=auth)
+    data = response.json()["data"]
+    check("下单返回订单号、合并后的明细和总价",
+          response.status_code == 200 and data["order_no"].startswith("RH") and data["status"] == "pending"
+          and [(item["product_id"], item["quantity"]) for item in data["items"]] == [(FLASH_ID, 2), (MIXED_IDS[0], 1)]
+          and data["total_amount"] == round(128.0 * 2 + 10.0 + MIXED_IDS[0], 2))
+    db = SessionLocal()
+    try:
+        order = db.get(Order, data["id"])
+        saved = order.user_id == 1 and order.notes == "尽快发货" and "南京" in order.shipping_address
+    finally:
+        db.close()
+    check("订单保存下单用户、收货地址和备注", saved)
+    statuses = {
+        "未登录": client.post("/api/shop/orders", json=body).status_code,
+        "库存不足": client.post("/api/shop/orders", json=body, headers=auth).status_code,
+        "没有商品": client.post("/api/shop/orders", json={"items": []}, headers=auth).status_code,
+        "数量无效": client.post("/api/shop/orders", json={"items": [{"product_id": 2, "quantity": 0}]},
+                            headers=auth).status_code,
+        "数量过多": client.post("/api/shop/orders", json={"items": [{"product_id": 2, "quantity": 100}]},
+                            headers=auth).status_code,
+        "格式无效": client.post("/api/shop/orders", json={"items": "abc"}, headers=auth).status_code,
+        "已下架": client.post("/api/shop/orders", json={"items": [{"product_id": 3}]}, headers=auth).status_code,
+        "不存在": client.post("/api/shop/orders", json={"items": [{"product_id": 999}]}, headers=auth).status_code,
+    }
+    expected = {"未登录": 403, "库存不足": 409, "没有商品": 400, "数量无效": 400, "数量过多": 400,
+                "格式无效": 400, "已下架": 404, "不存在": 404}
+    check(f"登录和参数校验（{statuses}）", statuses == expected)
+    check("失败的请求不改变库存", product_state(FLASH_ID)[0] == 1)
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="并发下单基准测试")
+    parser.add_argument("--buyers", type=int, default=500, help="同时下单的买家数")
+    parser.add_argument("--stock", type=int, default=100, help="抢购商品的库存")
+    args = parser.parse_args()
+    rng = random.Random(25)
+
+    with TestClient(app) as client:
+        seed(args.buyers, args.stock)
+        flash_sale(client, args.buyers, args.stock)
+        multi_item(client)
+        mixed(client, args.buyers, rng)
+        check_api(client)
+    if failures:
+        print(f"{len(failures)} 项检查失败")
+        sys.exit(1)
+    print("下单检查通过")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+全文搜索基准测试
+在临时数据库中生成大量帖子（默认50万），对比LIKE '%关键词%'全表扫描
+与FTS5全文索引（app.services.search）的查询时间。
+
+用法:
+    python scripts/bench_search.py --posts 500000 --rounds 10
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from itertools import accumulate
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import create_engine, select, func, or_, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database import Base, create_async_db_engine
+from app.models import user, content, community, shop, game, stats
+from app.models.community import Post
+from app.services.search import matching_ids, rebuild_index, search
+
+# 词频服从Zipf分布的随机双字词表，查询词覆盖高频、中频和低频
+random.seed(42)
+VOCABULARY = list(dict.fromkeys(
+    chr(random.randint(0x4e00, 0x4e00 + 3000)) + chr(random.randint(0x4e00, 0x4e00 + 3000))
+    for _ in range(20000)
+))
+CUM_WEIGHTS = list(accumulate(1 / rank for rank in range(1, len(VOCABULARY) + 1)))
+QUERIES = [VOCABULARY[10], VOCABULARY[200], VOCABULARY[5000], VOCABULARY[3] + VOCABULARY[50]]
+
+def random_text(word_count: int) -> str:
+    return "".join(random.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=word_count))
+
+def seed_database(db_path: str, post_count: int):
+    """建表并用sqlite3批量写入测试帖子"""
+    sync_engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=sync_engine)
+    sync_engine.dispose()
+
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    sql = (
+        "INSERT INTO posts (title, content, category, author_id, tags, view_count, like_count, "
+        "comment_count, is_pinned, status, created_at, updated_at) "
+        "VALUES (?, ?, 'discussion', 1, '[]', 0, 0, 0, 0, ?, ?, ?)"
+    )
+    batch = []
+    for _ in range(post_count):
+        status = "published" if random.random() < 0.95 else "draft"
+        batch.append((random_text(4), random_text(40), status, now, now))
+        if len(batch) >= 50000:
+            conn.executemany(sql, batch)
+            batch.clear()
+    if batch:
+        conn.executemany(sql, batch)
+    conn.commit()
+    conn.close()
+
+async def like_title(db: AsyncSession, query: str):
+    """旧实现：只搜索标题"""
+    return (await db.execute(
+        select(Post.id).where(Post.title.contains(query))
+        .order_by(desc(Post.created_at)).limit(20)
+    )).all()
+
+async def like_title_content(db: AsyncSession, query: str):
+    """LIKE搜索标题和正文（与全文索引覆盖范围相同）"""
+    return (await db.execute(
+        select(Post.id).where(or_(Post.title.contains(query), Post.content.contains(query)))
+        .order_by(desc(Post.created_at)).limit(20)
+    )).all()
+
+async def like_count(db: AsyncSession, query: str):
+    """LIKE统计匹配总数（管理端分页需要）"""
+    return await db.scalar(
+        select(func.count()).select_from(Post)
+        .where(or_(Post.title.contains(query), Post.content.contains(query)))
+    )
+
+async def fts_search(db: AsyncSession, query: str):
+    """全文索引：BM25排序取前20条"""
+    return await search(db, query, doc_type="post")
+
+async def fts_count(db: AsyncSession, query: str):
+    """全文索引统计匹配总数"""
+    return await db.scalar(
+        select(func.count()).select_from(Post).where(Post.id.in_(matching_ids("post", query)))
+    )
+
+async def measure(name, engine, func_, rounds):
+    """每个查询词多轮计时，输出各查询词的中位数"""
+    medians = []
+    for query in QUERIES:
+        timings = []
+        for _ in range(rounds):
+            async with AsyncSession(engine) as db:
+                start = time.perf_counter()
+                await func_(db, query)
+                timings.append((time.perf_counter() - start) * 1000)
+        medians.append(statistics.median(timings))
+    print(f"  {name:<16}" + "".join(f"{median:>10.1f}ms" for median in medians))
+
+async def run(db_path: str, rounds: int):
+    """建立索引并运行基准测试"""
+    url = f"sqlite:///{db_path}"
+    engine = create_async_db_engine(url)
+    start = time.perf_counter()
+    async with AsyncSession(engine) as db:
+        await rebuild_index(db)
+    print(f"建立全文索引耗时 {time.perf_counter() - start:.1f}s")
+
+    async with AsyncSession(engine) as db:
+        matches = [await like_count(db, query) for query in QUERIES]
+    print("  查询词匹配数    " + "".join(f"{count:>12}" for count in matches))
+
+    print("[Top 20]")
+    await measure("LIKE 标题", engine, like_title, rounds)
+    await measure("LIKE 标题+正文", engine, like_title_content, rounds)
+    await measure("FTS5 BM25", engine, fts_search, rounds)
+    print("[匹配总数]")
+    await measure("LIKE 标题+正文", engine, like_count, rounds)
+    await measure("FTS5", engine, fts_count, rounds)
+    await engine.dispose()
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="全文搜索基准测试")
+    parser.add_argument("--posts", type=int, default=500000, help="测试帖子数")
+    parser.add_argument("--rounds", type=int, default=10, help="测量轮数")
+    args = parser.parse_args()
+
+    settings.DEBUG = False
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "bench_search.db")
+        print(f"生成 {args.posts} 个帖子...")
+        seed_database(db_path, args.posts)
+        asyncio.run(run(db_path, args.rounds))
+
+if __name__ == "__main__":
+    main()
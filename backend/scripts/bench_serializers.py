@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+行序列化基准测试
+在临时数据库中生成帖子，对比以下方式查询并转换为字典列表的耗时和内存分配：
+  - ORM对象 + 旧版反射to_dict（遍历__table__.columns逐列getattr）
+  - ORM对象 + 编译后的to_dict
+  - Core查询（select(Post.__table__)）+ rows_to_dicts按位置取值
+
+用法:
+    python scripts/bench_serializers.py --rows 5000 --rounds 10
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database import Base, create_async_db_engine
+from app.models import user, content, community, shop, game, stats
+from app.models.base import rows_to_dicts
+from app.models.community import Post
+
+def seed_database(db_path: str, row_count: int):
+    """建表并批量写入测试帖子"""
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    now = datetime.now()
+    with engine.begin() as conn:
+        conn.execute(Post.__table__.insert(), [
+            {
+                "title": f"绒花作品{i}", "content": "制作过程和心得体会" * 10, "category": "showcase",
+                "author_id": 1, "images": "[]", "tags": "[]", "created_at": now, "updated_at": now
+            }
+            for i in range(row_count)
+        ])
+    engine.dispose()
+
+def reflective_to_dict(obj) -> dict:
+    """旧版BaseModel.to_dict实现"""
+    return {
+        column.name: getattr(obj, column.name)
+        for column in obj.__table__.columns
+    }
+
+async def orm_reflective(db: AsyncSession) -> list:
+    return [reflective_to_dict(post) for post in (await db.scalars(select(Post))).all()]
+
+async def orm_compiled(db: AsyncSession) -> list:
+    return [post.to_dict() for post in (await db.scalars(select(Post))).all()]
+
+async def core_rows(db: AsyncSession) -> list:
+    return rows_to_dicts((await db.execute(select(Post.__table__))).all())
+
+async def measure(name: str, engine, func_, rounds: int, baseline: list):
+    """计时（每轮新会话，避免标识映射复用）并统计一轮的内存分配峰值"""
+    timings = []
+    for _ in range(rounds):
+        async with AsyncSession(engine) as db:
+            start = time.perf_counter()
+            result = await func_(db)
+            timings.append((time.perf_counter() - start) * 1000)
+    if result != baseline:
+        print(f"  {name} 结果与基准不一致")
+        sys.exit(1)
+
+    async with AsyncSession(engine) as db:
+        tracemalloc.start()
+        await func_(db)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    print(f"  {name:<22} 中位数 {statistics.median(timings):>8.1f}ms  分配峰值 {peak / 1024 / 1024:>6.1f}MB")
+
+async def run(db_path: str, rounds: int):
+    """运行基准测试"""
+    engine = create_async_db_engine(f"sqlite:///{db_path}")
+    async with AsyncSession(engine) as db:
+        baseline = await orm_reflective(db)
+    await measure("ORM + 反射to_dict", engine, orm_reflective, rounds, baseline)
+    await measure("ORM + 编译to_dict", engine, orm_compiled, rounds, baseline)
+    await measure("Core Row + rows_to_dicts", engine, core_rows, rounds, baseline)
+    await engine.dispose()
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="行序列化基准测试")
+    parser.add_argument("--rows", type=int, default=5000, help="帖子数")
+    parser.add_argument("--rounds", type=int, default=10, help="测量轮数")
+    args = parser.parse_args()
+
+    settings.DEBUG = False
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "bench_serializers.db")
+        seed_database(db_path, args.rows)
+        print(f"[{args.rows} 行]")
+        asyncio.run(run(db_path, args.rounds))
+
+if __name__ == "__main__":
+    main()
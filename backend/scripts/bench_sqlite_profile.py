@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+SQLite性能配置基准测试
+在临时数据库上并发执行读写混合负载，对比默认配置（回滚日志、NullPool）
+与性能配置（WAL、PRAGMA、连接池、只读连接池）的吞吐量和延迟。
+
+用法:
+    python scripts/bench_sqlite_profile.py --users 50000 --readers 20 --writers 5 --seconds 10
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import select, func, update, create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.database import Base, create_async_db_engine
+from app.models.user import User
+
+def percentile(values, pct):
+    """计算分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def seed_database(url: str, user_count: int):
+    """创建表并批量插入测试用户"""
+    sync_engine = create_engine(url)
+    Base.metadata.create_all(bind=sync_engine)
+    with sync_engine.begin() as conn:
+        conn.execute(
+            User.__table__.insert(),
+            [
+                {
+                    "username": f"bench_{i}",
+                    "password_hash": "x",
+                    "is_active": True,
+                    "is_verified": False,
+                    "is_admin": False,
+                    "points": 0,
+                    "level": 1
+                }
+                for i in range(user_count)
+            ]
+        )
+    sync_engine.dispose()
+
+async def reader(engine, deadline, latencies, errors):
+    """读任务：模拟列表与统计查询"""
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            async with engine.connect() as conn:
+                await conn.scalar(select(func.count()).select_from(User).where(User.is_active == True))
+        except OperationalError:
+            errors["read"] += 1
+        latencies.append((time.perf_counter() - start) * 1000)
+
+async def writer(engine, deadline, user_count, latencies, errors):
+    """写任务：模拟toggle_user_status等管理端写操作"""
+    while time.perf_counter() < deadline:
+        user_id = random.randint(1, user_count)
+        start = time.perf_counter()
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(
+                    update(User).where(User.id == user_id).values(is_active=~User.is_active)
+                )
+        except OperationalError:
+            errors["write"] += 1
+        latencies.append((time.perf_counter() - start) * 1000)
+
+async def run_profile(name, url, user_count, readers, writers, seconds, enabled):
+    """在指定配置下运行一轮读写负载"""
+    settings.SQLITE_PERFORMANCE_PROFILE = enabled
+    if enabled:
+        write_engine = create_async_db_engine(url)
+        read_engine = create_async_db_engine(url, read_only=True)
+    else:
+        write_engine = create_async_db_engine(url, poolclass=NullPool)
+        read_engine = write_engine
+
+    read_latencies, write_latencies = [], []
+    errors = {"read": 0, "write": 0}
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(
+        *(reader(read_engine, deadline, read_latencies, errors) for _ in range(readers)),
+        *(writer(write_engine, deadline, user_count, write_latencies, errors) for _ in range(writers))
+    )
+
+    await write_engine.dispose()
+    if read_engine is not write_engine:
+        await read_engine.dispose()
+
+    print(f"[{name}]")
+    for label, values in (("读", read_latencies), ("写", write_latencies)):
+        print(
+            f"  {label}: {len(values) / seconds:>8.1f} ops/s"
+            f"  p50={percentile(values, 50):.1f}ms"
+            f"  p99={percentile(values, 99):.1f}ms"
+        )
+    print(f"  错误: 读 {errors['read']}, 写 {errors['write']}")
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="SQLite性能配置基准测试")
+    parser.add_argument("--users", type=int, default=50000, help="测试用户数")
+    parser.add_argument("--readers", type=int, default=20, help="并发读任务数")
+    parser.add_argument("--writers", type=int, default=5, help="并发写任务数")
+    parser.add_argument("--seconds", type=float, default=10, help="每轮持续时间")
+    args = parser.parse_args()
+
+    settings.DEBUG = False
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, enabled in (("默认配置", False), ("性能配置", True)):
+            db_path = os.path.join(tmp_dir, f"bench_{int(enabled)}.db")
+            url = f"sqlite:///{db_path}"
+            seed_database(url, args.users)
+            asyncio.run(run_profile(
+                name, url, args.users, args.readers, args.writers, args.seconds, enabled
+            ))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+静态资源传输基准测试
+把前端构建到临时目录，对比源文件直接提供（现状：原文件名、不压缩、无缓存策略）
+和构建后由PrecompressedStaticFiles提供时，每个页面首次访问需要传输的字节数，
+并按给定带宽和RTT估算首次访问与再次访问的加载时间：
+  - 首次访问：建立连接并请求HTML（2个RTT）+ HTML传输，再并行请求CSS/JS/图片（1个RTT）+ 传输
+  - 再次访问：HTML都需要验证（2个RTT）；现状下其余资源也要逐一验证（再加1个RTT），
+    带哈希的资源为immutable，直接使用浏览器缓存
+
+同时检查压缩文件解压后与原文件一致，以及Content-Encoding、Vary、Cache-Control响应头。
+
+用法:
+    python scripts/bench_static_assets.py --bandwidth-kbps 1600 --rtt-ms 150
+"""
+
+import argparse
+import gzip
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
+from fastapi.testclient import TestClient
+
+from app.core.static import IMMUTABLE_CACHE_CONTROL, PrecompressedStaticFiles
+from scripts.build_assets import brotli, build_assets
+
+SUBRESOURCE = re.compile(r"""<(?:link|script|img)\b[^>]*?\b(?:href|src)=["']([^"'#?]+)""", re.I)
+
+failures = []
+
+def check(name: str, ok: bool):
+    if not ok:
+        print(f"FAIL {name}")
+        failures.append(name)
+
+def page_resources(client: TestClient, prefix: str, page: str):
+    """页面引用的本地CSS/JS/图片（按页面所在目录解析相对路径）"""
+    html = client.get(f"{prefix}/{page}").text
+    base = page.rsplit("/", 1)[0] + "/" if "/" in page else ""
+    resources = []
+    for url in SUBRESOURCE.findall(html):
+        if re.match(r"^[a-z]+:|^/", url, re.I):
+            continue
+        parts = []
+        for part in (base + url).split("/"):
+            if part == "..":
+                parts.pop()
+            elif part not in ("", "."):
+                parts.append(part)
+        resources.append("/".join(parts))
+    return resources
+
+def transfer(client: TestClient, url: str, accept_encoding: str):
+    """返回(传输字节数, 响应, 原始响应体)；不存在的文件（页面引用了缺失的图片）字节数为None"""
+    with client.stream("GET", url, headers={"Accept-Encoding": accept_encoding}) as response:
+        raw = b"".join(response.iter_raw())
+    if response.status_code != 200:
+        return None, response, b""
+    return len(raw), response, raw
+
+def measure_page(client: TestClient, prefix: str, page: str, accept_encoding: str):
+    html_size = transfer(client, f"{prefix}/{page}", accept_encoding)[0]
+    sub_size = 0
+    immutable = 0
+    resources = page_resources(client, prefix, page)
+    for url in resources:
+        result = transfer(client, f"{prefix}/{url}", accept_encoding)
+        if result[0] is None:
+            continue
+        sub_size += result[0]
+        immutable += result[1].headers.get("cache-control") == IMMUTABLE_CACHE_CONTROL
+    return html_size, sub_size, immutable
+
+def load_times(html_size: int, sub_size: int, immutable_all: bool, bandwidth: float, rtt: float):
+    """估算首次和再次访问的加载时间（毫秒）"""
+    first = 3 * rtt + (html_size + sub_size) / bandwidth * 1000
+    repeat = 2 * rtt + html_size / bandwidth * 1000 + (0 if immutable_all else rtt)
+    return first, repeat
+
+def verify_encodings(client: TestClient, url: str):
+    """压缩版本解压后与未压缩版本一致，且带正确的响应头"""
+    identity = transfer(client, url, "identity")
+    if identity[0] is None:
+        return
+    encodings = [("gzip", gzip.decompress)] + ([("br", brotli.decompress)] if brotli else [])
+    for encoding, decompress in encodings:
+        size, response, raw = transfer(client, url, encoding)
+        if response.headers.get("content-encoding") != encoding:
+            continue
+        check(f"{url} {encoding}解压后一致", decompress(raw) == identity[2])
+        check(f"{url} {encoding}的Content-Type", response.headers["content-type"] == identity[1].headers["content-type"])
+        check(f"{url} {encoding}带Vary", response.headers.get("vary") == "Accept-Encoding")
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="静态资源传输基准测试")
+    parser.add_argument("--frontend", default=str(backend_dir.parent / "frontend"), help="前端源码目录")
+    parser.add_argument("--bandwidth-kbps", type=float, default=1600, help="下行带宽（kbit/s）")
+    parser.add_argument("--rtt-ms", type=float, default=150, help="往返时延（毫秒）")
+    args = parser.parse_args()
+    bandwidth = args.bandwidth_kbps * 1000 / 8  # 字节/秒
+
+    frontend_dir = Path(args.frontend)
+    pages = ["index.html"] + [f"pages/{path.name}" for path in sorted((frontend_dir / "pages").glob("*.html"))]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dist_dir = Path(tmp_dir) / "dist"
+        build_assets(frontend_dir, dist_dir, asset_dirs=["assets"], page_patterns=["*.html", "pages/*.html"])
+
+        app = FastAPI()
+        app.mount("/source", StaticFiles(directory=str(frontend_dir)), name="source")
+        app.mount("/dist", PrecompressedStaticFiles(directory=str(dist_dir)), name="dist")
+        client = TestClient(app)
+
+        variants = [("现状", "/source", "gzip, deflate, br"), ("构建+gzip", "/dist", "gzip, deflate")]
+        if brotli is not None:
+            variants.append(("构建+br", "/dist", "gzip, deflate, br"))
+
+        print(f"\n[带宽 {args.bandwidth_kbps:.0f}kbit/s，RTT {args.rtt_ms:.0f}ms]")
+        print(f"  {'页面':<24}" + "".join(f"{name:>26}" for name, _, _ in variants))
+        totals = {name: [0, 0, 0] for name, _, _ in variants}
+        for page in pages:
+            cells = []
+            for name, prefix, accept_encoding in variants:
+                html_size, sub_size, immutable = measure_page(client, prefix, page, accept_encoding)
+                first, repeat = load_times(html_size, sub_size, prefix == "/dist", bandwidth, args.rtt_ms)
+                totals[name][0] += html_size + sub_size
+                totals[name][1] += first
+                totals[name][2] += repeat
+                cells.append(f"{(html_size + sub_size) / 1024:>7.1f}KB {first:>6.0f}ms/{repeat:>4.0f}ms")
+                if prefix == "/dist":
+                    existing = sum(1 for url in page_resources(client, prefix, page)
+                                   if transfer(client, f"{prefix}/{url}", "identity")[0] is not None)
+                    check(f"{page} 的资源均为immutable", immutable == existing)
+            print(f"  {page:<24}" + "".join(f"{cell:>26}" for cell in cells))
+        print(f"  {'合计（字节/首次/再次）':<22}" + "".join(
+            f"{size / 1024:>7.1f}KB {first:>6.0f}ms/{repeat:>4.0f}ms".rjust(26)
+            for size, first, repeat in totals.values()
+        ))
+
+        for url in ["/dist/index.html", "/dist/pages/shop.html"] + [
+            f"/dist/{url}" for url in page_resources(client, "/dist", "pages/shop.html")
+        ]:
+            verify_encodings(client, url)
+        check("页面Cache-Control为no-cache",
+              client.get("/dist/index.html").headers.get("cache-control") == "no-cache")
+        check("不接受压缩时返回原文件",
+              "content-encoding" not in client.get("/dist/index.html", headers={"Accept-Encoding": "identity"}).headers)
+        check("q=0的编码不使用",
+              client.get("/dist/index.html", headers={"Accept-Encoding": "br;q=0, gzip"}).headers.get("content-encoding") == "gzip")
+        etag = client.get("/dist/index.html", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+        check("压缩文件的条件请求返回304",
+              client.get("/dist/index.html", headers={"Accept-Encoding": "gzip", "If-None-Match": etag}).status_code == 304)
+
+    if failures:
+        print(f"{len(failures)} 项检查失败")
+        sys.exit(1)
+    print("\n响应头和解压内容检查通过")
+
+if __name__ == "__main__":
+    main()
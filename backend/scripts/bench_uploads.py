@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+文件上传基准测试
+模拟N个客户端并发上传接近MAX_FILE_SIZE的图片（分块发送的multipart请求），对比：
+  - 旧写法：UploadFile参数（python-multipart先缓冲到内存/临时文件）+ read()整体读入校验 + 同步写盘
+  - 流式上传：receive_upload边接收边校验、在线程池中写入目标文件
+统计进程内存峰值增量（每种写法在单独的子进程中运行）、总耗时和事件循环最大延迟，
+并检查超限中止、类型识别和临时文件清理。
+
+用法:
+    python scripts/bench_uploads.py --concurrency 100 --size-mb 4
+"""
+
+import argparse
+import asyncio
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import httpx
+from fastapi import FastAPI, File, Request, UploadFile
+
+from app.core.config import settings
+from app.core.exceptions import CustomHTTPException, setup_exception_handlers
+from app.services.blobs import blob_path
+from app.services.uploads import receive_upload
+
+CHUNK_SIZE = 64 * 1024
+BOUNDARY = "----ronghua-bench-boundary"
+JPEG_HEADER = b"\xff\xd8\xff\xe0\x00\x10JFIF\x00"
+
+failures = []
+
+def check(name: str, ok: bool):
+    print(f"{'OK ' if ok else 'FAIL'} {name}")
+    if not ok:
+        failures.append(name)
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+    setup_exception_handlers(app)
+
+    @app.post("/baseline/{kind}")
+    async def baseline_upload(kind: str, file: UploadFile = File(...)):
+        content = await file.read()
+        if len(content) > settings.MAX_FILE_SIZE:
+            raise CustomHTTPException(status_code=413, detail="文件过大", error_code="FILE_TOO_LARGE")
+        extension = Path(file.filename).suffix.lower()
+        if extension not in settings.ALLOWED_EXTENSIONS:
+            raise CustomHTTPException(status_code=415, detail="不支持的文件类型", error_code="UNSUPPORTED_FILE_TYPE")
+        path = Path(settings.UPLOAD_DIR) / kind / f"{uuid.uuid4().hex}{extension}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(content)
+        return {"url": str(path), "size": len(content)}
+
+    @app.post("/stream/{kind}")
+    async def stream_upload(kind: str, request: Request):
+        return await receive_upload(request, kind)
+
+    return app
+
+class Body:
+    """按块生成multipart请求体（或原始请求体），记录服务端实际读取了多少字节"""
+
+    def __init__(self, payload_size: int, header: bytes = JPEG_HEADER, filename: str = "photo.jpg", multipart: bool = True):
+        self.payload_size = payload_size
+        self.header = header
+        self.filename = filename
+        self.multipart = multipart
+        self.sent = 0
+
+    async def __aiter__(self):
+        if self.multipart:
+            yield self._count((
+                f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{self.filename}\"\r\n"
+                f"Content-Type: image/jpeg\r\n\r\n"
+            ).encode())
+        yield self._count(self.header)
+        remaining = self.payload_size - len(self.header)
+        chunk = b"\x5a" * CHUNK_SIZE
+        while remaining > 0:
+            yield self._count(chunk[:min(CHUNK_SIZE, remaining)])
+            remaining -= CHUNK_SIZE
+            await asyncio.sleep(0)
+        if self.multipart:
+            yield self._count(f"\r\n--{BOUNDARY}--\r\n".encode())
+
+    def _count(self, data: bytes) -> bytes:
+        self.sent += len(data)
+        return data
+
+    @property
+    def headers(self) -> dict:
+        if self.multipart:
+            return {"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"}
+        return {"Content-Type": "application/octet-stream"}
+
+async def loop_lag(stop: asyncio.Event, result: list):
+    """每10ms醒来一次，记录事件循环被阻塞的最长时间"""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        worst = max(worst, time.perf_counter() - start - 0.01)
+    result.append(worst)
+
+def current_rss() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize()
+
+async def run_concurrent(path: str, concurrency: int, size: int):
+    """在当前进程中并发上传，输出 成功数 耗时 内存峰值增量 事件循环最大延迟"""
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+        # 预热一次，排除导入和首次分配的影响
+        await client.post(path, content=Body(CHUNK_SIZE), headers=Body(CHUNK_SIZE).headers)
+        baseline_rss = current_rss()
+        stop, lag = asyncio.Event(), []
+        lag_task = asyncio.create_task(loop_lag(stop, lag))
+        start = time.perf_counter()
+        bodies = [Body(size) for _ in range(concurrency)]
+        responses = await asyncio.gather(*(
+            client.post(path, content=body, headers=body.headers) for body in bodies
+        ))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await lag_task
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 - baseline_rss
+    ok = sum(response.status_code == 200 for response in responses)
+    print(ok, elapsed, max(peak, 0), lag[0])
+
+def measure(concurrency: int, size_mb: float):
+    print(f"[{concurrency} 个并发上传，每个 {size_mb:.1f}MB]")
+    for name, path in [("UploadFile + read()", "/baseline/products"), ("流式上传", "/stream/products")]:
+        output = subprocess.run(
+            [sys.executable, __file__, "--concurrency", str(concurrency), "--size-mb", str(size_mb), "--run", path],
+            capture_output=True, text=True, check=True
+        ).stdout.split()
+        ok, elapsed, peak, lag = int(output[-4]), float(output[-3]), int(output[-2]), float(output[-1])
+        print(f"  {name:<20} 成功 {ok:>3}  耗时 {elapsed:>6.2f}s  内存峰值增量 {peak / 1024 / 1024:>7.1f}MB  "
+              f"事件循环最大延迟 {lag * 1000:>6.1f}ms")
+        check(f"{name} 全部成功", ok == concurrency)
+    print()
+
+async def run_checks():
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+        upload_dir = Path(settings.UPLOAD_DIR)
+        oversized = Body(settings.MAX_FILE_SIZE * 2)
+        response = await client.post("/stream/content", content=oversized, headers=oversized.headers)
+        check("超过大小限制返回413", response.status_code == 413)
+        check("超限后不再读取剩余请求体",
+              oversized.sent < settings.MAX_FILE_SIZE + 4 * CHUNK_SIZE)
+
+        fake = Body(200 * 1024, header=b"<?php echo 1; ?>", filename="photo.jpg")
+        response = await client.post("/stream/content", content=fake, headers=fake.headers)
+        check("扩展名为.jpg但内容不是图片返回415", response.status_code == 415)
+        check("类型不符时读取前几个数据块即中止", fake.sent < 4 * CHUNK_SIZE)
+
+        video = Body(300 * 1024, header=b"\x00\x00\x00\x18ftypmp42", filename="clip.mp4")
+        response = await client.post("/stream/products", content=video, headers=video.headers)
+        check("商品图片类别不接受视频", response.status_code == 415)
+        response = await client.post("/stream/content", content=Body(300 * 1024, header=b"\x00\x00\x00\x18ftypmp42", filename="clip.mp4"),
+                                     headers=video.headers)
+        check("内容类别接受mp4并识别类型",
+              response.status_code == 200 and response.json()["content_type"] == "video/mp4")
+
+        raw = Body(100 * 1024, header=b"\x89PNG\r\n\x1a\n\x00\x00\x00\x0d", multipart=False)
+        response = await client.post("/stream/avatars", content=raw, headers=raw.headers)
+        check("直接以请求体上传PNG",
+              response.status_code == 200 and response.json()["url"].endswith(".png")
+              and blob_path(response.json()["id"]).stat().st_size == 100 * 1024)
+
+        response = await client.post("/stream/avatars", content=b"GIF89a\x01\x00",
+                                     headers={"Content-Type": "image/gif"})
+        check("小于识别长度的文件在结束时识别", response.status_code == 200 and response.json()["size"] == 8)
+
+        response = await client.post("/stream/avatars", content=b"x",
+                                     headers={"Content-Type": "image/gif", "Content-Length": str(settings.MAX_FILE_SIZE * 2)})
+        check("声明的Content-Length超限直接返回413", response.status_code == 413)
+        check("未知上传类别返回404", (await client.post("/stream/secrets", content=b"x")).status_code == 404)
+        check("没有遗留临时文件", not list(upload_dir.rglob("*.part")))
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="文件上传基准测试")
+    parser.add_argument("--concurrency", type=int, default=100, help="并发上传数")
+    parser.add_argument("--size-mb", type=float, default=4, help="每个文件的大小（MB）")
+    parser.add_argument("--run", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        settings.UPLOAD_DIR = tmp_dir
+        if args.run:
+            asyncio.run(run_concurrent(args.run, args.concurrency, int(args.size_mb * 1024 * 1024)))
+            return
+        measure(args.concurrency, args.size_mb)
+        asyncio.run(run_checks())
+
+    if failures:
+        print(f"{len(failures)} 项检查失败")
+        sys.exit(1)
+    print("上传检查通过")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+教程视频范围请求基准测试
+在临时数据库和上传目录中生成一个视频文件（moov在文件末尾，与未做faststart的MP4相同）并创建教程，
+对比播放器拖动进度条时，/static（不支持Range，每次返回整个文件）与 /api/tutorial/{id}/video
+需要传输的字节数和耗时；对比服务器支持zerocopysend扩展时（sendfile）与逐块读取发送的CPU时间
+（uvicorn没有实现该扩展，直接运行时总是逐块读取，零拷贝需由nginx通过X-Accel-Redirect发送）；
+并检查Range/If-Range/多范围/416/HEAD、并发流上限、续播字节偏移和同时首次上报进度。
+
+用法:
+    python scripts/bench_video_ranges.py --size 64 --seeks 20
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+# 必须在导入应用之前指定临时数据库和上传目录
+tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'video_ranges.db')}"
+os.environ["UPLOAD_DIR"] = os.path.join(tmp_dir, "uploads")
+os.environ["DEBUG"] = "False"
+os.environ["STATS_RECONCILE_INTERVAL"] = "0"
+os.chdir(backend_dir)
+
+import httpx
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.datastructures import Headers
+from starlette.routing import Mount
+from starlette.staticfiles import StaticFiles
+
+from app.main import app
+from app.api.auth import create_access_token
+from app.core.config import settings
+from app.core.ranges import ZEROCOPY_EXTENSION, RangeFileResponse
+from app.database import SessionLocal
+from app.models.content import LearningProgress, Tutorial
+from app.services.videos import video_streams
+
+DURATION = 600  # 教程时长（秒）
+SEEK_READ = 1024 * 1024  # 每次拖动后播放器读取的字节数
+
+failures = []
+
+def check(name: str, ok: bool):
+    print(f"{'OK ' if ok else 'FAIL'} {name}")
+    if not ok:
+        failures.append(name)
+
+def make_video(path: Path, size: int) -> tuple:
+    """ftyp + mdat + moov，返回(文件内容, mdat数据起点, mdat数据长度)"""
+    ftyp = struct.pack(">I4s4sI8s", 24, b"ftyp", b"isom", 512, b"isomiso2")
+    moov_data = os.urandom(64 * 1024)
+    moov = struct.pack(">I4s", len(moov_data) + 8, b"moov") + moov_data
+    mdat_data = os.urandom(size - len(ftyp) - len(moov) - 8)
+    mdat = struct.pack(">I4s", len(mdat_data) + 8, b"mdat") + mdat_data
+    content = ftyp + mdat + moov
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return content, len(ftyp) + 8, len(mdat_data)
+
+def parse_multipart(body: bytes, content_type: str) -> list:
+    """解析multipart/byteranges响应，返回[(Content-Range, 数据)]"""
+    boundary = content_type.split("boundary=")[1].encode()
+    parts = []
+    for chunk in body.split(b"--" + boundary)[1:-1]:
+        head, _, data = chunk.partition(b"\r\n\r\n")
+        content_range = [line for line in head.split(b"\r\n") if line.lower().startswith(b"content-range")][0]
+        parts.append((content_range.split(b":", 1)[1].strip().decode(), data[:-2]))
+    return parts
+
+async def send_over_socket(path: str, size: int, zerocopy: bool) -> float:
+    """在socketpair上按ASGI协议发送整个文件（由测试代码扮演服务器），返回发送方CPU时间"""
+    server, client = socket.socketpair()
+    received = []
+
+    def drain():
+        total = 0
+        while True:
+            data = client.recv(1024 * 1024)
+            if not data:
+                break
+            total += len(data)
+        received.append(total)
+
+    reader = threading.Thread(target=drain)
+    reader.start()
+
+    async def send(message):
+        if message["type"] == ZEROCOPY_EXTENSION:
+            offset, count = message["offset"], message["count"]
+            while count:
+                sent = await asyncio.to_thread(os.sendfile, server.fileno(), message["file"].fileno(), offset, count)
+                offset, count = offset + sent, count - sent
+        elif message["type"] == "http.response.body" and message["body"]:
+            await asyncio.to_thread(server.sendall, message["body"])
+
+    scope = {"type": "http", "extensions": {ZEROCOPY_EXTENSION: {}} if zerocopy else {}}
+    response = RangeFileResponse(path, os.stat(path), Headers())
+    cpu = time.process_time()
+    await response(scope, None, send)
+    cpu = time.process_time() - cpu
+    server.close()
+    reader.join()
+    client.close()
+    assert received[0] == size
+    return cpu
+
+async def post_progress_concurrently(tutorial_id: int, user_ids: range, requests: int) -> list:
+    """每个用户同时发出requests个首次进度上报（播放器定时上报），返回各请求的状态码"""
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        responses = await asyncio.gather(*(
+            client.post(f"/api/tutorial/{tutorial_id}/progress", params={"position": 10 + i},
+                        headers={"Authorization": f"Bearer {create_access_token(user_id)}"})
+            for user_id in user_ids for i in range(requests)
+        ))
+    return [response.status_code for response in responses]
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="教程视频范围请求基准测试")
+    parser.add_argument("--size", type=int, default=64, help="视频大小（MB）")
+    parser.add_argument("--seeks", type=int, default=20, help="拖动进度条次数")
+    args = parser.parse_args()
+
+    size = args.size * 1024 * 1024
+    video = Path(settings.UPLOAD_DIR) / "content" / "bench.mp4"
+    content, mdat_start, mdat_length = make_video(video, size)
+    video_url = "/static/uploads/content/bench.mp4"
+
+    with TestClient(app) as client:
+        db = SessionLocal()
+        try:
+            tutorial = Tutorial(title="绒花制作入门", video_url=video_url, category="basic", duration=DURATION)
+            broken = Tutorial(title="越界路径", video_url="/static/../app/main.py", category="basic")
+            db.add_all([tutorial, broken])
+            db.commit()
+            tutorial_id, broken_id = tutorial.id, broken.id
+        finally:
+            db.close()
+        url = f"/api/tutorial/{tutorial_id}/video"
+
+        # 拖动进度条：每次从随机位置读取1MB
+        rng = random.Random(1)
+        offsets = [rng.randrange(0, size - SEEK_READ) for _ in range(args.seeks)]
+        baseline = TestClient(Starlette(routes=[Mount("/static", StaticFiles(directory=tmp_dir))]))
+        results = {}
+        for name, target, base in (("/static（无Range）", "/static/uploads/content/bench.mp4", baseline),
+                                   ("视频接口（Range）", url, client)):
+            transferred = 0
+            start = time.perf_counter()
+            for offset in offsets:
+                response = base.get(target, headers={"Range": f"bytes={offset}-{offset + SEEK_READ - 1}"})
+                transferred += len(response.content)
+            results[name] = (transferred, time.perf_counter() - start)
+        print(f"[{args.size}MB 视频，拖动进度条 {args.seeks} 次，每次读取 {SEEK_READ // 1024}KB]")
+        for name, (transferred, elapsed) in results.items():
+            print(f"  {name:<16} 传输 {transferred / 1024 / 1024:>8.1f}MB  耗时 {elapsed:.2f}s")
+
+        # 发送整个文件：sendfile与逐块读取的发送方CPU时间
+        chunked_cpu = asyncio.run(send_over_socket(str(video), size, zerocopy=False))
+        sendfile_cpu = asyncio.run(send_over_socket(str(video), size, zerocopy=True))
+        print(f"  发送整个文件的CPU时间：逐块读取 {chunked_cpu * 1000:.0f}ms，zerocopysend(sendfile) {sendfile_cpu * 1000:.0f}ms")
+
+        response = client.get(url, headers={"Range": "bytes=1000-1999"})
+        check("单个范围返回206和对应内容",
+              response.status_code == 206 and response.content == content[1000:2000]
+              and response.headers["content-range"] == f"bytes 1000-1999/{size}")
+        response = client.get(url, headers={"Range": "bytes=0-99, 5000-5099, -100"})
+        parts = parse_multipart(response.content, response.headers["content-type"])
+        check("多个范围返回multipart/byteranges",
+              response.status_code == 206 and len(parts) == 3
+              and parts[0] == ("bytes 0-99/%d" % size, content[:100])
+              and parts[1][1] == content[5000:5100] and parts[2][1] == content[-100:]
+              and int(response.headers["content-length"]) == len(response.content))
+        response = client.get(url, headers={"Range": "bytes=0-99, 50-199, 200-299"})
+        check("重叠和相邻的范围合并为一个",
+              response.status_code == 206 and response.headers["content-range"] == f"bytes 0-299/{size}")
+        response = client.get(url, headers={"Range": f"bytes={size}-"})
+        check("超出文件的范围返回416",
+              response.status_code == 416 and response.headers["content-range"] == f"bytes */{size}")
+        check("格式错误的Range返回整个文件",
+              client.head(url, headers={"Range": "bytes=abc"}).status_code == 200)
+        etag = client.head(url).headers["etag"]
+        check("If-Range与ETag一致时返回部分内容",
+              client.get(url, headers={"Range": "bytes=0-9", "If-Range": etag}).status_code == 206)
+        response = client.head(url, headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+        check("If-Range与ETag不一致时返回整个文件",
+              response.status_code == 200 and response.headers["content-length"] == str(size))
+        response = client.head(url)
+        check("HEAD返回长度且不返回内容",
+              response.headers["accept-ranges"] == "bytes" and response.content == b""
+              and response.headers["content-type"] == "video/mp4")
+        check("视频流名额全部归还", video_streams.active == 0)
+
+        taken = 0
+        while video_streams.try_acquire():
+            taken += 1
+        response = client.get(url, headers={"Range": "bytes=0-9"})
+        check("超过并发流上限返回503",
+              response.status_code == 503 and response.headers.get("retry-after") == "1")
+        for _ in range(taken):
+            video_streams.release()
+
+        check("越出static目录的视频地址返回404",
+              client.get(f"/api/tutorial/{broken_id}/video").status_code == 404)
+        settings.VIDEO_ACCEL_REDIRECT_PREFIX = "/protected-static/"
+        response = client.get(url)
+        check("配置X-Accel-Redirect时交给nginx发送",
+              response.headers.get("x-accel-redirect") == "/protected-static/uploads/content/bench.mp4"
+              and response.content == b"")
+        settings.VIDEO_ACCEL_REDIRECT_PREFIX = ""
+
+        # 续播：记录观看位置，按位置取字节偏移
+        check("未登录时不能查询续播位置", client.get(f"/api/tutorial/{tutorial_id}/resume").status_code in (401, 403))
+        token = create_access_token(1)
+        auth = {"Authorization": f"Bearer {token}"}
+        client.post(f"/api/tutorial/{tutorial_id}/progress", params={"position": DURATION // 2}, headers=auth)
+        data = client.get(f"/api/tutorial/{tutorial_id}/resume", headers=auth).json()["data"]
+        expected = mdat_start + mdat_length // 2
+        check("续播字节偏移按时长比例落在媒体数据中",
+              data["last_position"] == DURATION // 2 and data["progress_percent"] == 50
+              and abs(data["byte_offset"] - expected) <= 1)
+        response = client.get(data["video_url"], headers={"Range": f"bytes={data['byte_offset']}-"})
+        check("从续播偏移请求Range",
+              response.status_code == 206 and response.content == content[data["byte_offset"]:])
+        client.post(f"/api/tutorial/{tutorial_id}/progress", params={"position": DURATION * 2}, headers=auth)
+        data = client.get(f"/api/tutorial/{tutorial_id}/resume", headers=auth).json()["data"]
+        check("看完后标记完成", data["is_completed"] and data["last_position"] == DURATION)
+
+        users = range(2, 52)
+        statuses = client.portal.call(post_progress_concurrently, tutorial_id, users, 2)
+        db = SessionLocal()
+        try:
+            rows = db.query(LearningProgress).filter(
+                LearningProgress.user_id.in_(users), LearningProgress.tutorial_id == tutorial_id
+            ).count()
+        finally:
+            db.close()
+        errors = sum(status != 200 for status in statuses)
+        check(f"同时首次上报进度都成功且每人一条记录（失败 {errors} 个）", not errors and rows == len(users))
+
+    if failures:
+        print(f"{len(failures)} 项检查失败")
+        sys.exit(1)
+    print("视频范围请求检查通过")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+浏览数写回基准测试
+在临时数据库中模拟并发浏览，对比每次浏览执行一次UPDATE并提交
+与内存缓冲后批量写回（app.services.views）的吞吐量，并检查缓冲中不同记录数的上限。
+
+用法:
+    python scripts/bench_view_counter.py --views 20000 --posts 1000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+DB_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DB_DIR, 'bench_views.db')}"
+os.environ["DEBUG"] = "False"
+
+from sqlalchemy import update, select, func
+
+from app.database import AsyncSessionLocal, create_tables_async, dispose_engines
+from app.models import user, content, community, shop, game, stats
+from app.models.community import Post
+from app.services.views import ViewCounter
+
+async def seed(post_count: int):
+    """建表并写入测试帖子"""
+    await create_tables_async()
+    async with AsyncSessionLocal() as db:
+        db.add_all([
+            Post(title=f"帖子{i}", content="内容", category="discussion", author_id=1)
+            for i in range(post_count)
+        ])
+        await db.commit()
+
+async def direct_update(post_id: int):
+    """旧方式：每次浏览一次UPDATE并提交"""
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(Post).where(Post.id == post_id).values(view_count=Post.view_count + 1)
+        )
+        await db.commit()
+
+async def run_views(name: str, handler, views: int, post_count: int, concurrency: int):
+    """以固定并发执行views次浏览并输出吞吐量"""
+    queue = [random.randint(1, post_count) for _ in range(views)]
+
+    async def worker():
+        while queue:
+            await handler(queue.pop())
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    print(f"  {name:<10} {views / elapsed:>10.0f} 次/秒  耗时 {elapsed:.2f}s")
+
+async def total_views() -> int:
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(func.sum(Post.view_count)))
+
+async def run(views: int, post_count: int, concurrency: int, threshold: int):
+    """运行基准测试"""
+    await seed(post_count)
+
+    await run_views("逐次UPDATE", direct_update, views, post_count, concurrency)
+
+    counter = ViewCounter([Post], flush_threshold=threshold)
+
+    async def buffered(post_id: int):
+        counter.record(Post, post_id)
+        # 让出事件循环，模拟请求处理
+        await asyncio.sleep(0)
+
+    await run_views("缓冲写回", buffered, views, post_count, concurrency)
+    await counter.flush()
+    metrics = counter.metrics()
+    print(f"  写入次数 {metrics['flushes']}，最近一次写入 {metrics['last_flush_ms']}ms")
+    print(f"  数据库浏览总数 {await total_views()}（期望 {views * 2}）")
+
+    # 大量不同id（如请求不存在的记录）不会使缓冲无限增长：达到上限后新id丢弃并立即触发写入
+    capped = ViewCounter([Post], flush_threshold=threshold, max_rows=100)
+    for post_id in range(1, 1001):
+        capped.record(Post, post_id)
+    capped.record(Post, 1)
+    metrics = capped.metrics()
+    await capped.flush()
+    print(f"  缓冲上限100：1000个不同id时缓冲 {metrics['pending_rows']} 个，丢弃 {metrics['dropped_views']} 次浏览")
+    await dispose_engines()
+    if (metrics["pending_rows"], metrics["dropped_views"], metrics["pending_views"]) != (100, 900, 101):
+        sys.exit(1)
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="浏览数写回基准测试")
+    parser.add_argument("--views", type=int, default=20000, help="浏览次数")
+    parser.add_argument("--posts", type=int, default=1000, help="帖子数")
+    parser.add_argument("--concurrency", type=int, default=50, help="并发数")
+    parser.add_argument("--threshold", type=int, default=1000, help="缓冲写回阈值")
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args.views, args.posts, args.concurrency, args.threshold))
+    finally:
+        shutil.rmtree(DB_DIR, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
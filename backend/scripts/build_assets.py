@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+静态资源构建
+压缩（保守的去注释、去缩进）并按内容哈希重命名CSS/JS/图片，改写HTML和CSS中的引用，
+并为文本资源预先生成.gz和.br文件，由PrecompressedStaticFiles按Accept-Encoding返回：
+  - frontend/ -> frontend/dist/（页面文件名不变；assets/下的资源同时保留原文件名，
+    供JS中按路径拼接的图片地址使用）
+  - backend/static/js|css -> backend/static/build/（模板通过static_url()引用）
+
+未安装brotli时只生成.gz文件。
+
+用法:
+    python scripts/build_assets.py
+    python scripts/build_assets.py --frontend ../frontend --out ../frontend/dist
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+from pathlib import Path, PurePosixPath
+from typing import Dict, Optional
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.core.static import MANIFEST_FILE, STATIC_BUILD_DIR
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 需要预压缩的文本资源
+COMPRESSIBLE_SUFFIXES = {".html", ".css", ".js", ".svg", ".json", ".txt", ".xml"}
+# 小于该字节数的文件压缩收益抵不过额外的响应头，不生成压缩文件
+MIN_COMPRESS_SIZE = 256
+HASH_LENGTH = 10
+
+# 字符串字面量或注释（CSS压缩时字符串原样保留）
+CSS_TOKEN = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*.*?\*/""", re.S)
+# HTML中不能改动空白的块，以及需要分别按JS/CSS处理的内联块
+HTML_RAW_BLOCK = re.compile(r"(<(pre|textarea|script|style)\b[^>]*>)(.*?)(</\2\s*>)", re.S | re.I)
+HTML_COMMENT = re.compile(r"<!--(?!\[if).*?-->", re.S)
+HTML_REFERENCE = re.compile(r"""(\b(?:href|src)\s*=\s*)(["'])([^"']+)\2""", re.I)
+CSS_URL = re.compile(r"""url\(\s*(["']?)([^"')]+)\1\s*\)""")
+BACKTICK = re.compile(r"(?<!\\)`")
+
+def minify_css(text: str) -> str:
+    """去掉注释和多余空白（不改动字符串，不删除选择器中冒号前的空格）"""
+    parts = []
+    last = 0
+    for match in CSS_TOKEN.finditer(text):
+        parts.append(_collapse_css(text[last:match.start()]))
+        # 字符串原样保留，注释直接丢弃
+        parts.append(match.group(1) or "")
+        last = match.end()
+    parts.append(_collapse_css(text[last:]))
+    return "".join(parts).replace(";}", "}").strip()
+
+def _collapse_css(text: str) -> str:
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+    return re.sub(r":\s+", ":", text)
+
+def minify_js(text: str) -> str:
+    """按行去掉缩进、空行和整行注释
+
+    不做语法分析，只在确定安全的范围内处理：模板字符串跨行的部分原样保留，
+    行尾注释和行内的空白不做改动，也不合并行（避免自动分号插入的问题）。
+    """
+    lines = []
+    in_template = False
+    in_comment = False
+    for line in text.splitlines():
+        if in_template:
+            lines.append(line)
+            in_template = len(BACKTICK.findall(line)) % 2 == 0
+            continue
+        stripped = line.strip()
+        if in_comment:
+            if "*/" not in stripped:
+                continue
+            in_comment = False
+            stripped = stripped.split("*/", 1)[1].strip()
+        elif stripped.startswith("/*"):
+            if "*/" not in stripped:
+                in_comment = True
+                continue
+            stripped = stripped.split("*/", 1)[1].strip()
+        if not stripped or stripped.startswith("//"):
+            continue
+        lines.append(stripped)
+        in_template = len(BACKTICK.findall(stripped)) % 2 == 1
+    return "\n".join(lines) + "\n" if lines else ""
+
+def minify_html(text: str) -> str:
+    """去掉注释、缩进和空行；pre/textarea原样保留，内联脚本和样式分别按JS/CSS处理"""
+    parts = []
+    last = 0
+    for match in HTML_RAW_BLOCK.finditer(text):
+        parts.append(_strip_html_lines(text[last:match.start()]))
+        open_tag, tag, body, close_tag = match.groups()
+        tag = tag.lower()
+        if tag == "script":
+            body = minify_js(body)
+        elif tag == "style":
+            body = minify_css(body)
+        parts.append(open_tag + body + close_tag)
+        last = match.end()
+    parts.append(_strip_html_lines(text[last:]))
+    return "".join(parts).strip() + "\n"
+
+def _strip_html_lines(text: str) -> str:
+    text = HTML_COMMENT.sub("", text)
+    stripped = "\n".join(line.strip() for line in text.split("\n") if line.strip())
+    # 标签之间原有的空白保留为一个换行，避免行内元素粘连
+    if text[:1].isspace() and stripped:
+        stripped = "\n" + stripped
+    if text[-1:].isspace():
+        stripped += "\n"
+    return stripped
+
+MINIFIERS = {".css": minify_css, ".js": minify_js, ".html": minify_html}
+
+def hashed_name(path: PurePosixPath, content: bytes) -> PurePosixPath:
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    return path.with_name(f"{path.stem}.{digest}{path.suffix}")
+
+def resolve_reference(url: str, base_dir: PurePosixPath, manifest: Dict[str, str]) -> str:
+    """把相对引用替换为带哈希的文件（外部地址、绝对路径和清单外的文件不变）"""
+    if re.match(r"^[a-z][a-z0-9+.-]*:|^/|^#", url, re.I):
+        return url
+    path, suffix = re.match(r"([^?#]*)(.*)", url, re.S).groups()
+    target = os.path.normpath(str(base_dir / path)).replace(os.sep, "/")
+    hashed = manifest.get(target)
+    if hashed is None:
+        return url
+    return os.path.relpath(hashed, str(base_dir)).replace(os.sep, "/") + suffix
+
+def rewrite_html(text: str, relative: PurePosixPath, manifest: Dict[str, str]) -> str:
+    return HTML_REFERENCE.sub(
+        lambda m: f"{m.group(1)}{m.group(2)}{resolve_reference(m.group(3), relative.parent, manifest)}{m.group(2)}",
+        text
+    )
+
+def rewrite_css(text: str, relative: PurePosixPath, manifest: Dict[str, str]) -> str:
+    return CSS_URL.sub(
+        lambda m: f"url({m.group(1)}{resolve_reference(m.group(2), relative.parent, manifest)}{m.group(1)})",
+        text
+    )
+
+def write_file(path: Path, content: bytes, stats: Optional[dict] = None):
+    """写入文件，文本资源同时写入.gz和.br；stats不为None时累计各编码的传输字节数"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    sizes = {"bytes": len(content), "gzip": len(content), "br": len(content)}
+    if path.suffix in COMPRESSIBLE_SUFFIXES and len(content) >= MIN_COMPRESS_SIZE:
+        for encoding, suffix, compress in (
+            ("gzip", ".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0)),
+            ("br", ".br", brotli and (lambda data: brotli.compress(data, quality=11))),
+        ):
+            if compress is None:
+                continue
+            compressed = compress(content)
+            if len(compressed) < len(content):
+                path.with_name(path.name + suffix).write_bytes(compressed)
+                sizes[encoding] = len(compressed)
+    if stats is not None:
+        stats["files"] += 1
+        for key, size in sizes.items():
+            stats[key] += size
+
+def build_assets(source_dir: Path, out_dir: Path, asset_dirs, page_patterns, keep_names: bool = True) -> Dict[str, str]:
+    """构建一个目录：asset_dirs下的资源按内容哈希命名，页面改写引用后保留原文件名
+
+    keep_names为True时资源同时以原文件名输出。
+    先处理图片等其他资源，再处理CSS（其中的url()已指向带哈希的图片），
+    因此图片变化时引用它的CSS哈希也会随之变化。返回 原路径 -> 带哈希路径 的清单。
+    """
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    stats = {"files": 0, "bytes": 0, "gzip": 0, "br": 0, "source": 0}
+    manifest: Dict[str, str] = {}
+
+    assets = sorted(
+        path for asset_dir in asset_dirs if (source_dir / asset_dir).is_dir()
+        for path in (source_dir / asset_dir).rglob("*") if path.is_file()
+    )
+    order = {".css": 1, ".js": 2}
+    for path in sorted(assets, key=lambda p: order.get(p.suffix, 0)):
+        relative = PurePosixPath(path.relative_to(source_dir).as_posix())
+        content = path.read_bytes()
+        stats["source"] += len(content)
+        if path.suffix in MINIFIERS:
+            text = MINIFIERS[path.suffix](content.decode("utf-8"))
+            if path.suffix == ".css":
+                text = rewrite_css(text, relative, manifest)
+            content = text.encode("utf-8")
+        target = hashed_name(relative, content)
+        manifest[str(relative)] = str(target)
+        write_file(out_dir / target, content, stats)
+        if keep_names:
+            write_file(out_dir / relative, content)
+
+    for pattern in page_patterns:
+        for path in sorted(source_dir.glob(pattern)):
+            relative = PurePosixPath(path.relative_to(source_dir).as_posix())
+            content = path.read_bytes()
+            stats["source"] += len(content)
+            text = rewrite_html(minify_html(content.decode("utf-8")), relative, manifest)
+            write_file(out_dir / relative, text.encode("utf-8"), stats)
+
+    (out_dir / MANIFEST_FILE).write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"{source_dir} -> {out_dir}")
+    print(f"  {stats['files']} 个文件，源文件 {stats['source']} 字节，去空白后 {stats['bytes']} 字节，"
+          f"gzip {stats['gzip']} 字节" + (f"，br {stats['br']} 字节" if brotli is not None else ""))
+    return manifest
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="静态资源构建")
+    parser.add_argument("--frontend", default=str(backend_dir.parent / "frontend"), help="前端源码目录")
+    parser.add_argument("--out", default=None, help="前端输出目录（默认为前端目录下的dist）")
+    parser.add_argument("--static", default=str(backend_dir / "static"), help="后端static目录")
+    args = parser.parse_args()
+
+    if brotli is None:
+        print("未安装brotli，只生成.gz文件")
+
+    frontend_dir = Path(args.frontend)
+    if frontend_dir.is_dir():
+        build_assets(frontend_dir, Path(args.out) if args.out else frontend_dir / "dist",
+                     asset_dirs=["assets"], page_patterns=["*.html", "pages/*.html"])
+
+    static_dir = Path(args.static)
+    build_assets(static_dir, static_dir / STATIC_BUILD_DIR,
+                 asset_dirs=["js", "css", "img", "images"], page_patterns=[], keep_names=False)
+
+if __name__ == "__main__":
+    main()
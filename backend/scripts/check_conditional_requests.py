@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+条件请求检查
+在临时数据库上请求公开API，检查ETag、Last-Modified和Cache-Control响应头，
+If-None-Match / If-Modified-Since命中时返回304，数据变化后ETag随之变化，
+以及非GET、非JSON和错误响应不受影响。
+
+用法:
+    python scripts/check_conditional_requests.py
+"""
+
+import os
+import sys
+import tempfile
+from email.utils import formatdate
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+# 必须在导入应用之前指定临时数据库
+tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'conditional.db')}"
+os.environ["DEBUG"] = "False"
+os.environ["STATS_RECONCILE_INTERVAL"] = "0"
+os.chdir(backend_dir)
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.core.config import settings
+from app.core.http_cache import MAX_TRACKED_URLS, ConditionalRequestMiddleware, vary_with_authorization
+
+failures = []
+
+def check(name: str, ok: bool):
+    print(f"{'OK ' if ok else 'FAIL'} {name}")
+    if not ok:
+        failures.append(name)
+
+def main():
+    """主函数"""
+    with TestClient(app) as client:
+        response = client.post(
+            "/admin/login",
+            data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+            follow_redirects=False
+        )
+        client.cookies.set("admin_session", response.cookies["admin_session"])
+
+        first = client.get("/api/shop/categories")
+        etag = first.headers.get("ETag")
+        last_modified = first.headers.get("Last-Modified")
+        check("响应带强ETag", bool(etag) and etag.startswith('"'))
+        check("响应带Last-Modified", bool(last_modified))
+        check("公开接口Cache-Control为public", first.headers.get("Cache-Control", "").startswith("public"))
+        check("带ETag的响应Vary包含Authorization", first.headers.get("Vary") == "Authorization")
+
+        not_modified = client.get("/api/shop/categories", headers={"If-None-Match": etag})
+        check("If-None-Match命中返回304且无响应体",
+              not_modified.status_code == 304 and not_modified.content == b""
+              and not_modified.headers.get("ETag") == etag)
+        check("304响应Vary包含Authorization", not_modified.headers.get("Vary") == "Authorization")
+        check("合并已有的Vary头且不重复",
+              vary_with_authorization([(b"vary", b"Accept-Encoding, Origin")]) == b"Accept-Encoding, Origin, Authorization"
+              and vary_with_authorization([(b"vary", b"authorization")]) == b"authorization")
+        check("弱校验和多值If-None-Match命中",
+              client.get("/api/shop/categories",
+                         headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304)
+        check("ETag不匹配返回200",
+              client.get("/api/shop/categories", headers={"If-None-Match": '"other"'}).status_code == 200)
+        check("If-Modified-Since不早于Last-Modified返回304",
+              client.get("/api/shop/categories",
+                         headers={"If-Modified-Since": last_modified}).status_code == 304)
+        check("If-Modified-Since早于Last-Modified返回200",
+              client.get("/api/shop/categories",
+                         headers={"If-Modified-Since": formatdate(0, usegmt=True)}).status_code == 200)
+        check("If-None-Match优先于If-Modified-Since",
+              client.get("/api/shop/categories",
+                         headers={"If-None-Match": '"other"', "If-Modified-Since": last_modified}).status_code == 200)
+
+        before = client.get("/api/tutorial/list")
+        client.post("/admin/api/tutorials", json={
+            "title": "新教程", "video_url": "/static/videos/new.mp4",
+            "category": "basic", "difficulty_level": 1
+        })
+        after = client.get("/api/tutorial/list", headers={"If-None-Match": before.headers["ETag"]})
+        check("数据变化后返回200和新ETag",
+              after.status_code == 200 and after.headers.get("ETag") != before.headers["ETag"])
+        check("再次验证新ETag返回304",
+              client.get("/api/tutorial/list",
+                         headers={"If-None-Match": after.headers["ETag"]}).status_code == 304)
+        stale = client.get("/api/tutorial/list", headers={"If-Modified-Since": before.headers["Last-Modified"]})
+        check("数据变化后旧的If-Modified-Since返回200", stale.status_code == 200)
+
+        check("认证接口Cache-Control为private",
+              client.get("/api/auth/profile").headers.get("Cache-Control") == "private, no-cache")
+        check("非GET请求不带ETag", "ETag" not in client.post("/api/shop/cart").headers)
+        check("错误响应不带ETag", "ETag" not in client.get("/api/search", params={"q": "x", "type": "bad"}).headers)
+        check("非API路径不带ETag", "ETag" not in client.get("/health").headers)
+
+        middleware = app.middleware_stack
+        while not isinstance(middleware, ConditionalRequestMiddleware):
+            middleware = middleware.app
+        tracked = len(middleware._versions)
+        for i in range(20):
+            client.get("/api/shop/categories", params={"x": i})
+        client.get("/api/tutorial/list", params={"page": 2, "per_page": 5})
+        client.get("/api/tutorial/list", params={"per_page": 5, "page": 2, "x": 1})
+        check("路由不读取的查询参数和参数顺序不产生新记录", len(middleware._versions) == tracked + 1)
+        for i in range(MAX_TRACKED_URLS + 10):
+            client.get("/api/tutorial/list", params={"page": i})
+        check("记录的URL数不超过上限", len(middleware._versions) == MAX_TRACKED_URLS)
+
+        print(f"教程列表：200响应 {len(after.content)} 字节，304响应 0 字节")
+
+    if failures:
+        print(f"{len(failures)} 项检查失败")
+        sys.exit(1)
+    print("条件请求检查通过")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+管理端列表接口SQL语句数检查
+在临时数据库中生成数据，以不同per_page请求列表接口，
+断言每页的SQL语句数固定（不随每页条数增长，即不存在N+1查询）；
+并检查公开列表接口的offset分页同样把per_page限制在1到MAX_PER_PAGE之间。
+
+用法:
+    python scripts/check_query_counts.py
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+# 必须在导入应用之前指定临时数据库
+tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'query_counts.db')}"
+os.environ["DEBUG"] = "False"
+os.environ["STATS_RECONCILE_INTERVAL"] = "0"  # 避免后台校准任务的语句计入
+os.chdir(backend_dir)
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.core.config import settings
+from app.core.pagination import MAX_PER_PAGE
+from app.core.query_counter import QueryCounter
+from app.database import SessionLocal, async_engine, async_read_engine, create_tables
+from app.models.user import User
+from app.models.community import Post
+from app.models.shop import Product, Order
+
+# 每个列表接口期望的语句数：总数查询 + 分页查询
+EXPECTED_STATEMENTS = {
+    "/admin/api/posts": 2,
+    "/admin/api/products": 2,
+    "/admin/api/orders": 2,
+}
+
+PER_PAGE_VALUES = [5, 20, 100]
+
+# 公开列表接口（含按热度、点赞数分页的信息流）
+PUBLIC_LISTS = [
+    ("/api/community/posts", {}),
+    ("/api/community/posts", {"sort": "hot"}),
+    ("/api/community/posts", {"sort": "top"}),
+    ("/api/shop/products", {}),
+]
+
+# 请求的per_page -> 实际每页条数
+CLAMPED_PER_PAGE = {-1: 1, 0: 1, 100000: MAX_PER_PAGE}
+
+def seed_data(count: int = 120):
+    """生成用户、帖子、商品和订单（每个帖子和订单属于不同用户）"""
+    create_tables()
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        users = [
+            User(username=f"qc_user_{i}", password_hash="x", created_at=now - timedelta(minutes=i))
+            for i in range(count)
+        ]
+        db.add_all(users)
+        db.flush()
+        for i, user in enumerate(users):
+            db.add(Post(
+                title=f"帖子{i}", content="内容", category="discussion",
+                author_id=user.id, created_at=now - timedelta(minutes=i)
+            ))
+            db.add(Product(
+                name=f"商品{i}", category="handicraft", price=10.0, stock=10,
+                created_at=now - timedelta(minutes=i)
+            ))
+            db.add(Order(
+                user_id=user.id, order_no=f"QC{i:06d}", total_amount=10.0,
+                created_at=now - timedelta(minutes=i)
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+def main():
+    """主函数"""
+    seed_data()
+    failures = []
+    clamp_failures = []
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/admin/login",
+            data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+            follow_redirects=False
+        )
+        client.cookies.set("admin_session", response.cookies["admin_session"])
+
+        for path, expected in EXPECTED_STATEMENTS.items():
+            for per_page in PER_PAGE_VALUES:
+                with QueryCounter(async_engine, async_read_engine) as counter:
+                    response = client.get(path, params={"per_page": per_page})
+                body = response.json()
+                ok = body.get("success") and counter.count == expected
+                print(f"{'OK ' if ok else 'FAIL'} {path:<22} per_page={per_page:<4} 语句数={counter.count}")
+                if not ok:
+                    failures.append((path, per_page, counter.count, counter.statements))
+
+        for path, params in PUBLIC_LISTS:
+            for per_page, expected in CLAMPED_PER_PAGE.items():
+                data = client.get(path, params={**params, "per_page": per_page, "page": 0}).json()["data"]
+                ok = len(data["items"]) == expected and data["per_page"] == expected and data["page"] == 1
+                print(f"{'OK ' if ok else 'FAIL'} {path} {params} per_page={per_page:<6} 返回 {len(data['items'])} 条")
+                if not ok:
+                    clamp_failures.append((path, params, per_page))
+
+    if failures:
+        for path, per_page, count, statements in failures:
+            print(f"\n{path} per_page={per_page} 期望 {EXPECTED_STATEMENTS[path]} 条，实际 {count} 条:")
+            for statement in statements:
+                print(f"  {statement}")
+    for path, params, per_page in clamp_failures:
+        print(f"\n{path} {params} per_page={per_page} 未限制每页条数")
+    if failures or clamp_failures:
+        sys.exit(1)
+    print("所有列表接口的SQL语句数与每页条数无关，每页条数不超过上限")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+响应缓存检查
+在临时数据库上分别用进程内LRU和Redis后端（FakeRedis模拟）请求公开接口，
+检查命中/未命中、按查询参数区分缓存键、管理端写操作后按标签失效、命中时浏览数和点赞数仍为实时值以及LRU容量上限，
+并对比命中与未命中的响应时间。
+
+用法:
+    python scripts/check_response_cache.py
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+# 必须在导入应用之前指定临时数据库
+tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'response_cache.db')}"
+os.environ["DEBUG"] = "False"
+os.environ["STATS_RECONCILE_INTERVAL"] = "0"
+os.chdir(backend_dir)
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.api.auth import create_access_token
+from app.core.cache import MemoryCache, RedisCache, FakeRedis, response_cache
+from app.core.config import settings
+from app.database import SessionLocal, create_tables
+from app.models.content import Tutorial
+from app.services.likes import like_counter
+from app.services.views import view_counter
+
+MAX_ENTRIES = 8
+
+failures = []
+
+def check(name: str, ok: bool):
+    print(f"{'OK ' if ok else 'FAIL'} {name}")
+    if not ok:
+        failures.append(name)
+
+def seed_data(count: int = 50):
+    """生成已发布教程"""
+    create_tables()
+    db = SessionLocal()
+    try:
+        db.add_all([
+            Tutorial(title=f"教程{i}", description="说明", video_url=f"/static/videos/{i}.mp4",
+                     category="basic", status="published")
+            for i in range(count)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+def median_ms(client: TestClient, path: str, bust: bool, rounds: int = 200) -> float:
+    """请求中位耗时，bust为真时每次使用不同查询参数使缓存不命中"""
+    timings = []
+    for i in range(rounds):
+        start = time.perf_counter()
+        client.get(path, params={"bust": i} if bust else None)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def run_checks(client: TestClient, backend_name: str):
+    """对当前后端执行检查"""
+    print(f"[{backend_name}]")
+    first = client.get("/api/tutorial/list")
+    second = client.get("/api/tutorial/list")
+    check("首次请求未命中", first.headers.get("X-Cache") == "MISS")
+    check("再次请求命中且内容一致", second.headers.get("X-Cache") == "HIT" and first.json() == second.json())
+    check("查询参数不同使用不同缓存键",
+          client.get("/api/tutorial/list", params={"per_page": 5}).headers.get("X-Cache") == "MISS")
+    check("查询参数顺序不影响缓存键",
+          client.get("/api/tutorial/list?per_page=5&page=1").headers.get("X-Cache") == "MISS"
+          and client.get("/api/tutorial/list?page=1&per_page=5").headers.get("X-Cache") == "HIT")
+
+    # 浏览、点赞（缓冲中和写回后）在命中缓存时仍是当前值
+    tutorial_id = first.json()["data"]["items"][0]["id"]
+    before = first.json()["data"]["items"][0]
+    client.get(f"/api/tutorial/{tutorial_id}")
+    client.put(f"/api/community/likes/tutorial/{tutorial_id}",
+               headers={"Authorization": f"Bearer {create_access_token(len(backend_name))}"})
+    pending = client.get("/api/tutorial/list")
+    client.portal.call(view_counter.flush)
+    client.portal.call(like_counter.flush)
+    flushed = client.get("/api/tutorial/list")
+    check("命中缓存时浏览数和点赞数为实时值",
+          pending.headers.get("X-Cache") == flushed.headers.get("X-Cache") == "HIT"
+          and all(response.json()["data"]["items"][0]["view_count"] == before["view_count"] + 1
+                  and response.json()["data"]["items"][0]["like_count"] == before["like_count"] + 1
+                  for response in (pending, flushed)))
+
+    client.get("/api/shop/categories")
+    response = client.post("/admin/api/tutorials", json={
+        "title": f"新教程-{backend_name}", "video_url": "/static/videos/new.mp4",
+        "category": "basic", "difficulty_level": 1
+    })
+    check("管理端创建教程成功", response.json().get("success") is True)
+    after = client.get("/api/tutorial/list", params={"per_page": 100})
+    titles = [item["title"] for item in after.json()["data"]["items"]]
+    check("创建教程后教程列表缓存失效",
+          after.headers.get("X-Cache") == "MISS" and f"新教程-{backend_name}" in titles)
+    check("其他标签的缓存不受影响", client.get("/api/shop/categories").headers.get("X-Cache") == "HIT")
+
+    client.get("/api/encyclopedia/history")
+    client.post("/admin/api/encyclopedia", json={"title": "百科", "content": "内容", "category": "history"})
+    check("创建百科后百科缓存失效", client.get("/api/encyclopedia/history").headers.get("X-Cache") == "MISS")
+
+def main():
+    """主函数"""
+    seed_data()
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/admin/login",
+            data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+            follow_redirects=False
+        )
+        client.cookies.set("admin_session", response.cookies["admin_session"])
+
+        memory = MemoryCache(MAX_ENTRIES)
+        response_cache.backend = memory
+        run_checks(client, "MemoryCache")
+        for page in range(1, MAX_ENTRIES * 2):
+            client.get("/api/tutorial/list", params={"page": page})
+        check(f"LRU容量不超过{MAX_ENTRIES}且有淘汰", memory.size() <= MAX_ENTRIES and memory.evictions > 0)
+
+        response_cache.backend = RedisCache(FakeRedis())
+        run_checks(client, "RedisCache")
+
+        response_cache.backend = MemoryCache(MAX_ENTRIES)
+        hit = median_ms(client, "/api/tutorial/list", bust=False)
+        miss = median_ms(client, "/api/tutorial/list", bust=True)
+        print(f"教程列表响应时间中位数：命中 {hit:.2f}ms，未命中 {miss:.2f}ms")
+        print(f"缓存指标: {client.get('/admin/api/metrics').json()['data']['response_cache']}")
+
+    if failures:
+        print(f"{len(failures)} 项检查失败")
+        sys.exit(1)
+    print("响应缓存检查通过")
+
+if __name__ == "__main__":
+    main()
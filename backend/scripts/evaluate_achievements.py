@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+成就批量评估脚本
+对全部用户评估全部成就（每个成就一条 INSERT ... SELECT，满足条件且尚未获得的用户一次发放并加积分），
+补上事件驱动评估遗漏的情况（如脚本导入的数据、新增或修改的成就）。建议由cron每晚执行。
+
+用法:
+    python scripts/evaluate_achievements.py --dry-run
+    python scripts/evaluate_achievements.py
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.database import AsyncSessionLocal, create_tables_async, dispose_engines
+from app.services.achievements import achievement_engine
+
+async def run(dry_run: bool):
+    await create_tables_async()
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        results = await achievement_engine.evaluate_all(db)
+        if dry_run:
+            await db.rollback()
+        else:
+            await db.commit()
+    # 提交后奖励积分产生的事件在后台继续评估（如积分成就），等待完成
+    await achievement_engine.stop()
+    elapsed = time.perf_counter() - start
+    await dispose_engines()
+
+    action = "将发放" if dry_run else "已发放"
+    for achievement_id, count in results.items():
+        print(f"  {achievement_engine.rules[achievement_id].name}：{action} {count} 人")
+    print(f"评估成就 {len(results)} 个，{action} {sum(results.values())} 个，耗时 {elapsed:.2f}s")
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="对全部用户批量评估成就")
+    parser.add_argument("--dry-run", action="store_true", help="只统计，不发放")
+    args = parser.parse_args()
+    asyncio.run(run(args.dry_run))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+上传文件清理脚本
+统计商品、帖子、百科的images字段，头像、教程视频，以及正文和描述中嵌入的图片URL引用的blob，删除没有被引用、
+且在宽限期内没有上传过的blob及其缩略图/WebP版本。可由cron定期执行。
+
+用法:
+    python scripts/gc_blobs.py --dry-run        # 只列出将删除的文件
+    python scripts/gc_blobs.py --grace-hours 24
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.database import AsyncSessionLocal, create_tables_async, dispose_engines
+from app.services.blobs import collect_garbage, stored_blobs
+
+async def run(grace_hours: float, dry_run: bool):
+    await create_tables_async()
+    total = len(stored_blobs())
+    async with AsyncSessionLocal() as db:
+        result = await collect_garbage(db, grace_seconds=int(grace_hours * 3600), dry_run=dry_run)
+    await dispose_engines()
+
+    action = "将删除" if dry_run else "已删除"
+    print(f"存储中共 {total} 个文件，被引用 {result['referenced']} 个")
+    for blob_id in result["removed"]:
+        print(f"  {action} {blob_id}")
+    print(f"{action}未引用的文件 {len(result['removed'])} 个（含变体共 {result['freed_bytes'] / 1024 / 1024:.1f}MB），"
+          f"未完成的临时文件 {result['temp_files']} 个")
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="清理未引用的上传文件")
+    parser.add_argument("--grace-hours", type=float, default=24, help="宽限期（小时），期间上传过的文件不删除")
+    parser.add_argument("--dry-run", action="store_true", help="只列出将删除的文件")
+    args = parser.parse_args()
+    asyncio.run(run(args.grace_hours, args.dry_run))
+
+if __name__ == "__main__":
+    main()
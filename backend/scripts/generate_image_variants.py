@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+图片变体补生成脚本
+为商品、帖子和百科images字段中引用的上传图片生成缺少的缩略图和WebP版本
+（启用图片变体之前上传的图片，或生成失败的图片）。
+
+用法:
+    python scripts/generate_image_variants.py
+    python scripts/generate_image_variants.py --force   # 全部重新生成
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal, create_tables_async, dispose_engines
+from app.models.community import Post
+from app.models.content import EncyclopediaContent
+from app.models.media import ImageVariant
+from app.models.shop import Product
+from app.services.blobs import resolve_images
+from app.services.images import image_pipeline, upload_path
+
+async def referenced_images(db) -> set:
+    """images字段中引用的、存在于上传目录中的图片URL"""
+    urls = set()
+    for model in (Product, Post, EncyclopediaContent):
+        for value in (await db.scalars(select(model.images).where(model.images.isnot(None)))).all():
+            urls.update(url for url in resolve_images(value) if upload_path(url) is not None)
+    return urls
+
+async def run(force: bool):
+    await create_tables_async()
+    async with AsyncSessionLocal() as db:
+        urls = await referenced_images(db)
+        done = set() if force else set((await db.scalars(select(ImageVariant.original_url).distinct())).all())
+    todo = sorted(urls - done)
+    print(f"引用的上传图片 {len(urls)} 张，需要生成 {len(todo)} 张")
+
+    if not image_pipeline.enabled:
+        print("未安装Pillow或IMAGE_WORKERS为0，不生成图片变体")
+        return
+    for url in todo:
+        image_pipeline.schedule(url)
+    await image_pipeline.stop()
+    metrics = image_pipeline.metrics()
+    print(f"完成：成功 {metrics['generated']} 张，失败 {metrics['failed']} 张，生成 {metrics['variants']} 个变体")
+    await dispose_engines()
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="图片变体补生成")
+    parser.add_argument("--force", action="store_true", help="重新生成所有图片的变体")
+    args = parser.parse_args()
+    asyncio.run(run(args.force))
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@
 创建所有数据表并插入初始数据
 """
 
+import json
 import sys
 import os
 from pathlib import Path
@@ -227,6 +228,26 @@ def create_sample_data():
                 points_reward=20,
                 is_active=True,
                 created_at=datetime.utcnow() - timedelta(days=18)
+            ),
+            Challenge(
+                title="学习达人",
+                description="本周完成3个视频教程",
+                type="weekly",
+                category="learning",
+                points_reward=50,
+                requirements=json.dumps({"event": "tutorial_completed", "count": 3}),
+                is_active=True,
+                created_at=datetime.utcnow() - timedelta(days=18)
+            ),
+            Challenge(
+                title="社交新星",
+                description="本周发布5个帖子",
+                type="weekly",
+                category="social",
+                points_reward=30,
+                requirements=json.dumps({"event": "post_created", "count": 5}),
+                is_active=True,
+                created_at=datetime.utcnow() - timedelta(days=18)
             )
         ]
         
@@ -237,6 +258,7 @@ def create_sample_data():
                 icon="achievement_first.png",
                 category="学习成就",
                 points_reward=10,
+                requirements=json.dumps({"metric": "challenges_completed", "gte": 1}),
                 is_active=True,
                 created_at=datetime.utcnow() - timedelta(days=20)
             ),
@@ -246,6 +268,7 @@ def create_sample_data():
                 icon="achievement_master.png",
                 category="积分成就",
                 points_reward=100,
+                requirements=json.dumps({"metric": "points", "gte": 100}),
                 is_active=True,
                 created_at=datetime.utcnow() - timedelta(days=18)
             )
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+并发压测脚本
+在管理端慢查询与公共API混合负载下统计各接口延迟分位数（p50/p95/p99），
+用于对比同步会话与异步会话下事件循环是否被阻塞。
+
+用法:
+    python scripts/load_test.py --base-url http://127.0.0.1:8000 --concurrency 50 --requests 2000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import httpx
+
+from app.core.config import settings
+
+# 公共接口（轻量）
+PUBLIC_PATHS = [
+    "/health",
+    "/api/shop/products",
+    "/api/encyclopedia/history",
+]
+
+# 管理端接口（含数据库查询）
+ADMIN_PATHS = [
+    "/admin/api/stats",
+    "/admin/api/posts",
+    "/admin/api/orders",
+]
+
+def percentile(values, pct):
+    """计算分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def admin_login(client: httpx.AsyncClient):
+    """管理员登录，返回会话cookie"""
+    response = await client.post(
+        "/admin/login",
+        data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+        follow_redirects=False
+    )
+    session_id = response.cookies.get("admin_session")
+    if not session_id:
+        raise RuntimeError("管理员登录失败，请检查ADMIN_USERNAME/ADMIN_PASSWORD")
+    client.cookies.set("admin_session", session_id)
+
+async def worker(client, queue, latencies, errors):
+    """从队列中取出请求路径并记录延迟"""
+    while True:
+        try:
+            path = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                errors[path] += 1
+        except httpx.HTTPError:
+            errors[path] += 1
+        latencies[path].append((time.perf_counter() - start) * 1000)
+
+async def run(base_url: str, concurrency: int, total_requests: int, admin_ratio: float):
+    """执行压测"""
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await admin_login(client)
+
+        queue = asyncio.Queue()
+        for _ in range(total_requests):
+            paths = ADMIN_PATHS if random.random() < admin_ratio else PUBLIC_PATHS
+            queue.put_nowait(random.choice(paths))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            worker(client, queue, latencies, errors) for _ in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+
+    print(f"{'接口':<32}{'请求数':>8}{'错误':>6}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}")
+    all_latencies = []
+    for path in sorted(latencies):
+        values = latencies[path]
+        all_latencies.extend(values)
+        print(
+            f"{path:<32}{len(values):>8}{errors[path]:>6}"
+            f"{statistics.median(values):>10.1f}"
+            f"{percentile(values, 95):>10.1f}"
+            f"{percentile(values, 99):>10.1f}"
+        )
+    print("-" * 76)
+    print(
+        f"{'合计':<32}{len(all_latencies):>8}{sum(errors.values()):>6}"
+        f"{statistics.median(all_latencies):>10.1f}"
+        f"{percentile(all_latencies, 95):>10.1f}"
+        f"{percentile(all_latencies, 99):>10.1f}"
+    )
+    print(f"总耗时: {elapsed:.2f}s, 吞吐量: {len(all_latencies) / elapsed:.1f} req/s")
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="绒花非遗传承平台 - 并发压测")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="服务地址")
+    parser.add_argument("--concurrency", type=int, default=50, help="并发数")
+    parser.add_argument("--requests", type=int, default=2000, help="请求总数")
+    parser.add_argument("--admin-ratio", type=float, default=0.2, help="管理端慢请求占比")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.base_url, args.concurrency, args.requests, args.admin_ratio))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+签到记录迁移脚本
+把旧的签到记录（checkin_records，每次签到一行）合并到签到日历（checkin_calendars，每人每年一行，
+每天一位），已有的日历按位或合并，可重复运行；并按日历重新计算游戏档案的连续签到天数和最后签到时间。
+
+用法:
+    python scripts/migrate_checkins_to_calendar.py --dry-run
+    python scripts/migrate_checkins_to_calendar.py --delete-records
+"""
+
+import argparse
+import asyncio
+import sys
+from collections import defaultdict
+from datetime import date
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import delete, func, select
+
+from app.database import AsyncSessionLocal, create_tables_async, dispose_engines
+from app.models.game import CheckinCalendar, CheckinRecord
+from app.services.checkin import day_index, run_ending, to_bits, to_bytes
+from app.services.points import get_game_profile
+
+def streak_at(calendars: dict, day: date) -> int:
+    """截至day（含）的连续签到天数（calendars为 年 -> 日历位）"""
+    streak = 0
+    while True:
+        run = run_ending(calendars.get(day.year, 0), day_index(day))
+        streak += run
+        if run <= day_index(day):
+            return streak
+        day = date(day.year - 1, 12, 31)
+
+async def run(dry_run: bool, delete_records: bool):
+    await create_tables_async()
+    async with AsyncSessionLocal() as db:
+        calendars = defaultdict(dict)
+        last_checkin = {}
+        records = 0
+        result = await db.stream(select(CheckinRecord.user_id, CheckinRecord.checkin_date))
+        async for user_id, checkin_date in result:
+            day = checkin_date.date()
+            user_calendars = calendars[user_id]
+            user_calendars[day.year] = user_calendars.get(day.year, 0) | 1 << day_index(day)
+            if user_id not in last_checkin or checkin_date > last_checkin[user_id]:
+                last_checkin[user_id] = checkin_date
+            records += 1
+        rows = sum(len(years) for years in calendars.values())
+        print(f"旧签到记录 {records} 条，{len(calendars)} 名用户，合并为 {rows} 行日历")
+        if not records:
+            await dispose_engines()
+            return
+
+        existing = defaultdict(dict)
+        for calendar in (await db.scalars(select(CheckinCalendar))).all():
+            existing[calendar.user_id][calendar.year] = calendar
+        for user_id, years in calendars.items():
+            for year, calendar in existing[user_id].items():
+                if year in years:
+                    years[year] |= to_bits(calendar.days)
+                    calendar.days = to_bytes(years[year])
+                else:
+                    years[year] = to_bits(calendar.days)
+            for year, bits in years.items():
+                if year not in existing[user_id]:
+                    db.add(CheckinCalendar(user_id=user_id, year=year, days=to_bytes(bits)))
+
+            profile = await get_game_profile(db, user_id)
+            last = max(filter(None, (last_checkin[user_id], profile.last_checkin)))
+            profile.last_checkin = last
+            profile.consecutive_days = streak_at(years, last.date())
+
+        if delete_records:
+            deleted = await db.scalar(select(func.count()).select_from(CheckinRecord))
+            await db.execute(delete(CheckinRecord))
+            print(f"删除旧签到记录 {deleted} 条")
+        if dry_run:
+            await db.rollback()
+            print("dry-run：未修改数据库")
+        else:
+            await db.commit()
+            print("迁移完成")
+    await dispose_engines()
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="签到记录迁移到签到日历")
+    parser.add_argument("--dry-run", action="store_true", help="只统计，不修改数据库")
+    parser.add_argument("--delete-records", action="store_true", help="迁移后删除旧的签到记录")
+    args = parser.parse_args()
+    asyncio.run(run(args.dry_run, args.delete_records))
+
+if __name__ == "__main__":
+    main()
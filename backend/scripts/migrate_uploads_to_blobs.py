@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+上传文件迁移脚本
+把启用内容寻址存储之前上传到 avatars/content/products 目录中的文件移入blob存储
+（相同内容只保留一份），并把数据库中引用旧URL的地方改为blob：images字段改为blob id，
+头像、教程视频，以及帖子、评论、百科、商品和教程的正文或描述中的图片改为blob的URL。旧文件的缩略图记录和文件一并删除，
+迁移后运行 scripts/generate_image_variants.py 重新生成。
+
+用法:
+    python scripts/migrate_uploads_to_blobs.py --dry-run
+    python scripts/migrate_uploads_to_blobs.py
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import delete, select
+
+from app.core.config import settings
+from app.database import AsyncSessionLocal, create_tables_async, dispose_engines
+from app.models.community import Post
+from app.models.content import EncyclopediaContent
+from app.models.media import ImageVariant
+from app.models.shop import Product
+from app.services.blobs import UPLOAD_URL, URL_COLUMNS, blob_path, blob_url
+from app.services.uploads import SNIFF_BYTES, UPLOAD_KINDS, sniff_extension
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def migrate_files(variant_urls: set, dry_run: bool) -> tuple:
+    """移动文件，返回(旧URL -> blob id, 迁移前字节数, 迁移后新增字节数)"""
+    mapping = {}
+    before = after = 0
+    stored = set()
+    for kind in UPLOAD_KINDS:
+        for path in sorted((Path(settings.UPLOAD_DIR) / kind).glob("*")):
+            url = f"{UPLOAD_URL}/{kind}/{path.name}"
+            if not path.is_file() or path.name.startswith(".") or url in variant_urls:
+                continue
+            with open(path, "rb") as f:
+                extension = sniff_extension(f.read(SNIFF_BYTES))
+            if extension is None:
+                print(f"  跳过无法识别类型的文件 {url}")
+                continue
+            blob_id = file_digest(path) + extension
+            mapping[url] = blob_id
+            size = path.stat().st_size
+            before += size
+            target = blob_path(blob_id)
+            if target.is_file() or blob_id in stored:
+                if not dry_run:
+                    path.unlink()
+                continue
+            stored.add(blob_id)
+            after += size
+            if not dry_run:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(path, target)
+    return mapping, before, after
+
+async def rewrite_references(db, mapping: dict) -> int:
+    """把数据库中的旧URL改为blob，返回修改的记录数"""
+    changed = 0
+    for model in (Product, Post, EncyclopediaContent):
+        for record in (await db.scalars(select(model).where(model.images.like(f"%{UPLOAD_URL}/%")))).all():
+            images = json.loads(record.images)
+            updated = [mapping.get(image, image) for image in images]
+            if updated != images:
+                record.images = json.dumps(updated)
+                changed += 1
+    for column in URL_COLUMNS:
+        model, name = column.class_, column.key
+        for record in (await db.scalars(select(model).where(column.like(f"%{UPLOAD_URL}/%")))).all():
+            value = getattr(record, name)
+            for url, blob_id in mapping.items():
+                value = value.replace(url, blob_url(blob_id))
+            if value != getattr(record, name):
+                setattr(record, name, value)
+                changed += 1
+    return changed
+
+async def run(dry_run: bool):
+    await create_tables_async()
+    async with AsyncSessionLocal() as db:
+        variants = (await db.execute(select(ImageVariant.original_url, ImageVariant.url))).all()
+        variant_urls = {url for original_url, url in variants if url != original_url}
+        mapping, before, after = migrate_files(variant_urls, dry_run)
+        print(f"旧文件 {len(mapping)} 个（{before / 1024 / 1024:.1f}MB），"
+              f"去重后 {len(set(mapping.values()))} 个（新增 {after / 1024 / 1024:.1f}MB）")
+        if not mapping:
+            await dispose_engines()
+            return
+
+        changed = await rewrite_references(db, mapping)
+        # 旧文件的缩略图（blob需要重新生成）
+        stale = [url for original_url, url in variants if original_url in mapping and url != original_url]
+        print(f"修改引用的记录 {changed} 条，删除旧缩略图 {len(stale)} 个")
+        if dry_run:
+            await db.rollback()
+        else:
+            for url in stale:
+                (Path(settings.UPLOAD_DIR) / url[len(UPLOAD_URL) + 1:]).unlink(missing_ok=True)
+            await db.execute(delete(ImageVariant).where(ImageVariant.original_url.in_(mapping)))
+            await db.commit()
+            print("迁移完成，请运行 python scripts/generate_image_variants.py 生成缩略图")
+    await dispose_engines()
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="上传文件迁移到内容寻址存储")
+    parser.add_argument("--dry-run", action="store_true", help="只统计，不移动文件和修改数据库")
+    args = parser.parse_args()
+    asyncio.run(run(args.dry_run))
+
+if __name__ == "__main__":
+    main()
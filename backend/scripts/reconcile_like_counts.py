@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+点赞数校准脚本
+删除重复的点赞记录（同一用户对同一对象只保留最早的一条，之后才能建立唯一索引），
+再按likes表重新计算帖子、评论、教程的like_count。
+服务启动补建唯一索引时也会删除重复点赞（见日志），之后需运行本脚本校准like_count。
+运行中的服务内存里还有未写入的点赞数增量，建议在停止服务后运行。
+
+用法:
+    python scripts/reconcile_like_counts.py --dry-run
+    python scripts/reconcile_like_counts.py
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import delete, func, select
+
+from app.database import AsyncSessionLocal, create_tables_async, dispose_engines
+from app.models import user, content, community, shop, game, stats
+from app.models.community import Like
+from app.services.likes import reconcile_like_counts
+
+async def delete_duplicates(db) -> int:
+    keep = select(func.min(Like.id)).group_by(Like.user_id, Like.target_type, Like.target_id)
+    result = await db.execute(delete(Like).where(Like.id.not_in(keep)))
+    return result.rowcount
+
+async def run(dry_run: bool):
+    async with AsyncSessionLocal() as db:
+        duplicates = await delete_duplicates(db)
+        if dry_run:
+            await db.rollback()
+        else:
+            await db.commit()
+    print(f"{'将删除' if dry_run else '已删除'}重复点赞 {duplicates} 条")
+    if dry_run:
+        await dispose_engines()
+        return
+
+    # 去重后再补建唯一索引
+    await create_tables_async()
+    async with AsyncSessionLocal() as db:
+        results = await reconcile_like_counts(db)
+        await db.commit()
+    await dispose_engines()
+    for target_type, count in results.items():
+        print(f"  {target_type}：校准 {count} 行")
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="删除重复点赞并校准点赞数")
+    parser.add_argument("--dry-run", action="store_true", help="只统计重复点赞，不修改")
+    args = parser.parse_args()
+    asyncio.run(run(args.dry_run))
+
+if __name__ == "__main__":
+    main()